@@ -26,9 +26,13 @@
 # include <Python.h>
 #endif
 
+#include <cstdint>
+#include <fstream>
+
 #include <CXX/Extensions.hxx>
 #include <CXX/Objects.hxx>
 
+#include <Base/BoundBoxPy.h>
 #include <Base/Console.h>
 #include <Base/VectorPy.h>
 #include <Base/FileInfo.h>
@@ -99,6 +103,15 @@ extern PartExport Py::Object shape2pyshape(const TopoDS_Shape &shape);
 }
 
 namespace Path {
+
+static Py::Dict sortStatistics(const SortStatistics &stats) {
+    Py::Dict dict;
+    dict.setItem("rapid_before",Py::Float(stats.rapid_before));
+    dict.setItem("rapid_after",Py::Float(stats.rapid_after));
+    dict.setItem("moves",Py::Int(stats.moves));
+    return dict;
+}
+
 class Module : public Py::ExtensionModule<Module>
 {
     
@@ -112,6 +125,26 @@ public:
         add_varargs_method("read",&Module::read,
             "read(filename,[document]): Imports a GCode file into the given document"
         );
+        add_keyword_method("readGCode",&Module::readGCode,
+            "readGCode(filename, comments=True, preview=0.0, return_lines=False)\n"
+            "\nReturns a Path object of the GCode file, which is parsed while it is read in chunks.\n"
+            "Words without a G or M command repeat the modal motion command, line numbers are dropped.\n"
+            "Lines which can't be parsed, e.g. with expressions, are skipped with a warning.\n"
+            "\n* comments (True): if False comments are dropped, otherwise they become comment commands.\n"
+            "\n* preview (0.0): if not 0 straight moves closer than preview to the last position are\n"
+            "  dropped, for a quick display of large files.\n"
+            "\n* return_lines (False): if True, returns tuple (path, lines), where 'lines' is a buffer of int32\n"
+            "  with the line in the file of each command.\n"
+        );
+        add_varargs_method("getSummary",&Module::getSummary,
+            "getSummary(object): Returns (count, length, boundbox) of the Path of the given object.\n"
+            "\nA path restored with a document is only parsed when it is used the first time,\n"
+            "this uses the summary saved with the document and doesn't parse it.\n"
+        );
+        add_varargs_method("isLoaded",&Module::isLoaded,
+            "isLoaded(object): Returns True if the Path of the given object is parsed, False if it\n"
+            "still holds the data restored with the document.\n"
+        );
         add_varargs_method("show",&Module::show,
             "show(path,[string]): Add the path to the active document or create one if no document exists"
         );
@@ -119,22 +152,26 @@ public:
             "fromShape(Shape): Returns a Path object from a Part Shape (deprecated - use fromShapes() instead)"
         );
         add_keyword_method("fromShapes",&Module::fromShapes,
-            "fromShapes(shapes, start=Vector(), return_end=False" PARAM_PY_ARGS_DOC(ARG,AREA_PARAMS_PATH) ")\n"
+            "fromShapes(shapes, start=Vector(), return_end=False" PARAM_PY_ARGS_DOC(ARG,AREA_PARAMS_PATH) ", statistics=False)\n"
             "\nReturns a Path object from a list of shapes\n"
             "\n* shapes: input list of shapes.\n"
             "\n* start (Vector()): feed start position, and also serves as a hint of path entry.\n"
             "\n* return_end (False): if True, returns tuple (path, endPosition).\n"
+            "\n* statistics (False): if True, appends a dictionary to the returned tuple, with the straight\n"
+            "rapid distance between the wires in the input order as 'rapid_before', in the sorted order as\n"
+            "'rapid_after', and the number of moves of the improvement pass as 'moves'.\n"
             PARAM_PY_DOC(ARG, AREA_PARAMS_PATH)
         );
         add_keyword_method("sortWires",&Module::sortWires,
             "sortWires(shapes, start=Vector(), "  
             PARAM_PY_ARGS_DOC(ARG,AREA_PARAMS_ARC_PLANE)
-            PARAM_PY_ARGS_DOC(ARG,AREA_PARAMS_SORT) ")\n"
+            PARAM_PY_ARGS_DOC(ARG,AREA_PARAMS_SORT) ", statistics=False)\n"
             "\nReturns (wires,end), where 'wires' is sorted across Z value and with optimized travel distance,\n"
             "and 'end' is the ending position of the whole wires. If arc_plane==1, it returns (wires,end,arc_plane),\n"
             "where arc_plane is the found plane if any, or unchanged.\n"
             "\n* shapes: input shape list\n"
             "\n* start (Vector()): optional start position.\n"
+            "\n* statistics (False): if True, appends a dictionary to the returned tuple, see fromShapes().\n"
             PARAM_PY_DOC(ARG, AREA_PARAMS_ARC_PLANE)
             PARAM_PY_DOC(ARG, AREA_PARAMS_SORT)
         );
@@ -196,12 +233,11 @@ private:
 
         try {
             // read the gcode file
-            std::ifstream filestr(file.filePath().c_str());
-            std::stringstream buffer;
-            buffer << filestr.rdbuf();
-            std::string gcode = buffer.str();
+            std::ifstream filestr(file.filePath().c_str(), std::ios::in | std::ios::binary);
             Toolpath path;
-            path.setFromGCode(gcode);
+            std::size_t skipped = path.readGCode(filestr);
+            if (skipped)
+                Base::Console().Warning("%s: %lu lines skipped\n", file.fileName().c_str(), (unsigned long)skipped);
             Path::Feature *object = static_cast<Path::Feature *>(pcDoc->addObject("Path::Feature",file.fileNamePure().c_str()));
             object->Path.setValue(path);
             pcDoc->recompute();
@@ -214,6 +250,82 @@ private:
     }
 
 
+    Py::Object readGCode(const Py::Tuple& args, const Py::Dict &kwds)
+    {
+        char* Name;
+        PyObject *comments=Py_True;
+        double preview=0.0;
+        PyObject *return_lines=Py_False;
+        static char* kwd_list[] = {"filename", "comments", "preview", "return_lines", NULL};
+        if (!PyArg_ParseTupleAndKeywords(args.ptr(), kwds.ptr(), "et|OdO", kwd_list,
+                    "utf-8", &Name, &comments, &preview, &return_lines))
+            throw Py::Exception();
+        std::string EncodedName = std::string(Name);
+        PyMem_Free(Name);
+
+        Base::FileInfo file(EncodedName.c_str());
+        if (!file.exists())
+            throw Py::RuntimeError("File doesn't exist");
+
+        try {
+            std::ifstream filestr(file.filePath().c_str(), std::ios::in | std::ios::binary);
+            std::unique_ptr<Toolpath> path(new Toolpath);
+            std::vector<int> lines;
+            bool withLines = PyObject_IsTrue(return_lines) ? true : false;
+            std::size_t skipped = path->readGCode(filestr, PyObject_IsTrue(comments) ? true : false,
+                    preview, withLines ? &lines : 0);
+            if (skipped)
+                Base::Console().Warning("%s: %lu lines skipped\n", file.fileName().c_str(), (unsigned long)skipped);
+            if (!withLines)
+                return Py::asObject(new PathPy(path.release()));
+            std::vector<int32_t> codes(lines.begin(), lines.end());
+            Py::Tuple tuple(2);
+            tuple.setItem(0, Py::asObject(new PathPy(path.release())));
+            tuple.setItem(1, Py::asObject(PyBytes_FromStringAndSize(
+                            codes.empty() ? "" : reinterpret_cast<const char*>(&codes[0]), codes.size() * sizeof(int32_t))));
+            return tuple;
+        }
+        catch (const Base::Exception& e) {
+            throw Py::RuntimeError(e.what());
+        }
+    }
+
+    Py::Object isLoaded(const Py::Tuple& args)
+    {
+        PyObject *pObj;
+        if (!PyArg_ParseTuple(args.ptr(), "O!", &(App::DocumentObjectPy::Type), &pObj))
+            throw Py::Exception();
+
+        App::DocumentObject* obj = static_cast<App::DocumentObjectPy*>(pObj)->getDocumentObjectPtr();
+        if (!obj->getTypeId().isDerivedFrom(Path::Feature::getClassTypeId()))
+            throw Py::TypeError("the given object is not a path");
+
+        return Py::Boolean(static_cast<Path::Feature*>(obj)->Path.isLoaded());
+    }
+
+    Py::Object getSummary(const Py::Tuple& args)
+    {
+        PyObject *pObj;
+        if (!PyArg_ParseTuple(args.ptr(), "O!", &(App::DocumentObjectPy::Type), &pObj))
+            throw Py::Exception();
+
+        App::DocumentObject* obj = static_cast<App::DocumentObjectPy*>(pObj)->getDocumentObjectPtr();
+        if (!obj->getTypeId().isDerivedFrom(Path::Feature::getClassTypeId()))
+            throw Py::TypeError("the given object is not a path");
+
+        try {
+            const PropertyPath &path = static_cast<Path::Feature*>(obj)->Path;
+            Py::Tuple ret(3);
+            ret.setItem(0, Py::Long((long)path.getSize()));
+            ret.setItem(1, Py::Float(path.getLength()));
+            ret.setItem(2, Py::asObject(new Base::BoundBoxPy(new Base::BoundBox3d(path.getBoundBox()))));
+            return ret;
+        }
+        catch (const Base::Exception& e) {
+            throw Py::RuntimeError(e.what());
+        }
+    }
+
     Py::Object show(const Py::Tuple& args)
     {
         PyObject *pcObj;
@@ -328,12 +440,13 @@ private:
         PyObject *pShapes=NULL;
         PyObject *start=NULL;
         PyObject *return_end=Py_False;
+        PyObject *statistics=Py_False;
         static char* kwd_list[] = {"shapes", "start", "return_end",
-                PARAM_FIELD_STRINGS(ARG,AREA_PARAMS_PATH), NULL};
+                PARAM_FIELD_STRINGS(ARG,AREA_PARAMS_PATH), "statistics", NULL};
         if (!PyArg_ParseTupleAndKeywords(args.ptr(), kwds.ptr(), 
-                "O|O!O" PARAM_PY_KWDS(AREA_PARAMS_PATH), 
+                "O|O!O" PARAM_PY_KWDS(AREA_PARAMS_PATH) "O", 
                 kwd_list, &pShapes, &(Base::VectorPy::Type), &start, &return_end,
-                PARAM_REF(PARAM_FARG,AREA_PARAMS_PATH)))
+                PARAM_REF(PARAM_FARG,AREA_PARAMS_PATH), &statistics))
             throw Py::Exception();
 
         std::list<TopoDS_Shape> shapes;
@@ -361,14 +474,20 @@ private:
 
         try {
             gp_Pnt pend;
+            SortStatistics stats;
+            bool need_stats = PyObject_IsTrue(statistics);
             std::unique_ptr<Toolpath> path(new Toolpath);
-            Area::toPath(*path,shapes,start?&pstart:0, &pend,
+            Area::toPath(*path,shapes,start?&pstart:0, &pend, need_stats?&stats:0,
                     PARAM_PY_FIELDS(PARAM_FARG,AREA_PARAMS_PATH));
-            if(!PyObject_IsTrue(return_end))
+            bool need_end = PyObject_IsTrue(return_end);
+            if(!need_end && !need_stats)
                 return Py::asObject(new PathPy(path.release()));
-            Py::Tuple tuple(2);
+            Py::Tuple tuple(1+need_end+need_stats);
             tuple.setItem(0, Py::asObject(new PathPy(path.release())));
-            tuple.setItem(1, Py::asObject(new Base::VectorPy(Base::Vector3d(pend.X(),pend.Y(),pend.Z()))));
+            if(need_end)
+                tuple.setItem(1, Py::asObject(new Base::VectorPy(Base::Vector3d(pend.X(),pend.Y(),pend.Z()))));
+            if(need_stats)
+                tuple.setItem(tuple.size()-1, sortStatistics(stats));
             return tuple;
         } PATH_CATCH
     }
@@ -379,16 +498,17 @@ private:
         PARAM_PY_DECLARE_INIT(PARAM_FARG,AREA_PARAMS_SORT)
         PyObject *pShapes=NULL;
         PyObject *start=NULL;
+        PyObject *statistics=Py_False;
         static char* kwd_list[] = {"shapes", "start", 
                 PARAM_FIELD_STRINGS(ARG,AREA_PARAMS_ARC_PLANE), 
-                PARAM_FIELD_STRINGS(ARG,AREA_PARAMS_SORT), NULL};
+                PARAM_FIELD_STRINGS(ARG,AREA_PARAMS_SORT), "statistics", NULL};
         if (!PyArg_ParseTupleAndKeywords(args.ptr(), kwds.ptr(), 
                 "O|O!" 
                 PARAM_PY_KWDS(AREA_PARAMS_ARC_PLANE) 
-                PARAM_PY_KWDS(AREA_PARAMS_SORT),
+                PARAM_PY_KWDS(AREA_PARAMS_SORT) "O",
                 kwd_list, &pShapes, &(Base::VectorPy::Type), &start, 
                 PARAM_REF(PARAM_FARG,AREA_PARAMS_ARC_PLANE),
-                PARAM_REF(PARAM_FARG,AREA_PARAMS_SORT)))
+                PARAM_REF(PARAM_FARG,AREA_PARAMS_SORT), &statistics))
             throw Py::Exception();
 
         std::list<TopoDS_Shape> shapes;
@@ -415,13 +535,16 @@ private:
         
         try {
             bool need_arc_plane = arc_plane==Area::ArcPlaneAuto;
+            bool need_stats = PyObject_IsTrue(statistics);
+            SortStatistics stats;
             std::list<TopoDS_Shape> wires = Area::sortWires(shapes,start!=0,&pstart,
-                    &pend, 0, &arc_plane, PARAM_PY_FIELDS(PARAM_FARG,AREA_PARAMS_SORT));
+                    &pend, 0, &arc_plane, need_stats?&stats:0,
+                    PARAM_PY_FIELDS(PARAM_FARG,AREA_PARAMS_SORT));
             PyObject *list = PyList_New(0);
             for(auto &wire : wires)
                 PyList_Append(list,Py::new_reference_to(
                             Part::shape2pyshape(TopoDS::Wire(wire))));
-            PyObject *ret = PyTuple_New(need_arc_plane?3:2);
+            PyObject *ret = PyTuple_New(2+need_arc_plane+need_stats);
             PyTuple_SetItem(ret,0,list);
             PyTuple_SetItem(ret,1,new Base::VectorPy(
                         Base::Vector3d(pend.X(),pend.Y(),pend.Z())));
@@ -431,6 +554,8 @@ private:
 #else
                 PyTuple_SetItem(ret,2,PyLong_FromLong(arc_plane));
 #endif
+            if(need_stats)
+                PyTuple_SetItem(ret,2+need_arc_plane,Py::new_reference_to(sortStatistics(stats)));
             return Py::asObject(ret);
         } PATH_CATCH
     }
@@ -25,6 +25,15 @@
 # include <cfloat>
 #endif
 
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <functional>
+#include <memory>
+#include <thread>
+#include <QThread>
+#include <QtConcurrentMap>
+
 #include <boost/version.hpp>
 #include <boost/config.hpp>
 #if defined(BOOST_MSVC) && (BOOST_VERSION == 105500)
@@ -38,6 +47,7 @@
 #include <boost/geometry/geometries/register/point.hpp>
 #include <boost/range/adaptor/indexed.hpp>
 #include <boost/range/adaptor/transformed.hpp>
+#include <boost/bind.hpp>
 
 #include <BRepLib.hxx>
 #include <BRep_Builder.hxx>
@@ -62,6 +72,7 @@
 #include <Geom_Ellipse.hxx>
 #include <Geom_Line.hxx>
 #include <Geom_Plane.hxx>
+#include <Standard.hxx>
 #include <Standard_Failure.hxx>
 #include <gp_Circ.hxx>
 #include <gp_GTrsf.hxx>
@@ -94,6 +105,7 @@
 #include <Mod/Part/App/CrossSection.h>
 #include "Area.h"
 #include "../libarea/Area.h"
+#include "../libarea/AreaAdaptive.h"
 
 namespace bg = boost::geometry;
 namespace bgi = boost::geometry::index;
@@ -154,7 +166,7 @@ CAreaConfig::~CAreaConfig() {
 
 TYPESYSTEM_SOURCE(Path::Area, Base::BaseClass);
 
-bool Area::s_aborting;
+std::atomic<bool> Area::s_aborting(false);
 
 Area::Area(const AreaParams *params)
 :myParams(s_params)
@@ -1285,6 +1297,47 @@ int Area::project(TopoDS_Shape &shape_out,
     return skips;
 }
 
+// Section of one height, see Area::makeSections()
+struct SectionResult {
+    shared_ptr<Area> area;
+    double z;
+    // messages are logged after all heights are done
+    std::vector<std::pair<int,std::string> > messages;
+
+    SectionResult():z(0) {}
+};
+
+#define AREA_SECTION_MSG(_level,_msg) do{\
+    std::ostringstream str;\
+    str << _msg;\
+    result.messages.push_back(std::make_pair(FC_LOGLEVEL_##_level,str.str()));\
+}while(0)
+
+// Runs the tasks handed out one after the other until all are done, an error
+// occured or the operation is aborted. One runs in each thread, see
+// makeSections() and makeAdaptive().
+struct AreaWorker {
+    std::function<void(size_t)> task;
+    std::vector<std::exception_ptr> errors;
+    std::atomic<size_t> next;
+    std::atomic<bool> failed;
+
+    AreaWorker(const std::function<void(size_t)> &func, size_t count)
+        :task(func),errors(count),next(0),failed(false)
+    {}
+
+    void run(int &) {
+        for(size_t i=next++; i<errors.size() && !failed && !Area::aborting(); i=next++) {
+            try {
+                task(i);
+            }catch(...) {
+                errors[i] = std::current_exception();
+                failed = true;
+            }
+        }
+    }
+};
+
 std::vector<shared_ptr<Area> > Area::makeSections(
         PARAM_ARGS(PARAM_FARG,AREA_PARAMS_SECTION_EXTRA),
         const std::vector<double> &_heights,
@@ -1429,7 +1482,15 @@ std::vector<shared_ptr<Area> > Area::makeSections(
     bool can_retry = fabs(tolerance)>Precision::Confusion();
     TopLoc_Location locInverse(loc.Inverted());
 
-    for(size_t i=0;i<heights.size();++i) {
+    // The heights are independent of each other, so they may be sliced in any
+    // order by any thread. Each keeps its section and messages in its own result,
+    // which are collected in the order of the heights afterwards. Only OCC is
+    // used to slice, the section areas must not be built here as CArea and
+    // Clipper keep their settings and buffers in globals.
+    std::vector<SectionResult> results(heights.size());
+
+    auto makeSection = [&](size_t i) {
+        SectionResult &result = results[i];
         double z = heights[i];
         bool retried = !can_retry;
         while(true) {
@@ -1450,7 +1511,7 @@ std::vector<shared_ptr<Area> > Area::makeSections(
                     TopLoc_Location wloc(t);
                     area->add(s.shape.Moved(wloc).Moved(locInverse),s.op);
                 }
-                sections.push_back(area);
+                result.area = area;
                 break;
             }
 
@@ -1467,7 +1528,7 @@ std::vector<shared_ptr<Area> > Area::makeSections(
                     wires = section.slice(-d);
                     showShapes(wires,0,"section_%u_wire",i);
                     if(wires.empty()) {
-                        AREA_LOG("Section returns no wires");
+                        AREA_SECTION_MSG(LOG,"Section returns no wires");
                         continue;
                     }
 
@@ -1482,7 +1543,7 @@ std::vector<shared_ptr<Area> > Area::makeSections(
                         mkFace.Build();
                         const TopoDS_Shape &shape = mkFace.Shape();
                         if (shape.IsNull())
-                            AREA_WARN("FaceMakerBullseye return null shape on section");
+                            AREA_SECTION_MSG(WARN,"FaceMakerBullseye return null shape on section");
                         else {
                             showShape(shape,0,"section_%u_face",i);
                             for(auto it=wires.begin(),itNext=it;it!=wires.end();it=itNext) {
@@ -1497,7 +1558,7 @@ std::vector<shared_ptr<Area> > Area::makeSections(
                             }
                         }
                     }catch (Base::Exception &e){
-                        AREA_WARN("FaceMakerBullseye failed on section: " << e.what());
+                        AREA_SECTION_MSG(WARN,"FaceMakerBullseye failed on section: " << e.what());
                     }
                     for(const TopoDS_Wire &wire : wires)
                         builder.Add(comp,wire);
@@ -1519,20 +1580,72 @@ std::vector<shared_ptr<Area> > Area::makeSections(
                 }
             }
             if(area->myShapes.size()){
-                sections.push_back(area);
-                FC_TIME_LOG(t1,"makeSection " << z);
-                showShape(area->getShape(),0,"section_%u_final",i);
+                result.area = area;
+                result.z = z;
                 break;
             }
             if(retried) {
-                AREA_WARN("Discard empty section");
+                AREA_SECTION_MSG(WARN,"Discard empty section");
                 break;
             }else{
-                AREA_TRACE("retry section " <<z<<"->"<<z+tolerance);
+                AREA_SECTION_MSG(TRACE,"retry section " <<z<<"->"<<z+tolerance);
                 z += tolerance;
                 retried = true;
             }
         }
+    };
+
+    auto addSection = [&](size_t i) {
+        SectionResult &result = results[i];
+        for(const auto &msg : result.messages) {
+            switch(msg.first) {
+            case FC_LOGLEVEL_WARN:
+                AREA_WARN(msg.second);
+                break;
+            case FC_LOGLEVEL_LOG:
+                AREA_LOG(msg.second);
+                break;
+            default:
+                AREA_TRACE(msg.second);
+            }
+        }
+        if(result.area) {
+            if(FC_LOG_INSTANCE.level()>FC_LOGLEVEL_TRACE)
+                showShape(result.area->getShape(),0,"section_%u_final",i);
+            sections.push_back(result.area);
+            if(!project)
+                FC_TIME_LOG(t1,"makeSection " << result.z);
+        }
+    };
+
+    int threads = myParams.SectionThreads;
+    if(threads <= 0)
+        threads = QThread::idealThreadCount();
+    // showShape() adds the intermediate shapes to the document, which must be done sequentially
+    if(FC_LOG_INSTANCE.level()>FC_LOGLEVEL_TRACE)
+        threads = 1;
+    threads = std::min<int>(threads,heights.size());
+
+    if(threads <= 1) {
+        for(size_t i=0;i<heights.size();++i) {
+            if(aborting())
+                throw Base::AbortException();
+            makeSection(i);
+            addSection(i);
+        }
+    }else{
+        Standard::SetReentrant(Standard_True);
+        AreaWorker worker(makeSection,heights.size());
+        std::vector<int> tasks(threads);
+        QtConcurrent::blockingMap(tasks, boost::bind(&AreaWorker::run, &worker, _1));
+        if(aborting())
+            throw Base::AbortException();
+        for(size_t i=0;i<heights.size();++i) {
+            if(worker.errors[i])
+                std::rethrow_exception(worker.errors[i]);
+            addSection(i);
+        }
+        FC_TIME_LOG(t1,"makeSection " << threads << " threads");
     }
     FC_TIME_LOG(t,"makeSection count: " << sections.size()<<", total");
     return sections;
@@ -2086,6 +2199,148 @@ TopoDS_Shape Area::makePocket(int index, PARAM_ARGS(PARAM_FARG,AREA_PARAMS_POCKE
         return toShape(out,FillNone);
 }
 
+std::list<AdaptivePass> Area::makeAdaptive(int index, PARAM_ARGS(PARAM_FARG,AREA_PARAMS_ADAPTIVE),
+        const std::function<bool(double)> &progress)
+{
+    if(tool_radius < Precision::Confusion())
+        throw Base::ValueError("tool radius too small");
+
+    if(engagement <= 0.0 || engagement > 180.0)
+        throw Base::ValueError("engagement angle must be greater than 0 and at most 180 degree");
+
+    if(tolerance < Precision::Confusion())
+        throw Base::ValueError("tolerance too small");
+
+    if(helix_radius == 0.0)
+        helix_radius = tool_radius*0.75;
+
+    build();
+
+    std::list<AdaptivePass> passes;
+    if(mySections.size()) {
+        if(index>=(int)mySections.size())
+            return passes;
+        size_t first = index<0?0:index;
+        size_t count = index<0?mySections.size():1;
+        for(size_t i=0;i<count;++i) {
+            std::function<bool(double)> sectionProgress;
+            if(progress) {
+                sectionProgress = [&](double done) {
+                    return progress((i+done)/count);
+                };
+            }
+            passes.splice(passes.end(),mySections[first+i]->makeAdaptive(index,
+                        PARAM_FIELDS(PARAM_FARG,AREA_PARAMS_ADAPTIVE),sectionProgress));
+        }
+        return passes;
+    }
+
+    FC_TIME_INIT2(t,t1);
+
+    CAreaConfig conf(myParams);
+    CAreaAdaptiveParams params(tool_radius,engagement*M_PI/180.0,tolerance,
+            helix_radius,extra_offset,climb,finish);
+
+    // Converting to Clipper uses global buffers in libarea, so only the tool
+    // paths of the regions are made in parallel.
+    std::list<CAdaptiveRegion> regionList;
+    CAdaptiveRegion::MakeRegions(*myArea,params,regionList);
+    std::vector<const CAdaptiveRegion*> regions;
+    std::vector<double> weights;
+    double total = 0.0;
+    for(const auto &region : regionList) {
+        regions.push_back(&region);
+        weights.push_back(fabs(region.m_material.GetArea()));
+        total += weights.back();
+    }
+    FC_TIME_LOG(t1,"makeAdaptive regions " << regions.size());
+
+    std::vector<std::list<CAdaptivePass> > toolpaths(regions.size());
+    std::unique_ptr<std::atomic<double>[]> done(new std::atomic<double>[regions.size()]);
+    for(size_t i=0;i<regions.size();++i)
+        done[i] = 0.0;
+    std::atomic<bool> cancelled(false);
+
+    auto report = [&]() {
+        if(!progress)
+            return true;
+        double sum = 0.0;
+        for(size_t i=0;i<regions.size();++i)
+            sum += weights[i]*done[i];
+        return progress(total>0.0?sum/total:1.0);
+    };
+
+    auto makeRegion = [&](size_t i) {
+        bool ok = regions[i]->MakeToolpath(toolpaths[i],[&,i](double d) {
+            done[i] = d;
+            // the progress callback may call into Python, only do it from the calling thread
+            if(threads<=1 && !report())
+                cancelled = true;
+            return !cancelled && !aborting();
+        });
+        if(!ok)
+            cancelled = true;
+    };
+
+    if(threads <= 0)
+        threads = QThread::idealThreadCount();
+    threads = std::min<int>(threads,regions.size());
+
+    // Use less threads if the grids of the biggest regions made at the same
+    // time would exceed the memory limit.
+    std::vector<double> cells;
+    for(auto region : regions)
+        cells.push_back(region->m_cells);
+    std::sort(cells.begin(),cells.end(),std::greater<double>());
+    double sum = 0.0;
+    for(int i=0;i<threads;++i) {
+        sum += cells[i];
+        if(i && sum > CAdaptiveRegion::max_total_cells) {
+            threads = i;
+            break;
+        }
+    }
+
+    if(threads <= 1) {
+        for(size_t i=0;i<regions.size();++i) {
+            makeRegion(i);
+            if(cancelled || aborting())
+                throw Base::AbortException();
+        }
+    }else{
+        AreaWorker worker(makeRegion,regions.size());
+        std::vector<int> tasks(threads);
+        QFuture<void> future = QtConcurrent::map(tasks, boost::bind(&AreaWorker::run, &worker, _1));
+        while(!future.isFinished()) {
+            if(!cancelled && !report())
+                cancelled = true;
+            std::this_thread::sleep_for(std::chrono::milliseconds(100));
+        }
+        future.waitForFinished();
+        if(cancelled || aborting())
+            throw Base::AbortException();
+        for(auto &error : worker.errors) {
+            if(error)
+                std::rethrow_exception(error);
+        }
+        FC_TIME_LOG(t1,"makeAdaptive " << threads << " threads");
+    }
+
+    gp_Trsf trsf(myTrsf.Inverted());
+    for(auto &toolpath : toolpaths) {
+        for(auto &pass : toolpath) {
+            passes.emplace_back();
+            AdaptivePass &p = passes.back();
+            p.type = pass.m_type;
+            p.points.reserve(pass.m_points.size());
+            for(auto &pt : pass.m_points)
+                p.points.push_back(gp_Pnt(pt.x,pt.y,0.0).Transformed(trsf));
+        }
+    }
+    FC_TIME_LOG(t,"makeAdaptive");
+    return passes;
+}
+
 static inline bool IsLeft(const gp_Pnt &a, const gp_Pnt &b, const gp_Pnt &c) {
     return ((b.X() - a.X())*(c.Y() - a.Y()) - (b.Y() - a.Y())*(c.X() - a.X())) > 0;
 }
@@ -2409,11 +2664,15 @@ struct ShapeInfo{
         , myRebase(false)
         , myStart(false)
     {}
+    void init() {
+        if(myWires.empty())
+            foreachSubshape(myShape,GetWires(myWires,myRTree,myParams),TopAbs_WIRE);
+    }
+
     double nearest(const gp_Pnt &pt) {
         myStartPt = pt;
 
-        if(myWires.empty())
-            foreachSubshape(myShape,GetWires(myWires,myRTree,myParams),TopAbs_WIRE);
+        init();
 
         // Now find the ture nearest point among the wires returned. Currently
         // only closed wire has a ture nearest point, using OCC's
@@ -2804,12 +3063,141 @@ struct WireOrienter {
     }
 };
 
+// Total straight distance of the rapid moves from pstart through the wires
+static double rapidDistance(const std::list<TopoDS_Shape> &wires, const gp_Pnt &pstart) {
+    double d = 0.0;
+    gp_Pnt pend(pstart);
+    for(auto &wire : wires) {
+        gp_Pnt p1,p2;
+        getEndPoints(TopoDS::Wire(wire),p1,p2);
+        d += pend.Distance(p1);
+        pend = p2;
+    }
+    return d;
+}
+
+// Improves the order found by the nearest neighbour search by moving up to
+// three consecutive wires to between two other wires, if that shortens the
+// rapid moves from pstart through the wires to the optional ptarget. The
+// wires keep their direction, and only the k wires nearest to both ends of
+// the moved ones are tried as new neighbours. Repeats until no move is left
+// or the deadline has passed, returns the number of moves.
+static int improveWires(std::list<TopoDS_Shape> &wires, const gp_Pnt &pstart,
+        const gp_Pnt *ptarget, int k, const std::chrono::steady_clock::time_point &deadline)
+{
+    const size_t n = wires.size();
+    if(n < 3)
+        return 0;
+
+    // wire n stands for the start position, and 'none' for the end
+    const size_t none = n+1;
+    std::vector<TopoDS_Shape> shapes(wires.begin(),wires.end());
+    std::vector<gp_Pnt> starts(n), ends(n+1);
+    std::vector<size_t> next(n+1), prev(n+1);
+    typedef std::pair<gp_Pnt,size_t> Value;
+    std::vector<Value> startValues, endValues;
+    for(size_t i=0;i<n;++i) {
+        getEndPoints(TopoDS::Wire(shapes[i]),starts[i],ends[i]);
+        startValues.emplace_back(starts[i],i);
+        endValues.emplace_back(ends[i],i);
+        next[i] = i+1<n?i+1:none;
+        prev[i] = i?i-1:n;
+    }
+    ends[n] = pstart;
+    endValues.emplace_back(pstart,n);
+    next[n] = 0;
+    prev[n] = none;
+    bgi::rtree<Value,RParameters> startIndex(startValues.begin(),startValues.end());
+    bgi::rtree<Value,RParameters> endIndex(endValues.begin(),endValues.end());
+
+    // rapid distance from the end of wire i to the start of wire j
+    auto dist = [&](size_t i, size_t j) {
+        if(j == none)
+            return ptarget?ends[i].Distance(*ptarget):0.0;
+        return ends[i].Distance(starts[j]);
+    };
+
+    int moves = 0;
+    std::vector<Value> found;
+    bool improved = true;
+    while(improved) {
+        improved = false;
+        for(size_t first=0;first<n;++first) {
+            if(std::chrono::steady_clock::now() > deadline) {
+                improved = false;
+                break;
+            }
+            size_t last = first;
+            for(int count=1;count<=3;++count) {
+                if(count>1) {
+                    last = next[last];
+                    if(last == none)
+                        break;
+                }
+                auto inside = [&](size_t i) {
+                    for(size_t j=first;;j=next[j]) {
+                        if(i == j) return true;
+                        if(j == last) return false;
+                    }
+                };
+                size_t before = prev[first], after = next[last];
+                double gain = dist(before,first) + dist(last,after) - dist(before,after);
+                if(gain < Precision::Confusion())
+                    continue;
+
+                // candidates of the wire to move behind, those ending near
+                // the start of the moved wires, or preceding those starting
+                // near their end
+                found.clear();
+                endIndex.query(bgi::nearest(starts[first],k),std::back_inserter(found));
+                size_t endCount = found.size();
+                startIndex.query(bgi::nearest(ends[last],k),std::back_inserter(found));
+                for(size_t i=endCount,count=found.size();i<count;++i)
+                    found[i].second = prev[found[i].second];
+
+                size_t best = none;
+                double best_cost = gain - Precision::Confusion();
+                for(auto &v : found) {
+                    size_t i = v.second;
+                    if(i==none || i==before || inside(i))
+                        continue;
+                    double cost = dist(i,first) + dist(last,next[i]) - dist(i,next[i]);
+                    if(cost < best_cost) {
+                        best_cost = cost;
+                        best = i;
+                    }
+                }
+                if(best == none)
+                    continue;
+
+                next[before] = after;
+                if(after != none)
+                    prev[after] = before;
+                size_t i = next[best];
+                next[last] = i;
+                if(i != none)
+                    prev[i] = last;
+                next[best] = first;
+                prev[first] = best;
+                ++moves;
+                improved = true;
+                break;
+            }
+        }
+    }
+
+    wires.clear();
+    for(size_t i=next[n];i!=none;i=next[i])
+        wires.push_back(shapes[i]);
+    return moves;
+}
+
 typedef Standard_Real (gp_Pnt::*AxisGetter)() const;
 typedef void (gp_Pnt::*AxisSetter)(Standard_Real);
 
 std::list<TopoDS_Shape> Area::sortWires(const std::list<TopoDS_Shape> &shapes,
     bool has_start, gp_Pnt *_pstart, gp_Pnt *_pend, 
-    double *stepdown_hint, short *_parc_plane,
+    double *stepdown_hint, short *_parc_plane, SortStatistics *stats,
     PARAM_ARGS(PARAM_FARG,AREA_PARAMS_SORT))
 {
     std::list<TopoDS_Shape> wires;
@@ -2861,6 +3249,12 @@ std::list<TopoDS_Shape> Area::sortWires(const std::list<TopoDS_Shape> &shapes,
                 foreachSubshape(shape,
                     WireOrienter(wires,dir,orientation,direction), TopAbs_WIRE);
         }
+        if(stats) {
+            gp_Pnt pstart;
+            if(_pstart) pstart = *_pstart;
+            stats->rapid_before = stats->rapid_after = rapidDistance(wires,pstart);
+            stats->moves = 0;
+        }
         return wires;
     }
 
@@ -2956,17 +3350,54 @@ std::list<TopoDS_Shape> Area::sortWires(const std::list<TopoDS_Shape> &shapes,
         if(_pstart) *_pstart = pstart;
     }
 
+    // Shapes without a plane are not merged, and are typically single edges.
+    // Instead of searching each of them for the next wire, their sampled
+    // points are indexed, and only the shapes owning the nearest k points
+    // are searched.
+    typedef std::pair<gp_Pnt,std::list<ShapeInfo>::iterator> SValue;
+    std::vector<SValue> values;
+    size_t nonplanar = 0;
+    for(auto &info : shape_list) {
+        if(!info.myPlanar)
+            ++nonplanar;
+    }
+    bool use_index = nonplanar > (size_t)rparams.k;
+    if(use_index) {
+        FC_TIME_INIT(t2);
+        for(auto it=shape_list.begin();it!=shape_list.end();++it) {
+            if(it->myPlanar) continue;
+            it->init();
+            for(auto &wire : it->myWires) {
+                for(auto &pt : wire.points)
+                    values.emplace_back(pt,it);
+            }
+        }
+        FC_DURATION_PLUS(rparams.bd,t2);
+    }
+    bgi::rtree<SValue,RParameters> shape_index(values.begin(),values.end());
+    values.clear();
+
+    int moves = 0;
+    gp_Pnt pfirst(pstart);
+
     gp_Pln pln;
     double hint = 0.0;
     bool hint_first = true;
     auto current_it = shape_list.end();
     double current_height = (pstart.*getter)();
     double max_dist = sort_mode==SortModeGreedy?threshold*threshold:0;
+    std::vector<std::list<ShapeInfo>::iterator> found;
+    std::list<std::list<TopoDS_Shape> > groups;
+    const ShapeInfo *last_group = 0;
+    double last_low = 0, last_high = 0;
+    bool entry_from_bound = use_bound && _pstart;
     while(shape_list.size()) {
         AREA_TRACE("sorting " << shape_list.size() << ' ' << AREA_XYZ(pstart));
         double best_d = DBL_MAX;
         auto best_it = shape_list.begin();
         for(auto it=best_it;it!=shape_list.end();++it) {
+            if(use_index && !it->myPlanar)
+                continue;
             double d;
             gp_Pnt pt;
             if(it->myPlanar && current_it==shape_list.end())
@@ -2978,6 +3409,24 @@ std::list<TopoDS_Shape> Area::sortWires(const std::list<TopoDS_Shape> &shapes,
                 best_d = d;
             }
         }
+        if(use_index && !shape_index.empty()) {
+            FC_TIME_INIT(t2);
+            found.clear();
+            for(auto it=shape_index.qbegin(bgi::nearest(pstart,shape_index.size()));
+                it!=shape_index.qend() && found.size()<(size_t)rparams.k; ++it)
+            {
+                if(std::find(found.begin(),found.end(),it->second)==found.end())
+                    found.push_back(it->second);
+            }
+            FC_DURATION_PLUS(rparams.qd,t2);
+            for(auto it : found) {
+                double d = it->nearest(pstart);
+                if(d < best_d) {
+                    best_it = it;
+                    best_d = d;
+                }
+            }
+        }
         gp_Pnt pentry;
         if(sort_mode==SortModeGreedy) {
             // greedy sort will go down to the next layer even if the current
@@ -2995,8 +3444,53 @@ std::list<TopoDS_Shape> Area::sortWires(const std::list<TopoDS_Shape> &shapes,
             }
         }
 
-        wires.splice(wires.end(),
-            best_it->sortWires(pstart,pend,min_dist,max_dist,&pentry));
+        if(use_index && !best_it->myPlanar) {
+            // remove the indexed points of the wires about to be sorted, and
+            // add back the ones of the wires left afterwards
+            FC_TIME_INIT(t2);
+            for(auto &wire : best_it->myWires) {
+                for(auto &pt : wire.points)
+                    shape_index.remove(SValue(pt,best_it));
+            }
+            FC_DURATION_PLUS(rparams.rd,t2);
+        }
+
+        std::list<TopoDS_Shape> sorted = best_it->sortWires(pstart,pend,min_dist,max_dist,&pentry);
+
+        if(use_index && !best_it->myPlanar) {
+            for(auto &wire : best_it->myWires) {
+                for(auto &pt : wire.points)
+                    shape_index.insert(SValue(pt,best_it));
+            }
+        }
+
+        // Consecutive wires of the same plane form a group. Wires without a
+        // plane are grouped by the heights of their end points instead. The
+        // improvement pass only moves wires within their group, so that the
+        // order of the planes and of the depths stays.
+        if(best_it->myPlanar) {
+            if(groups.empty() || last_group!=&(*best_it))
+                groups.emplace_back();
+            last_group = &(*best_it);
+            groups.back().splice(groups.back().end(),sorted);
+        }else{
+            for(auto &wire : sorted) {
+                gp_Pnt p1,p2;
+                getEndPoints(TopoDS::Wire(wire),p1,p2);
+                double low = (p1.*getter)();
+                double high = (p2.*getter)();
+                if(low > high)
+                    std::swap(low,high);
+                if(groups.empty() || last_group ||
+                   fabs(low-last_low)>Precision::Confusion() ||
+                   fabs(high-last_high)>Precision::Confusion())
+                    groups.emplace_back();
+                last_group = 0;
+                last_low = low;
+                last_high = high;
+                groups.back().push_back(wire);
+            }
+        }
 
         if(use_bound && _pstart) {
             use_bound = false;
@@ -3035,9 +3529,52 @@ std::list<TopoDS_Shape> Area::sortWires(const std::list<TopoDS_Shape> &shapes,
             shape_list.erase(best_it);
         }
     }
+
+    if(sort_improve > 0) {
+        FC_TIME_INIT(t2);
+        auto deadline = std::chrono::steady_clock::now() +
+            std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+                    std::chrono::duration<double>(sort_improve));
+        gp_Pnt p,p1,p2;
+        p = pfirst;
+        for(auto it=groups.begin();it!=groups.end();) {
+            auto &group = *it;
+            bool has_next = ++it!=groups.end();
+            if(has_next)
+                getEndPoints(TopoDS::Wire(it->front()),p1,p2);
+            moves += improveWires(group,p,has_next?&p1:0,rparams.k,deadline);
+            getEndPoints(TopoDS::Wire(group.back()),p1,p);
+        }
+        pend = p;
+        if(entry_from_bound && groups.size())
+            getEndPoints(TopoDS::Wire(groups.front().front()),*_pstart,p);
+        FC_DURATION_PLUS(td,t2);
+    }
+    for(auto &group : groups)
+        wires.splice(wires.end(),group);
+
     if(stepdown_hint && hint!=0.0)
         *stepdown_hint = hint;
     if(_pend) *_pend = pend;
+    if(stats) {
+        std::list<TopoDS_Shape> unsorted;
+        gp_Dir dir(0,0,1);
+        for(auto &shape : shapes) {
+            if(!shape.IsNull())
+                foreachSubshape(shape,
+                    WireOrienter(unsorted,dir,orientation,direction), TopAbs_WIRE);
+        }
+        if(arcPlaneFound) {
+            for(auto &wire : unsorted)
+                wire.Move(trsf);
+        }
+        stats->rapid_before = rapidDistance(unsorted,pfirst);
+        stats->rapid_after = rapidDistance(wires,pfirst);
+        stats->moves = moves;
+        AREA_LOG("rapid distance " << stats->rapid_before << " -> " << stats->rapid_after
+                << ", " << moves << " moves");
+    }
+    FC_DURATION_LOG(td,"improve");
     FC_DURATION_LOG(rparams.bd,"rtree build");
     FC_DURATION_LOG(rparams.qd,"rtree query");
     FC_DURATION_LOG(rparams.rd,"rtree clean");
@@ -3157,7 +3694,8 @@ void Area::setWireOrientation(TopoDS_Wire &wire, const gp_Dir &dir, bool wire_cc
 }
 
 void Area::toPath(Toolpath &path, const std::list<TopoDS_Shape> &shapes,
-        const gp_Pnt *_pstart, gp_Pnt *pend, PARAM_ARGS(PARAM_FARG,AREA_PARAMS_PATH))
+        const gp_Pnt *_pstart, gp_Pnt *pend, SortStatistics *stats,
+        PARAM_ARGS(PARAM_FARG,AREA_PARAMS_PATH))
 {
     std::list<TopoDS_Shape> wires;
 
@@ -3166,7 +3704,7 @@ void Area::toPath(Toolpath &path, const std::list<TopoDS_Shape> &shapes,
 
     double stepdown_hint = 1.0;
     wires = sortWires(shapes,_pstart!=0,&pstart,pend,&stepdown_hint,
-            PARAM_REF(PARAM_FARG,AREA_PARAMS_ARC_PLANE),
+            PARAM_REF(PARAM_FARG,AREA_PARAMS_ARC_PLANE),stats,
             PARAM_FIELDS(PARAM_FARG,AREA_PARAMS_SORT));
 
     short currentArcPlane = arc_plane;
@@ -24,7 +24,9 @@
 #define PATH_AREA_H
 
 #include <QCoreApplication>
+#include <atomic>
 #include <chrono>
+#include <functional>
 #include <memory>
 #include <vector>
 #include <list>
@@ -49,6 +51,27 @@ class Bnd_Box;
 namespace Path
 {
 
+/** One pass of the adaptive clearing tool path, see Area::makeAdaptive() */
+struct PathExport AdaptivePass {
+    /** 0 cutting, 1 one turn of the entry helix, 2 link through cleared
+     * material, 3 link requiring to retract the tool */
+    int type;
+    std::vector<gp_Pnt> points;
+};
+
+/** Rapid move statistics of Area::sortWires() */
+struct PathExport SortStatistics {
+    /** total straight distance from the end of each wire to the start of
+     * the next one, in the input order */
+    double rapid_before;
+    /** the same distance in the sorted order */
+    double rapid_after;
+    /** number of times the improvement pass moved wires */
+    int moves;
+
+    SortStatistics():rapid_before(0.0),rapid_after(0.0),moves(0){}
+};
+
 /** Store libarea algorithm configuration */
 struct PathExport CAreaParams {
     PARAM_DECLARE(PARAM_FNAME,AREA_PARAMS_CAREA)
@@ -134,7 +157,7 @@ protected:
     bool myProjecting;
     mutable int mySkippedShapes;
 
-    static bool s_aborting;
+    static std::atomic<bool> s_aborting;
     static AreaStaticParams s_params;
 
     /** Called internally to combine children shapes for further processing */
@@ -227,6 +250,16 @@ public:
      */
     TopoDS_Shape makePocket(int index=-1, PARAM_ARGS_DEF(PARAM_FARG,AREA_PARAMS_POCKET));
 
+    /** Make an adaptive clearing tool path of the combined shape
+     *
+     * \arg \c progress: optional callback receiving the done fraction, it
+     * is always called from the calling thread. Return false to abort.
+     *
+     * See #AREA_PARAMS_ADAPTIVE for description of the other arguments.
+     */
+    std::list<AdaptivePass> makeAdaptive(int index=-1, PARAM_ARGS_DEF(PARAM_FARG,AREA_PARAMS_ADAPTIVE),
+            const std::function<bool(double)> &progress = std::function<bool(double)>());
+
     /** Make a pocket of the combined shape
      *
      * \arg \c heights: optional customized heights of each section. The
@@ -349,6 +382,8 @@ public:
      * distance between two sections.
      * \arg \c arc_plane: optional arc plane selection, if given the found plane
      * will be returned. See #AREA_PARAMS_ARC_PLANE for more details.
+     * \arg \c stats: optional output of the rapid distance before and after
+     * sorting.
      *
      * See #AREA_PARAMS_SORT for other arguments
      *
@@ -356,7 +391,8 @@ public:
      */
     static std::list<TopoDS_Shape> sortWires(const std::list<TopoDS_Shape> &shapes,
             bool has_start=false, gp_Pnt *pstart=NULL, gp_Pnt *pend=NULL, double *stepdown_hint=NULL,
-            short *arc_plane = NULL, PARAM_ARGS_DEF(PARAM_FARG,AREA_PARAMS_SORT));
+            short *arc_plane = NULL, SortStatistics *stats = NULL,
+            PARAM_ARGS_DEF(PARAM_FARG,AREA_PARAMS_SORT));
 
     /** Convert a list of wires to gcode
      *
@@ -364,11 +400,13 @@ public:
      * \arg \c shapes: input list of shapes
      * \arg \c pstart: output start point,
      * \arg \c pend: optional output containing the ending point of the returned
+     * \arg \c stats: optional output of the rapid distance before and after
+     * sorting the wires.
      * 
      * See #AREA_PARAMS_PATH for other arguments
      */
     static void toPath(Toolpath &path, const std::list<TopoDS_Shape> &shapes,
-            const gp_Pnt *pstart=NULL, gp_Pnt *pend=NULL,
+            const gp_Pnt *pstart=NULL, gp_Pnt *pend=NULL, SortStatistics *stats=NULL,
             PARAM_ARGS_DEF(PARAM_FARG,AREA_PARAMS_PATH));
 
     static int project(TopoDS_Shape &out, const TopoDS_Shape &in, const AreaParams *params=0);
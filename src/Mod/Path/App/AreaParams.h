@@ -116,6 +116,23 @@
 #define AREA_PARAMS_POCKET_CONF \
     ((bool,thicken,Thicken,false,"Thicken the resulting wires with ToolRadius"))
 
+/** Adaptive clearing parameters */
+#define AREA_PARAMS_ADAPTIVE \
+    ((double,tool_radius,ToolRadius,1.0,"Tool radius for adaptive clearing",App::PropertyLength))\
+    ((double,engagement,EngagementAngle,60.0,\
+        "Maximum angle in degree of the tool's cutting edge in contact with the material",App::PropertyAngle))\
+    ((double,tolerance,AdaptiveTolerance,0.1,"Size of the cells tracking the cleared material.\n"\
+        "Without finishing pass, up to about twice of it is left on the walls.",App::PropertyLength))\
+    ((double,helix_radius,HelixRadius,0.0,\
+        "Radius of the helix entering the material. If =0, use 3/4 of ToolRadius.",App::PropertyLength))\
+    ((double,extra_offset,AdaptiveExtraOffset,0.0,"Material left on the walls",App::PropertyDistance))\
+    ((bool,climb,Climb,true,"Climb milling, i.e. the material is on the right of the cutting direction.\n"\
+        "Otherwise conventional milling."))\
+    ((bool,finish,FinishingPass,true,"Add a pass along the walls after clearing"))\
+    ((long,threads,AdaptiveThreads,0,"Number of threads to clear the separate regions of the area in parallel.\n"\
+        "0 means one thread per processor, 1 clears them one after the other. Less threads are used\n"\
+        "if the cells of the regions cleared at the same time would take too much memory."))
+
 /** Operation code */
 #define AREA_PARAMS_OPCODE \
     ((enum,op,Operation,0,"Boolean operation.\n"\
@@ -154,6 +171,8 @@
         "When the section hits or over the shape boundary, a section with the height of that boundary\n"\
         "will be created. A small offset is usually required to avoid the tangential cut.",\
         App::PropertyPrecision))\
+    ((long,threads,SectionThreads,1,"Number of threads to slice the sections in parallel.\n"\
+        "0 means one thread per processor, 1 slices them one after the other."))\
      AREA_PARAMS_SECTION_EXTRA
 
 #ifdef AREA_OFFSET_ALGO
@@ -219,7 +238,11 @@
         "If two wire's end points are separated within this threshold, they are consider\n"\
         "as connected. You may want to set this to the tool diameter to keep the tool down.",\
         App::PropertyLength))\
-    ((enum, retract_axis, RetractAxis, 2,"Tool retraction axis",(X)(Y)(Z)))
+    ((enum, retract_axis, RetractAxis, 2,"Tool retraction axis",(X)(Y)(Z)))\
+    ((double, sort_improve, SortImprove, 0.0, "Time limit in seconds of a pass improving the sorted order\n"\
+        "by moving up to three consecutive wires to where the rapid moves get shorter. The wires\n"\
+        "are only moved among the consecutive wires of their plane, or, without a plane, among the\n"\
+        "consecutive wires with the same end point depths, and keep their direction. 0 disables the pass."))
        
 /** Area path generation parameters */
 #define AREA_PARAMS_PATH \
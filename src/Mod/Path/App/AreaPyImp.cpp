@@ -137,6 +137,17 @@ static const PyMethodDef areaOverrides[] = {
         "\n* index (-1): the index of the section. -1 means all sections. No effect on planar shape.\n"
         PARAM_PY_DOC(ARG,AREA_PARAMS_POCKET),
     },
+    {
+        "makeAdaptive",NULL,0,
+        "makeAdaptive(index=-1, " PARAM_PY_ARGS_DOC(ARG,AREA_PARAMS_ADAPTIVE) ", progress=None):\n"
+        "Generate adaptive clearing toolpath of the shape, which keeps the engagement of the tool\n"
+        "below the given angle. Returns a list of (type, [Vector...]), with type 0 for cutting, 1 for\n"
+        "one turn of the entry helix, 2 for a link through cleared material, and 3 for a link\n"
+        "requiring to retract the tool.\n"
+        "\n* index (-1): the index of the section. -1 means all sections. No effect on planar shape.\n"
+        PARAM_PY_DOC(ARG,AREA_PARAMS_ADAPTIVE)
+        "\n* progress (None): optional callable called with the done fraction. Return False to abort.",
+    },
     {
         "makeSections",NULL,0,
         "makeSections(" PARAM_PY_ARGS_DOC(ARG,AREA_PARAMS_SECTION_EXTRA) ", heights=[], plane=None):\n"
@@ -322,6 +333,61 @@ PyObject* AreaPy::makePocket(PyObject *args, PyObject *keywds)
     return Py::new_reference_to(Part::shape2pyshape(resultShape));
 }
 
+PyObject* AreaPy::makeAdaptive(PyObject *args, PyObject *keywds)
+{
+    static char *kwlist[] = {"index",PARAM_FIELD_STRINGS(ARG,AREA_PARAMS_ADAPTIVE), "progress", NULL};
+    short index = -1;
+    PyObject *progress = Py_None;
+
+    PARAM_PY_DECLARE_INIT(PARAM_FARG,AREA_PARAMS_ADAPTIVE)
+
+    if (!PyArg_ParseTupleAndKeywords(args, keywds, 
+                "|h" PARAM_PY_KWDS(AREA_PARAMS_ADAPTIVE) "O", kwlist, 
+                &index,PARAM_REF(PARAM_FARG,AREA_PARAMS_ADAPTIVE), &progress))
+        return 0;
+
+    bool failed = false;
+    std::function<bool(double)> callback;
+    if(progress != Py_None) {
+        if(!PyCallable_Check(progress)) {
+            PyErr_SetString(PyExc_TypeError, "progress must be callable");
+            return 0;
+        }
+        callback = [&](double done) {
+            if(failed)
+                return false;
+            PyObject *res = PyObject_CallFunction(progress, "d", done);
+            if(!res) {
+                failed = true;
+                return false;
+            }
+            bool ok = res != Py_False;
+            Py_DECREF(res);
+            return ok;
+        };
+    }
+
+    std::list<AdaptivePass> passes;
+    try {
+        passes = getAreaPtr()->makeAdaptive(index,
+                        PARAM_PY_FIELDS(PARAM_FARG,AREA_PARAMS_ADAPTIVE),callback);
+    }catch(Base::AbortException &) {
+        // keep the exception raised by the progress callback
+        if(failed)
+            return 0;
+        throw;
+    }
+
+    Py::List ret;
+    for(auto &pass : passes) {
+        Py::List points;
+        for(auto &pt : pass.points)
+            points.append(Py::asObject(new Base::VectorPy(Base::Vector3d(pt.X(),pt.Y(),pt.Z()))));
+        ret.append(Py::TupleN(Py::Int(pass.type),points));
+    }
+    return Py::new_reference_to(ret);
+}
+
 PyObject* AreaPy::makeSections(PyObject *args, PyObject *keywds)
 {
     static char *kwlist[] = {PARAM_FIELD_STRINGS(ARG,AREA_PARAMS_SECTION_EXTRA), 
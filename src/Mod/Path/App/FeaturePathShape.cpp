@@ -87,7 +87,7 @@ App::DocumentObjectExecReturn *FeatureShape::execute(void)
         shapes.push_back(shape);
     }
 
-    Area::toPath(path,shapes,UseStartPoint.getValue()?&pstart:0,0,PARAM_PROP_ARGS(AREA_PARAMS_PATH));
+    Area::toPath(path,shapes,UseStartPoint.getValue()?&pstart:0,0,0,PARAM_PROP_ARGS(AREA_PARAMS_PATH));
 
     Path.setValue(path);
     return App::DocumentObject::StdReturn;
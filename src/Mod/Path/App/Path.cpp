@@ -23,11 +23,25 @@
 
 #include "PreCompiled.h"
 
+#ifndef _PreComp_
+# include <algorithm>
+# include <cmath>
+# include <cstdlib>
+# include <cstring>
+# include <iterator>
+# include <limits>
+# include <sstream>
+#endif
+
 #ifndef _PreComp_
 #endif
 
 #include <boost/regex.hpp>
+#include <boost/algorithm/string.hpp>
+#include <boost/cstdint.hpp>
+#include <zlib.h>
 
+#include <App/Application.h>
 #include <Base/Writer.h>
 #include <Base/Reader.h>
 #include <Base/Stream.h>
@@ -114,7 +128,7 @@ void Toolpath::deleteCommand(int pos)
     recalculate();
 }
 
-double Toolpath::getLength()
+double Toolpath::getLength() const
 {
     if(vpcCommands.size()==0)
         return 0;
@@ -200,6 +214,265 @@ void Toolpath::setFromGCode(const std::string instr)
     recalculate();
 }
 
+namespace {
+    // Streaming G-code parser for Toolpath::readGCode(), parses one line at a time.
+    class GCodeReader
+    {
+    public:
+        GCodeReader(std::vector<Command*> &commands, bool comments, double preview, std::vector<int> *lines)
+            : skipped(0), commands(commands), comments(comments), preview(preview), lines(lines),
+              pending(0), pendingLine(0), haveLast(false)
+        {
+            for (int i = 0; i < 3; ++i) {
+                position[i] = 0.0;
+                last[i] = 0.0;
+            }
+        }
+
+        ~GCodeReader()
+        {
+            delete pending;
+            clearLine();
+        }
+
+        void parseLine(const char *begin, const char *end, int line)
+        {
+            Command *motionCmd = 0;
+            const char *p = begin;
+            while (p < end) {
+                char c = *p;
+                if (isspace(static_cast<unsigned char>(c)) || c == '%' || c == '/') {
+                    ++p;
+                } else if (c == '(' || c == ';') {
+                    const char *close = c == '(' ? static_cast<const char*>(memchr(p, ')', end - p)) : 0;
+                    const char *stop = close ? close : end;
+                    if (comments) {
+                        std::string text(p + 1, stop);
+                        boost::trim(text);
+                        Command *cmd = new Command();
+                        cmd->Name = "(" + text + ")";
+                        items.push_back(cmd);
+                    }
+                    p = close ? close + 1 : end;
+                } else if (isalpha(static_cast<unsigned char>(c))) {
+                    char letter = static_cast<char>(toupper(static_cast<unsigned char>(c)));
+                    ++p;
+                    while (p < end && (*p == ' ' || *p == '\t'))
+                        ++p;
+                    const char *number = p;
+                    if (p < end && (*p == '-' || *p == '+'))
+                        ++p;
+                    bool digits = false;
+                    while (p < end && (isdigit(static_cast<unsigned char>(*p)) || *p == '.')) {
+                        digits = digits || *p != '.';
+                        ++p;
+                    }
+                    if (!digits || p - number > 63) {
+                        ++skipped;
+                        clearLine();
+                        return;
+                    }
+                    if (letter == 'N' || letter == 'O')
+                        continue;
+                    if (letter == 'G' || letter == 'M') {
+                        Command *cmd = new Command();
+                        cmd->Name = std::string(1, letter) + std::string(*number == '+' ? number + 1 : number, p);
+                        items.push_back(cmd);
+                        if (letter == 'G') {
+                            double code = toDouble(number, p);
+                            if (isMotion(code)) {
+                                motion = cmd->Name;
+                                motionCmd = cmd;
+                            } else if (code == 80) {
+                                motion.clear();
+                            }
+                        }
+                    } else {
+                        params.push_back(std::make_pair(std::string(1, letter), toDouble(number, p)));
+                    }
+                } else {
+                    ++skipped;
+                    clearLine();
+                    return;
+                }
+            }
+
+            if (!params.empty()) {
+                // all words of a line apply together, parameters go to its motion command, or the last command
+                Command *target = motionCmd;
+                for (std::vector<Command*>::reverse_iterator it = items.rbegin(); !target && it != items.rend(); ++it)
+                    if ((*it)->Name[0] != '(')
+                        target = *it;
+                if (!target) {
+                    if (motion.empty()) {
+                        ++skipped;
+                        clearLine();
+                        return;
+                    }
+                    // no command on this line, repeat the modal motion command
+                    target = new Command();
+                    target->Name = motion;
+                    items.push_back(target);
+                }
+                for (std::vector<std::pair<std::string, double> >::const_iterator it = params.begin(); it != params.end(); ++it)
+                    target->Parameters[it->first] = it->second;
+            }
+            for (std::vector<Command*>::iterator it = items.begin(); it != items.end(); ++it)
+                emit(*it, line);
+            items.clear();
+            params.clear();
+        }
+
+        void finish()
+        {
+            flush();
+        }
+
+        std::size_t skipped;
+
+    private:
+        static double toDouble(const char *begin, const char *end)
+        {
+            char buffer[64];
+            std::size_t len = end - begin;
+            memcpy(buffer, begin, len);
+            buffer[len] = 0;
+            return std::atof(buffer);
+        }
+
+        static bool isMotion(double code)
+        {
+            return code <= 3 || code == 33 || (code >= 38 && code < 39) || code == 73 || code == 76 || (code >= 81 && code <= 89);
+        }
+
+        static bool isStraight(const Command &cmd)
+        {
+            return cmd.Name == "G0" || cmd.Name == "G00" || cmd.Name == "G1" || cmd.Name == "G01";
+        }
+
+        void clearLine()
+        {
+            for (std::vector<Command*>::iterator it = items.begin(); it != items.end(); ++it)
+                delete *it;
+            items.clear();
+            params.clear();
+        }
+
+        void add(Command *cmd, int line)
+        {
+            commands.push_back(cmd);
+            if (lines)
+                lines->push_back(line);
+        }
+
+        void flush()
+        {
+            if (pending) {
+                add(pending, pendingLine);
+                pending = 0;
+            }
+        }
+
+        void emit(Command *cmd, int line)
+        {
+            static const char *axes[3] = { "X", "Y", "Z" };
+            bool moved = false;
+            for (int i = 0; i < 3; ++i) {
+                std::map<std::string, double>::const_iterator it = cmd->Parameters.find(axes[i]);
+                if (it != cmd->Parameters.end()) {
+                    position[i] = it->second;
+                    moved = true;
+                }
+            }
+            if (preview <= 0 || !moved) {
+                flush();
+                add(cmd, line);
+                return;
+            }
+
+            if (isStraight(*cmd)) {
+                // the preview drops moves, so the ones kept carry the full position
+                for (int i = 0; i < 3; ++i)
+                    cmd->Parameters[axes[i]] = position[i];
+                double dx = position[0] - last[0];
+                double dy = position[1] - last[1];
+                double dz = position[2] - last[2];
+                if (haveLast && dx * dx + dy * dy + dz * dz < preview * preview
+                        && (!pending || pending->Name == cmd->Name)) {
+                    delete pending;
+                    pending = cmd;
+                    pendingLine = line;
+                    return;
+                }
+                if (pending && pending->Name == cmd->Name) {
+                    delete pending;
+                    pending = 0;
+                }
+            }
+            flush();
+            add(cmd, line);
+            for (int i = 0; i < 3; ++i)
+                last[i] = position[i];
+            haveLast = true;
+        }
+
+        std::vector<Command*> &commands;
+        bool comments;
+        double preview;
+        std::vector<int> *lines;
+
+        std::vector<Command*> items;
+        std::vector<std::pair<std::string, double> > params;
+        std::string motion;
+        double position[3];
+
+        // the last straight move within preview of the last position added
+        Command *pending;
+        int pendingLine;
+        double last[3];
+        bool haveLast;
+    };
+}
+
+std::size_t Toolpath::readGCode(std::istream &stream, bool comments, double preview, std::vector<int> *lines)
+{
+    clear();
+    if (lines)
+        lines->clear();
+
+    GCodeReader reader(vpcCommands, comments, preview, lines);
+    std::vector<char> buffer(1 << 20);
+    std::string rest;
+    int line = 1;
+    while (stream) {
+        stream.read(&buffer[0], buffer.size());
+        std::size_t count = static_cast<std::size_t>(stream.gcount());
+        if (count == 0)
+            break;
+        const char *begin = &buffer[0];
+        const char *end = begin + count;
+        const char *eol;
+        while ((eol = static_cast<const char*>(memchr(begin, '\n', end - begin))) != 0) {
+            if (rest.empty()) {
+                reader.parseLine(begin, eol, line);
+            } else {
+                // a line continued from the previous chunk
+                rest.append(begin, eol);
+                reader.parseLine(rest.data(), rest.data() + rest.size(), line);
+                rest.clear();
+            }
+            ++line;
+            begin = eol + 1;
+        }
+        rest.append(begin, end);
+    }
+    if (!rest.empty())
+        reader.parseLine(rest.data(), rest.data() + rest.size(), line);
+    reader.finish();
+    recalculate();
+    return reader.skipped;
+}
+
 std::string Toolpath::toGCode(void) const
 {
     std::string result;
@@ -210,9 +483,186 @@ std::string Toolpath::toGCode(void) const
     return result;
 }    
 
+bool Toolpath::isModalAxis(char axis)
+{
+    switch (axis) {
+        case 'X': case 'Y': case 'Z':
+        case 'A': case 'B': case 'C':
+        case 'F':
+            return true;
+    }
+    return false;
+}
+
+void Toolpath::getArrays(const std::string &axes, std::vector<std::string> &names, std::vector<int> &opcodes,
+        std::vector<double> &values, std::vector<unsigned char> &mask) const
+{
+    const std::size_t k = axes.size();
+    const double nan = std::numeric_limits<double>::quiet_NaN();
+    std::vector<std::string> keys(k);
+    std::vector<bool> modal(k);
+    std::vector<double> current(k, nan);
+    for (std::size_t a = 0; a < k; ++a) {
+        keys[a] = std::string(1, axes[a]);
+        modal[a] = isModalAxis(axes[a]);
+    }
+
+    std::map<std::string, int> lookup;
+    names.clear();
+    opcodes.resize(vpcCommands.size());
+    values.resize(vpcCommands.size() * k);
+    mask.resize(vpcCommands.size() * k);
+
+    double *row = values.empty() ? 0 : &values[0];
+    unsigned char *set = mask.empty() ? 0 : &mask[0];
+    for (std::size_t i = 0; i < vpcCommands.size(); ++i, row += k, set += k) {
+        const Command &cmd = *vpcCommands[i];
+        std::map<std::string, int>::const_iterator op = lookup.find(cmd.Name);
+        if (op == lookup.end()) {
+            op = lookup.insert(std::make_pair(cmd.Name, static_cast<int>(names.size()))).first;
+            names.push_back(cmd.Name);
+        }
+        opcodes[i] = op->second;
+
+        for (std::size_t a = 0; a < k; ++a) {
+            std::map<std::string, double>::const_iterator it = cmd.Parameters.find(keys[a]);
+            if (it != cmd.Parameters.end()) {
+                row[a] = it->second;
+                set[a] = 1;
+                if (modal[a])
+                    current[a] = it->second;
+            } else {
+                row[a] = modal[a] ? current[a] : nan;
+                set[a] = 0;
+            }
+        }
+    }
+}
+
+void Toolpath::setFromArrays(const std::vector<std::string> &names, const int *opcodes, std::size_t count,
+        const std::string &axes, const double *values, const unsigned char *mask, const Toolpath *tmpl)
+{
+    if (tmpl && tmpl->getSize() != count)
+        throw Base::ValueError("Template path must have the same number of commands");
+
+    const std::size_t k = axes.size();
+    const double nan = std::numeric_limits<double>::quiet_NaN();
+    std::vector<std::string> keys(k);
+    std::vector<bool> modal(k);
+    std::vector<double> last(k, nan);
+    for (std::size_t a = 0; a < k; ++a) {
+        keys[a] = std::string(1, axes[a]);
+        modal[a] = isModalAxis(axes[a]);
+    }
+
+    // build the new commands before clearing in case tmpl is this path
+    std::vector<Command*> commands;
+    commands.reserve(count);
+    const double *row = values;
+    for (std::size_t i = 0; i < count; ++i, row += k) {
+        int op = opcodes[i];
+        if (op < 0 || op >= static_cast<int>(names.size())) {
+            for (std::vector<Command*>::iterator it = commands.begin(); it != commands.end(); ++it)
+                delete (*it);
+            throw Base::IndexError("Opcode out of range");
+        }
+        Command *cmd = tmpl ? new Command(tmpl->getCommand(i)) : new Command();
+        cmd->Name = names[op];
+        for (std::size_t a = 0; a < k; ++a) {
+            double v = row[a];
+            bool emit;
+            if (mask)
+                emit = mask[i * k + a] != 0;
+            else if (tmpl)
+                emit = cmd->Parameters.count(keys[a]) > 0;
+            else
+                emit = !std::isnan(v) && (!modal[a] || v != last[a]);
+
+            if (emit && !std::isnan(v)) {
+                cmd->Parameters[keys[a]] = v;
+                last[a] = v;
+            } else {
+                cmd->Parameters.erase(keys[a]);
+            }
+        }
+        commands.push_back(cmd);
+    }
+
+    clear();
+    vpcCommands.swap(commands);
+    recalculate();
+}
+
+const Base::Vector3d &Toolpath::getPosition(unsigned int pos) const
+{
+    if (pos > vpcCommands.size())
+        throw Base::IndexError("Index not in range");
+
+    if (vPositions.size() != vpcCommands.size() + 1) {
+        static const std::string keys[3] = { "X", "Y", "Z" };
+        vPositions.resize(vpcCommands.size() + 1);
+        Vector3d current;
+        vPositions[0] = current;
+        // drill cycles end at R with G99, at the initial Z (or R if that's higher) with G98
+        bool retractToR = false;
+        bool hasR = false;
+        double r = 0.0;
+        for (std::size_t i = 0; i < vpcCommands.size(); ++i) {
+            const std::string &name = vpcCommands[i]->Name;
+            const std::map<std::string, double> &params = vpcCommands[i]->Parameters;
+            if (name == "G98" || name == "G99") {
+                retractToR = name == "G99";
+            } else if (name == "G73" || name == "G81" || name == "G82" || name == "G83") {
+                std::map<std::string, double>::const_iterator it = params.find("R");
+                if (it != params.end()) {
+                    r = it->second;
+                    hasR = true;
+                }
+                double z = current.z;
+                for (int a = 0; a < 2; ++a) {
+                    it = params.find(keys[a]);
+                    if (it != params.end())
+                        current[a] = it->second;
+                }
+                if (hasR)
+                    current.z = retractToR ? r : std::max(z, r);
+                vPositions[i + 1] = current;
+                continue;
+            }
+            if (!params.empty()) {
+                for (int a = 0; a < 3; ++a) {
+                    std::map<std::string, double>::const_iterator it = params.find(keys[a]);
+                    if (it != params.end())
+                        current[a] = it->second;
+                }
+            }
+            vPositions[i + 1] = current;
+        }
+    }
+    return vPositions[pos];
+}
+
+Base::BoundBox3d Toolpath::getBoundBox(void) const
+{
+    BoundBox3d bbox;
+    if (vpcCommands.empty())
+        return bbox;
+    getPosition(vpcCommands.size());
+    for (std::size_t i = 1; i < vPositions.size(); ++i) {
+        bbox.Add(vPositions[i]);
+        // the bottom of a drilled hole isn't the position after the cycle
+        const std::map<std::string, double> &params = vpcCommands[i - 1]->Parameters;
+        std::map<std::string, double>::const_iterator it = params.find("Z");
+        if (it != params.end() && it->second < vPositions[i].z)
+            bbox.Add(Vector3d(vPositions[i].x, vPositions[i].y, it->second));
+    }
+    return bbox;
+}
+
 void Toolpath::recalculate(void) // recalculates the path cache
 {
-    
+    vPositions.clear();
+
     if(vpcCommands.size()==0)
         return;
         
@@ -280,6 +730,288 @@ unsigned int Toolpath::getMemSize (void) const
     return toGCode().size();
 }
 
+namespace {
+    // Binary format of a Toolpath, all numbers are little endian:
+    //   header  ... "FCPath", uint16 version, uint32 flags, uint32 number of commands,
+    //               uint32 size of the payload, uint32 size of the payload as stored
+    //   payload ... number of names, each name as length and characters,
+    //               number of parameter keys, each key the same way,
+    //               per command the name index and number of parameters,
+    //               per parameter the key index, followed by all values in the same order
+    // All counts, lengths and indices in the payload are unsigned LEB128 varints.
+    // Values are float64, or float32 with BinaryFloat32. With BinaryDelta the bits of each value
+    // are xor-ed with the previous value of the same key, which is lossless and turns repeated
+    // coordinates into zeros. With BinaryZlib the payload is compressed.
+    const char BinaryMagic[] = "FCPath";
+    const std::size_t BinaryMagicSize = 6;
+    const std::size_t BinaryHeaderSize = BinaryMagicSize + 2 + 4 * 4;
+    const boost::uint16_t BinaryVersion = 1;
+    enum { BinaryFloat32 = 1, BinaryDelta = 2, BinaryZlib = 4 };
+
+    template<typename T>
+    void put(std::string &out, T value)
+    {
+        for (std::size_t i = 0; i < sizeof(T); ++i)
+            out += static_cast<char>((value >> (8 * i)) & 0xff);
+    }
+
+    void putVarint(std::string &out, std::size_t value)
+    {
+        while (value >= 0x80) {
+            out += static_cast<char>((value & 0x7f) | 0x80);
+            value >>= 7;
+        }
+        out += static_cast<char>(value);
+    }
+
+    void putString(std::string &out, const std::string &value)
+    {
+        putVarint(out, value.size());
+        out += value;
+    }
+
+    class BinaryInput
+    {
+    public:
+        BinaryInput(const char *data, std::size_t size)
+            : pos(reinterpret_cast<const unsigned char*>(data)), end(pos + size) {}
+
+        template<typename T>
+        T get()
+        {
+            need(sizeof(T));
+            T value = 0;
+            for (std::size_t i = 0; i < sizeof(T); ++i)
+                value |= static_cast<T>(pos[i]) << (8 * i);
+            pos += sizeof(T);
+            return value;
+        }
+
+        std::size_t getVarint()
+        {
+            std::size_t value = 0;
+            for (int shift = 0; shift < 35; shift += 7) {
+                need(1);
+                unsigned char byte = *pos++;
+                value |= static_cast<std::size_t>(byte & 0x7f) << shift;
+                if (!(byte & 0x80))
+                    return value;
+            }
+            throw Base::BadFormatError("Binary path data is corrupt");
+        }
+
+        // reads the number of following items, each of them taking at least minSize bytes
+        std::size_t getCount(std::size_t minSize)
+        {
+            std::size_t count = getVarint();
+            need(count * minSize);
+            return count;
+        }
+
+        std::string getString()
+        {
+            std::size_t size = getVarint();
+            need(size);
+            std::string value(reinterpret_cast<const char*>(pos), size);
+            pos += size;
+            return value;
+        }
+
+        void need(std::size_t size) const
+        {
+            if (static_cast<std::size_t>(end - pos) < size)
+                throw Base::BadFormatError("Binary path data is truncated");
+        }
+
+    private:
+        const unsigned char *pos;
+        const unsigned char *end;
+    };
+}
+
+bool Toolpath::isBinary(const std::string &data)
+{
+    return data.compare(0, BinaryMagicSize, BinaryMagic) == 0;
+}
+
+void Toolpath::toBinary(std::string &data, bool float32, bool compress) const
+{
+    std::map<std::string, boost::uint32_t> names;
+    std::map<std::string, boost::uint32_t> keys;
+    std::vector<std::string> nameList;
+    std::vector<std::string> keyList;
+    std::string commands;
+    std::vector<boost::uint32_t> valueKeys;
+    std::vector<double> values;
+    for (std::vector<Command*>::const_iterator it = vpcCommands.begin(); it != vpcCommands.end(); ++it) {
+        const Command &cmd = **it;
+        std::map<std::string, boost::uint32_t>::iterator name = names.find(cmd.Name);
+        if (name == names.end()) {
+            name = names.insert(std::make_pair(cmd.Name, nameList.size())).first;
+            nameList.push_back(cmd.Name);
+        }
+        putVarint(commands, name->second);
+        putVarint(commands, cmd.Parameters.size());
+        for (std::map<std::string, double>::const_iterator param = cmd.Parameters.begin(); param != cmd.Parameters.end(); ++param) {
+            std::map<std::string, boost::uint32_t>::iterator key = keys.find(param->first);
+            if (key == keys.end()) {
+                key = keys.insert(std::make_pair(param->first, keyList.size())).first;
+                keyList.push_back(param->first);
+            }
+            putVarint(commands, key->second);
+            valueKeys.push_back(key->second);
+            values.push_back(param->second);
+        }
+    }
+
+    std::string payload;
+    putVarint(payload, nameList.size());
+    for (std::vector<std::string>::const_iterator it = nameList.begin(); it != nameList.end(); ++it)
+        putString(payload, *it);
+    putVarint(payload, keyList.size());
+    for (std::vector<std::string>::const_iterator it = keyList.begin(); it != keyList.end(); ++it)
+        putString(payload, *it);
+    payload += commands;
+
+    // the values are stored with the delta of their bits, the previous value of each key starts at 0
+    std::vector<boost::uint64_t> last(keyList.size(), 0);
+    payload.reserve(payload.size() + values.size() * (float32 ? 4 : 8));
+    for (std::size_t i = 0; i < values.size(); ++i) {
+        boost::uint64_t bits;
+        if (float32) {
+            float value = static_cast<float>(values[i]);
+            boost::uint32_t b;
+            std::memcpy(&b, &value, sizeof(b));
+            bits = b;
+        } else {
+            std::memcpy(&bits, &values[i], sizeof(bits));
+        }
+        boost::uint64_t delta = bits ^ last[valueKeys[i]];
+        last[valueKeys[i]] = bits;
+        if (float32)
+            put<boost::uint32_t>(payload, static_cast<boost::uint32_t>(delta));
+        else
+            put<boost::uint64_t>(payload, delta);
+    }
+
+    boost::uint32_t flags = BinaryDelta | (float32 ? BinaryFloat32 : 0);
+    std::string stored;
+    if (compress) {
+        uLongf size = compressBound(payload.size());
+        stored.resize(size);
+        if (::compress2(reinterpret_cast<Bytef*>(&stored[0]), &size,
+                    reinterpret_cast<const Bytef*>(payload.data()), payload.size(), Z_BEST_SPEED) != Z_OK)
+            throw Base::RuntimeError("Compressing path failed");
+        stored.resize(size);
+        flags |= BinaryZlib;
+    }
+    const std::string &body = compress ? stored : payload;
+
+    data.clear();
+    data.reserve(BinaryHeaderSize + body.size());
+    data.append(BinaryMagic, BinaryMagicSize);
+    put<boost::uint16_t>(data, BinaryVersion);
+    put<boost::uint32_t>(data, flags);
+    put<boost::uint32_t>(data, vpcCommands.size());
+    put<boost::uint32_t>(data, payload.size());
+    put<boost::uint32_t>(data, body.size());
+    data += body;
+}
+
+void Toolpath::setFromBinary(const std::string &data)
+{
+    if (!isBinary(data))
+        throw Base::BadFormatError("Not a binary path");
+    BinaryInput header(data.data() + BinaryMagicSize, data.size() - BinaryMagicSize);
+    boost::uint16_t version = header.get<boost::uint16_t>();
+    if (version > BinaryVersion)
+        throw Base::BadFormatError("Binary path was written by a newer version");
+    boost::uint32_t flags = header.get<boost::uint32_t>();
+    boost::uint32_t count = header.get<boost::uint32_t>();
+    boost::uint32_t size = header.get<boost::uint32_t>();
+    boost::uint32_t storedSize = header.get<boost::uint32_t>();
+    header.need(storedSize);
+
+    const char *stored = data.data() + BinaryHeaderSize;
+    std::string payload;
+    if (flags & BinaryZlib) {
+        // zlib doesn't compress by more than 1032:1, so a bigger size is corrupt
+        if (size / 1032 > storedSize)
+            throw Base::BadFormatError("Binary path data is corrupt");
+        payload.resize(size);
+        uLongf length = size;
+        if (size && (::uncompress(reinterpret_cast<Bytef*>(&payload[0]), &length,
+                    reinterpret_cast<const Bytef*>(stored), storedSize) != Z_OK || length != size))
+            throw Base::BadFormatError("Binary path data is corrupt");
+    } else {
+        payload.assign(stored, storedSize);
+    }
+
+    // all counts are checked against the data left before anything is allocated for them
+    BinaryInput input(payload.data(), payload.size());
+    std::vector<std::string> names(input.getCount(1));
+    for (std::size_t i = 0; i < names.size(); ++i)
+        names[i] = input.getString();
+    std::vector<std::string> keys(input.getCount(1));
+    for (std::size_t i = 0; i < keys.size(); ++i)
+        keys[i] = input.getString();
+
+    // each command takes at least its opcode and parameter count
+    input.need(static_cast<std::size_t>(count) * 2);
+    std::vector<std::size_t> opcodes(count);
+    std::vector<std::size_t> params;
+    std::vector<std::size_t> paramCounts(count);
+    for (std::size_t i = 0; i < count; ++i) {
+        opcodes[i] = input.getVarint();
+        paramCounts[i] = input.getCount(1);
+        if (opcodes[i] >= names.size())
+            throw Base::BadFormatError("Binary path data is corrupt");
+        for (std::size_t j = 0; j < paramCounts[i]; ++j) {
+            params.push_back(input.getVarint());
+            if (params.back() >= keys.size())
+                throw Base::BadFormatError("Binary path data is corrupt");
+        }
+    }
+    input.need(params.size() * (flags & BinaryFloat32 ? 4 : 8));
+
+    std::vector<Command*> commands;
+    commands.reserve(count);
+    std::vector<boost::uint64_t> last(keys.size(), 0);
+    std::size_t p = 0;
+    for (std::size_t i = 0; i < count; ++i) {
+        Command *cmd = new Command();
+        cmd->Name = names[opcodes[i]];
+        for (std::size_t j = 0; j < paramCounts[i]; ++j, ++p) {
+            std::size_t key = params[p];
+            boost::uint64_t bits = flags & BinaryFloat32 ? input.get<boost::uint32_t>() : input.get<boost::uint64_t>();
+            if (flags & BinaryDelta)
+                bits ^= last[key];
+            last[key] = bits;
+            double value;
+            if (flags & BinaryFloat32) {
+                boost::uint32_t b = static_cast<boost::uint32_t>(bits);
+                float f;
+                std::memcpy(&f, &b, sizeof(f));
+                value = f;
+            } else {
+                std::memcpy(&value, &bits, sizeof(value));
+            }
+            cmd->Parameters[keys[key]] = value;
+        }
+        commands.push_back(cmd);
+    }
+
+    clear();
+    vpcCommands.swap(commands);
+    recalculate();
+}
+
+bool Toolpath::binaryDocFiles(void)
+{
+    ParameterGrp::handle hGrp = App::GetApplication().GetParameterGroupByPath("User parameter:BaseApp/Preferences/Mod/Path");
+    return hGrp->GetBool("BinaryPathFormat", false);
+}
+
 void Toolpath::Save (Writer &writer) const
 {
     if (writer.isForceXML()) {
@@ -290,16 +1022,25 @@ void Toolpath::Save (Writer &writer) const
         writer.decInd();
         writer.Stream() << writer.ind() << "</Path>" << std::endl;
     } else {
+        const char *extension = binaryDocFiles() ? ".path" : ".nc";
         writer.Stream() << writer.ind()
-            << "<Path file=\"" << writer.addFile((writer.ObjectName+".nc").c_str(), this) << "\"/>" << std::endl;
+            << "<Path file=\"" << writer.addFile((writer.ObjectName+extension).c_str(), this) << "\"/>" << std::endl;
     }
 }
 
 void Toolpath::SaveDocFile (Base::Writer &writer) const
 {
-    if (toGCode().empty())
+    if (binaryDocFiles()) {
+        ParameterGrp::handle hGrp = App::GetApplication().GetParameterGroupByPath("User parameter:BaseApp/Preferences/Mod/Path");
+        std::string data;
+        toBinary(data, hGrp->GetBool("BinaryPathFloat32", false), hGrp->GetBool("BinaryPathCompression", true));
+        writer.Stream().write(data.data(), data.size());
+        return;
+    }
+    std::string gcode = toGCode();
+    if (gcode.empty())
         return;
-    writer.Stream() << toGCode();
+    writer.Stream() << gcode;
 }
 
 void Toolpath::Restore(XMLReader &reader)
@@ -315,14 +1056,26 @@ void Toolpath::Restore(XMLReader &reader)
 
 void Toolpath::RestoreDocFile(Base::Reader &reader)
 {
+    std::string data((std::istreambuf_iterator<char>(reader)), std::istreambuf_iterator<char>());
+    setFromDocFile(data);
+}
+
+void Toolpath::setFromDocFile(const std::string &data)
+{
+    // binary or text, independent of the file name and the current preferences
+    if (isBinary(data)) {
+        setFromBinary(data);
+        return;
+    }
+
+    std::istringstream text(data);
     std::string gcode;
     std::string line;
-    while (reader >> line) { 
+    while (text >> line) {
         gcode += line;
         gcode += " ";
     }
     setFromGCode(gcode);
-
 }
 
 
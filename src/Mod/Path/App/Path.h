@@ -27,8 +27,10 @@
 #include "Command.h"
 //#include "Mod/Robot/App/kdl_cp/path_composite.hpp"
 //#include "Mod/Robot/App/kdl_cp/frames_io.hpp"
+#include <Base/BoundBox.h>
 #include <Base/Persistence.h>
 #include <Base/Vector3D.h>
+#include <iosfwd>
 
 namespace Path
 {
@@ -58,10 +60,29 @@ namespace Path
             void addCommand(const Command &Cmd); // adds a command at the end
             void insertCommand(const Command &Cmd, int); // inserts a command
             void deleteCommand(int); // deletes a command
-            double getLength(void); // return the Length (mm) of the Path
+            double getLength(void) const; // return the Length (mm) of the Path
             void recalculate(void); // recalculates the points
             void setFromGCode(const std::string); // sets the path from the contents of the given GCode string
             std::string toGCode(void) const; // gets a gcode string representation from the Path
+            // reads gcode from a stream in chunks, see Path.readGCode() for the options, returns the number of skipped lines
+            std::size_t readGCode(std::istream &stream, bool comments=true, double preview=0.0, std::vector<int> *lines=0);
+
+            // bulk access to the parameters, one row of the given axes per command
+            void getArrays(const std::string &axes, std::vector<std::string> &names, std::vector<int> &opcodes,
+                    std::vector<double> &values, std::vector<unsigned char> &mask) const;
+            void setFromArrays(const std::vector<std::string> &names, const int *opcodes, std::size_t count,
+                    const std::string &axes, const double *values, const unsigned char *mask = 0,
+                    const Toolpath *tmpl = 0);
+            static bool isModalAxis(char axis); // returns true if the value of axis persists across commands
+            // compact binary representation, float32 rounds all values, compress uses zlib
+            void toBinary(std::string &data, bool float32=false, bool compress=true) const;
+            void setFromBinary(const std::string &data);
+            static bool isBinary(const std::string &data); // returns true if data was created by toBinary()
+            static bool binaryDocFiles(void); // returns true if documents are saved with the binary representation
+            void setFromDocFile(const std::string &data); // sets the path from the contents of a document file, binary or text
+            // tool position at the start of command pos, getSize() for the end of the path, cached until the path changes
+            const Base::Vector3d &getPosition(unsigned int pos) const;
+            Base::BoundBox3d getBoundBox(void) const; // bounding box of the positions after each command
             
             // shortcut functions
             unsigned int getSize(void) const{return vpcCommands.size();}
@@ -70,6 +91,7 @@ namespace Path
         
         protected:
             std::vector<Command*> vpcCommands;
+            mutable std::vector<Base::Vector3d> vPositions; // modal X, Y and Z before each command and at the end
             //KDL::Path_Composite *pcPath;
             
         /*
@@ -31,6 +31,11 @@
 
 #include "CommandPy.h"
 
+#include <Base/VectorPy.h>
+
+#include <cstdint>
+#include <cstring>
+
 using namespace Path;
 
 // returns a string which represents the object e.g. when printed in python
@@ -199,6 +204,164 @@ PyObject* PathPy::setFromGCode(PyObject * args)
     throw Py::Exception("Argument must be a string");
 }
 
+PyObject* PathPy::toBinary(PyObject * args, PyObject * keywds)
+{
+    PyObject *pFloat32 = Py_False;
+    PyObject *pCompress = Py_True;
+    static char *kwlist[] = {"float32", "compress", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, keywds, "|O!O!", kwlist,
+                &PyBool_Type, &pFloat32, &PyBool_Type, &pCompress))
+        return 0;
+
+    std::string data;
+    PY_TRY {
+        getToolpathPtr()->toBinary(data, PyObject_IsTrue(pFloat32) ? true : false, PyObject_IsTrue(pCompress) ? true : false);
+    } PY_CATCH
+    return PyBytes_FromStringAndSize(data.data(), data.size());
+}
+
+PyObject* PathPy::getPosition(PyObject * args)
+{
+    int index;
+    if (!PyArg_ParseTuple(args, "i", &index))
+        return 0;
+    if (index < 0 || index > static_cast<int>(getToolpathPtr()->getSize())) {
+        PyErr_SetString(PyExc_IndexError, "Index not in range");
+        return 0;
+    }
+    return new Base::VectorPy(new Base::Vector3d(getToolpathPtr()->getPosition(index)));
+}
+
+// bulk methods
+
+PyObject* PathPy::toArrays(PyObject * args)
+{
+    char *axes = "XYZIJKF";
+    if (!PyArg_ParseTuple(args, "|s", &axes))
+        return 0;
+
+    std::vector<std::string> names;
+    std::vector<int> opcodes;
+    std::vector<double> values;
+    std::vector<unsigned char> mask;
+    std::vector<int32_t> codes;
+    PY_TRY {
+        getToolpathPtr()->getArrays(axes, names, opcodes, values, mask);
+        codes.assign(opcodes.begin(), opcodes.end());
+    } PY_CATCH
+
+    Py::List list;
+    for (std::vector<std::string>::const_iterator it = names.begin(); it != names.end(); ++it)
+        list.append(Py::String(*it));
+
+    Py::Tuple tuple(4);
+    tuple.setItem(0, list);
+    tuple.setItem(1, Py::asObject(PyBytes_FromStringAndSize(
+                    codes.empty() ? "" : reinterpret_cast<const char*>(&codes[0]), codes.size() * sizeof(int32_t))));
+    tuple.setItem(2, Py::asObject(PyBytes_FromStringAndSize(
+                    values.empty() ? "" : reinterpret_cast<const char*>(&values[0]), values.size() * sizeof(double))));
+    tuple.setItem(3, Py::asObject(PyBytes_FromStringAndSize(
+                    mask.empty() ? "" : reinterpret_cast<const char*>(&mask[0]), mask.size())));
+    return Py::new_reference_to(tuple);
+}
+
+namespace {
+    // RAII wrapper around the buffer protocol
+    class Buffer {
+    public:
+        Buffer() : valid(false) {}
+        ~Buffer() {
+            if (valid)
+                PyBuffer_Release(&view);
+        }
+        bool get(PyObject *obj, const char *name) {
+            if (PyObject_GetBuffer(obj, &view, PyBUF_C_CONTIGUOUS) != 0) {
+                PyErr_Format(PyExc_TypeError, "%s must be a contiguous buffer", name);
+                return false;
+            }
+            valid = true;
+            return true;
+        }
+        Py_buffer view;
+        bool valid;
+    };
+}
+
+PyObject* PathPy::setFromBinary(PyObject * args)
+{
+    PyObject *pData;
+    if (!PyArg_ParseTuple(args, "O", &pData))
+        return 0;
+
+    Buffer data;
+    if (!data.get(pData, "data"))
+        return 0;
+    PY_TRY {
+        getToolpathPtr()->setFromBinary(std::string(static_cast<const char*>(data.view.buf), data.view.len));
+    } PY_CATCH
+    Py_Return;
+}
+
+PyObject* PathPy::setFromArrays(PyObject * args, PyObject * keywds)
+{
+    PyObject *pNames, *pOpcodes, *pValues;
+    PyObject *pMask = Py_None;
+    PyObject *pTemplate = Py_None;
+    char *axes = "XYZIJKF";
+    static char *kwlist[] = {"names", "opcodes", "values", "mask", "axes", "template", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, keywds, "OOO|OsO", kwlist,
+                &pNames, &pOpcodes, &pValues, &pMask, &axes, &pTemplate))
+        return 0;
+
+    const Toolpath *tmpl = 0;
+    if (pTemplate != Py_None) {
+        if (!PyObject_TypeCheck(pTemplate, &(PathPy::Type))) {
+            PyErr_SetString(PyExc_TypeError, "template must be a Path");
+            return 0;
+        }
+        tmpl = static_cast<PathPy*>(pTemplate)->getToolpathPtr();
+    }
+
+    std::vector<std::string> names;
+    PY_TRY {
+        Py::Sequence seq(pNames);
+        for (Py::Sequence::iterator it = seq.begin(); it != seq.end(); ++it)
+            names.push_back(Py::String(*it).as_std_string());
+    } PY_CATCH
+
+    Buffer opcodes, values, mask;
+    if (!opcodes.get(pOpcodes, "opcodes") || !values.get(pValues, "values"))
+        return 0;
+    if (pMask != Py_None && !mask.get(pMask, "mask"))
+        return 0;
+
+    const std::size_t k = strlen(axes);
+    const std::size_t count = opcodes.view.len / sizeof(int32_t);
+    if (opcodes.view.len % sizeof(int32_t)) {
+        PyErr_SetString(PyExc_ValueError, "opcodes must be a buffer of int32");
+        return 0;
+    }
+    if (static_cast<std::size_t>(values.view.len) != count * k * sizeof(double)) {
+        PyErr_SetString(PyExc_ValueError, "values must be a buffer of float64 with one row of axes per opcode");
+        return 0;
+    }
+    if (mask.valid && static_cast<std::size_t>(mask.view.len) != count * k) {
+        PyErr_SetString(PyExc_ValueError, "mask must be a buffer of uint8 with one row of axes per opcode");
+        return 0;
+    }
+
+    PY_TRY {
+        const int32_t *codes = static_cast<const int32_t*>(opcodes.view.buf);
+        std::vector<int> ops(codes, codes + count);
+        getToolpathPtr()->setFromArrays(names, ops.empty() ? 0 : &ops[0], count, axes,
+                static_cast<const double*>(values.view.buf),
+                mask.valid ? static_cast<const unsigned char*>(mask.view.buf) : 0,
+                tmpl);
+    } PY_CATCH
+
+    Py_Return;
+}
+
 // custom attributes get/set
 
 PyObject *PathPy::getCustomAttributes(const char* /*attr*/) const
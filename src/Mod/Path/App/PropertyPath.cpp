@@ -24,6 +24,7 @@
 #include "PreCompiled.h"
 
 #ifndef _PreComp_
+# include <iterator>
 # include <sstream>
 #endif
 
@@ -45,6 +46,7 @@ using namespace Path;
 TYPESYSTEM_SOURCE(Path::PropertyPath, App::Property);
 
 PropertyPath::PropertyPath()
+    : _Summary(false), _Size(0), _Length(0)
 {
 }
 
@@ -56,18 +58,56 @@ void PropertyPath::setValue(const Toolpath& pa)
 {
     aboutToSetValue();
     _Path = pa;
+    _Data.clear();
     hasSetValue();
 }
 
 
 const Toolpath &PropertyPath::getValue(void)const 
 {
+    load();
     return _Path;
 }
 
+void PropertyPath::load(void) const
+{
+    if (_Data.empty())
+        return;
+    std::string data;
+    data.swap(_Data);
+    try {
+        _Path.setFromDocFile(data);
+    }
+    catch (const Base::Exception &e) {
+        _Path.clear();
+        Base::Console().Error("Failed to restore path: %s\n", e.what());
+    }
+}
+
+unsigned int PropertyPath::getSize(void) const
+{
+    if (!_Data.empty() && _Summary)
+        return _Size;
+    return getValue().getSize();
+}
+
+double PropertyPath::getLength(void) const
+{
+    if (!_Data.empty() && _Summary)
+        return _Length;
+    return getValue().getLength();
+}
+
+Base::BoundBox3d PropertyPath::getBoundBox(void) const
+{
+    if (!_Data.empty() && _Summary)
+        return _BoundBox;
+    return getValue().getBoundBox();
+}
+
 PyObject *PropertyPath::getPyObject(void)
 {
-    return new PathPy(new Toolpath(_Path));
+    return new PathPy(new Toolpath(getValue()));
 }
 
 void PropertyPath::setPyObject(PyObject *value)
@@ -85,27 +125,61 @@ void PropertyPath::setPyObject(PyObject *value)
 
 App::Property *PropertyPath::Copy(void) const
 {
+    // copies of a path that was not parsed yet, eg for undo, stay unparsed
     PropertyPath *prop = new PropertyPath();
     prop->_Path = this->_Path;
+    prop->_Data = this->_Data;
+    prop->_Summary = this->_Summary;
+    prop->_Size = this->_Size;
+    prop->_Length = this->_Length;
+    prop->_BoundBox = this->_BoundBox;
  
     return prop;
 }
 
 void PropertyPath::Paste(const App::Property &from)
 {
+    const PropertyPath &other = dynamic_cast<const PropertyPath&>(from);
     aboutToSetValue();
-    _Path = dynamic_cast<const PropertyPath&>(from)._Path;
+    _Path = other._Path;
+    _Data = other._Data;
+    _Summary = other._Summary;
+    _Size = other._Size;
+    _Length = other._Length;
+    _BoundBox = other._BoundBox;
     hasSetValue();
 }
 
 unsigned int PropertyPath::getMemSize (void) const
 {
+    if (!_Data.empty())
+        return _Data.size();
     return _Path.getMemSize();
 }
 
 void PropertyPath::Save (Base::Writer &writer) const
 {
-    _Path.Save(writer);
+    if (writer.isForceXML()) {
+        getValue().Save(writer);
+        return;
+    }
+
+    // a path that was not parsed yet is saved as it was restored, without a
+    // summary if there was none, so saving doesn't parse it
+    bool binary = _Data.empty() ? Toolpath::binaryDocFiles() : Toolpath::isBinary(_Data);
+    const char *extension = binary ? ".path" : ".nc";
+    writer.Stream() << writer.ind()
+        << "<Path file=\"" << writer.addFile((writer.ObjectName+extension).c_str(), this) << "\"";
+    if (_Data.empty() || _Summary) {
+        Base::BoundBox3d bbox = getBoundBox();
+        writer.Stream() << " count=\"" << getSize() << "\" length=\"" << getLength() << "\"";
+        if (bbox.IsValid()) {
+            writer.Stream()
+                << " minX=\"" << bbox.MinX << "\" minY=\"" << bbox.MinY << "\" minZ=\"" << bbox.MinZ << "\""
+                << " maxX=\"" << bbox.MaxX << "\" maxY=\"" << bbox.MaxY << "\" maxZ=\"" << bbox.MaxZ << "\"";
+        }
+    }
+    writer.Stream() << "/>" << std::endl;
 }
 
 void PropertyPath::Restore(Base::XMLReader &reader)
@@ -113,15 +187,32 @@ void PropertyPath::Restore(Base::XMLReader &reader)
     reader.readElement("Path");
     std::string file (reader.getAttribute("file") );
 
+    // documents saved before the summary was added are parsed to get it
+    _Summary = reader.hasAttribute("count") && reader.hasAttribute("length");
+    if (_Summary) {
+        _Size = reader.getAttributeAsUnsigned("count");
+        _Length = reader.getAttributeAsFloat("length");
+        _BoundBox = Base::BoundBox3d();
+        if (reader.hasAttribute("minX")) {
+            _BoundBox = Base::BoundBox3d(
+                    reader.getAttributeAsFloat("minX"), reader.getAttributeAsFloat("minY"), reader.getAttributeAsFloat("minZ"),
+                    reader.getAttributeAsFloat("maxX"), reader.getAttributeAsFloat("maxY"), reader.getAttributeAsFloat("maxZ"));
+        }
+    }
+
     if (!file.empty()) {
         // initate a file read
         reader.addFile(file.c_str(),this);
     }
 }
 
-void PropertyPath::SaveDocFile (Base::Writer &) const
+void PropertyPath::SaveDocFile (Base::Writer &writer) const
 {
-    // does nothing
+    if (!_Data.empty()) {
+        writer.Stream().write(_Data.data(), _Data.size());
+        return;
+    }
+    _Path.SaveDocFile(writer);
 }
 
 void PropertyPath::RestoreDocFile(Base::Reader &reader)
@@ -136,8 +227,11 @@ void PropertyPath::RestoreDocFile(Base::Reader &reader)
         obj->setStatus(App::ObjectStatus::Restore, true);
     }
 
+    // only keep the contents, the path is parsed when it is accessed the first time
+    std::string data((std::istreambuf_iterator<char>(reader)), std::istreambuf_iterator<char>());
     aboutToSetValue();
-    _Path.RestoreDocFile(reader);
+    _Path.clear();
+    _Data.swap(data);
     hasSetValue();
 
     if (obj) {
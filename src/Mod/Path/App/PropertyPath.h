@@ -48,6 +48,18 @@ public:
     const Toolpath &getValue(void) const;
     //@}
 
+    /** @name Summary
+     * A restored path is only parsed when its value is accessed for the first time,
+     * the summary saved with the document is available without parsing it.
+     */
+    //@{
+    /// returns false if the restored path was not parsed yet
+    bool isLoaded(void) const {return _Data.empty();}
+    unsigned int getSize(void) const;
+    double getLength(void) const;
+    Base::BoundBox3d getBoundBox(void) const;
+    //@}
+
     /** @name Python interface */
     //@{
     PyObject* getPyObject(void);
@@ -67,7 +79,17 @@ public:
     //@}
 
 private:
-    Toolpath _Path;
+    void load(void) const;
+
+private:
+    mutable Toolpath _Path;
+    // contents of the document file while the path is not parsed
+    mutable std::string _Data;
+    // summary of _Data, if it was saved with the document
+    bool _Summary;
+    unsigned int _Size;
+    double _Length;
+    Base::BoundBox3d _BoundBox;
 };
 
 
@@ -39,6 +39,11 @@
 # include <Inventor/details/SoLineDetail.h>
 # include <Inventor/nodes/SoSwitch.h>
 # include <Inventor/nodes/SoAnnotation.h>
+# include <Inventor/nodes/SoCallback.h>
+# include <Inventor/actions/SoGLRenderAction.h>
+# include <Inventor/elements/SoModelMatrixElement.h>
+# include <Inventor/elements/SoViewVolumeElement.h>
+# include <Inventor/elements/SoViewportRegionElement.h>
 # include <QFile>
 #endif
 
@@ -51,6 +56,7 @@
 #include <Base/FileInfo.h>
 #include <Base/Stream.h>
 #include <Base/Console.h>
+#include <Base/BoundBox.h>
 #include <Base/Parameter.h>
 #include <Gui/BitmapFactory.h>
 #include <Gui/SoFCBoundingBox.h>
@@ -59,6 +65,7 @@
 
 
 #define ARC_MIN_SEGMENTS   20.0  // minimum # segments to interpolate an arc
+#define LOD_PIXELS       2000.0  // the simplified path deviates less than a pixel if the path spans up to this many pixels
 
 #ifndef M_PI
     #define M_PI 3.14159265358979323846
@@ -77,7 +84,8 @@ using namespace PartGui;
 PROPERTY_SOURCE(PathGui::ViewProviderPath, Gui::ViewProviderGeometryObject)
 
 ViewProviderPath::ViewProviderPath()
-    :pt0Index(-1),blockPropertyChange(false),edgeStart(-1),coordStart(-1),coordEnd(-1)
+    :pt0Index(-1),blockPropertyChange(false),edgeStart(-1),coordStart(-1),coordEnd(-1),visualPending(false)
+    ,lodDeviation(0),lodActive(false)
 {
     ParameterGrp::handle hGrp = App::GetApplication().GetParameterGroupByPath("User parameter:BaseApp/Preferences/Mod/Path");
     unsigned long lcol = hGrp->GetUnsigned("DefaultNormalPathColor",11141375UL); // dark green (0,170,0)
@@ -93,6 +101,8 @@ ViewProviderPath::ViewProviderPath()
     int markerSize = hGrp->GetInt("DefaultPathMarkerSize",4);
     ADD_PROPERTY_TYPE(MarkerSize,(markerSize),"Path",App::Prop_None,"The point size of the markers");
     ADD_PROPERTY_TYPE(ShowNodes,(false),"Path",App::Prop_None,"Turns the display of nodes on/off");
+    bool lod = hGrp->GetBool("DefaultPathLevelOfDetail",true);
+    ADD_PROPERTY_TYPE(LevelOfDetail,(lod),"Path",App::Prop_None,"Show a simplified path of large paths when zoomed out");
 
 
     ShowCountConstraints.LowerBound=0;
@@ -163,6 +173,28 @@ ViewProviderPath::ViewProviderPath()
     pcArrowSwitch->addChild(pArrowGroup);
     pcArrowSwitch->whichChild = -1;
 
+    pcLodSwitch = new SoSwitch();
+    pcLodSwitch->ref();
+    pcLodSwitch->whichChild = 0;
+
+    pcLodCallback = new SoCallback();
+    pcLodCallback->ref();
+    pcLodCallback->setCallback(levelOfDetailCallback, this);
+
+    pcLodCoords = new SoCoordinate3();
+    pcLodCoords->ref();
+
+    pcLodLines = new PartGui::SoBrepEdgeSet();
+    pcLodLines->ref();
+    pcLodLines->coordIndex.setNum(0);
+
+    pcLodColor = new SoMaterial;
+    pcLodColor->ref();
+
+    pcLodMatBind = new SoMaterialBinding;
+    pcLodMatBind->ref();
+    pcLodMatBind->value = SoMaterialBinding::OVERALL;
+
     NormalColor.touch();
     MarkerColor.touch();
 
@@ -186,6 +218,12 @@ ViewProviderPath::~ViewProviderPath()
     pcMatBind->unref();
     pcMarkerColor->unref();
     pcArrowSwitch->unref();
+    pcLodSwitch->unref();
+    pcLodCallback->unref();
+    pcLodCoords->unref();
+    pcLodLines->unref();
+    pcLodColor->unref();
+    pcLodMatBind->unref();
 }
 
 void ViewProviderPath::attach(App::DocumentObject *pcObj)
@@ -200,6 +238,17 @@ void ViewProviderPath::attach(App::DocumentObject *pcObj)
     linesep->addChild(pcLineCoords);
     linesep->addChild(pcLines);
 
+    // Draw simplified trajectory lines
+    SoSeparator* lodsep = new SoSeparator;
+    lodsep->addChild(pcLodColor);
+    lodsep->addChild(pcLodMatBind);
+    lodsep->addChild(pcDrawStyle);
+    lodsep->addChild(pcLodCoords);
+    lodsep->addChild(pcLodLines);
+
+    pcLodSwitch->addChild(linesep);
+    pcLodSwitch->addChild(lodsep);
+
     // Draw markers
     SoSeparator* markersep = new SoSeparator;
     SoPointSet* marker = new SoPointSet;
@@ -211,7 +260,8 @@ void ViewProviderPath::attach(App::DocumentObject *pcObj)
 
     SoSeparator* pcPathRoot = new SoSeparator();
     pcPathRoot->addChild(pcMarkerSwitch);
-    pcPathRoot->addChild(linesep);
+    pcPathRoot->addChild(pcLodCallback);
+    pcPathRoot->addChild(pcLodSwitch);
     pcPathRoot->addChild(pcArrowSwitch);
 
     addDisplayMaskMode(pcPathRoot, "Waypoints");
@@ -239,16 +289,24 @@ std::string ViewProviderPath::getElement(const SoDetail* detail) const
 {
     if(edgeStart>=0 && detail && detail->getTypeId() == SoLineDetail::getClassTypeId()) {
         const SoLineDetail* line_detail = static_cast<const SoLineDetail*>(detail);
-        int index = line_detail->getLineIndex()+edgeStart;
-        if(index>=0 && index<(int)edge2Command.size()) {
-            index = edge2Command[index];
+        int index = -1;
+        if(pcLodSwitch->whichChild.getValue() == 1) {
+            // the simplified path, each segment belongs to the command of its end point
+            int pt = line_detail->getPoint1()->getCoordinateIndex();
+            if(pt>=0 && pt<(int)lodPoint2Command.size())
+                index = lodPoint2Command[pt];
+        } else {
+            index = line_detail->getLineIndex()+edgeStart;
+            index = (index>=0 && index<(int)edge2Command.size()) ? edge2Command[index] : -1;
+        }
+        if(index>=0) {
             Path::Feature* pcPathObj = static_cast<Path::Feature*>(pcObject);
             const Toolpath &tp = pcPathObj->Path.getValue();
             if(index<(int)tp.getSize()) {
                 std::stringstream str;
                 str << index+1 << " " << tp.getCommand(index).toGCode(6,false);
                 pt0Index = line_detail->getPoint0()->getCoordinateIndex();
-                if(pt0Index<0 || pt0Index>=pcLineCoords->point.getNum())
+                if(pt0Index<0 || pt0Index>=activeCoords()->point.getNum())
                     pt0Index = -1;
                 return str.str();
             }
@@ -263,7 +321,12 @@ SoDetail* ViewProviderPath::getDetail(const char* subelement) const
 {
     int index = std::atoi(subelement);
     SoDetail* detail = 0;
-    if (index>0 && index<=(int)command2Edge.size()) {
+    if (pcLodSwitch->whichChild.getValue() == 1) {
+        if (index>0 && index<=(int)command2LodEdge.size() && command2LodEdge[index-1]>=0) {
+            detail = new SoLineDetail();
+            static_cast<SoLineDetail*>(detail)->setLineIndex(command2LodEdge[index-1]);
+        }
+    } else if (index>0 && index<=(int)command2Edge.size()) {
         index = command2Edge[index-1];
         if(index>=0 && edgeStart>=0 && edgeStart<=index) {
             detail = new SoLineDetail();
@@ -286,7 +349,7 @@ void ViewProviderPath::onSelectionChanged(const Gui::SelectionChanges& msg) {
             Path::Feature* pcPathObj = static_cast<Path::Feature*>(pcObject);
             Base::Vector3d pt = pcPathObj->Placement.getValue().inverse().toMatrix()*
                                     Base::Vector3d(msg.x,msg.y,msg.z);
-            const SbVec3f &ptTo = *pcLineCoords->point.getValues(pt0Index);
+            const SbVec3f &ptTo = *activeCoords()->point.getValues(pt0Index);
             SbVec3f ptFrom(pt.x,pt.y,pt.z);
             if(ptFrom != ptTo) {
                 pcArrowTransform->pointAt(ptFrom,ptTo);
@@ -307,17 +370,17 @@ void ViewProviderPath::onChanged(const App::Property* prop)
     } else if (prop == &MarkerSize) {
         pcMarkerStyle->pointSize = MarkerSize.getValue();
     } else if (prop == &NormalColor) {
-        if (colorindex.size() > 0 && coordStart>=0 && coordStart<(int)colorindex.size()) {
-            const App::Color& c = NormalColor.getValue();
-            ParameterGrp::handle hGrp = App::GetApplication().GetParameterGroupByPath("User parameter:BaseApp/Preferences/Mod/Path");
-            unsigned long rcol = hGrp->GetUnsigned("DefaultRapidPathColor",2852126975UL); // dark red (170,0,0)
-            float rr,rg,rb;
-            rr = ((rcol >> 24) & 0xff) / 255.0; rg = ((rcol >> 16) & 0xff) / 255.0; rb = ((rcol >> 8) & 0xff) / 255.0;
+        const App::Color& c = NormalColor.getValue();
+        ParameterGrp::handle hGrp = App::GetApplication().GetParameterGroupByPath("User parameter:BaseApp/Preferences/Mod/Path");
+        unsigned long rcol = hGrp->GetUnsigned("DefaultRapidPathColor",2852126975UL); // dark red (170,0,0)
+        float rr,rg,rb;
+        rr = ((rcol >> 24) & 0xff) / 255.0; rg = ((rcol >> 16) & 0xff) / 255.0; rb = ((rcol >> 8) & 0xff) / 255.0;
 
-            unsigned long pcol = hGrp->GetUnsigned("DefaultProbePathColor",4293591295UL); // yellow (255,255,5)
-            float pr,pg,pb;
-            pr = ((pcol >> 24) & 0xff) / 255.0; pg = ((pcol >> 16) & 0xff) / 255.0; pb = ((pcol >> 8) & 0xff) / 255.0;
+        unsigned long pcol = hGrp->GetUnsigned("DefaultProbePathColor",4293591295UL); // yellow (255,255,5)
+        float pr,pg,pb;
+        pr = ((pcol >> 24) & 0xff) / 255.0; pg = ((pcol >> 16) & 0xff) / 255.0; pb = ((pcol >> 8) & 0xff) / 255.0;
 
+        if (colorindex.size() > 0 && coordStart>=0 && coordStart<(int)colorindex.size()) {
             pcMatBind->value = SoMaterialBinding::PER_PART;
             // resizing and writing the color vector:
             
@@ -339,6 +402,24 @@ void ViewProviderPath::onChanged(const App::Property* prop)
             }
             pcLineColor->diffuseColor.finishEditing();
         }
+        if (lodColorindex.size() > 0) {
+            pcLodMatBind->value = SoMaterialBinding::PER_PART;
+            pcLodColor->diffuseColor.setNum(lodColorindex.size());
+            SbColor* colors = pcLodColor->diffuseColor.startEditing();
+            for(std::size_t i=0;i<lodColorindex.size();i++) {
+                switch(lodColorindex[i]){
+                case 0:
+                    colors[i] = SbColor(rr,rg,rb);
+                    break;
+                case 1:
+                    colors[i] = SbColor(c.r,c.g,c.b);
+                    break;
+                default:
+                    colors[i] = SbColor(pr,pg,pb);
+                }
+            }
+            pcLodColor->diffuseColor.finishEditing();
+        }
     } else if (prop == &MarkerColor) {
         const App::Color& c = MarkerColor.getValue();
         pcMarkerColor->rgb.setValue(c.r,c.g,c.b);
@@ -349,6 +430,14 @@ void ViewProviderPath::onChanged(const App::Property* prop)
         if (vis) hide();
         updateVisual();
         if (vis) show();
+    } else if (prop == &LevelOfDetail) {
+        if(pcObject) {
+            if(isShow())
+                updateVisual(true);
+            else
+                visualPending = true;
+            NormalColor.touch();
+        }
     } else if (prop == &StartPosition) {
         if(pcLineCoords->point.getNum()){
             const Base::Vector3d &pt = StartPosition.getValue();
@@ -370,6 +459,12 @@ void ViewProviderPath::showBoundingBox(bool show) {
     inherited::showBoundingBox(show);
 }
 
+void ViewProviderPath::show(void) {
+    if(visualPending)
+        updateVisual(true);
+    inherited::show();
+}
+
 unsigned long ViewProviderPath::getBoundColor() const {
     ParameterGrp::handle hGrp = App::GetApplication().GetParameterGroupByPath("User parameter:BaseApp/Preferences/Mod/Path");
     if(SelectionStyle.getValue() == 0 || !Selectable.getValue())
@@ -401,7 +496,11 @@ void ViewProviderPath::updateData(const App::Property* prop)
 {
     Path::Feature* pcPathObj = static_cast<Path::Feature*>(pcObject);
     if(prop == &pcPathObj->Path) {
-        updateVisual(true);
+        // hidden paths, eg all of them while a document is restored, aren't parsed until shown
+        if(isShow())
+            updateVisual(true);
+        else
+            visualPending = true;
         return;
     }
     inherited::updateData(prop);
@@ -411,10 +510,12 @@ void ViewProviderPath::hideSelection() {
     // Clear selection
     SoSelectionElementAction saction(Gui::SoSelectionElementAction::None);
     saction.apply(pcLines);
+    saction.apply(pcLodLines);
 
     // Clear highlighting
     SoHighlightElementAction haction;
     haction.apply(pcLines);
+    haction.apply(pcLodLines);
 
     // Hide arrow
     pcArrowSwitch->whichChild = -1;
@@ -422,15 +523,26 @@ void ViewProviderPath::hideSelection() {
 
 void ViewProviderPath::updateVisual(bool rebuild) {
 
+    if(!rebuild && visualPending)
+        return;
+
     hideSelection();
     
     updateShowConstraints();
 
     pcLines->coordIndex.deleteValues(0);
+    lodActive = false;
+    pcLodSwitch->whichChild = 0;
 
     if(rebuild) {
+        visualPending = false;
         pcLineCoords->point.deleteValues(0);
         pcMarkerCoords->point.deleteValues(0);
+        pcLodCoords->point.deleteValues(0);
+        pcLodLines->coordIndex.deleteValues(0);
+        lodColorindex.clear();
+        lodPoint2Command.clear();
+        command2LodEdge.clear();
 
         command2Edge.clear();
         edge2Command.clear();
@@ -624,6 +736,10 @@ void ViewProviderPath::updateVisual(bool rebuild) {
                 pcMarkerCoords->point.set1Value(i,markers[i].x,markers[i].y,markers[i].z);
 
             recomputeBoundingBox();
+
+            ParameterGrp::handle hPath = App::GetApplication().GetParameterGroupByPath("User parameter:BaseApp/Preferences/Mod/Path");
+            if(LevelOfDetail.getValue() && (long)points.size() >= hPath->GetInt("PathLevelOfDetailThreshold",100000))
+                updateLevelOfDetail(points);
         }
     }
 
@@ -666,9 +782,152 @@ void ViewProviderPath::updateVisual(bool rebuild) {
     pcLines->coordIndex.finishEditing();
     assert(i==count);
 
+    // the simplified path only stands in for the entire path
+    lodActive = LevelOfDetail.getValue() && !lodColorindex.empty()
+        && edgeStart==0 && edgeEnd==(int)edgeIndices.size();
+
     NormalColor.touch();
 }
 
+namespace {
+    // Douglas-Peucker simplification of points[first..last], appends the indices of the points kept except the last
+    void simplify(const std::deque<Base::Vector3d> &points, int first, int last, double tolerance, std::vector<int> &keep)
+    {
+        std::vector<char> mark(last-first+1, 0);
+        mark.front() = mark.back() = 1;
+        std::vector<std::pair<int,int> > stack(1, std::make_pair(first, last));
+        const double tolerance2 = tolerance*tolerance;
+        while(!stack.empty()) {
+            int a = stack.back().first;
+            int b = stack.back().second;
+            stack.pop_back();
+            if(b-a < 2)
+                continue;
+            const Base::Vector3d &p0 = points[a];
+            Base::Vector3d d = points[b] - p0;
+            double len2 = d.Sqr();
+            double worst = -1;
+            int index = -1;
+            for(int i=a+1;i<b;++i) {
+                Base::Vector3d v = points[i] - p0;
+                double t = len2>0 ? std::max(0.0, std::min(1.0, (v*d)/len2)) : 0.0;
+                double dist2 = (v - d*t).Sqr();
+                if(dist2 > worst) {
+                    worst = dist2;
+                    index = i;
+                }
+            }
+            if(worst > tolerance2) {
+                mark[index-first] = 1;
+                stack.push_back(std::make_pair(a, index));
+                stack.push_back(std::make_pair(index, b));
+            }
+        }
+        for(int i=first;i<last;++i)
+            if(mark[i-first])
+                keep.push_back(i);
+    }
+}
+
+void ViewProviderPath::updateLevelOfDetail(const std::deque<Base::Vector3d> &points)
+{
+    // the path is one polyline, segment k ends at point k and has the color colorindex[k-1]
+    Base::BoundBox3d bbox;
+    for(const auto &pt : points)
+        bbox.Add(pt);
+    lodDeviation = bbox.CalcDiagonalLength() / LOD_PIXELS;
+    lodCenter = bbox.GetCenter();
+
+    const int numPoints = points.size();
+    std::vector<int> segment2Command(numPoints, -1);
+    int first = 1;
+    for(std::size_t e=0;e<edgeIndices.size();++e) {
+        for(int k=first;k<edgeIndices[e] && k<numPoints;++k)
+            segment2Command[k] = edge2Command[e];
+        first = edgeIndices[e];
+    }
+
+    // feed moves are simplified in runs, all other moves are kept as they are
+    std::vector<int> keep;
+    std::vector<int> runEnd;
+    int k = 1;
+    while(k < numPoints) {
+        int color = colorindex[k-1];
+        int end = k;
+        while(end+1 < numPoints && colorindex[end] == color)
+            ++end;
+        if(color == 1)
+            simplify(points, k-1, end, lodDeviation, keep);
+        else
+            for(int i=k-1;i<end;++i)
+                keep.push_back(i);
+        keep.push_back(end);
+        runEnd.push_back(keep.size());
+        k = end+1;
+    }
+
+    command2LodEdge.assign(command2Edge.size(), -1);
+    lodPoint2Command.resize(keep.size());
+    pcLodCoords->point.setNum(keep.size());
+    SbVec3f* verts = pcLodCoords->point.startEditing();
+    for(std::size_t i=0;i<keep.size();++i) {
+        const Base::Vector3d &pt = points[keep[i]];
+        verts[i].setValue(pt.x,pt.y,pt.z);
+        lodPoint2Command[i] = segment2Command[keep[i]];
+    }
+    pcLodCoords->point.finishEditing();
+
+    pcLodLines->coordIndex.setNum(keep.size()+runEnd.size());
+    int32_t *idx = pcLodLines->coordIndex.startEditing();
+    int i = 0;
+    std::size_t start = 0;
+    for(std::size_t run=0;run<runEnd.size();++run) {
+        for(std::size_t j=start;j<(std::size_t)runEnd[run];++j) {
+            idx[i++] = j;
+            if(j>start) {
+                lodColorindex.push_back(colorindex[keep[j]-1]);
+                // dropped points map to the run they were dropped from
+                for(int s=keep[j-1]+1;s<=keep[j];++s)
+                    if(segment2Command[s]>=0)
+                        command2LodEdge[segment2Command[s]] = run;
+            }
+        }
+        idx[i++] = -1;
+        start = runEnd[run];
+    }
+    pcLodLines->coordIndex.finishEditing();
+}
+
+SoCoordinate3 *ViewProviderPath::activeCoords() const
+{
+    return pcLodSwitch->whichChild.getValue() == 1 ? pcLodCoords : pcLineCoords;
+}
+
+void ViewProviderPath::levelOfDetailCallback(void *data, SoAction *action)
+{
+    if(!action->isOfType(SoGLRenderAction::getClassTypeId()))
+        return;
+    ViewProviderPath *self = static_cast<ViewProviderPath*>(data);
+    int child = 0;
+    if(self->lodActive) {
+        SoState *state = action->getState();
+        const SbViewVolume &vv = SoViewVolumeElement::get(state);
+        const SbViewportRegion &vp = SoViewportRegionElement::get(state);
+        SbVec3f center(self->lodCenter.x, self->lodCenter.y, self->lodCenter.z);
+        SoModelMatrixElement::get(state).multVecMatrix(center, center);
+        // size of a pixel at the center of the path, the simplification is invisible if it is smaller
+        float pixel = vv.getWorldToScreenScale(center, 1.0f) / std::max<short>(vp.getViewportSizePixels()[1], 1);
+        if(pixel >= self->lodDeviation)
+            child = 1;
+    }
+    if(self->pcLodSwitch->whichChild.getValue() != child) {
+        // switch without scheduling another redraw
+        self->pcLodSwitch->whichChild.enableNotify(FALSE);
+        self->pcLodSwitch->whichChild = child;
+        self->pcLodSwitch->whichChild.enableNotify(TRUE);
+    }
+}
+
 void ViewProviderPath::recomputeBoundingBox()
 {
     // update the boundbox
@@ -38,6 +38,8 @@ class SoBaseColor;
 class SoMaterialBinding;
 class SoTransform;
 class SoSwitch;
+class SoCallback;
+class SoAction;
 
 namespace PathGui
 {
@@ -62,6 +64,7 @@ public:
     App::PropertyInteger MarkerSize;
     App::PropertyBool    ShowNodes;
     App::PropertyVector  StartPosition;
+    App::PropertyBool    LevelOfDetail;
 
     App::PropertyIntegerConstraint StartIndex;
     App::PropertyIntegerConstraint::Constraints  StartIndexConstraints;
@@ -86,11 +89,16 @@ public:
     void hideSelection();
 
     virtual void showBoundingBox(bool show);
+    virtual void show(void);
 
 protected:
 
     virtual void onChanged(const App::Property* prop);
     virtual unsigned long getBoundColor() const;
+
+    void updateLevelOfDetail(const std::deque<Base::Vector3d> &points);
+    SoCoordinate3 *activeCoords() const;
+    static void levelOfDetailCallback(void *data, SoAction *action);
  
     SoCoordinate3         * pcLineCoords;
     SoCoordinate3         * pcMarkerCoords;
@@ -114,6 +122,22 @@ protected:
     int edgeStart;
     int coordStart;
     int coordEnd;
+    // the Path changed while hidden, the visual is rebuilt when shown
+    bool visualPending;
+
+    // simplified path shown when zoomed out, rebuilt only if the Path changes
+    SoSwitch              * pcLodSwitch;
+    SoCallback            * pcLodCallback;
+    SoCoordinate3         * pcLodCoords;
+    PartGui::SoBrepEdgeSet         * pcLodLines;
+    SoMaterial            * pcLodColor;
+    SoMaterialBinding     * pcLodMatBind;
+    std::vector<int>        lodColorindex;
+    std::vector<int>        lodPoint2Command;
+    std::vector<int>        command2LodEdge;
+    float lodDeviation;
+    Base::Vector3d lodCenter;
+    bool lodActive;
 
  };
  
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Path
+import PathScripts.PathLog as PathLog
+import PathScripts.PathPocketShape as PathPocketShape
+import PathScripts.PathUtils as PathUtils
+import math
+
+from FreeCAD import Base
+from PathScripts.PathGeom import PathGeom
+from PySide import QtCore
+
+__title__ = "Path Adaptive Operation"
+__url__ = "http://www.freecadweb.org"
+__doc__ = "Class and implementation of the Adaptive clearing operation."
+
+if False:
+    PathLog.setLevel(PathLog.Level.DEBUG, PathLog.thisModule())
+    PathLog.trackModule(PathLog.thisModule())
+else:
+    PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# Qt tanslation handling
+def translate(context, text, disambig=None):
+    return QtCore.QCoreApplication.translate(context, text, disambig)
+
+# pass types returned by Path.Area.makeAdaptive()
+PassCutting        = 0
+PassHelix          = 1
+PassLinkClear      = 2
+PassLinkNotClear   = 3
+
+
+class Progress:
+    '''Progress callback for Path.Area.makeAdaptive(), shows the done fraction in the progress
+    bar and aborts the computation if the user cancels it.'''
+
+    def __init__(self, label, steps=100):
+        self.steps = steps
+        self.done = 0
+        self.bar = Base.ProgressIndicator()
+        self.bar.start(label, steps)
+
+    def __call__(self, done):
+        while self.done < min(int(done * self.steps), self.steps):
+            self.done += 1
+            self.bar.next(True)
+        return True
+
+    def stop(self):
+        self.bar.stop()
+
+
+class ObjectAdaptive(PathPocketShape.ObjectPocket):
+    '''Proxy object for the Adaptive operation, which clears the same shapes as the Pocket Shape
+    operation but steers the tool so that its engagement in the material never exceeds EngagementAngle.'''
+
+    def initAreaOp(self, obj):
+        '''initAreaOp(obj) ... create adaptive specific properties, none of the pocket's.'''
+        PathLog.track()
+
+        obj.addProperty("App::PropertyEnumeration", "CutMode", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "The direction that the toolpath should go around the part ClockWise CW or CounterClockWise CCW"))
+        obj.CutMode = ['Climb', 'Conventional']
+        obj.addProperty("App::PropertyDistance", "ExtraOffset", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "Material left on the walls of the pocket"))
+        obj.addProperty("App::PropertyAngle", "EngagementAngle", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "Maximum angle of the tool's circumference in contact with the material"))
+        obj.addProperty("App::PropertyDistance", "Tolerance", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "Resolution of the material tracking, smaller values are more accurate but slower"))
+        obj.addProperty("App::PropertyDistance", "HelixRadius", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "Radius of the entry helix, 0 for 3/4 of the tool radius"))
+        obj.addProperty("App::PropertyAngle", "HelixAngle", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "Ramp angle of the entry helix"))
+        obj.addProperty("App::PropertyBool", "FinishingPass", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "Add a pass along the walls once the material is cleared"))
+        obj.addProperty("App::PropertyInteger", "Threads", "Adaptive", QtCore.QT_TRANSLATE_NOOP("App::Property", "Number of separate regions processed at the same time, 0 for one per processor core"))
+
+    def areaOpRetractTool(self, obj):
+        return True
+
+    def areaOpAreaParams(self, obj, isHole):
+        '''areaOpAreaParams(obj, isHole) ... return dictionary with the area parameters used to slice the shapes'''
+        params = {}
+        params['Fill'] = 0
+        params['Coplanar'] = 0
+        params['SectionCount'] = -1
+        return params
+
+    def areaOpPathParams(self, obj, isHole):
+        return {}
+
+    def adaptiveParams(self, obj):
+        '''adaptiveParams(obj) ... return dictionary with the parameters of Path.Area.makeAdaptive()'''
+        params = {}
+        params['tool_radius'] = self.radius
+        params['engagement'] = obj.EngagementAngle.Value
+        params['tolerance'] = obj.Tolerance.Value
+        params['helix_radius'] = obj.HelixRadius.Value
+        params['extra_offset'] = obj.ExtraOffset.Value
+        params['climb'] = obj.CutMode == 'Climb'
+        params['finish'] = obj.FinishingPass
+        params['threads'] = obj.Threads
+        return params
+
+    def collectAreaTasks(self, obj):
+        '''collectAreaTasks(obj) ... returns no tasks, the adaptive path is made when the operation
+        is recomputed by itself.'''
+        return []
+
+    def _buildPathArea(self, obj, baseobject, isHole, start, getsim):
+        '''_buildPathArea(obj, baseobject, isHole, start, getsim) ... makes the adaptive tool path
+        of each section of baseobject, from the top down.'''
+        PathLog.track()
+        area = Path.Area()
+        plane = PathUtils.makeWorkplane(baseobject)
+        area.setPlane(plane)
+        area.add(baseobject)
+        area.setParams(**self.areaOpAreaParams(obj, isHole))
+        areaParamsString = str(area.getParams())
+        obj.AreaParams = areaParamsString
+
+        heights = [i for i in self.depthparams]
+        shapes = self._sections(area, baseobject, plane, areaParamsString, heights, False)
+        params = self.adaptiveParams(obj)
+        obj.PathParams = str(params)
+
+        commands = []
+        top = obj.StartDepth.Value
+        progress = Progress(translate("PathAdaptive", "Adaptive clearing %s") % obj.Label, 100 * len(shapes))
+        try:
+            for i, shape in enumerate(shapes):
+                section = Path.Area(Fill=0, Coplanar=0)
+                section.add(shape)
+                params['progress'] = lambda done, i=i: progress((i + done) / len(shapes))
+                z = shape.BoundBox.ZMin
+                commands.extend(self._adaptiveCommands(obj, section.makeAdaptive(**params), z, top))
+                top = z
+        finally:
+            progress.stop()
+
+        return Path.Path(commands), None
+
+    def _adaptiveCommands(self, obj, passes, z, top):
+        '''_adaptiveCommands(obj, passes, z, top) ... returns the commands of the passes cutting at
+        depth z, the entry helix ramps down from top.'''
+        commands = []
+        safe = obj.SafeHeight.Value
+        # position of the tool while it's down at z, None while it's retracted
+        pos = None
+        for (kind, points) in passes:
+            points = [FreeCAD.Vector(p.x, p.y, z) for p in points]
+            if kind == PassLinkNotClear:
+                if pos is not None:
+                    commands.append(Path.Command('G0', {'Z': safe}))
+                    pos = None
+                continue
+            if kind == PassLinkClear:
+                for p in points[1:]:
+                    commands.append(Path.Command('G1', {'X': p.x, 'Y': p.y, 'F': self.horizFeed}))
+                if points:
+                    pos = points[-1]
+                continue
+
+            if pos is None or not PathGeom.pointsCoincide(pos, points[0]):
+                if pos is not None:
+                    commands.append(Path.Command('G0', {'Z': safe}))
+                commands.append(Path.Command('G0', {'X': points[0].x, 'Y': points[0].y}))
+                if kind == PassHelix:
+                    commands.append(Path.Command('G0', {'Z': top}))
+                else:
+                    commands.append(Path.Command('G1', {'Z': z, 'F': self.vertFeed}))
+
+            if kind == PassHelix:
+                commands.extend(self._helixCommands(obj, points, z, top))
+            else:
+                for p in points[1:]:
+                    commands.append(Path.Command('G1', {'X': p.x, 'Y': p.y, 'F': self.horizFeed}))
+            pos = points[-1]
+        if pos is not None:
+            commands.append(Path.Command('G0', {'Z': safe}))
+        return commands
+
+    def _helixCommands(self, obj, points, z, top):
+        '''_helixCommands(obj, points, z, top) ... returns the commands ramping down from top to z along the
+        turn given by points, followed by one more turn at z. A single point is a plunge.'''
+        length = sum((points[k] - points[k-1]).Length for k in range(1, len(points)))
+        if length == 0 or top <= z:
+            return [Path.Command('G1', {'Z': z, 'F': self.vertFeed})]
+
+        angle = obj.HelixAngle.Value if obj.HelixAngle.Value > 0 else 90
+        turns = max(1, int(math.ceil((top - z) / (length * math.tan(math.radians(min(angle, 89)))))))
+        drop = (top - z) / turns
+        commands = []
+        for turn in range(turns + 1):
+            travelled = 0
+            for k in range(1, len(points)):
+                travelled += (points[k] - points[k-1]).Length
+                h = max(z, top - drop * (turn + travelled / length))
+                commands.append(Path.Command('G1', {'X': points[k].x, 'Y': points[k].y, 'Z': h, 'F': self.horizFeed}))
+        return commands
+
+    def areaOpSetDefaultValues(self, obj):
+        '''areaOpSetDefaultValues(obj) ... set default values'''
+        obj.EngagementAngle = 60
+        obj.Tolerance = 0.1
+        obj.HelixRadius = 0
+        obj.HelixAngle = 5
+        obj.FinishingPass = True
+        obj.Threads = 0
+        job = PathUtils.findParentJob(obj)
+        if job and job.Stock:
+            bb = job.Stock.Shape.BoundBox
+            obj.OpFinalDepth = bb.ZMin
+            obj.OpStartDepth = bb.ZMax
+
+def Create(name):
+    '''Create(name) ... Creates and returns an Adaptive operation.'''
+    obj = FreeCAD.ActiveDocument.addObject("Path::FeaturePython", name)
+    proxy = ObjectAdaptive(obj)
+    return obj
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import FreeCADGui
+import PathScripts.PathAdaptive as PathAdaptive
+import PathScripts.PathGui as PathGui
+import PathScripts.PathOpGui as PathOpGui
+
+from PySide import QtCore
+
+__title__ = "Path Adaptive Operation UI"
+__url__ = "http://www.freecadweb.org"
+__doc__ = "Adaptive operation page controller and command implementation."
+
+class TaskPanelOpPage(PathOpGui.TaskPanelPage):
+    '''Page controller class for the Adaptive operation.'''
+
+    def getForm(self):
+        '''getForm() ... return UI'''
+        return FreeCADGui.PySideUic.loadUi(":/panels/PageOpAdaptiveEdit.ui")
+
+    def getFields(self, obj):
+        '''getFields(obj) ... transfers values from UI to obj's proprties'''
+        if obj.CutMode != str(self.form.cutMode.currentText()):
+            obj.CutMode = str(self.form.cutMode.currentText())
+        if obj.FinishingPass != self.form.finishingPass.isChecked():
+            obj.FinishingPass = self.form.finishingPass.isChecked()
+        if obj.Threads != self.form.threads.value():
+            obj.Threads = self.form.threads.value()
+
+        PathGui.updateInputField(obj, 'EngagementAngle', self.form.engagementAngle)
+        PathGui.updateInputField(obj, 'Tolerance', self.form.tolerance)
+        PathGui.updateInputField(obj, 'HelixRadius', self.form.helixRadius)
+        PathGui.updateInputField(obj, 'HelixAngle', self.form.helixAngle)
+        PathGui.updateInputField(obj, 'ExtraOffset', self.form.extraOffset)
+        self.updateToolController(obj, self.form.toolController)
+
+    def setFields(self, obj):
+        '''setFields(obj) ... transfers obj's property values to UI'''
+        self.selectInComboBox(obj.CutMode, self.form.cutMode)
+        self.form.finishingPass.setChecked(obj.FinishingPass)
+        self.form.threads.setValue(obj.Threads)
+
+        self.form.engagementAngle.setText(FreeCAD.Units.Quantity(obj.EngagementAngle.Value, FreeCAD.Units.Angle).UserString)
+        self.form.tolerance.setText(FreeCAD.Units.Quantity(obj.Tolerance.Value, FreeCAD.Units.Length).UserString)
+        self.form.helixRadius.setText(FreeCAD.Units.Quantity(obj.HelixRadius.Value, FreeCAD.Units.Length).UserString)
+        self.form.helixAngle.setText(FreeCAD.Units.Quantity(obj.HelixAngle.Value, FreeCAD.Units.Angle).UserString)
+        self.form.extraOffset.setText(FreeCAD.Units.Quantity(obj.ExtraOffset.Value, FreeCAD.Units.Length).UserString)
+        self.setupToolController(obj, self.form.toolController)
+
+    def getSignalsForUpdate(self, obj):
+        '''getSignalsForUpdate(obj) ... return list of signals for updating obj'''
+        signals = []
+
+        signals.append(self.form.cutMode.currentIndexChanged)
+        signals.append(self.form.engagementAngle.editingFinished)
+        signals.append(self.form.tolerance.editingFinished)
+        signals.append(self.form.helixRadius.editingFinished)
+        signals.append(self.form.helixAngle.editingFinished)
+        signals.append(self.form.extraOffset.editingFinished)
+        signals.append(self.form.threads.editingFinished)
+        signals.append(self.form.finishingPass.clicked)
+        signals.append(self.form.toolController.currentIndexChanged)
+
+        return signals
+
+Command = PathOpGui.SetupOperation('Adaptive',
+        PathAdaptive.Create,
+        TaskPanelOpPage,
+        'Path-Pocket',
+        QtCore.QT_TRANSLATE_NOOP("PathAdaptive", "Adaptive"),
+        QtCore.QT_TRANSLATE_NOOP("PathAdaptive", "Creates an Adaptive clearing Path object from a face or faces, keeping the engagement of the tool constant"))
+
+FreeCAD.Console.PrintLog("Loading PathAdaptiveGui... done\n")
@@ -26,6 +26,7 @@ import FreeCAD
 import Path
 import PathScripts.PathLog as PathLog
 import PathScripts.PathOp as PathOp
+import PathScripts.PathUtil as PathUtil
 import PathScripts.PathUtils as PathUtils
 
 from PathScripts.PathUtils import waiting_effects
@@ -46,13 +47,40 @@ else:
 def translate(context, text, disambig=None):
     return QtCore.QCoreApplication.translate(context, text, disambig)
 
+class SectionCache(PathUtil.LRUCache):
+    '''LRU cache of the shapes returned by Path.Area.makeSections().
+    The key consists of hashes of the BREP representation of the shape and the workplane,
+    the area parameters, the heights and the projection flag - so operations slicing the
+    same shape the same way share the result. Each job has its own cache, see sectionCache().'''
+
+    def __init__(self, size=64):
+        super(SectionCache, self).__init__(size)
+
+    def key(self, shape, plane, areaParams, heights, project):
+        return (PathUtil.shapeDigest(shape), PathUtil.shapeDigest(plane), areaParams, tuple(heights), project)
+
+def sectionCache(job):
+    '''sectionCache(job) ... returns the SectionCache of job, it is cleared whenever the job's Base changes.'''
+    if not hasattr(job.Proxy, 'sectionCache'):
+        job.Proxy.sectionCache = SectionCache()
+    return job.Proxy.sectionCache
+
+# end vector of a collected area task, the actual value is only known once it is computed
+AreaTaskEnd = FreeCAD.Vector()
+
 class ObjectOp(PathOp.ObjectOp):
     '''Base class for all Path.Area based operations.
     Provides standard features including debugging properties AreaParams,
     PathParams and removalshape, all hidden.
     The main reason for existence is to implement the standard interface
     to Path.Area so subclasses only have to provide the shapes for the
-    operations.'''
+    operations.
+    The Path.Area computations can be collected with collectAreaTasks() instead of
+    being done, precomputed results can be handed in through areaResults, see
+    PathJobRegenerate for both.'''
+
+    areaTasks = None
+    areaResults = None
 
     def opFeatures(self, obj):
         '''opFeatures(obj) ... returns the base features supported by all Path.Area based operations.
@@ -157,7 +185,8 @@ class ObjectOp(PathOp.ObjectOp):
         '''_buildPathArea(obj, baseobject, isHole, start, getsim) ... internal function.'''
         PathLog.track()
         area = Path.Area()
-        area.setPlane(PathUtils.makeWorkplane(baseobject))
+        plane = PathUtils.makeWorkplane(baseobject)
+        area.setPlane(plane)
         area.add(baseobject)
 
         areaParams = self.areaOpAreaParams(obj, isHole)
@@ -165,17 +194,12 @@ class ObjectOp(PathOp.ObjectOp):
         heights = [i for i in self.depthparams]
         PathLog.debug('depths: {}'.format(heights))
         area.setParams(**areaParams)
-        obj.AreaParams = str(area.getParams())
+        areaParamsString = str(area.getParams())
 
         PathLog.debug("Area with params: {}".format(area.getParams()))
 
-        sections = area.makeSections(mode=0, project=self.areaOpUseProjection(obj), heights=heights)
-        PathLog.debug("sections = %s" % sections)
-        shapelist = [sec.getShape() for sec in sections]
-        PathLog.debug("shapelist = %s" % shapelist)
-
+        project = self.areaOpUseProjection(obj)
         pathParams = self.areaOpPathParams(obj, isHole)
-        pathParams['shapes'] = shapelist
         pathParams['feedrate'] = self.horizFeed
         pathParams['feedrate_v'] = self.vertFeed
         pathParams['verbose'] = True
@@ -188,15 +212,49 @@ class ObjectOp(PathOp.ObjectOp):
         if not self.areaOpRetractTool(obj):
             pathParams['threshold'] = 2.001 * self.radius
 
+        startPoint = None
+        if PathOp.FeatureStartPoint & self.opFeatures(obj) and obj.UseStartPoint:
+            startPoint = obj.StartPoint
+        taskKey = areaParamsString + str(sorted(pathParams.items())) + str(heights) + str(project)
+
+        if self.areaTasks is not None and not getsim:
+            # only collect the work, it gets computed by PathJobRegenerate
+            self.areaTasks.append({
+                'key': taskKey,
+                'plane': plane.exportBrepToString(),
+                'shape': baseobject.exportBrepToString(),
+                'areaParams': areaParams,
+                'heights': heights,
+                'project': project,
+                'pathParams': pathParams,
+                'chain': self.endVector is not None,
+                'start': None if startPoint is None else (startPoint.x, startPoint.y, startPoint.z)})
+            self.endVector = AreaTaskEnd
+            return Path.Path(), None
+
         if self.endVector is not None:
             pathParams['start'] = self.endVector
-        elif PathOp.FeatureStartPoint & self.opFeatures(obj) and obj.UseStartPoint:
-            pathParams['start'] = obj.StartPoint
+        elif startPoint is not None:
+            pathParams['start'] = startPoint
 
+        obj.AreaParams = areaParamsString
         obj.PathParams = str({key: value for key, value in pathParams.items() if key != 'shapes'})
         PathLog.debug("Path with params: {}".format(obj.PathParams))
 
-        (pp, end_vector) = Path.fromShapes(**pathParams)
+        result = None
+        if self.areaResults:
+            (resultKey, commands, end_vector) = self.areaResults.pop(0)
+            if resultKey == taskKey:
+                result = (Path.Path(commands), end_vector)
+            else:
+                PathLog.warning("precomputed path of %s doesn't match, recomputing" % obj.Label)
+                self.areaResults = None
+
+        if result is None:
+            pathParams['shapes'] = self._sections(area, baseobject, plane, areaParamsString, heights, project)
+            result = Path.fromShapes(**pathParams)
+
+        (pp, end_vector) = result
         PathLog.debug('pp: {}, end vector: {}'.format(pp, end_vector))
         self.endVector = end_vector
 
@@ -210,6 +268,40 @@ class ObjectOp(PathOp.ObjectOp):
 
         return pp, simobj
 
+    def _sections(self, area, baseobject, plane, areaParams, heights, project):
+        cache = None
+        if hasattr(self, 'job') and hasattr(self.job, 'Proxy'):
+            cache = sectionCache(self.job)
+            key = cache.key(baseobject, plane, areaParams, heights, project)
+            shapelist = cache.get(key)
+            if shapelist is not None:
+                PathLog.debug("shapelist (cached) = %s" % shapelist)
+                return shapelist
+
+        sections = area.makeSections(mode=0, project=project, heights=heights)
+        PathLog.debug("sections = %s" % sections)
+        shapelist = [sec.getShape() for sec in sections]
+        PathLog.debug("shapelist = %s" % shapelist)
+        if cache is not None:
+            cache.put(key, shapelist)
+        return shapelist
+
+    def collectAreaTasks(self, obj):
+        '''collectAreaTasks(obj) ... returns the Path.Area computations execute() would do, as a
+        list of tasks for PathJobRegenerate. Neither the path of obj nor the cache statistics are
+        changed. The list is empty if obj is inactive or its cached path can be reused.'''
+        if not obj.Active or not self.setupExecute(obj, False):
+            return []
+        self.commandlist = self.header(obj)
+        if self.cachedPath(obj, list(self.commandlist)) is not None:
+            return []
+        self.areaTasks = []
+        try:
+            self.opExecute(obj)
+            return self.areaTasks
+        finally:
+            self.areaTasks = None
+
     def opExecute(self, obj, getsim=False):
         '''opExecute(obj, getsim=False) ... implementation of Path.Area ops.
         determines the parameters for _buildPathArea().
@@ -28,13 +28,140 @@ import Path
 import PathScripts
 from PySide import QtCore
 import math
+import numpy
+
+from PathScripts.PathCommandArray import CommandArray
+from PathScripts.PathGeom import PathGeom
 
 """Path Array object and FreeCAD command"""
 
+CmdDrill  = ['G81', 'G82', 'G83']
+CmdRotate = PathGeom.CmdMoveRapid + PathGeom.CmdMove + CmdDrill
+
+LinearAxes = 'XY'
+RotateAxes = 'XYIJ'
+
 # Qt tanslation handling
 def translate(context, text, disambig=None):
     return QtCore.QCoreApplication.translate(context, text, disambig)
 
+def _quantize(values):
+    '''Returns the values as they are after a round trip through Command.toGCode() and back.'''
+    values = numpy.where(numpy.isnan(values), 0, values)
+    v = numpy.trunc(values * 1e7).astype(numpy.int64)
+    neg = v < 0
+    v = (numpy.abs(v) + 5) // 10
+    result = v / 1e6
+    return numpy.where(neg, -result, result)
+
+def _carry(values, mask):
+    '''Returns values where each unset entry is replaced by the last set one, or 0.'''
+    last = numpy.maximum.accumulate(numpy.where(mask, numpy.arange(len(values)), -1))
+    return numpy.where(last >= 0, values[last], 0)
+
+def _template(path, count):
+    '''Returns a path holding count copies of path as read back from its G-code, or None
+    if the G-code of several copies cannot be split into the same commands again.'''
+    gcode = path.toGCode()
+    template = Path.Path(gcode)
+    if template.Size != path.Size or (gcode and gcode[0] not in '(gGmM'):
+        return None
+    return Path.Path(template.Commands * count)
+
+def _stack(array, values, mask, count, axes):
+    opcodes = numpy.tile(array.opcodes, count)
+    return CommandArray(array.names, opcodes, values.reshape(-1, len(axes)), mask.reshape(-1, len(axes)), axes)
+
+def _rotateArrays(array, angles, centre):
+    '''Returns the values and mask of X, Y, I and J for all commands of array rotated by each of angles.
+    The result has the shape (len(angles), len(array), 4).'''
+    x, y, i, j = [array.column(axis) for axis in RotateAxes]
+    setX, setY, setI, setJ = [array.mask[:, array.index(axis)] for axis in RotateAxes]
+    moves = array.select(CmdRotate)
+    arcs = array.select(PathGeom.CmdMoveArc)
+
+    # only moves define the current position
+    x = x.copy()
+    y = y.copy()
+    x[moves] = _carry(x[moves], setX[moves])
+    y[moves] = _carry(y[moves], setY[moves])
+    i = numpy.where(setI, i, 0)
+    j = numpy.where(setJ, j, 0)
+
+    ang = [a / 180 * math.pi for a in angles]
+    cos = numpy.array([[math.cos(a)] for a in ang])
+    sin = numpy.array([[math.sin(a)] for a in ang])
+
+    # "move" the centre to origin, rotate and move it back
+    cx = x - centre.x
+    cy = y - centre.y
+    nx = cx * cos - cy * sin + centre.x
+    ny = cy * cos + cx * sin + centre.y
+
+    # arcs need to have the I and J params rotated as well
+    ni = i * cos - j * sin
+    nj = j * cos + i * sin
+
+    values = numpy.empty((len(angles), len(array), 4))
+    values[:, :, 0] = numpy.where(moves, nx, x)
+    values[:, :, 1] = numpy.where(moves, ny, y)
+    values[:, :, 2] = numpy.where(arcs, ni, i)
+    values[:, :, 3] = numpy.where(arcs, nj, j)
+    mask = numpy.empty((len(angles), len(array), 4), dtype=numpy.bool_)
+    mask[:, :, 0] = setX | moves
+    mask[:, :, 1] = setY | moves
+    mask[:, :, 2] = setI | arcs
+    mask[:, :, 3] = setJ | arcs
+    return values, mask
+
+def _legacyCopies(transform, copies):
+    output = ""
+    for copy in copies:
+        output += transform(copy).toGCode()
+    return Path.Path(output)
+
+def linearCopies(path, offsets):
+    '''linearCopies(path, offsets) ... returns a path with one copy of path for each (x, y) offset.
+    The result is identical to transforming each command with Command.transform(), but the copies
+    are built from the command arrays instead of concatenating their G-code.'''
+    if not offsets:
+        return Path.Path()
+    abc = CommandArray.fromPath(path, 'ABC')
+    template = None
+    if not numpy.any(abc.values[abc.mask]):
+        template = _template(path, len(offsets))
+    if template is None:
+        # rotary axes change the direction of the offset and G-code which does not split into
+        # the same commands cannot be reproduced from arrays, let Command.transform() deal with them
+        def transform(offset):
+            pl = FreeCAD.Placement()
+            pl.move(FreeCAD.Vector(offset[0], offset[1], 0))
+            return Path.Path([cm.transform(pl) for cm in path.Commands])
+        return _legacyCopies(transform, offsets)
+
+    array = CommandArray.fromPath(path, LinearAxes)
+    offsets = numpy.array(offsets, dtype=numpy.float64)
+    values = numpy.empty((len(offsets), len(array), 2))
+    values[:, :, 0] = _quantize(array.column('X') + offsets[:, 0:1])
+    values[:, :, 1] = _quantize(array.column('Y') + offsets[:, 1:2])
+    mask = numpy.broadcast_to(array.mask, values.shape)
+    return _stack(array, values, mask, len(offsets), LinearAxes).toPath(template)
+
+def polarCopies(path, angles, centre):
+    '''polarCopies(path, angles, centre) ... returns a path with one copy of path rotated by each of
+    angles (in degrees) around centre. Only X and Y (and I, J of arcs) are considered.'''
+    if not angles:
+        return Path.Path()
+    template = _template(path, len(angles))
+    array = CommandArray.fromPath(path, RotateAxes)
+    values, mask = _rotateArrays(array, angles, centre)
+    if template is None:
+        def transform(k):
+            return CommandArray(array.names, array.opcodes, values[k], mask[k], RotateAxes).toPath(path)
+        return _legacyCopies(transform, range(len(angles)))
+    return _stack(array, _quantize(values), mask, len(angles), RotateAxes).toPath(template)
+
+
 class ObjectArray:
 
     def __init__(self, obj):
@@ -103,59 +230,9 @@ class ObjectArray:
             Rotates Path around given centre vector
             Only X and Y is considered
         '''
-        CmdMoveRapid    = ['G0', 'G00']
-        CmdMoveStraight = ['G1', 'G01']
-        CmdMoveCW       = ['G2', 'G02']
-        CmdMoveCCW      = ['G3', 'G03']
-        CmdDrill        = ['G81', 'G82', 'G83']
-        CmdMoveArc      = CmdMoveCW + CmdMoveCCW
-        CmdMove         = CmdMoveStraight + CmdMoveArc
-
-        commands = []
-        ang = angle / 180 * math.pi
-        currX = 0
-        currY = 0
-        for cmd in path.Commands:
-            if (cmd.Name in CmdMoveRapid) or (cmd.Name in CmdMove) or (cmd.Name in CmdDrill):
-                params = cmd.Parameters
-                x = params.get("X")
-                if x is None:
-                    x = currX
-                currX = x
-                y = params.get("Y")
-                if y is None:
-                    y = currY
-                currY = y
-
-                # "move" the centre to origin
-                x = x - centre.x
-                y = y - centre.y
-
-                # rotation around origin:
-                nx = x * math.cos(ang) - y * math.sin(ang)
-                ny = y * math.cos(ang) + x * math.sin(ang)
-
-                # "move" the centre back and update
-                params.update({'X': nx + centre.x, 'Y': ny + centre.y})
-
-                # Arcs need to have the I and J params rotated as well
-                if cmd.Name in CmdMoveArc:
-                    i = params.get("I")
-                    if i is None:
-                        i = 0
-                    j = params.get("J")
-                    if j is None:
-                        j = 0
-
-                    ni = i * math.cos(ang) - j * math.sin(ang)
-                    nj = j * math.cos(ang) + i * math.sin(ang)
-                    params.update({'I': ni, 'J': nj})
-
-                cmd.Parameters = params
-            commands.append(cmd)
-        newPath = Path.Path(commands)
-
-        return newPath
+        array = CommandArray.fromPath(path, RotateAxes)
+        values, mask = _rotateArrays(array, [angle], centre)
+        return CommandArray(array.names, array.opcodes, values, mask, RotateAxes).toPath(path)
 
     def execute(self, obj):
         if obj.Base:
@@ -170,43 +247,30 @@ class ObjectArray:
 
             # build copies
             basepath = obj.Base.Path
-            output = ""
             if obj.Type == 'Linear1D':
-                for i in range(obj.Copies):
-                    pl = FreeCAD.Placement()
-                    pos = FreeCAD.Vector(obj.Offset.x * (i + 1), obj.Offset.y * (i + 1), 0)
-                    pl.move(pos)
-                    np = Path.Path([cm.transform(pl)
-                                    for cm in basepath.Commands])
-                    output += np.toGCode()
+                offsets = [(obj.Offset.x * (i + 1), obj.Offset.y * (i + 1)) for i in range(obj.Copies)]
+                path = linearCopies(basepath, offsets)
 
             elif obj.Type == 'Linear2D':
+                offsets = []
                 for i in range(obj.CopiesX + 1):
                     for j in range(obj.CopiesY + 1):
-                        pl = FreeCAD.Placement()
                         # do not process the index 0,0. It will be processed at basepath
                         if not (i == 0 and j == 0):
                             if (i % 2) == 0:
-                                pos = FreeCAD.Vector(obj.Offset.x * i, obj.Offset.y * j, 0)
+                                offsets.append((obj.Offset.x * i, obj.Offset.y * j))
                             else:
-                                pos = FreeCAD.Vector(obj.Offset.x * i, obj.Offset.y * (obj.CopiesY - j), 0)
-
-                            pl.move(pos)
-                            np = Path.Path([cm.transform(pl)
-                                            for cm in basepath.Commands])
-                            output += np.toGCode()
+                                offsets.append((obj.Offset.x * i, obj.Offset.y * (obj.CopiesY - j)))
+                path = linearCopies(basepath, offsets)
 
             else:
+                angles = []
                 for i in range(obj.Copies):
-
                     ang = 360
                     if obj.Copies > 0:
                         ang = obj.Angle / obj.Copies * (1 + i)
-
-                    np = self.rotatePath(basepath, ang, obj.Centre)
-                    output += np.toGCode()
-            # print output
-            path = Path.Path(output)
+                    angles.append(ang)
+                path = polarCopies(basepath, angles, obj.Centre)
             obj.Path = path
 
 
@@ -28,6 +28,7 @@ import DraftGeomUtils
 import Part
 import PathScripts.PathLog as PathLog
 import PathScripts.PathOp as PathOp
+import PathScripts.PathOrder as PathOrder
 import PathScripts.PathUtils as PathUtils
 import string
 import sys
@@ -52,8 +53,14 @@ else:
     PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
 
 
+HoleOrders = ['Optimized', 'Nearest', 'Legacy', 'None']
+
 class ObjectOp(PathOp.ObjectOp):
-    '''Base class for proxy objects of all operations on circular holes.'''
+    '''Base class for proxy objects of all operations on circular holes.
+    The holes are visited in the order selected by HoleOrder, documents created before it
+    existed get restoredHoleOrder so their paths don't change.'''
+
+    restoredHoleOrder = 'None'
 
     def opFeatures(self, obj):
         '''opFeatures(obj) ... calls circularHoleFeatures(obj) and ORs in the standard features required for processing circular holes.
@@ -69,8 +76,41 @@ class ObjectOp(PathOp.ObjectOp):
         '''initOperation(obj) ... adds Disabled properties and calls initCircularHoleOperation(obj).
         Do not overwrite, implement initCircularHoleOperation(obj) instead.'''
         obj.addProperty("App::PropertyStringList", "Disabled", "Base", QtCore.QT_TRANSLATE_NOOP("Path", "List of disabled features"))
+        self.addHoleOrderProperties(obj, 'Optimized')
         self.initCircularHoleOperation(obj)
 
+    def addHoleOrderProperties(self, obj, order):
+        obj.addProperty("App::PropertyEnumeration", "HoleOrder", "Hole Order", QtCore.QT_TRANSLATE_NOOP("Path", "Order in which the holes are processed: Optimized (nearest neighbour improved by 2-opt/Or-opt), Nearest (nearest neighbour), Legacy (nearest neighbour attracted to X=0) or None (order of the features)"))
+        obj.HoleOrder = HoleOrders
+        obj.HoleOrder = order
+        obj.addProperty("App::PropertyFloat", "HoleOrderTime", "Hole Order", QtCore.QT_TRANSLATE_NOOP("Path", "Maximum time in seconds spent optimizing the hole order"))
+        obj.HoleOrderTime = 1.0
+
+    def onDocumentRestored(self, obj):
+        super(ObjectOp, self).onDocumentRestored(obj)
+        if not hasattr(obj, 'HoleOrder'):
+            self.addHoleOrderProperties(obj, self.restoredHoleOrder)
+
+    def sortHoles(self, obj, holes):
+        '''sortHoles(obj, holes) ... returns holes in the order selected by obj.HoleOrder, starting at the origin.
+        The length of the rapid moves between the holes before and after sorting is logged and
+        stored in rapidDistance.'''
+        order = getattr(obj, 'HoleOrder', self.restoredHoleOrder)
+        if order == 'Legacy':
+            result = PathUtils.sort_jobs(holes, ['x', 'y'])
+        elif order in ['Optimized', 'Nearest'] and len(holes) > 1:
+            points = [(hole['x'], hole['y']) for hole in holes]
+            limit = obj.HoleOrderTime if order == 'Optimized' else 0
+            result = [holes[i] for i in PathOrder.orderPoints(points, (0, 0), limit)]
+        else:
+            result = list(holes)
+        before = PathOrder.tourLength([(h['x'], h['y']) for h in holes], list(range(len(holes))))
+        after = PathOrder.tourLength([(h['x'], h['y']) for h in result], list(range(len(result))))
+        self.rapidDistance = (before, after)
+        if before > 0:
+            PathLog.info("%s: %s hole order, rapid distance %.2f -> %.2f (%.1f%% saved)" % (obj.Label, order, before, after, 100.0 * (before - after) / before))
+        return result
+
     def initCircularHoleOperation(self, obj):
         '''initCircularHoleOperation(obj) ... overwrite if the subclass needs initialisation.
         Can safely be overwritten by subclasses.'''
@@ -174,7 +214,7 @@ class ObjectOp(PathOp.ObjectOp):
                 holes.append({'x': location.x, 'y': location.y, 'r': 0})
 
         if len(holes) > 0:
-            self.circularHoleExecute(obj, holes)
+            self.circularHoleExecute(obj, self.sortHoles(obj, holes))
 
     def circularHoleExecute(self, obj, holes):
         '''circularHoleExecute(obj, holes) ... implement processing of holes.
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Path
+import numpy
+
+from PathScripts.PathGeom import PathGeom
+
+__doc__ = """Vectorized representation of the commands of a Path.
+Instead of a list of Path.Command objects a CommandArray holds an opcode per command and
+a (N, k) array with the values of k axes. Modal axes are filled in from previous commands,
+so each row holds the full machine position at the end of the command."""
+
+Axes = 'XYZIJKF'
+
+class CommandArray(object):
+    '''CommandArray(names, opcodes, values, mask, axes=Axes)
+    names   ... list of command names, opcodes are indices into this list
+    opcodes ... (N,) int32 array
+    values  ... (N, k) float64 array, one column for each axis in axes
+    mask    ... (N, k) bool array, True if the command explicitly sets the axis
+    Arrays created by fromPath are read-only views, use copy() before modifying them in place.'''
+
+    def __init__(self, names, opcodes, values, mask, axes=Axes):
+        self.names = list(names)
+        self.opcodes = opcodes
+        self.values = values
+        self.mask = mask
+        self.axes = axes
+
+    @classmethod
+    def fromPath(cls, path, axes=Axes):
+        '''fromPath(path, axes=Axes) ... create a CommandArray for all commands of path.'''
+        names, opcodes, values, mask = path.toArrays(axes)
+        k = len(axes)
+        opcodes = numpy.frombuffer(opcodes, dtype=numpy.int32)
+        values = numpy.frombuffer(values, dtype=numpy.float64).reshape(-1, k)
+        mask = numpy.frombuffer(mask, dtype=numpy.uint8).reshape(-1, k).view(numpy.bool_)
+        return cls(names, opcodes, values, mask, axes)
+
+    def toPath(self, template=None):
+        '''toPath(template=None) ... create a new Path from the arrays.
+        If a template Path is given all other parameters are copied from its commands.'''
+        path = Path.Path()
+        path.setFromArrays(self.names,
+                numpy.ascontiguousarray(self.opcodes, dtype=numpy.int32),
+                numpy.ascontiguousarray(self.values, dtype=numpy.float64),
+                numpy.ascontiguousarray(self.mask, dtype=numpy.uint8),
+                self.axes, template)
+        return path
+
+    def copy(self):
+        '''copy() ... returns a deep and writeable copy.'''
+        return CommandArray(self.names, self.opcodes.copy(), self.values.copy(), self.mask.copy(), self.axes)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def index(self, axis):
+        '''index(axis) ... returns the column of axis.'''
+        return self.axes.index(axis)
+
+    def column(self, axis):
+        '''column(axis) ... returns the values of axis for all commands.'''
+        return self.values[:, self.axes.index(axis)]
+
+    def codes(self, names):
+        '''codes(names) ... returns the opcodes of the given command names used in this array.'''
+        return [i for i, name in enumerate(self.names) if name in names]
+
+    def select(self, names):
+        '''select(names) ... returns a bool array which is True for all commands with one of the given names.'''
+        return numpy.in1d(self.opcodes, self.codes(names))
+
+    def isRapid(self):
+        return self.select(PathGeom.CmdMoveRapid)
+
+    def isMove(self):
+        '''isMove() ... True for all feed moves, straight or arc.'''
+        return self.select(PathGeom.CmdMove)
+
+    def isArc(self):
+        return self.select(PathGeom.CmdMoveArc)
+
+    def positions(self):
+        '''positions() ... returns the (N, 3) array of X, Y and Z at the end of each command.'''
+        return self.values[:, [self.index('X'), self.index('Y'), self.index('Z')]]
+
+    def boundBox(self, rapids=True):
+        '''boundBox(rapids=True) ... returns the BoundBox of the end points of all moves.
+        Arcs are only accounted for with their end points.'''
+        moves = self.isMove()
+        if rapids:
+            moves |= self.isRapid()
+        pos = self.positions()[moves]
+        if pos.size == 0:
+            return FreeCAD.BoundBox()
+        lo = numpy.nanmin(pos, axis=0)
+        hi = numpy.nanmax(pos, axis=0)
+        lo = numpy.where(numpy.isnan(lo), 0, lo)
+        hi = numpy.where(numpy.isnan(hi), 0, hi)
+        return FreeCAD.BoundBox(lo[0], lo[1], lo[2], hi[0], hi[1], hi[2])
+
+    def setFeed(self, feed, names=None):
+        '''setFeed(feed, names=None) ... returns a copy where all commands with the given names,
+        all moves by default, have their feed rate set to feed.'''
+        if names is None:
+            names = PathGeom.CmdMove
+        result = self.copy()
+        sel = self.select(names)
+        f = self.index('F')
+        result.values[sel, f] = feed
+        result.mask[sel, f] = True
+        return result
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import PathScripts.PathDressup as PathDressup
+import PathScripts.PathLog as PathLog
+import math
+import numpy
+
+from PathScripts.PathCommandArray import CommandArray
+from PathScripts.PathGeom import PathGeom
+from PathScripts.PathPreferences import PathPreferences
+
+__doc__ = """Estimation of the machining time of paths and jobs.
+Feed moves are planned like a motion controller does: each move is limited by its feed rate and the
+acceleration of the axes it moves, corners by the junction deviation. The speeds at the junctions are
+found with a backward and a forward pass over all moves, both expressed as running minima of prefix
+sums so entire paths are planned with a few NumPy operations."""
+
+if False:
+    PathLog.setLevel(PathLog.Level.DEBUG, PathLog.thisModule())
+    PathLog.trackModule()
+else:
+    PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+CmdDrill = ['G73', 'G81', 'G82', 'G83']
+CmdDwell = ['G4', 'G04']
+CmdPlane = ['G17', 'G18', 'G19']
+
+# the axes (u, v, w) of the arcs in each plane, (u, v) is the plane the way G2/G3 look at it and w its normal
+PlaneAxes = numpy.array([[0, 1, 2], [2, 0, 1], [1, 2, 0]])
+
+class Machine(object):
+    '''Kinematic limits of a machine, lengths are in mm and times in s.
+    acceleration      ... (x, y, z) acceleration limits of the axes
+    junctionDeviation ... allowed deviation from the corner of two moves, limits the cornering speed
+    rapid             ... (xy, z) rapid rates used if a tool controller doesn't specify them
+    toolChange        ... duration of a tool change'''
+
+    def __init__(self, acceleration=(500, 500, 200), junctionDeviation=0.01, rapid=(100, 50), toolChange=0):
+        self.acceleration = numpy.array(acceleration, dtype=numpy.float64)
+        self.junctionDeviation = junctionDeviation
+        self.rapid = rapid
+        self.toolChange = toolChange
+
+    @classmethod
+    def fromPreferences(cls):
+        '''fromPreferences() ... returns the Machine configured in the Path preferences.'''
+        return cls(PathPreferences.machineAcceleration(), PathPreferences.machineJunctionDeviation(),
+                PathPreferences.machineRapid(), PathPreferences.machineToolChangeTime())
+
+def _directionLimit(limits, direction):
+    # the largest value along each direction for which no axis exceeds its limit
+    with numpy.errstate(divide='ignore'):
+        return numpy.minimum(numpy.minimum(limits[0] / numpy.abs(direction[:, 0]), limits[1] / numpy.abs(direction[:, 1])),
+                limits[2] / numpy.abs(direction[:, 2]))
+
+def _planes(array):
+    # index into PlaneAxes of the plane each command is in, G17 until one is selected
+    n = len(array)
+    plane = numpy.full(n, -1)
+    for (p, name) in enumerate(CmdPlane):
+        plane[array.select([name])] = p
+    last = numpy.maximum.accumulate(numpy.where(plane >= 0, numpy.arange(n), 0))
+    return numpy.maximum(plane[last], 0)
+
+def _fromPlane(vectors, axes):
+    # vectors given as (u, v, w) back to (x, y, z)
+    result = numpy.empty_like(vectors)
+    result[numpy.arange(len(vectors))[:, None], axes] = vectors
+    return result
+
+def plan(lengths, speeds, accelerations, junctions):
+    '''plan(lengths, speeds, accelerations, junctions) ... returns the duration of each of a sequence of moves.
+    A move starts and ends at the speed of its junctions, accelerates to its speed if possible and decelerates
+    at the given acceleration. junctions holds the speed limit of the M+1 junctions of M moves, including the
+    start and the end.
+    Both passes are a recurrence w[i] = min(c[i], w[i+1] + d[i]) on the square of the speeds; unrolled it is the
+    minimum over c[j] plus the sum of d between i and j, which is a running minimum of a prefix sum.'''
+    d = 2 * accelerations * lengths
+    s = numpy.concatenate(([0], numpy.cumsum(d)))
+    c = numpy.minimum(junctions, numpy.concatenate((speeds, [0])))
+    c = numpy.minimum(c, numpy.concatenate(([0], speeds))) ** 2
+    # backward pass, decelerate in time for each junction
+    w = numpy.minimum.accumulate((c + s)[::-1])[::-1] - s
+    # forward pass, the speed each junction can be reached with
+    w = numpy.minimum.accumulate(w - s) + s
+    w = numpy.maximum(w, 0)
+
+    w0 = w[:-1]
+    w1 = w[1:]
+    a = accelerations
+    vmax = speeds
+    v0 = numpy.sqrt(w0)
+    v1 = numpy.sqrt(w1)
+    accelerate = (vmax * vmax - w0) / (2 * a)
+    decelerate = (vmax * vmax - w1) / (2 * a)
+    cruise = lengths - accelerate - decelerate
+    # moves too short to reach their speed only accelerate to a peak and decelerate again
+    peak = numpy.sqrt(numpy.maximum((d + w0 + w1) / 2, 0))
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        trapezoid = (vmax - v0) / a + (vmax - v1) / a + cruise / vmax
+        triangle = (peak - v0) / a + (peak - v1) / a
+    return numpy.where(cruise >= 0, trapezoid, triangle)
+
+class PathTime(object):
+    '''Estimated duration of a path.
+    times ... duration of each command of the path
+    rapid ... total duration of all rapid moves
+    end   ... position of the tool at the end of the path'''
+
+    def __init__(self, times, rapid, end):
+        self.times = times
+        self.rapid = rapid
+        self.end = end
+        self.total = float(times.sum())
+
+def pathTime(path, feed=(0, 0), rapid=None, machine=None, start=None):
+    '''pathTime(path, feed=(0, 0), rapid=None, machine=None, start=None) ... returns the PathTime of path.
+    feed are the (horizontal, vertical) feed rates used for moves without F, rapid the (xy, z) rapid rates
+    and start the position the tool is at, by default the first position of the path.
+    Feed rates are in mm/s, as in the commands of a Path.'''
+    if machine is None:
+        machine = Machine.fromPreferences()
+    if rapid is None or not all(rapid):
+        rapid = machine.rapid
+    array = CommandArray.fromPath(path, 'XYZIJKFPRQ')
+    n = len(array)
+    times = numpy.zeros(n)
+    if n == 0:
+        return PathTime(times, 0.0, start)
+
+    pos = array.positions().copy()
+    drill = array.select(CmdDrill)
+    r = array.column('R')
+    # the tool stays at the retract plane after a drill cycle, until the next command setting Z
+    z = numpy.where(array.mask[:, array.index('Z')], pos[:, 2], numpy.nan)
+    pos[:, 2] = numpy.where(drill, r, z)
+    for axis in range(3):
+        # commands without an axis leave the tool where the previous one did
+        last = numpy.maximum.accumulate(numpy.where(numpy.isnan(pos[:, axis]), 0, numpy.arange(n)))
+        pos[:, axis] = pos[last, axis]
+        column = pos[:, axis]
+        first = column[~numpy.isnan(column)]
+        fill = start[axis] if start is not None else (first[0] if len(first) else 0)
+        column[numpy.isnan(column)] = fill
+    begin = numpy.array(start if start is not None else pos[0], dtype=numpy.float64)
+    prev = numpy.vstack((begin, pos[:-1]))
+    delta = pos - prev
+
+    isRapid = array.isRapid()
+    isArc = array.isArc()
+    isMove = isRapid | array.isMove()
+    cw = array.select(PathGeom.CmdMoveCW)
+
+    # arc lengths and tangents in the plane (u, v) of each arc, the offsets I, J and K are relative to the start point
+    axes = PlaneAxes[_planes(array)]
+    rows = numpy.arange(n)[:, None]
+    offset = numpy.column_stack([numpy.where(array.mask[:, array.index(a)], array.column(a), 0) for a in 'IJK'])[rows, axes[:, :2]]
+    uvw = delta[rows, axes]
+    r0 = -offset
+    r1 = uvw[:, :2] - offset
+    radius = numpy.hypot(r0[:, 0], r0[:, 1])
+    angle = numpy.arctan2(r0[:, 0] * r1[:, 1] - r0[:, 1] * r1[:, 0], r0[:, 0] * r1[:, 0] + r0[:, 1] * r1[:, 1])
+    sweep = numpy.where(cw, -angle, angle) % (2 * math.pi)
+    sweep = numpy.where(sweep < 1e-9, 2 * math.pi, sweep)
+    arcLength = radius * sweep
+    lengths = numpy.where(isArc, numpy.hypot(arcLength, uvw[:, 2]), numpy.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2 + delta[:, 2] ** 2))
+
+    keep = isMove & (lengths > 1e-9)
+    # any command other than a move or a comment stops the machine
+    barrier = ~isMove & ~numpy.array([name.startswith('(') for name in array.names], dtype=bool)[array.opcodes]
+    index = numpy.flatnonzero(keep)
+    L = lengths[index]
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        chord = delta[index] / L[:, None]
+        sign = numpy.where(cw[index], -1.0, 1.0)
+        scale = numpy.where(radius[index] > 0, arcLength[index] / L / radius[index], 0)
+        normal = uvw[index, 2] / L
+    startTangent = numpy.where(isArc[index][:, None], _fromPlane(numpy.column_stack((-r0[index, 1] * sign * scale, r0[index, 0] * sign * scale, normal)), axes[index]), chord)
+    endTangent = numpy.where(isArc[index][:, None], _fromPlane(numpy.column_stack((-r1[index, 1] * sign * scale, r1[index, 0] * sign * scale, normal)), axes[index]), chord)
+
+    # speed and acceleration of each move
+    fcol = array.column('F')[index]
+    hasZ = numpy.abs(chord[:, 2]) > numpy.hypot(chord[:, 0], chord[:, 1])
+    speeds = numpy.where(numpy.isnan(fcol) | (fcol <= 0), numpy.where(hasZ, feed[1], feed[0]), fcol)
+    rapidLimits = numpy.array([rapid[0], rapid[0], rapid[1]], dtype=numpy.float64)
+    rapidSpeeds = _directionLimit(rapidLimits, chord)
+    moveRapid = isRapid[index] | (speeds <= 0)
+    speeds = numpy.where(moveRapid, rapidSpeeds, speeds)
+    accelerations = _directionLimit(machine.acceleration, chord)
+    # arcs are limited by their centripetal acceleration
+    arcs = isArc[index]
+    speeds[arcs] = numpy.minimum(speeds[arcs], numpy.sqrt(accelerations[arcs] * radius[index][arcs]))
+
+    # cornering speed from the junction deviation
+    t0 = endTangent[:-1]
+    t1 = startTangent[1:]
+    cos = (t0[:, 0] * t1[:, 0] + t0[:, 1] * t1[:, 1] + t0[:, 2] * t1[:, 2]) / numpy.maximum(numpy.sqrt(
+            (t0[:, 0] ** 2 + t0[:, 1] ** 2 + t0[:, 2] ** 2) * (t1[:, 0] ** 2 + t1[:, 1] ** 2 + t1[:, 2] ** 2)), 1e-12)
+    sinHalf = numpy.sqrt(numpy.clip((1 + cos) / 2, 0, 1))
+    a = numpy.minimum(accelerations[:-1], accelerations[1:])
+    with numpy.errstate(divide='ignore'):
+        corner = numpy.sqrt(a * machine.junctionDeviation * sinHalf / (1 - sinHalf))
+    stops = numpy.cumsum(barrier)[index]
+    corner = numpy.where(stops[1:] != stops[:-1], 0, corner)
+    junctions = numpy.concatenate(([0], corner, [0]))
+
+    times[index] = plan(L, speeds, accelerations, junctions)
+
+    # drill cycles: rapid to the hole, down to R, feed down, retract, without acceleration
+    if drill.any():
+        z = array.column('Z')[drill]
+        top = numpy.where(numpy.isnan(r[drill]), prev[drill, 2], r[drill])
+        approach = numpy.maximum(prev[drill, 2] - top, 0)
+        depth = numpy.maximum(numpy.nan_to_num(top - z), 0)
+        travel = numpy.hypot(delta[drill, 0], delta[drill, 1])
+        f = array.column('F')[drill]
+        f = numpy.where(numpy.isnan(f) | (f <= 0), feed[1] if feed[1] > 0 else rapid[1], f)
+        q = array.column('Q')[drill]
+        pecks = numpy.where(array.select(['G73', 'G83'])[drill] & (q > 0), numpy.ceil(depth / numpy.where(q > 0, q, 1)), 1)
+        # each peck retracts to the top and returns to the previous depth
+        peckTravel = numpy.where(pecks > 1, (pecks - 1) * depth, 0)
+        dwell = numpy.nan_to_num(array.column('P')[drill])
+        times[drill] = travel / rapid[0] + (approach + depth + peckTravel) / rapid[1] + depth / f + dwell
+
+    dwell = array.select(CmdDwell)
+    if dwell.any():
+        times[dwell] = numpy.nan_to_num(array.column('P')[dwell])
+
+    return PathTime(times, float(times[index][moveRapid].sum()), pos[-1])
+
+class CycleTime(object):
+    '''Estimated duration of a job.
+    operations ... list of (Label, seconds) of each operation
+    tools      ... list of (Label, seconds) of each tool controller, in the order they are first used
+    toolChange ... time spent changing tools
+    rapid      ... time spent with rapid moves
+    total      ... duration of the entire job'''
+
+    def __init__(self):
+        self.operations = []
+        self.tools = []
+        self.toolChange = 0.0
+        self.rapid = 0.0
+        self.total = 0.0
+
+    def addOperation(self, label, tool, estimate):
+        self.operations.append((label, estimate.total))
+        labels = [t[0] for t in self.tools]
+        if tool in labels:
+            i = labels.index(tool)
+            self.tools[i] = (tool, self.tools[i][1] + estimate.total)
+        else:
+            self.tools.append((tool, estimate.total))
+        self.rapid += estimate.rapid
+        self.total += estimate.total
+
+def formatTime(seconds):
+    '''formatTime(seconds) ... returns seconds as h:mm:ss.'''
+    seconds = int(round(seconds))
+    return "%d:%02d:%02d" % (seconds // 3600, (seconds // 60) % 60, seconds % 60)
+
+def cycleTime(job, machine=None):
+    '''cycleTime(job, machine=None) ... returns the CycleTime of all active operations of job.
+    Each operation starts where the previous one ended, feed and rapid rates are taken from the
+    tool controller of each operation.'''
+    if machine is None:
+        machine = Machine.fromPreferences()
+    result = CycleTime()
+    position = None
+    current = None
+    for op in job.Operations.Group:
+        if not getattr(op, 'Active', True) or not hasattr(op, 'Path'):
+            continue
+        tc = PathDressup.toolController(op)
+        feed = (0, 0)
+        rapid = None
+        label = None
+        if tc is not None:
+            feed = (tc.HorizFeed.Value, tc.VertFeed.Value)
+            rapid = (tc.HorizRapid.Value, tc.VertRapid.Value)
+            label = tc.Label
+            if current is not None and tc.ToolNumber != current:
+                result.toolChange += machine.toolChange
+                result.total += machine.toolChange
+            current = tc.ToolNumber
+        estimate = pathTime(op.Path, feed, rapid, machine, position)
+        if estimate.end is not None:
+            position = estimate.end
+        result.addOperation(op.Label, label, estimate)
+        PathLog.debug("%s: %s" % (op.Label, formatTime(estimate.total)))
+    return result
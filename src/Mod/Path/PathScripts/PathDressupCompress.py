@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import FreeCADGui
+import PathScripts.PathDressup as PathDressup
+import PathScripts.PathLog as PathLog
+import PathScripts.PathSimplify as PathSimplify
+
+from PathScripts import PathUtils
+from PySide import QtCore
+
+__doc__ = """Dressup replacing runs of short straight moves of its base path by fewer lines and arcs,
+see PathSimplify.compress()."""
+
+# Qt tanslation handling
+def translate(text, context="Path_DressupCompress", disambig=None):
+    return QtCore.QCoreApplication.translate(context, text, disambig)
+
+
+PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+ArcPlanes = {'XY': ('XY',), 'XY XZ YZ': ('XY', 'XZ', 'YZ'), 'None': ()}
+
+
+class ObjectDressup:
+
+    def __init__(self, obj):
+        obj.addProperty("App::PropertyLink", "Base", "Path", QtCore.QT_TRANSLATE_NOOP("Path_DressupCompress", "The base path to modify"))
+        obj.addProperty("App::PropertyDistance", "Tolerance", "Path", QtCore.QT_TRANSLATE_NOOP("Path_DressupCompress", "Maximum distance of the compressed path from the points of the base path"))
+        obj.addProperty("App::PropertyEnumeration", "ArcPlanes", "Path", QtCore.QT_TRANSLATE_NOOP("Path_DressupCompress", "Planes arcs are fitted in, None only merges straight moves. Arcs in XZ and YZ need a machine and post processor supporting G18 and G19"))
+        obj.addProperty("App::PropertyFloat", "CompressionRatio", "Result", QtCore.QT_TRANSLATE_NOOP("Path_DressupCompress", "Number of commands of the base path per command of the compressed path"))
+        obj.addProperty("App::PropertyDistance", "Deviation", "Result", QtCore.QT_TRANSLATE_NOOP("Path_DressupCompress", "Largest distance of the compressed path from the points of the base path"))
+        obj.ArcPlanes = ['XY', 'XY XZ YZ', 'None']
+        obj.setEditorMode('CompressionRatio', 1)
+        obj.setEditorMode('Deviation', 1)
+        obj.Proxy = self
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+    def setup(self, obj):
+        obj.Tolerance = 0.01
+        obj.ArcPlanes = 'XY'
+
+    def execute(self, obj):
+        if not obj.Base or not obj.Base.isDerivedFrom("Path::Feature") or not obj.Base.Path:
+            return
+        planes = ArcPlanes[obj.ArcPlanes]
+        (path, ratio, deviation) = PathSimplify.compress(obj.Base.Path, max(obj.Tolerance.Value, 1e-6), len(planes) > 0, planes)
+        PathLog.debug("%s: %d -> %d commands, deviation %.4f" % (obj.Label, obj.Base.Path.Size, path.Size, deviation))
+        obj.CompressionRatio = ratio
+        obj.Deviation = deviation
+        obj.Path = path
+
+
+class ViewProviderDressup:
+
+    def __init__(self, vobj):
+        vobj.Proxy = self
+
+    def attach(self, vobj):
+        self.obj = vobj.Object
+
+    def claimChildren(self):
+        if hasattr(self.obj.Base, "InList"):
+            for i in self.obj.Base.InList:
+                if hasattr(i, "Group"):
+                    group = i.Group
+                    for g in group:
+                        if g.Name == self.obj.Base.Name:
+                            group.remove(g)
+                    i.Group = group
+        return [self.obj.Base]
+
+    def onDelete(self, arg1=None, arg2=None):
+        '''this makes sure that the base operation is added back to the project and visible'''
+        FreeCADGui.ActiveDocument.getObject(arg1.Object.Base.Name).Visibility = True
+        job = PathUtils.findParentJob(self.obj)
+        job.Proxy.addOperation(arg1.Object.Base)
+        arg1.Object.Base = None
+        return True
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+
+class CommandPathDressupCompress:
+
+    def GetResources(self):
+        return {'Pixmap': 'Path-Dressup',
+                'MenuText': QtCore.QT_TRANSLATE_NOOP("Path_DressupCompress", "Compress Dress-up"),
+                'ToolTip': QtCore.QT_TRANSLATE_NOOP("Path_DressupCompress", "Replaces runs of short moves of the selected path by lines and arcs")}
+
+    def IsActive(self):
+        return PathDressup.selection() is not None
+
+    def Activated(self):
+
+        # check that the selection contains exactly what we want
+        selection = FreeCADGui.Selection.getSelection()
+        if len(selection) != 1:
+            PathLog.error(translate("Please select one path object\n"))
+            return
+        if not selection[0].isDerivedFrom("Path::Feature"):
+            PathLog.error(translate("The selected object is not a path\n"))
+            return
+
+        # everything ok!
+        FreeCAD.ActiveDocument.openTransaction(translate("Create Compress Dress-up"))
+        FreeCADGui.addModule("PathScripts.PathDressupCompress")
+        FreeCADGui.addModule("PathScripts.PathUtils")
+        FreeCADGui.doCommand('obj = FreeCAD.ActiveDocument.addObject("Path::FeaturePython", "CompressDressup")')
+        FreeCADGui.doCommand('dbo = PathScripts.PathDressupCompress.ObjectDressup(obj)')
+        FreeCADGui.doCommand('obj.Base = FreeCAD.ActiveDocument.' + selection[0].Name)
+        FreeCADGui.doCommand('PathScripts.PathDressupCompress.ViewProviderDressup(obj.ViewObject)')
+        FreeCADGui.doCommand('PathScripts.PathUtils.addToJob(obj)')
+        FreeCADGui.doCommand('Gui.ActiveDocument.getObject(obj.Base.Name).Visibility = False')
+        FreeCADGui.doCommand('dbo.setup(obj)')
+        FreeCAD.ActiveDocument.commitTransaction()
+        FreeCAD.ActiveDocument.recompute()
+
+
+if FreeCAD.GuiUp:
+    # register the FreeCAD command
+    FreeCADGui.addCommand('Path_DressupCompress', CommandPathDressupCompress())
+
+PathLog.notice("Loading Path_DressupCompress... done\n")
@@ -26,6 +26,7 @@ import DraftGeomUtils
 import FreeCAD
 import FreeCADGui
 import math
+import numpy
 import Part
 import Path
 import PathScripts.PathDressup as PathDressup
@@ -33,6 +34,7 @@ import PathScripts.PathLog as PathLog
 import PathScripts.PathUtil as PathUtil
 import PathScripts.PathUtils as PathUtils
 
+from PathScripts.PathCommandArray import CommandArray
 from PathScripts.PathGeom import PathGeom
 from PySide import QtCore, QtGui
 
@@ -291,13 +293,51 @@ class Chord (object):
 
     def foldsBackOrTurns(self, chord, side):
         dir = chord.getDirectionOf(self)
-        PathLog.info("  - direction = %s/%s" % (dir, side))
+        PathLog.info("  - direction = %s/%s", dir, side)
         return dir == 'Back' or dir == side
 
     def connectsTo(self, chord):
         return PathGeom.pointsCoincide(self.End, chord.Start)
 
 
+class Moves:
+    '''Moves(path) ... start and end points of all commands of path as (N, 3) arrays.
+    Commands other than moves keep the position of the previous move, the first move starts at the origin.
+    Used to find the corners of a path with vector math instead of a Chord for every command.'''
+
+    def __init__(self, path):
+        array = CommandArray.fromPath(path, 'XYZ')
+        n = len(array)
+        self.isMove = array.select(movecommands)
+        self.isStraight = array.select(movestraight)
+
+        # fill in the axes not set by a move from the last move which did
+        index = numpy.where(array.mask & self.isMove[:, numpy.newaxis], numpy.arange(n)[:, numpy.newaxis], -1)
+        last = numpy.maximum.accumulate(index, axis=0) if n else index
+        self.end = numpy.where(last >= 0, array.values[numpy.maximum(last, 0), numpy.arange(3)], 0.0)
+        self.start = numpy.vstack((numpy.zeros((1, 3)), self.end[:-1]))
+
+        vector = self.end - self.start
+        self.isPlunge = numpy.fabs(vector[:, 2]) > PathGeom.Tolerance
+
+        # direction of each move relative to the previous move, see Chord.getDirectionOfVector
+        previous = numpy.maximum.accumulate(numpy.where(self.isMove, numpy.arange(n), -1)) if n else numpy.zeros(0, dtype=int)
+        previous = numpy.concatenate(([0], previous[:-1]))
+        (A, B) = (vector[previous], vector)
+        self.isSame = (numpy.fabs(A - B) <= numpy.finfo(float).eps).all(axis=1)
+        self.d = -A[:, 0] * B[:, 1] + A[:, 1] * B[:, 0]
+
+    def chord(self, i):
+        '''chord(i) ... returns the Chord of the i-th command.'''
+        return Chord(FreeCAD.Vector(*self.start[i]), FreeCAD.Vector(*self.end[i]))
+
+    def turns(self, side):
+        '''turns(side) ... bool array, True for all moves which fold back or turn to side relative to the previous move.'''
+        if side == Side.Left:
+            return ~self.isSame & (self.d <= 0)
+        return ~self.isSame & (self.d >= 0)
+
+
 class Bone:
     def __init__(self, boneId, obj, lastCommand, inChord, outChord, smooth, F):
         self.obj = obj
@@ -341,9 +381,9 @@ class Bone:
         # for some reason pi/2 is not equal to pi/2
         if math.fabs(angle - boneAngle) < 0.00001:
             # moving directly towards the corner
-            PathLog.debug("adaptive - on target: %.2f - %.2f" % (distance, toolRadius))
+            PathLog.debug("adaptive - on target: %.2f - %.2f", distance, toolRadius)
             return distance - toolRadius
-        PathLog.debug("adaptive - angles: corner=%.2f  bone=%.2f diff=%.12f" % (angle/math.pi, boneAngle/math.pi, angle - boneAngle))
+        PathLog.debug("adaptive - angles: corner=%.2f  bone=%.2f diff=%.12f", angle/math.pi, boneAngle/math.pi, angle - boneAngle)
 
         # The bones root and end point form a triangle with the intersection of the tool path
         # with the toolRadius circle around the bone end point.
@@ -366,7 +406,7 @@ class Bone:
             length2 = toolRadius * math.sin(alpha2) / math.sin(beta2)
             length = min(length, length2)
 
-        PathLog.debug("adaptive corner=%.2f * %.2f˚ -> bone=%.2f * %.2f˚" % (distance, angle, length, boneAngle))
+        PathLog.debug("adaptive corner=%.2f * %.2f˚ -> bone=%.2f * %.2f˚", distance, angle, length, boneAngle)
         return length
 
 
@@ -417,20 +457,20 @@ class ObjectDressup:
         for pt in DraftGeomUtils.findIntersection(edge, pivotEdge, dts=False):
             # debugMarker(pt, "pti.%d-%s.in" % (self.boneId, d), color, 0.2)
             distance = (pt - refPt).Length
-            PathLog.debug("        -->  (%.2f, %.2f): %.2f" % (pt.x, pt.y, distance))
+            PathLog.debug("        -->  (%.2f, %.2f): %.2f", pt.x, pt.y, distance)
             if not ppt or pptDistance < distance:
                 ppt = pt
                 pptDistance = distance
         if not ppt:
             tangent = DraftGeomUtils.findDistance(pivot, edge)
             if tangent:
-                PathLog.debug("Taking tangent as intersect %s" % tangent)
+                PathLog.debug("Taking tangent as intersect %s", tangent)
                 ppt = pivot + tangent
             else:
                 PathLog.debug("Taking chord start as intersect %s" % edge.Vertexes[0].Point)
                 ppt = edge.Vertexes[0].Point
             # debugMarker(ppt, "ptt.%d-%s.in" % (self.boneId, d), color, 0.2)
-            PathLog.debug("        -->  (%.2f, %.2f)" % (ppt.x, ppt.y))
+            PathLog.debug("        -->  (%.2f, %.2f)", ppt.x, ppt.y)
         return ppt
 
     def pointIsOnEdge(self, point, edge):
@@ -449,19 +489,19 @@ class ObjectDressup:
             refPoint = outChord.End
 
         if DraftGeomUtils.areColinear(inChord.asEdge(), outChord.asEdge()):
-            PathLog.info(" straight edge %s" % d)
+            PathLog.info(" straight edge %s", d)
             return [outChord.g1Command(bone.F)]
 
         pivot = None
         pivotDistance = 0
 
-        PathLog.info("smooth:  (%.2f, %.2f)-(%.2f, %.2f)" % (edge.Vertexes[0].Point.x, edge.Vertexes[0].Point.y, edge.Vertexes[1].Point.x, edge.Vertexes[1].Point.y))
+        PathLog.info("smooth:  (%.2f, %.2f)-(%.2f, %.2f)", edge.Vertexes[0].Point.x, edge.Vertexes[0].Point.y, edge.Vertexes[1].Point.x, edge.Vertexes[1].Point.y)
         for e in wire.Edges:
             self.dbg.append(e)
             if type(e.Curve) == Part.LineSegment or type(e.Curve) == Part.Line:
-                PathLog.debug("         (%.2f, %.2f)-(%.2f, %.2f)" % (e.Vertexes[0].Point.x, e.Vertexes[0].Point.y, e.Vertexes[1].Point.x, e.Vertexes[1].Point.y))
+                PathLog.debug("         (%.2f, %.2f)-(%.2f, %.2f)", e.Vertexes[0].Point.x, e.Vertexes[0].Point.y, e.Vertexes[1].Point.x, e.Vertexes[1].Point.y)
             else:
-                PathLog.debug("         (%.2f, %.2f)^%.2f" % (e.Curve.Center.x, e.Curve.Center.y, e.Curve.Radius))
+                PathLog.debug("         (%.2f, %.2f)^%.2f", e.Curve.Center.x, e.Curve.Center.y, e.Curve.Radius)
             for pt in DraftGeomUtils.findIntersection(edge, e, True, findAll=True):
                 if not PathGeom.pointsCoincide(pt, corner) and self.pointIsOnEdge(pt, e):
                     # debugMarker(pt, "candidate-%d-%s" % (self.boneId, d), color, 0.05)
@@ -488,7 +528,7 @@ class ObjectDressup:
                 PathLog.debug("  add g3 command")
                 commands.append(Chord(t1, t2).g3Command(pivot, bone.F))
             else:
-                PathLog.debug("  add g2 command center=(%.2f, %.2f) -> from (%2f, %.2f) to (%.2f, %.2f" % (pivot.x, pivot.y, t1.x, t1.y, t2.x, t2.y))
+                PathLog.debug("  add g2 command center=(%.2f, %.2f) -> from (%2f, %.2f) to (%.2f, %.2f", pivot.x, pivot.y, t1.x, t1.y, t2.x, t2.y)
                 commands.append(Chord(t1, t2).g2Command(pivot, bone.F))
             if not PathGeom.pointsCoincide(t2, outChord.End):
                 PathLog.debug("  add lead out")
@@ -508,7 +548,7 @@ class ObjectDressup:
 
         bone.tip = bone.inChord.End  # in case there is no bone
 
-        PathLog.debug("corner = (%.2f, %.2f)" % (corner.x, corner.y))
+        PathLog.debug("corner = (%.2f, %.2f)", corner.x, corner.y)
         # debugMarker(corner, 'corner', (1., 0., 1.), self.toolRadius)
 
         length = fixedLength
@@ -597,7 +637,7 @@ class ObjectDressup:
         onInString = 'out'
         if onIn:
             onInString = 'in'
-        PathLog.debug("tboneEdge boneAngle[%s]=%.2f   (in=%.2f, out=%.2f)" % (onInString, boneAngle/math.pi, bone.inChord.getAngleXY()/math.pi, bone.outChord.getAngleXY()/math.pi))
+        PathLog.debug("tboneEdge boneAngle[%s]=%.2f   (in=%.2f, out=%.2f)", onInString, boneAngle/math.pi, bone.inChord.getAngleXY()/math.pi, bone.outChord.getAngleXY()/math.pi)
         return self.inOutBoneCommands(bone, boneAngle, self.toolRadius)
 
     def tboneLongEdge(self, bone):
@@ -640,7 +680,7 @@ class ObjectDressup:
             return [bone.lastCommand, bone.outChord.g1Command(bone.F)]
 
     def insertBone(self, bone):
-        PathLog.debug(">----------------------------------- %d --------------------------------------" % bone.boneId)
+        PathLog.debug(">----------------------------------- %d --------------------------------------", bone.boneId)
         self.boneShapes = []
         blacklisted, inaccessible = self.boneIsBlacklisted(bone)
         enabled = not blacklisted
@@ -654,7 +694,7 @@ class ObjectDressup:
         bone.commands = commands
 
         self.shapes[bone.boneId] = self.boneShapes
-        PathLog.debug("<----------------------------------- %d --------------------------------------" % bone.boneId)
+        PathLog.debug("<----------------------------------- %d --------------------------------------", bone.boneId)
         return commands
 
     def removePathCrossing(self, commands, bone1, bone2):
@@ -711,8 +751,13 @@ class ObjectDressup:
 
         self.setup(obj, False)
 
+        # find the candidates and corners for all commands at once, Chords are only created for the bones
+        moves = Moves(obj.Base.Path)
+        candidates = moves.isStraight & ~moves.isPlunge
+        corners = candidates & moves.turns(self.theOtherSideOf(obj.Side))
+
         commands = []           # the dressed commands
-        lastChord = Chord()     # the last chord
+        lastMove = None         # index of the command that generated the last chord
         lastCommand = None      # the command that generated the last chord
         lastBone = None         # track last bone for optimizations
         oddsAndEnds = []        # track chords that are connected to plunges - in case they form a loop
@@ -720,23 +765,14 @@ class ObjectDressup:
         boneId = 1
         self.bones = []
         self.locationBlacklist = set()
-        # boneIserted = False
 
         for (i, thisCommand) in enumerate(obj.Base.Path.Commands):
-            # if i > 14:
-            #    if lastCommand:
-            #        commands.append(lastCommand)
-            #        lastCommand = None
-            #    commands.append(thisCommand)
-            #    continue
-            PathLog.info("%3d: %s" % (i, thisCommand))
-            if thisCommand.Name in movecommands:
-                thisChord = lastChord.moveToParameters(thisCommand.Parameters)
-                thisIsACandidate = self.canAttachDogbone(thisCommand, thisChord)
-
-                if thisIsACandidate and lastCommand and self.shouldInsertDogbone(obj, lastChord, thisChord):
-                    PathLog.info("  Found bone corner")
-                    bone = Bone(boneId, obj, lastCommand, lastChord, thisChord, Smooth.InAndOut, thisCommand.Parameters.get('F'))
+            if moves.isMove[i]:
+                thisIsACandidate = candidates[i]
+
+                if thisIsACandidate and lastCommand and corners[i]:
+                    PathLog.info("%3d: found bone corner", i)
+                    bone = Bone(boneId, obj, lastCommand, moves.chord(lastMove), moves.chord(i), Smooth.InAndOut, thisCommand.Parameters.get('F'))
                     bones = self.insertBone(bone)
                     boneId += 1
                     if lastBone:
@@ -746,12 +782,13 @@ class ObjectDressup:
                     commands.extend(bones[:-1])
                     lastCommand = bones[-1]
                     lastBone = bone
-                elif lastCommand and thisChord.isAPlungeMove():
-                    PathLog.info("  Looking for connection in odds and ends")
+                elif lastCommand and moves.isPlunge[i]:
+                    PathLog.debug("%3d: looking for connection in odds and ends", i)
                     haveNewLastCommand = False
+                    lastChord = moves.chord(lastMove)
                     for chord in (chord for chord in oddsAndEnds if lastChord.connectsTo(chord)):
                         if self.shouldInsertDogbone(obj, lastChord, chord):
-                            PathLog.info("    and there is one")
+                            PathLog.info("%3d: found bone corner in odds and ends", i)
                             bone = Bone(boneId, obj, lastCommand, lastChord, chord, Smooth.In, lastCommand.Parameters.get('F'))
                             bones = self.insertBone(bone)
                             boneId += 1
@@ -768,26 +805,22 @@ class ObjectDressup:
                     commands.append(thisCommand)
                     lastBone = None
                 elif thisIsACandidate:
-                    PathLog.info("  is a candidate, keeping for later")
                     if lastCommand:
                         commands.append(lastCommand)
                     lastCommand = thisCommand
                     lastBone = None
                 else:
-                    PathLog.info("  nope")
                     if lastCommand:
                         commands.append(lastCommand)
                         lastCommand = None
                     commands.append(thisCommand)
                     lastBone = None
 
-                if lastChord.isAPlungeMove() and thisIsACandidate:
-                    PathLog.info("  adding to odds and ends")
-                    oddsAndEnds.append(thisChord)
+                if lastMove is not None and moves.isPlunge[lastMove] and thisIsACandidate:
+                    oddsAndEnds.append(moves.chord(i))
 
-                lastChord = thisChord
+                lastMove = i
             else:
-                PathLog.info("  Clean slate")
                 if lastCommand:
                     commands.append(lastCommand)
                     lastCommand = None
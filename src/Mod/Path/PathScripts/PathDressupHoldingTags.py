@@ -44,6 +44,8 @@ if False:
 else:
     PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
 
+LOG = PathLog.moduleLevel()
+
 
 # Qt tanslation handling
 def translate(context, text, disambig=None):
@@ -51,7 +53,7 @@ def translate(context, text, disambig=None):
 
 
 def debugEdge(edge, prefix, force=False):
-    if force or PathLog.getLevel(PathLog.thisModule()) == PathLog.Level.DEBUG:
+    if force or LOG.isEnabledFor(PathLog.Level.DEBUG):
         pf = edge.valueAt(edge.FirstParameter)
         pl = edge.valueAt(edge.LastParameter)
         if type(edge.Curve) == Part.Line or type(edge.Curve) == Part.LineSegment:
@@ -62,7 +64,7 @@ def debugEdge(edge, prefix, force=False):
 
 
 def debugMarker(vector, label, color=None, radius=0.5):
-    if PathLog.getLevel(PathLog.thisModule()) == PathLog.Level.DEBUG:
+    if LOG.isEnabledFor(PathLog.Level.DEBUG):
         obj = FreeCAD.ActiveDocument.addObject("Part::Sphere", label)
         obj.Label = label
         obj.Radius = radius
@@ -72,7 +74,7 @@ def debugMarker(vector, label, color=None, radius=0.5):
 
 
 def debugCylinder(vector, r, height, label, color=None):
-    if PathLog.getLevel(PathLog.thisModule()) == PathLog.Level.DEBUG:
+    if LOG.isEnabledFor(PathLog.Level.DEBUG):
         obj = FreeCAD.ActiveDocument.addObject("Part::Cylinder", label)
         obj.Label = label
         obj.Radius = r
@@ -84,7 +86,7 @@ def debugCylinder(vector, r, height, label, color=None):
 
 
 def debugCone(vector, r1, r2, height, label, color=None):
-    if PathLog.getLevel(PathLog.thisModule()) == PathLog.Level.DEBUG:
+    if LOG.isEnabledFor(PathLog.Level.DEBUG):
         obj = FreeCAD.ActiveDocument.addObject("Part::Cone", label)
         obj.Label = label
         obj.Radius1 = r1
@@ -135,7 +137,7 @@ class Tag:
             self.isSquare = True
             self.solid = Part.makeCylinder(r1, height)
             radius = min(min(self.radius, r1), self.height)
-            PathLog.debug("Part.makeCone(%f, %f)" % (r1, height))
+            PathLog.debug("Part.makeCone(%f, %f)", r1, height)
         elif self.angle > 0.0 and height > 0.0:
             # cone
             rad = math.radians(self.angle)
@@ -152,23 +154,23 @@ class Tag:
                 height = r1 * tangens * 1.01
                 self.actualHeight = height
             self.r2 = r2
-            PathLog.debug("Part.makeCone(%f, %f, %f)" % (r1, r2, height))
+            PathLog.debug("Part.makeCone(%f, %f, %f)", r1, r2, height)
             self.solid = Part.makeCone(r1, r2, height)
         else:
             # degenerated case - no tag
-            PathLog.debug("Part.makeSphere(%f / 10000)" % (r1))
+            PathLog.debug("Part.makeSphere(%f / 10000)", r1)
             self.solid = Part.makeSphere(r1 / 10000)
         if not R == 0:  # testing is easier if the solid is not rotated
             angle = -PathGeom.getAngle(self.originAt(0)) * 180 / math.pi
-            PathLog.debug("solid.rotate(%f)" % angle)
+            PathLog.debug("solid.rotate(%f)", angle)
             self.solid.rotate(FreeCAD.Vector(0, 0, 0), FreeCAD.Vector(0, 0, 1), angle)
         orig = self.originAt(z - 0.01 * self.actualHeight)
-        PathLog.debug("solid.translate(%s)" % orig)
+        PathLog.debug("solid.translate(%s)", orig)
         self.solid.translate(orig)
         radius = min(self.radius, radius)
         self.realRadius = radius
         if radius != 0:
-            PathLog.debug("makeFillet(%.4f)" % radius)
+            PathLog.debug("makeFillet(%.4f)", radius)
             self.solid = self.solid.makeFillet(radius, [self.solid.Edges[0]])
 
     def filterIntersections(self, pts, face):
@@ -226,6 +228,56 @@ class Tag:
             Part.show(e)
 
 
+class TagIndex:
+    '''2D grid over the XY footprints of all enabled tags.
+    An edge can only intersect a tag if their bounding boxes overlap, so candidates()
+    limits the expensive intersection of edge and tag solid to the tags close to the edge.'''
+
+    def __init__(self, tags, tolerance=PathGeom.Tolerance):
+        self.boxes = {}
+        for i, tag in enumerate(tags):
+            if tag.enabled:
+                bb = tag.solid.BoundBox
+                self.boxes[i] = (bb.XMin - tolerance, bb.YMin - tolerance, bb.XMax + tolerance, bb.YMax + tolerance)
+
+        self.cellSize = 1.0
+        if self.boxes:
+            self.cellSize = max([max(b[2] - b[0], b[3] - b[1]) for b in self.boxes.values()])
+
+        self.grid = {}
+        for i, box in self.boxes.items():
+            for cell in self.cells(box):
+                self.grid.setdefault(cell, []).append(i)
+
+    def cellRange(self, box):
+        x0 = int(math.floor(box[0] / self.cellSize))
+        y0 = int(math.floor(box[1] / self.cellSize))
+        x1 = int(math.floor(box[2] / self.cellSize))
+        y1 = int(math.floor(box[3] / self.cellSize))
+        return (x0, y0, x1, y1)
+
+    def cells(self, box):
+        (x0, y0, x1, y1) = self.cellRange(box)
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def candidates(self, edge):
+        '''candidates(edge) ... returns the set of indices of all tags the edge might intersect.'''
+        bb = edge.BoundBox
+        box = (bb.XMin, bb.YMin, bb.XMax, bb.YMax)
+        (x0, y0, x1, y1) = self.cellRange(box)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.boxes):
+            # long edges are cheaper to check against every tag directly
+            indices = self.boxes.keys()
+        else:
+            indices = set()
+            for cell in self.cells(box):
+                indices.update(self.grid.get(cell, []))
+        return set([i for i in indices if self.overlap(box, self.boxes[i])])
+
+    def overlap(self, box, other):
+        return box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]
+
+
 class MapWireToTag:
     def __init__(self, edge, tag, i, segm, maxZ):
         debugEdge(edge, 'MapWireToTag(%.2f, %.2f, %.2f)' % (i.x, i.y, i.z))
@@ -250,9 +302,9 @@ class MapWireToTag:
         self.edges = []
         self.entry = i
         if tail:
-            PathLog.debug("MapWireToTag(%s - %s)" % (i, tail.valueAt(tail.FirstParameter)))
+            PathLog.debug("MapWireToTag(%s - %s)", i, tail.valueAt(tail.FirstParameter))
         else:
-            PathLog.debug("MapWireToTag(%s - )" % i)
+            PathLog.debug("MapWireToTag(%s - )", i)
         self.complete = False
         self.haveProblem = False
 
@@ -390,9 +442,9 @@ class MapWireToTag:
                     debugEdge(e, '    ', False)
                 raise ValueError("No connection to %s" % (p0))
             elif lastP:
-                PathLog.debug("xxxxxx (%.2f, %.2f, %.2f) (%.2f, %.2f, %.2f)" % (p0.x, p0.y, p0.z, lastP.x, lastP.y, lastP.z))
+                PathLog.debug("xxxxxx (%.2f, %.2f, %.2f) (%.2f, %.2f, %.2f)", p0.x, p0.y, p0.z, lastP.x, lastP.y, lastP.z)
             else:
-                PathLog.debug("xxxxxx (%.2f, %.2f, %.2f) -" % (p0.x, p0.y, p0.z))
+                PathLog.debug("xxxxxx (%.2f, %.2f, %.2f) -", p0.x, p0.y, p0.z)
             lastP = p0
         PathLog.track("-")
         return outputEdges
@@ -559,7 +611,7 @@ class PathData:
         startIndex = 0
         for i in range(0, len(self.baseWire.Edges)):
             edge = self.baseWire.Edges[i]
-            PathLog.debug('  %d: %.2f' % (i, edge.Length))
+            PathLog.debug('  %d: %.2f', i, edge.Length)
             if edge.Length == longestEdge.Length:
                 startIndex = i
                 break
@@ -574,10 +626,10 @@ class PathData:
 
         minLength = min(2. * W, longestEdge.Length)
 
-        PathLog.debug("length=%.2f shortestEdge=%.2f(%.2f) longestEdge=%.2f(%.2f) minLength=%.2f" % (self.baseWire.Length, shortestEdge.Length, shortestEdge.Length/self.baseWire.Length, longestEdge.Length, longestEdge.Length / self.baseWire.Length, minLength))
-        PathLog.debug("   start: index=%-2d count=%d (length=%.2f, distance=%.2f)" % (startIndex, startCount, startEdge.Length, tagDistance))
-        PathLog.debug("               -> lastTagLength=%.2f)" % lastTagLength)
-        PathLog.debug("               -> currentLength=%.2f)" % currentLength)
+        PathLog.debug("length=%.2f shortestEdge=%.2f(%.2f) longestEdge=%.2f(%.2f) minLength=%.2f", self.baseWire.Length, shortestEdge.Length, shortestEdge.Length/self.baseWire.Length, longestEdge.Length, longestEdge.Length / self.baseWire.Length, minLength)
+        PathLog.debug("   start: index=%-2d count=%d (length=%.2f, distance=%.2f)", startIndex, startCount, startEdge.Length, tagDistance)
+        PathLog.debug("               -> lastTagLength=%.2f)", lastTagLength)
+        PathLog.debug("               -> currentLength=%.2f)", currentLength)
 
         edgeDict = {startIndex: startCount}
 
@@ -592,7 +644,7 @@ class PathData:
 
         for (i, count) in PathUtil.keyValueIter(edgeDict):
             edge = self.baseWire.Edges[i]
-            PathLog.debug(" %d: %d" % (i, count))
+            PathLog.debug(" %d: %d", i, count)
             # debugMarker(edge.Vertexes[0].Point, 'base', (1.0, 0.0, 0.0), 0.2)
             # debugMarker(edge.Vertexes[1].Point, 'base', (0.0, 1.0, 0.0), 0.2)
             if 0 != count:
@@ -611,10 +663,10 @@ class PathData:
                 tagCount += 1
                 lastTagLength += tagDistance
             if tagCount > 0:
-                PathLog.debug("      index=%d -> count=%d" % (index, tagCount))
+                PathLog.debug("      index=%d -> count=%d", index, tagCount)
                 edgeDict[index] = tagCount
         else:
-            PathLog.debug("      skipping=%-2d (%.2f)" % (index, edge.Length))
+            PathLog.debug("      skipping=%-2d (%.2f)", index, edge.Length)
 
         return (currentLength, lastTagLength)
 
@@ -647,14 +699,14 @@ class PathData:
                 ordered.append(t)
         # disable all tags that are not on the base wire.
         for tag in tags:
-            PathLog.info("Tag #%d (%.2f, %.2f, %.2f) not on base wire - disabling\n" % (len(ordered), tag.x, tag.y, self.minZ))
+            PathLog.info("Tag #%d (%.2f, %.2f, %.2f) not on base wire - disabling\n", len(ordered), tag.x, tag.y, self.minZ)
             tag.enabled = False
             ordered.append(tag)
         return ordered
 
     def pointIsOnPath(self, p):
         v = Part.Vertex(self.pointAtBottom(p))
-        PathLog.debug("pt = (%f, %f, %f)" % (v.X, v.Y, v.Z))
+        PathLog.debug("pt = (%f, %f, %f)", v.X, v.Y, v.Z)
         for e in self.bottomEdges:
             indent = "{} ".format(e.distToShape(v)[0])
             debugEdge(e, indent, True)
@@ -744,8 +796,12 @@ class ObjectTagDressup:
         self.mappers = []
         mapper = None
 
+        index = TagIndex(tags)
+        candidateEdge = None
+        candidates = None
+
         while edge or lastEdge < len(pathData.edges):
-            PathLog.debug("------- lastEdge = %d/%d.%d/%d" % (lastEdge, lastTag, t, len(tags)))
+            PathLog.debug("------- lastEdge = %d/%d.%d/%d", lastEdge, lastTag, t, len(tags))
             if not edge:
                 edge = pathData.edges[lastEdge]
                 debugEdge(edge, "=======  new edge: %d/%d" % (lastEdge, len(pathData.edges)))
@@ -764,7 +820,12 @@ class ObjectTagDressup:
             if edge:
                 tIndex = (t + lastTag) % len(tags)
                 t += 1
-                i = tags[tIndex].intersects(edge, edge.FirstParameter)
+                if edge is not candidateEdge:
+                    candidateEdge = edge
+                    candidates = index.candidates(edge)
+                i = None
+                if tIndex in candidates:
+                    i = tags[tIndex].intersects(edge, edge.FirstParameter)
                 if i and self.isValidTagStartIntersection(edge, i):
                     mapper = MapWireToTag(edge, tags[tIndex], i, segm, pathData.maxZ)
                     self.mappers.append(mapper)
@@ -839,20 +900,20 @@ class ObjectTagDressup:
             if tag.enabled:
                 if prev:
                     if prev.solid.common(tag.solid).Faces:
-                        PathLog.info("Tag #%d intersects with previous tag - disabling\n" % i)
-                        PathLog.debug("this tag = %d [%s]" % (i, tag.solid.BoundBox))
+                        PathLog.info("Tag #%d intersects with previous tag - disabling\n", i)
+                        PathLog.debug("this tag = %d [%s]", i, tag.solid.BoundBox)
                         tag.enabled = False
                 elif self.pathData.edges:
                     e = self.pathData.edges[0]
                     p0 = e.valueAt(e.FirstParameter)
                     p1 = e.valueAt(e.LastParameter)
                     if tag.solid.isInside(p0, PathGeom.Tolerance, True) or tag.solid.isInside(p1, PathGeom.Tolerance, True):
-                        PathLog.info("Tag #%d intersects with starting point - disabling\n" % i)
+                        PathLog.info("Tag #%d intersects with starting point - disabling\n", i)
                         tag.enabled = False
 
             if tag.enabled:
                 prev = tag
-                PathLog.debug("previousTag = %d [%s]" % (i, prev))
+                PathLog.debug("previousTag = %d [%s]", i, prev)
             else:
                 disabled.append(i)
             tag.id = i  # assigne final id
@@ -887,7 +948,7 @@ class ObjectTagDressup:
         if hasattr(obj, "Positions"):
             self.tags, positions, disabled = self.createTagsPositionDisabled(obj, obj.Positions, obj.Disabled)
             if obj.Disabled != disabled:
-                PathLog.debug("Updating properties.... %s vs. %s" % (obj.Disabled, disabled))
+                PathLog.debug("Updating properties.... %s vs. %s", obj.Disabled, disabled)
                 obj.Positions = positions
                 obj.Disabled = disabled
 
@@ -916,11 +977,11 @@ class ObjectTagDressup:
     @waiting_effects
     def processTags(self, obj):
         tagID = 0
-        if PathLog.getLevel(PathLog.thisModule()) == PathLog.Level.DEBUG:
+        if LOG.isEnabledFor(PathLog.Level.DEBUG):
             for tag in self.tags:
                 tagID += 1
                 if tag.enabled:
-                    PathLog.debug("x=%s, y=%s, z=%s" % (tag.x, tag.y, self.pathData.minZ))
+                    PathLog.debug("x=%s, y=%s, z=%s", tag.x, tag.y, self.pathData.minZ)
                     # debugMarker(FreeCAD.Vector(tag.x, tag.y, self.pathData.minZ), "tag-%02d" % tagID , (1.0, 0.0, 1.0), 0.5)
                     # if tag.angle != 90:
                     #    debugCone(tag.originAt(self.pathData.minZ), tag.r1, tag.r2, tag.actualHeight, "tag-%02d" % tagID)
@@ -55,6 +55,8 @@ def translate(context, text, disambig=None):
 class ObjectDrilling(PathCircularHoleBase.ObjectOp):
     '''Proxy object for Drilling operation.'''
 
+    restoredHoleOrder = 'Legacy'
+
     def circularHoleFeatures(self, obj):
         '''circularHoleFeatures(obj) ... drilling works on anything, turn on all Base geometries and Locations.'''
         return PathOp.FeatureBaseGeometry | PathOp.FeatureLocations
@@ -84,7 +86,6 @@ class ObjectDrilling(PathCircularHoleBase.ObjectOp):
         if obj.AddTipLength:
             tiplength = PathUtils.drillTipLength(self.tool)
 
-        holes = PathUtils.sort_jobs(holes, ['x', 'y'])
         self.commandlist.append(Path.Command('G90'))
         self.commandlist.append(Path.Command(obj.ReturnLevel))
 
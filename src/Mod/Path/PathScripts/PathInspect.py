@@ -106,6 +106,7 @@ class GCodeEditorDialog(QtGui.QDialog):
 
     def __init__(self, PathObj, parent=FreeCADGui.getMainWindow()):
         self.PathObj = PathObj
+        self.commands = None
         QtGui.QDialog.__init__(self, parent)
         layout = QtGui.QVBoxLayout(self)
 
@@ -158,36 +159,17 @@ class GCodeEditorDialog(QtGui.QDialog):
         cursor.setPosition(ep)
         endrow = cursor.blockNumber()
 
-        commands = self.PathObj.Commands
+        if self.commands is None:
+            self.commands = self.PathObj.Commands
 
         #Derive the starting position for the first selected command
-        prevX = prevY = prevZ = None
-        prevcommands = commands[:startrow]
-        prevcommands.reverse()
-        for c in prevcommands:
-            if prevX is None:
-                if c.Parameters.get("X") is not None:
-                    prevX = c.Parameters.get("X")
-            if prevY is None:
-                if c.Parameters.get("Y") is not None:
-                    prevY = c.Parameters.get("Y")
-            if prevZ is None:
-                if c.Parameters.get("Z") is not None:
-                    prevZ = c.Parameters.get("Z")
-            if prevX is not None and prevY is not None and prevZ is not None:
-                break
-        if prevX is None:
-            prevX = 0.0
-        if prevY is None:
-            prevY = 0.0
-        if prevZ is None:
-            prevZ = 0.0
+        start = self.PathObj.getPosition(min(startrow, self.PathObj.Size))
 
         #Build a new path with selection
         p = Path.Path()
-        firstrapid = Path.Command("G0", {"X": prevX, "Y":prevY, "Z":prevZ})
+        firstrapid = Path.Command("G0", {"X": start.x, "Y": start.y, "Z": start.z})
 
-        selectionpath = [firstrapid] + commands[startrow:endrow +1]
+        selectionpath = [firstrapid] + self.commands[startrow:endrow +1]
         p.Commands = selectionpath
         self.selectionobj.Path = p
 
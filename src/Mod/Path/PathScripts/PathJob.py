@@ -234,6 +234,15 @@ class ObjectJob:
             processor = PostProcessor.load(obj.PostProcessor)
             self.tooltip = processor.tooltip
             self.tooltipArgs = processor.tooltipArgs
+        if prop == "Base":
+            self.invalidateCaches()
+
+    def invalidateCaches(self):
+        '''invalidateCaches() ... drop all cached results of the job's operations, called when the Base changes.'''
+        if hasattr(self, 'sectionCache'):
+            self.sectionCache.clear()
+        if hasattr(self, 'surfaceCache'):
+            self.surfaceCache.clear()
 
     def baseObject(self, obj):
         '''Return the base object, not its clone.'''
@@ -340,6 +349,12 @@ class ObjectJob:
             collectBaseOps(op)
         return ops
 
+    def regenerateAll(self, processes=None):
+        '''regenerateAll(processes=None) ... recompute all operations, independent ones concurrently.
+        See PathJobRegenerate.regenerate() for details, returns the timing report of all operations.'''
+        import PathScripts.PathJobRegenerate as PathJobRegenerate
+        return PathJobRegenerate.regenerate(self.obj, processes)
+
     @classmethod
     def baseCandidates(cls):
         '''Answer all objects in the current document which could serve as a Base for a job.'''
@@ -26,6 +26,7 @@ import Draft
 import DraftVecUtils
 import FreeCAD
 import FreeCADGui
+import PathScripts.PathCycleTime as PathCycleTime
 import PathScripts.PathJob as PathJob
 import PathScripts.PathGui as PathGui
 import PathScripts.PathLog as PathLog
@@ -1026,6 +1027,17 @@ class TaskPanel:
     def operationDelete(self):
         self.objectDelete(self.form.operationsList)
 
+    def cycleTimeEstimate(self):
+        estimate = PathCycleTime.cycleTime(self.obj)
+        self.form.cycleTime.setText(PathCycleTime.formatTime(estimate.total))
+        lines = ["%s: %s" % (label, PathCycleTime.formatTime(seconds)) for (label, seconds) in estimate.operations]
+        lines.append('')
+        lines.extend(["%s: %s" % (label, PathCycleTime.formatTime(seconds)) for (label, seconds) in estimate.tools if label])
+        lines.append(translate("Path_Job", "Rapid moves: %s") % PathCycleTime.formatTime(estimate.rapid))
+        if estimate.toolChange:
+            lines.append(translate("Path_Job", "Tool changes: %s") % PathCycleTime.formatTime(estimate.toolChange))
+        self.form.cycleTime.setToolTip("\n".join(lines))
+
     def operationMoveUp(self):
         row = self.form.operationsList.currentRow()
         if row > 0:
@@ -1354,6 +1366,7 @@ class TaskPanel:
         self.form.operationDelete.clicked.connect(self.operationDelete)
         self.form.operationUp.clicked.connect(self.operationMoveUp)
         self.form.operationDown.clicked.connect(self.operationMoveDown)
+        self.form.cycleTimeEstimate.clicked.connect(self.cycleTimeEstimate)
 
         self.form.operationEdit.hide() # not supported yet
         self.form.activeToolGroup.hide() # not supported yet
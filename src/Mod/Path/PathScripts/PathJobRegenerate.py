@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Path
+import PathScripts.PathAreaOp as PathAreaOp
+import PathScripts.PathLog as PathLog
+import multiprocessing
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+__doc__ = """Regenerates all operations of a Job.
+The Path.Area computations of the Path.Area based operations only depend on the job and
+the operation itself, they are computed concurrently in worker processes. The workers are
+separate FreeCADCmd processes running PathJobRegenerateWorker.py, they get the shapes as BREP
+strings and the resulting paths are assigned back to the operations in document order. All
+other operations are recomputed serially."""
+
+if False:
+    PathLog.setLevel(PathLog.Level.DEBUG, PathLog.thisModule())
+    PathLog.trackModule()
+else:
+    PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+# environment variables with the input and output file of a worker process
+WorkerInput = 'PATH_REGENERATE_INPUT'
+WorkerOutput = 'PATH_REGENERATE_OUTPUT'
+WorkerScript = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PathJobRegenerateWorker.py')
+
+# seconds after which the worker processes are killed and their work is computed serially
+WorkerTimeout = 600
+
+def computeAreaTasks(tasks):
+    '''computeAreaTasks(tasks) ... computes the Path.Area tasks collected for an operation.
+    Returns a list with a (key, commands, end) tuple per task and the time it took.
+    Commands are (name, parameters) tuples so the result can be pickled.'''
+    import Part
+    begin = time.time()
+    results = []
+    end = None
+    for task in tasks:
+        plane = Part.Shape()
+        plane.importBrepFromString(task['plane'])
+        shape = Part.Shape()
+        shape.importBrepFromString(task['shape'])
+
+        area = Path.Area()
+        area.setPlane(plane)
+        area.add(shape)
+        area.setParams(**task['areaParams'])
+        sections = area.makeSections(mode=0, project=task['project'], heights=task['heights'])
+
+        pathParams = dict(task['pathParams'])
+        pathParams['shapes'] = [sec.getShape() for sec in sections]
+        if task['chain'] and end is not None:
+            pathParams['start'] = end
+        elif task['start'] is not None:
+            pathParams['start'] = FreeCAD.Vector(task['start'][0], task['start'][1], task['start'][2])
+        (pp, end) = Path.fromShapes(**pathParams)
+
+        commands = [(cmd.Name, cmd.Parameters) for cmd in pp.Commands]
+        results.append((task['key'], commands, None if end is None else (end.x, end.y, end.z)))
+    return (results, time.time() - begin)
+
+def workerExecutable():
+    '''workerExecutable() ... returns the path of FreeCADCmd, which runs the worker processes,
+    or None if it can't be found.'''
+    home = FreeCAD.getHomePath()
+    for directory in [os.path.dirname(sys.executable), os.path.join(home, 'bin'), os.path.join(home, 'MacOS')]:
+        for name in ['FreeCADCmd', 'FreeCADCmd.exe', 'freecadcmd']:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+    return None
+
+def runWorker(inputFile, outputFile):
+    '''runWorker(inputFile, outputFile) ... applies the function pickled in inputFile together with the
+    work to each item of the work and pickles the results into outputFile. This is what the worker
+    processes do, see PathJobRegenerateWorker.py.'''
+    with open(inputFile, 'rb') as fp:
+        (function, work) = pickle.load(fp)
+    results = [function(item) for item in work]
+    # the output only shows up once it is complete
+    with open(outputFile + '.tmp', 'wb') as fp:
+        pickle.dump(results, fp, 2)
+    os.rename(outputFile + '.tmp', outputFile)
+
+def computeInWorkers(work, processes, executable, timeout=WorkerTimeout, function=computeAreaTasks):
+    '''computeInWorkers(work, processes, executable, timeout=WorkerTimeout, function=computeAreaTasks) ...
+    distributes work over processes worker processes started with executable, which apply function
+    to each item of work. function has to be a module level function the workers can import.
+    Returns the results in the order of work, with None for the work of workers which failed or
+    didn't finish within timeout seconds.'''
+    results = [None] * len(work)
+    count = min(processes, len(work))
+    tmpdir = tempfile.mkdtemp(prefix='PathJobRegenerate')
+    devnull = open(os.devnull, 'w')
+    workers = []
+    try:
+        for n in range(count):
+            chunk = list(range(n, len(work), count))
+            inputFile = os.path.join(tmpdir, 'work%d' % n)
+            outputFile = os.path.join(tmpdir, 'result%d' % n)
+            with open(inputFile, 'wb') as fp:
+                pickle.dump((function, [work[i] for i in chunk]), fp, 2)
+            env = dict(os.environ)
+            env[WorkerInput] = inputFile
+            env[WorkerOutput] = outputFile
+            proc = subprocess.Popen([executable, WorkerScript], env=env, stdin=devnull, stdout=devnull, stderr=devnull)
+            workers.append((proc, chunk, outputFile))
+
+        deadline = time.time() + timeout
+        while time.time() < deadline and any(proc.poll() is None for (proc, chunk, outputFile) in workers):
+            time.sleep(0.05)
+
+        for (proc, chunk, outputFile) in workers:
+            if proc.poll() is None:
+                PathLog.warning("worker process didn't finish within %ds" % timeout)
+            elif not os.path.exists(outputFile):
+                PathLog.warning("worker process failed with exit code %s" % proc.returncode)
+            else:
+                with open(outputFile, 'rb') as fp:
+                    for (i, result) in zip(chunk, pickle.load(fp)):
+                        results[i] = result
+    finally:
+        for (proc, chunk, outputFile) in workers:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+        devnull.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+def _compute(work, processes):
+    '''Returns the results of computeAll() and for each of them whether it was computed by a worker.'''
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    results = [None] * len(work)
+    executable = workerExecutable()
+    if processes > 1 and len(work) > 1 and executable is not None:
+        try:
+            results = computeInWorkers(work, processes, executable)
+        except Exception as e:
+            PathLog.warning("parallel computation failed (%s), computing serially" % e)
+    inWorker = [result is not None for result in results]
+    for (i, tasks) in enumerate(work):
+        if results[i] is None:
+            results[i] = computeAreaTasks(tasks)
+    return (results, inWorker)
+
+def computeAll(work, processes=None):
+    '''computeAll(work, processes=None) ... computes the tasks of all operations in work.
+    Uses worker processes, one per CPU by default, and computes the work serially if processes is 1,
+    FreeCADCmd can't be found, or for the work of any worker that failed. The results are in the
+    order of work.'''
+    return _compute(work, processes)[0]
+
+def operations(job):
+    '''operations(job) ... returns all operations of job in document order.'''
+    order = dict([(obj.Name, i) for i, obj in enumerate(job.Document.Objects)])
+    return sorted(job.Proxy.allOperations(), key=lambda op: order.get(op.Name, -1))
+
+def regenerate(job, processes=None):
+    '''regenerate(job, processes=None) ... recomputes all operations of job.
+    Returns a list with a report (Label, mode, collect, compute, assign) for each operation,
+    where mode is one of 'parallel' if its path was computed by a worker process, 'serial' or 'cached',
+    and the others are durations in seconds.'''
+    ops = operations(job)
+    timing = dict([(op.Name, [0, 0, 0]) for op in ops])
+
+    # collect the Path.Area work of all operations
+    work = []
+    areaOps = []
+    for op in ops:
+        proxy = getattr(op, 'Proxy', None)
+        if isinstance(proxy, PathAreaOp.ObjectOp):
+            begin = time.time()
+            tasks = proxy.collectAreaTasks(op)
+            timing[op.Name][0] = time.time() - begin
+            if tasks:
+                work.append(tasks)
+                areaOps.append(op)
+
+    (computed, inWorker) = _compute(work, processes)
+    parallel = [op for (op, worker) in zip(areaOps, inWorker) if worker]
+    for op, (results, duration) in zip(areaOps, computed):
+        timing[op.Name][1] = duration
+        op.Proxy.areaResults = [(key, [Path.Command(name, params) for (name, params) in commands], None if end is None else FreeCAD.Vector(end[0], end[1], end[2])) for (key, commands, end) in results]
+
+    # assign the results and recompute everything else in document order
+    report = []
+    for op in ops:
+        proxy = getattr(op, 'Proxy', None)
+        hits = getattr(proxy, 'cacheHits', 0)
+        begin = time.time()
+        try:
+            op.recompute()
+            op.purgeTouched()
+        finally:
+            if op in areaOps:
+                proxy.areaResults = None
+        timing[op.Name][2] = time.time() - begin
+        if getattr(proxy, 'cacheHits', 0) != hits:
+            mode = 'cached'
+        elif op in parallel:
+            mode = 'parallel'
+        else:
+            mode = 'serial'
+        report.append((op.Label, mode) + tuple(timing[op.Name]))
+    job.Document.recompute()
+
+    for (label, mode, collect, compute, assign) in report:
+        PathLog.info("%-30s %-8s collect=%.3fs compute=%.3fs assign=%.3fs" % (label, mode, collect, compute, assign))
+    return report
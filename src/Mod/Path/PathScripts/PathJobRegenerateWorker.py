@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import os
+import PathScripts.PathJobRegenerate as PathJobRegenerate
+
+__doc__ = """Worker process of PathJobRegenerate, run by FreeCADCmd.
+The work is read from the file named by the environment variable PathJobRegenerate.WorkerInput
+and the results are written to the one named by PathJobRegenerate.WorkerOutput."""
+
+if os.environ.get(PathJobRegenerate.WorkerInput):
+    PathJobRegenerate.runWorker(os.environ[PathJobRegenerate.WorkerInput], os.environ[PathJobRegenerate.WorkerOutput])
@@ -24,7 +24,7 @@
 
 import FreeCAD
 import os
-import traceback
+import sys
 
 class Level:
     """Enumeration of log levels, used for setLevel and getLevel."""
@@ -46,6 +46,8 @@ _moduleLogLevel  = { }
 _useConsole = True
 _trackModule = { }
 _trackAll = False
+_moduleNames = { }
+_profile = None
 
 def logToConsole(yes):
     """(boolean) - if set to True (default behaviour) log messages are printed to the console. Otherwise they are printed to stdout."""
@@ -77,19 +79,62 @@ def getLevel(module = None):
         return _moduleLogLevel.get(module, _defaultLogLevel)
     return _defaultLogLevel
 
+def isEnabledFor(level, module = None):
+    """(level, module = None) - return True if messages of level are logged for the given module, the calling module if not set.
+       Looking up the calling module is slow, to guard debugging code in loops use a moduleLevel() instead."""
+    if module is None:
+        module = _moduleName(sys._getframe(1))
+    return _moduleLogLevel.get(module, _defaultLogLevel) >= level
+
+class ModuleLevel:
+    """Log level checks of a single module, which is determined once when it is created:
+           LOG = PathLog.moduleLevel()
+       at the top of a module, and in its loops
+           if LOG.isEnabledFor(PathLog.Level.DEBUG):
+       The level is read on every check, so changes of the log level are honoured."""
+
+    def __init__(self, module):
+        self.module = module
+
+    def isEnabledFor(self, level):
+        """(level) - return True if messages of level are logged for the module."""
+        return _moduleLogLevel.get(self.module, _defaultLogLevel) >= level
+
+def moduleLevel(module = None):
+    """(module = None) - return a ModuleLevel of the given module, the calling module if not set."""
+    if module is None:
+        module = _caller()[0]
+    return ModuleLevel(module)
+
 def thisModule():
     """returns the module id of the caller, can be used for setLevel, getLevel and trackModule."""
     return _caller()[0]
 
+def _moduleName(frame):
+    """internal function to determine the module of a frame, the names are cached by file."""
+    file = frame.f_code.co_filename
+    module = _moduleNames.get(file)
+    if module is None:
+        module = os.path.splitext(os.path.basename(file))[0]
+        _moduleNames[file] = module
+    return module
+
 def _caller():
     """internal function to determine the calling module."""
-    file, line, func, text = traceback.extract_stack(limit=3)[0]
-    return os.path.splitext(os.path.basename(file))[0], line, func
-
-def _log(level, module_line_func, msg):
-    """internal function to do the logging"""
-    module, line, func = module_line_func
-    if getLevel(module) >= level:
+    frame = sys._getframe(2)
+    return _moduleName(frame), frame.f_lineno, frame.f_code.co_name
+
+def _log(level, frame, msg, args):
+    """internal function to do the logging, msg is only formatted if the message is logged."""
+    module = _moduleName(frame)
+    if _profile is not None:
+        site = (module, frame.f_lineno, frame.f_code.co_name, Level.toString(level))
+        _profile[site] = _profile.get(site, 0) + 1
+    if _moduleLogLevel.get(module, _defaultLogLevel) >= level:
+        if callable(msg):
+            msg = msg()
+        if args:
+            msg = msg % args
         message = "%s.%s: %s" % (module, Level.toString(level), msg)
         if _useConsole:
             message += "\n"
@@ -106,21 +151,24 @@ def _log(level, module_line_func, msg):
         return message
     return None
 
-def debug(msg):
-    """(message)"""
-    return _log(Level.DEBUG, _caller(), msg)
-def info(msg):
-    """(message)"""
-    return _log(Level.INFO, _caller(), msg)
-def notice(msg):
-    """(message)"""
-    return _log(Level.NOTICE, _caller(), msg)
-def warning(msg):
-    """(message)"""
-    return _log(Level.WARNING, _caller(), msg)
-def error(msg):
-    """(message)"""
-    return _log(Level.ERROR, _caller(), msg)
+# All log functions take either a message, a format string and its arguments, or a callable
+# returning the message. Formatting and the callable are deferred until the message is logged:
+#   PathLog.debug("%3d: %s", i, cmd)   instead of   PathLog.debug("%3d: %s" % (i, cmd))
+def debug(msg, *args):
+    """(message, *args)"""
+    return _log(Level.DEBUG, sys._getframe(1), msg, args)
+def info(msg, *args):
+    """(message, *args)"""
+    return _log(Level.INFO, sys._getframe(1), msg, args)
+def notice(msg, *args):
+    """(message, *args)"""
+    return _log(Level.NOTICE, sys._getframe(1), msg, args)
+def warning(msg, *args):
+    """(message, *args)"""
+    return _log(Level.WARNING, sys._getframe(1), msg, args)
+def error(msg, *args):
+    """(message, *args)"""
+    return _log(Level.ERROR, sys._getframe(1), msg, args)
 
 def trackAllModules(boolean):
     """(boolean) - if True all modules will be tracked, otherwise tracking is up to the module setting."""
@@ -156,6 +204,9 @@ def untrackModule(module = None):
 def track(*args):
     """(....) - call with arguments of current function you want logged if tracking is enabled."""
     module, line, func = _caller()
+    if _profile is not None:
+        site = (module, line, func, 'TRACK')
+        _profile[site] = _profile.get(site, 0) + 1
     if _trackAll or _trackModule.get(module, None):
         message = "%s(%d).%s(%s)" % (module, line, func, ', '.join([str(arg) for arg in args]))
         if _useConsole:
@@ -165,3 +216,20 @@ def track(*args):
         return message
     return None
 
+def startProfiling():
+    """Start counting the calls of all log functions per call site, whether the messages are logged or not."""
+    global _profile
+    _profile = { }
+
+def stopProfiling():
+    """Stop counting log calls and return the result of profile()."""
+    global _profile
+    result = profile()
+    _profile = None
+    return result
+
+def profile():
+    """returns a list of (count, module, line, function, level) for all counted call sites, most frequent first."""
+    if _profile is None:
+        return []
+    return sorted([(count,) + site for site, count in _profile.items()], key=lambda c: (-c[0], c[1], c[2]))
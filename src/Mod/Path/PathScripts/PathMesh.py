@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import PathScripts.PathUtil as PathUtil
+import hashlib
+import numpy
+import os
+import tempfile
+
+__doc__ = """Conversion of shapes and meshes into OpenCamLib surfaces and heightmaps.
+The mesh topology is kept as NumPy arrays, the points and the point indices of each facet,
+from which the ocl.STLSurf is built without creating intermediate Facet objects. Converted
+surfaces are cached per job so all 3D operations of a job, and their recomputes, share them."""
+
+def meshArrays(mesh):
+    '''meshArrays(mesh) ... returns the (N, 3) float64 array of points and the (F, 3) int32 array
+    of point indices of each facet of mesh.'''
+    (points, facets) = mesh.Topology
+    # Vectors are sequences, NumPy converts them without a Python loop
+    points = numpy.array(points, dtype=numpy.float64).reshape(-1, 3)
+    facets = numpy.array(facets, dtype=numpy.int32).reshape(-1, 3)
+    return (points, facets)
+
+def triangles(points, facets):
+    '''triangles(points, facets) ... returns the (F, 3, 3) array of the corners of all facets,
+    without degenerated facets which don't contribute to the surface.'''
+    tri = points[facets]
+    n = numpy.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    return tri[(n * n).sum(axis=1) > 0]
+
+def stlText(points, facets):
+    '''stlText(points, facets) ... returns the ASCII STL of the facets, see triangles().'''
+    tri = triangles(points, facets)
+    facet = 'facet normal 0 0 0\nouter loop\n' + 'vertex %.17g %.17g %.17g\n' * 3 + 'endloop\nendfacet\n'
+    return 'solid\n' + (facet * len(tri)) % tuple(tri.ravel().tolist()) + 'endsolid\n'
+
+def stlSurf(points, facets):
+    '''stlSurf(points, facets) ... returns a new ocl.STLSurf of the facets.'''
+    import ocl
+    s = ocl.STLSurf()
+    if len(facets) == 0:
+        return s
+    # ocl only adds triangles one at a time from Python, its STLReader adds all of them in C++
+    (fd, path) = tempfile.mkstemp(prefix='PathMesh', suffix='.stl')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(stlText(points, facets))
+        ocl.STLReader(path, s)
+    finally:
+        os.remove(path)
+    return s
+
+def _splitTriangles(tri):
+    # four triangles from the corners and the midpoints of the edges
+    a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+    ab, bc, ca = (a + b) / 2, (b + c) / 2, (c + a) / 2
+    return numpy.concatenate([numpy.stack(t, axis=1) for t in [(a, ab, ca), (ab, b, bc), (ca, bc, c), (ab, bc, ca)]])
+
+def _rasterize(tri, heights, nx, ny, span):
+    # highest point of the triangles at each pixel centre, all triangles cover at most span pixels in x and y
+    k = numpy.arange(span + 1)
+    ix = numpy.ceil(tri[:, :, 0].min(axis=1)).astype(numpy.int64)[:, None, None] + k[None, None, :]
+    iy = numpy.ceil(tri[:, :, 1].min(axis=1)).astype(numpy.int64)[:, None, None] + k[None, :, None]
+    a, b, c = tri[:, 0, :, None, None], tri[:, 1, :, None, None], tri[:, 2, :, None, None]
+    den = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    dx = ix - a[:, 0]
+    dy = iy - a[:, 1]
+    v = (dx * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * dy) / den
+    w = ((b[:, 0] - a[:, 0]) * dy - dx * (b[:, 1] - a[:, 1])) / den
+    u = 1 - v - w
+    eps = 1e-9
+    inside = (u >= -eps) & (v >= -eps) & (w >= -eps) & (ix >= 0) & (iy >= 0) & (ix < nx) & (iy < ny)
+    z = (u * a[:, 2] + v * b[:, 2] + w * c[:, 2])[inside]
+    index = (iy * nx + ix)[inside]
+    if len(index) == 0:
+        return
+    order = numpy.argsort(index, kind='mergesort')
+    index = index[order]
+    z = z[order]
+    first = numpy.flatnonzero(numpy.r_[True, index[1:] != index[:-1]])
+    index = index[first]
+    heights[index] = numpy.maximum(heights[index], numpy.maximum.reduceat(z, first))
+
+def heightMap(points, facets, x0, y0, nx, ny, resolution, span=8, chunk=16384):
+    '''heightMap(points, facets, x0, y0, nx, ny, resolution, span=8, chunk=16384) ... returns the (ny, nx) float32
+    array of the highest point of the facets above the centre of each pixel, heights[iy, ix] is the height at
+    (x0 + (ix + 0.5) * resolution, y0 + (iy + 0.5) * resolution). Pixels not covered by any facet are -inf.
+    Larger facets are split until they cover at most span pixels in x and y, chunk of which are rasterized at once.'''
+    heights = numpy.full(nx * ny, -numpy.inf)
+    tri = triangles(points, facets).copy()
+    tri[:, :, 0] = (tri[:, :, 0] - x0) / resolution - 0.5
+    tri[:, :, 1] = (tri[:, :, 1] - y0) / resolution - 0.5
+    # vertical facets don't cover any pixel centre their neighbours don't
+    area = (tri[:, 1, 0] - tri[:, 0, 0]) * (tri[:, 2, 1] - tri[:, 0, 1]) - (tri[:, 2, 0] - tri[:, 0, 0]) * (tri[:, 1, 1] - tri[:, 0, 1])
+    tri = tri[numpy.abs(area) > 1e-12]
+    while len(tri):
+        lo = tri[:, :, :2].min(axis=1)
+        hi = tri[:, :, :2].max(axis=1)
+        visible = (hi[:, 0] >= 0) & (hi[:, 1] >= 0) & (lo[:, 0] <= nx - 1) & (lo[:, 1] <= ny - 1)
+        small = visible & ((hi - lo).max(axis=1) <= span)
+        for i in range(0, numpy.count_nonzero(small), chunk):
+            _rasterize(tri[small][i:i + chunk], heights, nx, ny, span)
+        tri = _splitTriangles(tri[visible & ~small])
+    return heights.reshape(ny, nx).astype(numpy.float32)
+
+
+class MeshSurface(object):
+    '''The mesh of a shape as arrays, see meshArrays(), and its bounding box.
+    The ocl.STLSurf is only built when first requested through surface().'''
+
+    def __init__(self, points, facets):
+        self.points = points
+        self.facets = facets
+        if len(points):
+            lo = points.min(axis=0)
+            hi = points.max(axis=0)
+            self.boundBox = FreeCAD.BoundBox(lo[0], lo[1], lo[2], hi[0], hi[1], hi[2])
+        else:
+            self.boundBox = FreeCAD.BoundBox()
+        self.stl = None
+        self.heightMaps = PathUtil.LRUCache(4)
+
+    def surface(self):
+        '''surface() ... returns the ocl.STLSurf of the mesh.'''
+        if self.stl is None:
+            self.stl = stlSurf(self.points, self.facets)
+        return self.stl
+
+    def heightMap(self, x0, y0, nx, ny, resolution):
+        '''heightMap(x0, y0, nx, ny, resolution) ... returns the heightmap of the mesh, see heightMap().
+        The last few heightmaps are kept with the surface.'''
+        key = (float(x0), float(y0), int(nx), int(ny), float(resolution))
+        heights = self.heightMaps.get(key)
+        if heights is None:
+            heights = heightMap(self.points, self.facets, x0, y0, nx, ny, resolution)
+            self.heightMaps.put(key, heights)
+        return heights
+
+
+class SurfaceCache(PathUtil.LRUCache):
+    '''LRU cache of MeshSurfaces.
+    Shapes are identified by a hash of their BREP representation together with the deflection
+    used to mesh them, meshes by a hash of their topology. Each job has its own cache, see surfaceCache().'''
+
+    def __init__(self, size=8):
+        super(SurfaceCache, self).__init__(size)
+
+def surfaceCache(job):
+    '''surfaceCache(job) ... returns the SurfaceCache of job, it is cleared whenever the job's Base changes.'''
+    if not hasattr(job.Proxy, 'surfaceCache'):
+        job.Proxy.surfaceCache = SurfaceCache()
+    return job.Proxy.surfaceCache
+
+def _meshKey(points, facets):
+    md5 = hashlib.md5(points.tobytes())
+    md5.update(facets.tobytes())
+    return ('mesh', md5.hexdigest())
+
+def _shapeKey(shape, deflection):
+    return ('shape', PathUtil.shapeDigest(shape), float(getattr(deflection, 'Value', deflection)))
+
+def meshSurface(base, deflection, job=None):
+    '''meshSurface(base, deflection, job=None) ... returns the MeshSurface of base, which is either a
+    mesh or a shape object. Shapes are meshed with deflection. If job is given the surface is
+    taken from, or added to, the job's cache.'''
+    cache = surfaceCache(job) if job is not None else None
+    if base.TypeId.startswith('Mesh'):
+        (points, facets) = meshArrays(base.Mesh)
+        key = _meshKey(points, facets)
+    else:
+        points = None
+        key = _shapeKey(base.Shape, deflection)
+
+    surface = cache.get(key) if cache is not None else None
+    if surface is None:
+        if points is None:
+            import MeshPart
+            base.Shape.tessellate(0.5)
+            (points, facets) = meshArrays(MeshPart.meshFromShape(base.Shape, Deflection=deflection))
+        surface = MeshSurface(points, facets)
+        if cache is not None:
+            cache.put(key, surface)
+    return surface
@@ -28,6 +28,7 @@ import PathScripts.PathLog as PathLog
 import PathScripts.PathSetupSheet as PathSetupSheet
 import PathScripts.PathUtil as PathUtil
 import PathScripts.PathUtils as PathUtils
+import hashlib
 
 from PathScripts.PathGeom import PathGeom
 from PathScripts.PathUtils import waiting_effects
@@ -63,6 +64,52 @@ FeatureLocations    = 0x1000     # Locations
 
 FeatureBaseGeometry = FeatureBaseVertexes | FeatureBaseFaces | FeatureBaseEdges | FeatureBasePanels
 
+# properties which are not an input of the path generation
+FingerprintIgnore = ['Path', 'Label', 'Label2', 'Comment', 'UserLabel', 'UseCache', 'Proxy', 'ExpressionEngine', 'Visibility']
+# properties of the job, besides Base and Stock, which are an input of the path generation
+FingerprintJobProperties = ['GeometryTolerance']
+
+CacheStatistics = {'hits': 0, 'misses': 0}
+
+def cacheStatistics():
+    '''cacheStatistics() ... returns a dictionary with the number of cache hits and misses of all operations.'''
+    return dict(CacheStatistics)
+
+def resetCacheStatistics():
+    CacheStatistics['hits'] = 0
+    CacheStatistics['misses'] = 0
+
+def _fingerprintShape(shape):
+    if shape.isNull():
+        return 'null'
+    return '%s:%s' % (shape.ShapeType, PathUtil.shapeDigest(shape))
+
+def _fingerprintValue(value, depth):
+    if hasattr(value, 'PropertiesList') and hasattr(value, 'isDerivedFrom'):
+        if depth > 0:
+            return '{%s}' % _fingerprintObject(value, depth - 1)
+        return value.Name
+    if hasattr(value, 'ShapeType') and hasattr(value, 'exportBrepToString'):
+        return _fingerprintShape(value)
+    if hasattr(value, 'templateAttrs'):
+        return repr(sorted(value.templateAttrs().items()))
+    if isinstance(value, (list, tuple)):
+        return '[%s]' % ','.join([_fingerprintValue(v, depth) for v in value])
+    if isinstance(value, FreeCAD.Units.Quantity):
+        return repr((value.Value, str(value.Unit)))
+    if isinstance(value, FreeCAD.Vector):
+        return repr((value.x, value.y, value.z))
+    if isinstance(value, FreeCAD.Placement):
+        return repr((tuple(value.Base), tuple(value.Rotation.Q)))
+    return repr(value)
+
+def _fingerprintObject(obj, depth):
+    values = []
+    for prop in sorted(obj.PropertiesList):
+        if not prop in FingerprintIgnore:
+            values.append("%s=%s" % (prop, _fingerprintValue(getattr(obj, prop), depth)))
+    return ';'.join(values)
+
 class ObjectOp(object):
     '''
     Base class for proxy objects of all Path operations.
@@ -93,6 +140,9 @@ class ObjectOp(object):
     implementation - otherwise the base functionality might be broken.
     '''
 
+    cacheHits = 0
+    cacheMisses = 0
+
     def addBaseProperty(self, obj):
         obj.addProperty("App::PropertyLinkSubListGlobal", "Base", "Path", QtCore.QT_TRANSLATE_NOOP("PathOp", "The base geometry for this operation"))
 
@@ -107,12 +157,17 @@ class ObjectOp(object):
             obj.addProperty("App::PropertyDistance", "OpToolDiameter", "Op Values", QtCore.QT_TRANSLATE_NOOP("PathOp", "Holds the diameter of the tool"))
             obj.setEditorMode('OpToolDiameter', 1) # read-only
 
+    def addCacheProperty(self, obj):
+        obj.addProperty("App::PropertyBool", "UseCache", "Path", QtCore.QT_TRANSLATE_NOOP("PathOp", "Reuse the previous path if none of the inputs of the operation changed"))
+        obj.UseCache = True
+
     def __init__(self, obj):
         PathLog.track()
 
         obj.addProperty("App::PropertyBool", "Active", "Path", QtCore.QT_TRANSLATE_NOOP("PathOp", "Make False, to prevent operation from generating code"))
         obj.addProperty("App::PropertyString", "Comment", "Path", QtCore.QT_TRANSLATE_NOOP("PathOp", "An optional comment for this Operation"))
         obj.addProperty("App::PropertyString", "UserLabel", "Path", QtCore.QT_TRANSLATE_NOOP("PathOp", "User Assigned Label"))
+        self.addCacheProperty(obj)
 
         features = self.opFeatures(obj)
 
@@ -171,6 +226,9 @@ class ObjectOp(object):
             if FeatureNoFinalDepth & features:
                 obj.setEditorMode('OpFinalDepth', 2)
 
+        if not hasattr(obj, 'UseCache'):
+            self.addCacheProperty(obj)
+
     def __getstate__(self):
         '''__getstat__(self) ... called when receiver is saved.
         Can safely be overwritten by subclasses.'''
@@ -355,6 +413,85 @@ class ObjectOp(object):
             if not PathGeom.isRoughly(obj.OpStartDepth.Value, zmax):
                 obj.OpStartDepth = zmax
 
+    def fingerprint(self, obj):
+        '''fingerprint(obj) ... returns a hash of all inputs of the operation.
+        The inputs are all properties of obj, the objects they link to, including their shapes,
+        the job's base and stock and the job properties listed in FingerprintJobProperties.
+        Subclasses with additional inputs should extend it.'''
+        values = [type(self).__module__, type(self).__name__, _fingerprintObject(obj, 1)]
+        values.append(_fingerprintValue([self.baseobject, self.stock], 1))
+        for prop in FingerprintJobProperties:
+            values.append("%s=%s" % (prop, _fingerprintValue(getattr(self.job, prop, None), 0)))
+        return hashlib.md5(';'.join(values).encode('utf-8')).hexdigest()
+
+    def cachedPath(self, obj, header):
+        '''cachedPath(obj, header) ... returns the path of the previous execution for the given header
+        commands if the fingerprint of obj did not change since, or None.'''
+        if not getattr(obj, 'UseCache', False) or not hasattr(self, 'cache'):
+            return None
+        try:
+            fingerprint = self.fingerprint(obj)
+        except Exception as e:
+            PathLog.debug("fingerprint failed: %s" % e)
+            return None
+        (cachedFingerprint, cachedHeader, commands, result) = self.cache
+        if fingerprint != cachedFingerprint:
+            return None
+        if [c.toGCode() for c in header] != cachedHeader:
+            commands = header + commands.Commands[len(cachedHeader):]
+            self.cache = (fingerprint, [c.toGCode() for c in header], Path.Path(commands), result)
+        return self.cache[2]
+
+    def updateCache(self, obj, header, path, result):
+        '''updateCache(obj, header, path, result) ... remember path and result for the current inputs.'''
+        if hasattr(self, 'cache'):
+            del self.cache
+        if getattr(obj, 'UseCache', False):
+            try:
+                self.cache = (self.fingerprint(obj), [c.toGCode() for c in header], path, result)
+            except Exception as e:
+                PathLog.debug("fingerprint failed: %s" % e)
+
+    def setupExecute(self, obj, recompute=True):
+        '''setupExecute(obj, recompute=True) ... validates the receiver and sets up all instance variables
+        listed in execute(). Returns False if no path can be generated.
+        obj is recomputed afterwards unless recompute is False, outside of execute() that runs execute().
+        Do not overwrite.'''
+        if not self._setBaseAndStock(obj):
+            return False
+
+        if FeatureTool & self.opFeatures(obj):
+            tc = obj.ToolController
+            if tc is None or tc.ToolNumber == 0:
+                FreeCAD.Console.PrintError("No Tool Controller is selected. We need a tool to build a Path.")
+                return False
+            else:
+                self.vertFeed = tc.VertFeed.Value
+                self.horizFeed = tc.HorizFeed.Value
+                self.vertRapid = tc.VertRapid.Value
+                self.horizRapid = tc.HorizRapid.Value
+                tool = tc.Proxy.getTool(tc)
+                if not tool or tool.Diameter == 0:
+                    FreeCAD.Console.PrintError("No Tool found or diameter is zero. We need a tool to build a Path.")
+                    return False
+                self.radius = tool.Diameter/2
+                self.tool = tool
+                obj.OpToolDiameter = tool.Diameter
+
+        self.updateDepths(obj)
+        # now that all op values are set make sure the user properties get updated accordingly,
+        # in case they still have an expression referencing any op values
+        if recompute:
+            obj.recompute()
+        return True
+
+    def header(self, obj):
+        '''header(obj) ... returns the comment commands each path starts with.'''
+        commands = [Path.Command("(%s)" % obj.Label)]
+        if obj.Comment:
+            commands.append(Path.Command("(%s)" % obj.Comment))
+        return commands
+
     @waiting_effects
     def execute(self, obj):
         '''execute(obj) ... base implementation - do not overwrite!
@@ -375,6 +512,10 @@ class ObjectOp(object):
         opExecute(obj) - which is expected to add the generated commands to self.commandlist
         Finally the base implementation adds a rapid move to clearance height and assigns
         the receiver's Path property from the command list.
+
+        If UseCache is set and the fingerprint() of the operation's inputs did not change since
+        the last execution opExecute(obj) is skipped and the previous path is reused. The number
+        of reused and regenerated paths is tracked in cacheHits and cacheMisses.
         '''
         PathLog.track()
 
@@ -385,36 +526,20 @@ class ObjectOp(object):
                 obj.ViewObject.Visibility = False
             return
 
-        if not self._setBaseAndStock(obj):
+        if not self.setupExecute(obj):
             return
 
-        if FeatureTool & self.opFeatures(obj):
-            tc = obj.ToolController
-            if tc is None or tc.ToolNumber == 0:
-                FreeCAD.Console.PrintError("No Tool Controller is selected. We need a tool to build a Path.")
-                return
-            else:
-                self.vertFeed = tc.VertFeed.Value
-                self.horizFeed = tc.HorizFeed.Value
-                self.vertRapid = tc.VertRapid.Value
-                self.horizRapid = tc.HorizRapid.Value
-                tool = tc.Proxy.getTool(tc)
-                if not tool or tool.Diameter == 0:
-                    FreeCAD.Console.PrintError("No Tool found or diameter is zero. We need a tool to build a Path.")
-                    return
-                self.radius = tool.Diameter/2
-                self.tool = tool
-                obj.OpToolDiameter = tool.Diameter
+        self.commandlist = self.header(obj)
+        header = list(self.commandlist)
 
-        self.updateDepths(obj)
-        # now that all op values are set make sure the user properties get updated accordingly,
-        # in case they still have an expression referencing any op values
-        obj.recompute()
-
-        self.commandlist = []
-        self.commandlist.append(Path.Command("(%s)" % obj.Label))
-        if obj.Comment:
-            self.commandlist.append(Path.Command("(%s)" % obj.Comment))
+        path = self.cachedPath(obj, header)
+        if path is not None:
+            self.cacheHits += 1
+            CacheStatistics['hits'] += 1
+            obj.Path = path
+            return self.cache[3]
+        self.cacheMisses += 1
+        CacheStatistics['misses'] += 1
 
         result = self.opExecute(obj)
 
@@ -424,6 +549,7 @@ class ObjectOp(object):
 
         path = Path.Path(self.commandlist)
         obj.Path = path
+        self.updateCache(obj, header, path, result)
         return result
 
     def addBase(self, obj, base, sub):
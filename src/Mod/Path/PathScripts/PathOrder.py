@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import math
+import numpy
+import time
+
+__doc__ = """Ordering of locations, like holes, to minimise the rapid moves between them.
+A nearest neighbour tour, backed by a KD-tree, is improved with 2-opt and Or-opt moves
+until no more improvements are found or the time budget is used up. The tour starts at
+a given point and ends at the last location, it does not return to the start."""
+
+class KDTree(object):
+    '''KDTree(points) ... static 2D KD-tree over the (N, 2) array points supporting removal,
+    which is what a nearest neighbour tour needs. Removed points are skipped by nearest() and
+    subtrees without any remaining points are pruned.'''
+
+    def __init__(self, points):
+        self.points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 2)
+        n = len(self.points)
+        self.xs = self.points[:, 0].tolist()
+        self.ys = self.points[:, 1].tolist()
+        # node i holds point index[i], its children are left[i] and right[i] (-1 for none)
+        self.index = []
+        self.axis = []
+        self.left = []
+        self.right = []
+        self.parent = []
+        self.alive = []
+        self.node = [0] * n
+        self.removed = [False] * n
+        self.root = self._build(list(range(n)), 0, -1)
+
+    def _build(self, indices, depth, parent):
+        if not indices:
+            return -1
+        axis = depth % 2
+        coord = self.xs if axis == 0 else self.ys
+        indices.sort(key=lambda i: coord[i])
+        mid = len(indices) // 2
+        node = len(self.index)
+        self.index.append(indices[mid])
+        self.axis.append(axis)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.parent.append(parent)
+        self.alive.append(len(indices))
+        self.node[indices[mid]] = node
+        self.left[node] = self._build(indices[:mid], depth + 1, node)
+        self.right[node] = self._build(indices[mid + 1:], depth + 1, node)
+        return node
+
+    def __len__(self):
+        return self.alive[self.root] if self.root >= 0 else 0
+
+    def remove(self, i):
+        '''remove(i) ... remove point i from further queries.'''
+        if self.removed[i]:
+            return
+        self.removed[i] = True
+        node = self.node[i]
+        while node >= 0:
+            self.alive[node] -= 1
+            node = self.parent[node]
+
+    def nearest(self, x, y, k=1, exclude=None):
+        '''nearest(x, y, k=1, exclude=None) ... returns the indices of the k nearest remaining points
+        to (x, y), closest first, ignoring the point with index exclude.'''
+        best = []
+        worst = float('inf')
+        stack = [self.root]
+        xs = self.xs
+        ys = self.ys
+        while stack:
+            node = stack.pop()
+            if node < 0 or self.alive[node] == 0:
+                continue
+            i = self.index[node]
+            dx = x - xs[i]
+            dy = y - ys[i]
+            if not self.removed[i] and i != exclude:
+                d = dx * dx + dy * dy
+                if len(best) < k or d < worst:
+                    best.append((d, i))
+                    best.sort()
+                    if len(best) > k:
+                        best.pop()
+                    if len(best) == k:
+                        worst = best[-1][0]
+            diff = dx if self.axis[node] == 0 else dy
+            (near, far) = (self.right[node], self.left[node]) if diff > 0 else (self.left[node], self.right[node])
+            if diff * diff < worst:
+                stack.append(far)
+            stack.append(near)
+        return [i for (d, i) in best]
+
+
+def tourLength(points, order, start=(0, 0)):
+    '''tourLength(points, order, start=(0, 0)) ... returns the length of the path from start
+    through points in the given order.'''
+    if len(order) == 0:
+        return 0.0
+    p = numpy.vstack((numpy.asarray(start, dtype=numpy.float64).reshape(1, 2), numpy.asarray(points, dtype=numpy.float64).reshape(-1, 2)[order]))
+    d = numpy.diff(p, axis=0)
+    return float(numpy.sqrt((d * d).sum(axis=1)).sum())
+
+def nearestNeighbour(points, start=(0, 0), tree=None):
+    '''nearestNeighbour(points, start=(0, 0), tree=None) ... returns the order of points visited
+    by always moving to the closest remaining point, beginning at start.'''
+    if tree is None:
+        tree = KDTree(points)
+    order = []
+    (x, y) = start
+    while len(tree):
+        i = tree.nearest(x, y)[0]
+        tree.remove(i)
+        order.append(i)
+        (x, y) = (tree.xs[i], tree.ys[i])
+    return order
+
+class _Tour(object):
+    '''Open tour with a fixed first node, the start, used for the improvement passes.'''
+
+    def __init__(self, xs, ys, order):
+        self.xs = xs
+        self.ys = ys
+        self.t = list(order)
+        self.update()
+
+    def update(self):
+        self.pos = [0] * len(self.t)
+        for p, i in enumerate(self.t):
+            self.pos[i] = p
+
+    def d(self, a, b):
+        if a is None or b is None:
+            return 0.0
+        return math.hypot(self.xs[a] - self.xs[b], self.ys[a] - self.ys[b])
+
+    def at(self, p):
+        return self.t[p] if p < len(self.t) else None
+
+    def twoOpt(self, neighbours, deadline):
+        '''Replace edges (t[i], t[i+1]) and (t[j], t[j+1]) with (t[i], t[j]) and (t[i+1], t[j+1]).'''
+        improved = False
+        for a in list(self.t):
+            for c in neighbours[a]:
+                (i, j) = (self.pos[a], self.pos[c])
+                if i > j:
+                    (i, j) = (j, i)
+                if j - i < 2:
+                    continue
+                (ti, ti1, tj, tj1) = (self.t[i], self.t[i + 1], self.t[j], self.at(j + 1))
+                gain = self.d(ti, ti1) + self.d(tj, tj1) - self.d(ti, tj) - self.d(ti1, tj1)
+                if gain > 1e-9:
+                    self.t[i + 1:j + 1] = self.t[i + 1:j + 1][::-1]
+                    for p in range(i + 1, j + 1):
+                        self.pos[self.t[p]] = p
+                    improved = True
+            if time.time() > deadline:
+                break
+        return improved
+
+    def orOpt(self, neighbours, deadline, maxLength=3):
+        '''Move segments of up to maxLength nodes, possibly reversed, next to a neighbour.'''
+        improved = False
+        for length in range(1, maxLength + 1):
+            for s in list(self.t):
+                p = self.pos[s]
+                q = p + length - 1
+                if p == 0 or q >= len(self.t):
+                    continue
+                e = self.t[q]
+                (prev, nxt) = (self.t[p - 1], self.at(q + 1))
+                removeGain = self.d(prev, s) + self.d(e, nxt) - self.d(prev, nxt)
+                if removeGain <= 1e-9:
+                    continue
+                best = None
+                for c in neighbours[s] + neighbours[e]:
+                    k = self.pos[c]
+                    if p - 1 <= k <= q:
+                        continue
+                    # insert between t[k] and t[k+1]
+                    (a, b) = (c, self.at(k + 1))
+                    cost = self.d(a, s) + self.d(e, b) - self.d(a, b)
+                    rcost = self.d(a, e) + self.d(s, b) - self.d(a, b)
+                    for (gain, reverse) in ((removeGain - cost, False), (removeGain - rcost, True)):
+                        if gain > 1e-9 and (best is None or gain > best[0]):
+                            best = (gain, k, reverse)
+                if best is not None:
+                    (gain, k, reverse) = best
+                    segment = self.t[p:q + 1]
+                    if reverse:
+                        segment.reverse()
+                    after = self.t[k]
+                    del self.t[p:q + 1]
+                    k = self.t.index(after, max(0, k - length - 1))
+                    self.t[k + 1:k + 1] = segment
+                    self.update()
+                    improved = True
+                if time.time() > deadline:
+                    return improved
+        return improved
+
+def improve(points, order, start=(0, 0), timeLimit=1.0, neighbours=8, tree=None):
+    '''improve(points, order, start=(0, 0), timeLimit=1.0, neighbours=8, tree=None) ... returns
+    order improved by 2-opt and Or-opt moves between each point and its closest neighbours.
+    Stops when a pass doesn't find an improvement or after timeLimit seconds.'''
+    deadline = time.time() + timeLimit
+    n = len(order)
+    if n < 3:
+        return list(order)
+    if tree is None:
+        tree = KDTree(points)
+    # the start is node n, fixed at the beginning of the tour
+    xs = tree.xs + [float(start[0])]
+    ys = tree.ys + [float(start[1])]
+    near = [tree.nearest(xs[i], ys[i], neighbours, i) for i in range(n + 1)]
+    tour = _Tour(xs, ys, [n] + list(order))
+    while time.time() < deadline:
+        improved = tour.twoOpt(near, deadline)
+        improved = tour.orOpt(near, deadline) or improved
+        if not improved:
+            break
+    return tour.t[1:]
+
+def orderPoints(points, start=(0, 0), timeLimit=1.0):
+    '''orderPoints(points, start=(0, 0), timeLimit=1.0) ... returns the nearest neighbour order of
+    points, improved for up to timeLimit seconds. A timeLimit of 0 skips the improvement.'''
+    points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 2)
+    order = nearestNeighbour(points, start, KDTree(points))
+    if timeLimit > 0:
+        order = improve(points, order, start, timeLimit, tree=KDTree(points))
+    return order
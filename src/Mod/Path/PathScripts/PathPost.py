@@ -198,7 +198,8 @@ class CommandPathPost:
         if postname and filename:
             print("post: %s(%s, %s)" % (postname, filename, postArgs))
             processor = PostProcessor.load(postname)
-            gcode = processor.export(objs, filename, postArgs)
+            # the program is written to the file, only keep it if there is no file to write to
+            gcode = processor.export(objs, filename, postArgs, filename == '-')
             return (False, gcode)
         else:
             return (True, '')
@@ -99,6 +99,11 @@ class PostProcessor:
 
     def __init__(self, script):
         self.script = script
+        self.streaming = hasattr(script, "gcodeLines")
 
-    def export(self, obj, filename, args):
+    def export(self, obj, filename, args, collect=True):
+        '''export(obj, filename, args, collect=True) ... post process obj into filename.
+        Posts built on PostStream only return the program if collect is set, all others always return it.'''
+        if self.streaming:
+            return self.script.export(obj, filename, args, collect)
         return self.script.export(obj, filename, args)
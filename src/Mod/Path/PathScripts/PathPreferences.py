@@ -47,6 +47,20 @@ class PathPreferences:
 
     EnableExperimentalFeatures = "EnableExperimentalFeatures"
 
+    # Machine kinematics used to estimate cycle times
+    MachineAccelerationX     = "MachineAccelerationX"
+    MachineAccelerationY     = "MachineAccelerationY"
+    MachineAccelerationZ     = "MachineAccelerationZ"
+    MachineJunctionDeviation = "MachineJunctionDeviation"
+    MachineRapidXY           = "MachineRapidXY"
+    MachineRapidZ            = "MachineRapidZ"
+    MachineToolChangeTime    = "MachineToolChangeTime"
+
+    # Format of the paths saved in documents, see Path.Path.toBinary()
+    BinaryPathFormat      = "BinaryPathFormat"
+    BinaryPathFloat32     = "BinaryPathFloat32"
+    BinaryPathCompression = "BinaryPathCompression"
+
 
     @classmethod
     def preferences(cls):
@@ -181,6 +195,39 @@ class PathPreferences:
         cls.preferences().SetString(cls.DefaultStockTemplate, template)
 
 
+    @classmethod
+    def machineAcceleration(cls):
+        '''machineAcceleration() ... returns the (x, y, z) acceleration limits in mm/s^2.'''
+        pref = cls.preferences()
+        return (pref.GetFloat(cls.MachineAccelerationX, 500), pref.GetFloat(cls.MachineAccelerationY, 500), pref.GetFloat(cls.MachineAccelerationZ, 200))
+
+    @classmethod
+    def machineJunctionDeviation(cls):
+        return cls.preferences().GetFloat(cls.MachineJunctionDeviation, 0.01)
+
+    @classmethod
+    def machineRapid(cls):
+        '''machineRapid() ... returns the (xy, z) rapid rates in mm/s used if a tool controller has none.'''
+        pref = cls.preferences()
+        return (pref.GetFloat(cls.MachineRapidXY, 100), pref.GetFloat(cls.MachineRapidZ, 50))
+
+    @classmethod
+    def machineToolChangeTime(cls):
+        return cls.preferences().GetFloat(cls.MachineToolChangeTime, 0)
+
+    @classmethod
+    def binaryPathFormat(cls):
+        '''binaryPathFormat() ... returns (binary, float32, compression) for saving paths in documents.'''
+        pref = cls.preferences()
+        return (pref.GetBool(cls.BinaryPathFormat, False), pref.GetBool(cls.BinaryPathFloat32, False), pref.GetBool(cls.BinaryPathCompression, True))
+
+    @classmethod
+    def setBinaryPathFormat(cls, binary, float32, compression):
+        pref = cls.preferences()
+        pref.SetBool(cls.BinaryPathFormat, binary)
+        pref.SetBool(cls.BinaryPathFloat32, float32)
+        pref.SetBool(cls.BinaryPathCompression, compression)
+
     @classmethod
     def experimentalFeaturesEnabled(cls):
         return cls.preferences().GetBool(cls.EnableExperimentalFeatures, False)
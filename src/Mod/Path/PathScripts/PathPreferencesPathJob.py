@@ -52,6 +52,7 @@ class JobPreferencesPage:
         geometryTolerance = Units.Quantity(self.form.geometryTolerance.text())
         curveAccuracy = Units.Quantity(self.form.curveAccuracy.text())
         PathPreferences.setJobDefaults(filePath, jobTemplate, geometryTolerance, curveAccuracy)
+        PathPreferences.setBinaryPathFormat(self.form.binaryPathFormat.isChecked(), self.form.binaryPathFloat32.isChecked(), self.form.binaryPathCompression.isChecked())
 
         processor = str(self.form.defaultPostProcessor.currentText())
         args = str(self.form.defaultPostProcessorArgs.text())
@@ -151,6 +152,11 @@ class JobPreferencesPage:
         self.form.geometryTolerance.setText(geomTol.UserString)
         self.form.curveAccuracy.setText(Units.Quantity(PathPreferences.defaultLibAreaCurveAccuracy(), Units.Length).UserString)
 
+        (binary, float32, compression) = PathPreferences.binaryPathFormat()
+        self.form.binaryPathFormat.setChecked(binary)
+        self.form.binaryPathFloat32.setChecked(float32)
+        self.form.binaryPathCompression.setChecked(compression)
+
         self.form.leOutputFile.setText(PathPreferences.defaultOutputFile())
         self.selectComboEntry(self.form.cboOutputPolicy, PathPreferences.defaultOutputPolicy())
 
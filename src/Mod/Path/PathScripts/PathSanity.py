@@ -87,50 +87,7 @@ class CommandPathSanity:
         for op in obj.Operations.Group:
             PathLog.info("Checking: {}.{}".format(obj.Label, op.Label))
 
-            if isinstance(op.Proxy, PathScripts.PathProfileContour.ObjectContour):
-                if op.Active:
-                    # simobj = op.Proxy.execute(op, getsim=True)
-                    # if simobj is not None:
-                    #     print ('collision detected')
-                    #     PC.getCollisionObject(self.baseobj, simobj)
-                    #     clean = False
-                    pass
-
-            if isinstance(op.Proxy, PathScripts.PathProfileFaces.ObjectProfile):
-                if op.Active:
-                    # simobj = op.Proxy.execute(op, getsim=True)
-                    # if simobj is not None:
-                    #     print ('collision detected')
-                    #     PC.getCollisionObject(self.baseobj, simobj)
-                    #     clean = False
-                    pass
-
-            if isinstance(op.Proxy, PathScripts.PathProfileEdges.ObjectProfile):
-                if op.Active:
-                    # simobj = op.Proxy.execute(op, getsim=True)
-                    # if simobj is not None:
-                    #     print ('collision detected')
-                    #     PC.getCollisionObject(self.baseobj, simobj)
-                    #     clean = False
-                    pass
-
-            if isinstance(op.Proxy, PathScripts.PathPocket.ObjectPocket):
-                if op.Active:
-                    # simobj = op.Proxy.execute(op, getsim=True)
-                    # if simobj is not None:
-                    #     print ('collision detected')
-                    #     PC.getCollisionObject(self.baseobj, simobj)
-                    #     clean = False
-                    pass
-
-            if isinstance(op.Proxy, PathScripts.PathPocketShape.ObjectPocket):
-                if op.Active:
-                    # simobj = op.Proxy.execute(op, getsim=True)
-                    # if simobj is not None:
-                    #     print ('collision detected')
-                    #     PC.getCollisionObject(self.baseobj, simobj)
-                    #     clean = False
-                    pass
+        clean &= self.__checkCollisions(obj)
 
         if not any(op.Active for op in obj.Operations.Group): #no active operations
             FreeCAD.Console.PrintWarning(translate("Path_Sanity", "No active operations was found. Post processing will not result in any tooling."))
@@ -143,6 +100,29 @@ class CommandPathSanity:
         if clean:
             FreeCAD.Console.PrintMessage(translate("Path_Sanity", "No issues detected, {} has passed basic sanity check.").format(obj.Label))
 
+    def __checkCollisions(self, obj):
+        '''simulates all operations and reports moves cutting into the model and rapid moves into the stock'''
+        if obj.Stock is None or not any(op.Active for op in obj.Operations.Group):
+            return True
+        import PathScripts.PathSimulation as PathSimulation
+        try:
+            result = PathSimulation.simulate(obj, check=True)
+        except Exception as e:
+            PathLog.error(translate("Path_Sanity", "Collision check failed: {}").format(e))
+            return True
+
+        for (label, rapids, gouges) in result.collisions:
+            if gouges:
+                FreeCAD.Console.PrintWarning(translate("Path_Sanity", "{}: {} moves cut into the model, commands {}").format(label, len(gouges), _commands(gouges))+"\n")
+            if rapids:
+                FreeCAD.Console.PrintWarning(translate("Path_Sanity", "{}: {} rapid moves into the stock, commands {}").format(label, len(rapids), _commands(rapids))+"\n")
+        if result.collisions:
+            depth = result.gouges().max()
+            if depth > 0:
+                FreeCAD.Console.PrintWarning(translate("Path_Sanity", "The stock is cut up to {:.3f} below the model.").format(depth)+"\n")
+            return False
+        return True
+
     def __checkTC(self, tc):
         clean = True
         if tc.ToolNumber == 0:
@@ -159,6 +139,12 @@ class CommandPathSanity:
             clean = False
         return clean
 
+def _commands(indices, count=10):
+    text = ', '.join([str(i) for i in indices[:count]])
+    if len(indices) > count:
+        text += ', ...'
+    return text
+
 if FreeCAD.GuiUp:
     # register the FreeCAD command
     FreeCADGui.addCommand('Path_Sanity',CommandPathSanity())
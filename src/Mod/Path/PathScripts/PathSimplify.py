@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import Path
+import math
+import numpy
+
+from PathScripts.PathCommandArray import CommandArray
+from PathScripts.PathGeom import PathGeom
+
+__doc__ = """Reduction of dense point sequences, as produced by drop cutters or linear
+interpolation of curves, to as few lines and arcs as possible.
+A sequence is split greedily into the longest segments which keep every original point,
+and the original straight moves between them, within a given tolerance of the fitted
+line or arc. Arcs are fitted in the XY plane and, if requested, in the XZ and YZ planes, the
+third axis may change linearly along the arc. Arcs in XZ and YZ are only understood by consumers
+handling G18 and G19, most of FreeCAD itself and many post processors only handle XY arcs.
+
+compress() applies the fitting to all runs of straight feed moves of a Path."""
+
+# the columns of the (u, v, axis) coordinates of each plane, the order makes counter clockwise
+# in u, v the same direction as G3 in that plane
+Planes = {'XY': (0, 1, 2), 'XZ': (2, 0, 1), 'YZ': (1, 2, 0)}
+PlaneCommand = {'XY': 'G17', 'XZ': 'G18', 'YZ': 'G19'}
+
+def _lineDeviation(points, i, j):
+    '''Returns the maximum distance of points[i+1:j] from the segment points[i] - points[j].'''
+    if j - i < 2:
+        return 0.0
+    a = points[i]
+    ab = points[j] - a
+    d = points[i + 1:j] - a
+    ll = numpy.dot(ab, ab)
+    if ll == 0:
+        return numpy.sqrt((d * d).sum(axis=1)).max()
+    t = numpy.clip(numpy.dot(d, ab) / ll, 0, 1)
+    e = d - t[:, numpy.newaxis] * ab
+    return numpy.sqrt((e * e).sum(axis=1)).max()
+
+def _circle(a, b, c):
+    '''Returns the centre and radius of the circle through the XY projections of a, b and c.'''
+    d = 2 * (a[0] * (b[1] - c[1]) + b[0] * (c[1] - a[1]) + c[0] * (a[1] - b[1]))
+    if d == 0:
+        return None
+    aa = a[0] * a[0] + a[1] * a[1]
+    bb = b[0] * b[0] + b[1] * b[1]
+    cc = c[0] * c[0] + c[1] * c[1]
+    x = (aa * (b[1] - c[1]) + bb * (c[1] - a[1]) + cc * (a[1] - b[1])) / d
+    y = (aa * (c[0] - b[0]) + bb * (a[0] - c[0]) + cc * (b[0] - a[0])) / d
+    return (x, y, math.hypot(a[0] - x, a[1] - y))
+
+def _arc(points, i, j, tolerance, maxRadius):
+    '''Returns (u, v, clockwise) of an arc through points[i:j+1], or None if they don't fit one.
+    The arc is in the plane of the first two columns of points.'''
+    if j - i < 2:
+        return None
+    circle = _circle(points[i], points[(i + j) // 2], points[j])
+    if circle is None:
+        return None
+    (x, y, r) = circle
+    if r > maxRadius:
+        return None
+    p = points[i:j + 1]
+    dx = p[:, 0] - x
+    dy = p[:, 1] - y
+    if numpy.abs(numpy.hypot(dx, dy) - r).max() > tolerance:
+        return None
+    angles = numpy.arctan2(dy, dx)
+    steps = numpy.diff(angles)
+    steps = (steps + math.pi) % (2 * math.pi) - math.pi
+    if not (numpy.all(steps > 0) or numpy.all(steps < 0)):
+        return None
+    sweep = numpy.abs(steps).sum()
+    if sweep >= 2 * math.pi - 1e-6:
+        return None
+    # the original moves are chords of the arc
+    if (r * (1 - numpy.cos(numpy.abs(steps).max() / 2))) > tolerance:
+        return None
+    # Z has to change linearly with the angle
+    fraction = numpy.concatenate(([0], numpy.cumsum(numpy.abs(steps)))) / sweep
+    z = p[0, 2] + fraction * (p[-1, 2] - p[0, 2])
+    if numpy.abs(z - p[:, 2]).max() > tolerance:
+        return None
+    return (x, y, steps[0] < 0)
+
+def _longest(fits, i, n):
+    '''Returns the largest j, and the result of fits(j), such that fits(j) holds, searching
+    exponentially and then by bisection. fits(i + 1) is assumed to hold with result None.'''
+    good = i + 1
+    result = None
+    step = 2
+    bad = None
+    while True:
+        j = i + step
+        if j >= n:
+            j = n - 1
+        if j <= good:
+            break
+        r = fits(j)
+        if r is None:
+            bad = j
+            break
+        good = j
+        result = r
+        if j == n - 1:
+            break
+        step *= 2
+    if bad is not None:
+        while bad - good > 1:
+            j = (good + bad) // 2
+            r = fits(j)
+            if r is None:
+                bad = j
+            else:
+                good = j
+                result = r
+    return (good, result)
+
+def fit(points, tolerance, arcs=True, maxRadius=1e4, planes=('XY',)):
+    '''fit(points, tolerance, arcs=True, maxRadius=1e4, planes=('XY',)) ... returns the segments approximating points.
+    points is a (N, 3) array, each segment is a tuple (start, end, arc) of indices into points and
+    arc is either None for a straight line or (u, v, clockwise, plane) with the centre of the arc
+    in the given plane, e.g. (x, y) for 'XY' and (z, x) for 'XZ', see Planes.'''
+    points = numpy.asarray(points, dtype=numpy.float64)
+    n = len(points)
+    projections = [(plane, numpy.ascontiguousarray(points[:, list(Planes[plane])])) for plane in planes] if arcs else []
+    segments = []
+    i = 0
+    while i < n - 1:
+        (j, _) = _longest(lambda j: True if _lineDeviation(points, i, j) <= tolerance else None, i, n)
+        arc = None
+        for (plane, projected) in projections:
+            if j >= n - 1:
+                break
+            (k, a) = _longest(lambda k: _arc(projected, i, k, tolerance, maxRadius), i, n)
+            if a is not None and k > j:
+                (j, arc) = (k, a + (plane,))
+        segments.append((i, j, arc))
+        i = j
+    return segments
+
+def commands(points, segments, feed=None):
+    '''commands(points, segments, feed=None) ... returns the G1, G2 and G3 commands for the segments
+    returned by fit(), starting from points[0]. Arcs not in the XY plane are preceded by G18 or G19,
+    the commands end in the XY plane.'''
+    cmds = []
+    plane = 'XY'
+    for (i, j, arc) in segments:
+        p = points[j]
+        params = {'X': float(p[0]), 'Y': float(p[1]), 'Z': float(p[2])}
+        if feed is not None:
+            params['F'] = feed
+        if arc is None:
+            cmds.append(Path.Command('G1', params))
+        else:
+            (u, v, clockwise, arcPlane) = arc
+            if arcPlane != plane:
+                cmds.append(Path.Command(PlaneCommand[arcPlane]))
+                plane = arcPlane
+            (a, b, _) = Planes[plane]
+            params['IJK'[a]] = float(u - points[i][a])
+            params['IJK'[b]] = float(v - points[i][b])
+            cmds.append(Path.Command('G2' if clockwise else 'G3', params))
+    if plane != 'XY':
+        cmds.append(Path.Command('G17'))
+    return cmds
+
+def deviation(points, segments):
+    '''deviation(points, segments) ... returns the maximum distance of any point from its segment.'''
+    points = numpy.asarray(points, dtype=numpy.float64)
+    result = 0.0
+    for (i, j, arc) in segments:
+        if arc is None:
+            result = max(result, _lineDeviation(points, i, j))
+        else:
+            (u, v, _, plane) = arc
+            (a, b, _) = Planes[plane]
+            p = points[i:j + 1]
+            r = math.hypot(p[0, a] - u, p[0, b] - v)
+            result = max(result, numpy.abs(numpy.hypot(p[:, a] - u, p[:, b] - v) - r).max())
+    return result
+
+def compress(path, tolerance, arcs=True, planes=('XY',), maxRadius=1e4):
+    '''compress(path, tolerance, arcs=True, planes=('XY',), maxRadius=1e4) ... returns (path, ratio, deviation).
+    Every run of at least two straight feed moves with the same feed rate and no other parameters than X, Y, Z
+    and F is replaced by the lines and arcs returned by fit(). ratio is the number of commands of path divided
+    by the number of commands of the returned path, deviation the largest distance of an original end point
+    from the new moves.'''
+    array = CommandArray.fromPath(path, 'XYZFIJKABCPQRS')
+    n = len(array)
+    if n < 2:
+        return (path, 1.0, 0.0)
+
+    pos = array.positions()
+    feed = array.column('F')
+    other = array.mask[:, 4:].any(axis=1)
+    straight = array.select(PathGeom.CmdMoveStraight) & ~other
+    # a run continues from the position after the previous command, which has to be known
+    known = ~numpy.isnan(pos).any(axis=1)
+    before = numpy.concatenate(([False], known[:-1]))
+    sameFeed = numpy.concatenate(([False], (feed[1:] == feed[:-1]) | (numpy.isnan(feed[1:]) & numpy.isnan(feed[:-1]))))
+    member = straight & before
+    starts = member & ~(numpy.concatenate(([False], member[:-1])) & sameFeed)
+    runId = numpy.cumsum(starts)
+    runId[~member] = 0
+    # keep only runs of at least two moves
+    counts = numpy.bincount(runId)
+    counts[0] = 0
+    runs = numpy.flatnonzero(counts >= 2)
+    if len(runs) == 0:
+        return (path, 1.0, 0.0)
+    # the moves of a run are consecutive
+    first = numpy.concatenate(([0], numpy.flatnonzero(starts)))
+    last = first + counts - 1
+
+    cmds = path.Commands
+    fMask = array.mask[:, array.index('F')]
+    result = []
+    worst = 0.0
+    i = 0
+    for run in runs:
+        (a, b) = (first[run], last[run])
+        result.extend(cmds[i:a])
+        points = pos[a - 1:b + 1]
+        segments = fit(points, tolerance, arcs, maxRadius, planes)
+        worst = max(worst, deviation(points, segments))
+        f = float(feed[a]) if fMask[a:b + 1].any() else None
+        result.extend(commands(points, segments, f))
+        i = b + 1
+    result.extend(cmds[i:])
+    return (Path.Path(result), float(n) / max(len(result), 1), worst)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import PathScripts.PathDressup as PathDressup
+import PathScripts.PathLog as PathLog
+import PathScripts.PathMesh as PathMesh
+import PathSimulator
+import numpy
+import time
+
+__doc__ = """Headless simulation of a job's operations on the voxel stock of PathSimulator.
+All paths are applied in single calls to the simulator, the resulting stock is returned as a
+heightmap, a NumPy array with one height per stock pixel. Meshing the result is only done on
+request. Intended for scripts run with FreeCADCmd, e.g. to compare toolpaths between versions.
+
+The simulation can also check the paths against a heightmap of the job's model: moves cutting
+below the model (gouges) and rapid moves removing material are reported by the simulator with
+the index of their command."""
+
+if False:
+    PathLog.setLevel(PathLog.Level.DEBUG, PathLog.thisModule())
+    PathLog.trackModule()
+else:
+    PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
+
+class Simulation(object):
+    '''Result of simulate().
+    heights    ... (ny, nx) float32 array of the stock height at each pixel, heights[iy, ix] is the height of the
+                   pixel centred at (x0 + (ix + 0.5) * resolution, y0 + (iy + 0.5) * resolution), pixels cut
+                   through are at the bottom of the stock
+    x0, y0     ... lower left corner of the first pixel
+    resolution ... size of a pixel
+    timing     ... list of (Label, seconds, commands) for each simulated operation
+    snapshots  ... list of (Label, heights) after each operation, if requested
+    limit      ... (ny, nx) array of the lowest allowed height at each pixel, None if not checked
+    collisions ... list of (Label, rapids, gouges) of all checked operations with collisions, rapids and gouges
+                   are the indices of the commands of the operation's Path'''
+
+    def __init__(self, sim, timing, snapshots, limit=None, collisions=None):
+        self.sim = sim
+        self.timing = timing
+        self.snapshots = snapshots
+        self.limit = limit
+        self.collisions = collisions if collisions is not None else []
+        (self.heights, self.x0, self.y0, self.resolution) = heightMap(sim)
+
+    def coordinates(self):
+        '''coordinates() ... returns the X and Y coordinates of the pixel centres of the columns and rows of heights.'''
+        (ny, nx) = self.heights.shape
+        return (self.x0 + (numpy.arange(nx) + 0.5) * self.resolution, self.y0 + (numpy.arange(ny) + 0.5) * self.resolution)
+
+    def mesh(self):
+        '''mesh() ... returns the outer and inner Mesh of the simulated stock.'''
+        return self.sim.GetResultMesh()
+
+    def gouges(self):
+        '''gouges() ... returns the (ny, nx) array of how far the stock was cut below the limit, 0 where it wasn't.'''
+        if self.limit is None:
+            return numpy.zeros_like(self.heights)
+        return numpy.maximum(self.limit - self.heights, 0)
+
+def heightMap(sim):
+    '''heightMap(sim) ... returns the current heights of the stock of the PathSimulator.PathSim sim
+    as a (ny, nx) array, and the lower left corner of the first pixel and the resolution.'''
+    (data, nx, ny, x0, y0, resolution) = sim.GetHeightMap()
+    heights = numpy.frombuffer(data, dtype=numpy.float32).reshape(ny, nx)
+    return (heights, x0, y0, resolution)
+
+def modelHeightMap(job, x0, y0, nx, ny, resolution, deflection=None):
+    '''modelHeightMap(job, x0, y0, nx, ny, resolution, deflection=None) ... returns the heights of the job's
+    Base model at the centre of each pixel of the grid, -inf where there is no model. The model is meshed
+    with deflection, a quarter of resolution by default. Mesh and heightmap are cached with the job.'''
+    if deflection is None:
+        deflection = resolution / 4
+    surface = PathMesh.meshSurface(job.Base, deflection, job)
+    return surface.heightMap(x0, y0, nx, ny, resolution)
+
+def limitHeightMap(model, tolerance):
+    '''limitHeightMap(model, tolerance) ... returns the lowest height the tool may reach at each pixel of model.
+    The pixels are only an approximation of the model, so the lowest height of each pixel and its
+    neighbours is used, less tolerance.'''
+    padded = numpy.pad(model, 1, mode='edge')
+    (ny, nx) = model.shape
+    limit = model.copy()
+    for dy in range(3):
+        for dx in range(3):
+            numpy.minimum(limit, padded[dy:dy + ny, dx:dx + nx], out=limit)
+    return limit - tolerance
+
+def operations(job):
+    '''operations(job) ... returns all active operations of job in the order they are executed.'''
+    return [op for op in job.Operations.OutList if getattr(op, 'Active', True) and hasattr(op, 'Path')]
+
+def simulate(job, ops=None, resolution=None, accuracy=0.1, snapshots=False, parallel=True, check=False, tolerance=0.01):
+    '''simulate(job, ops=None, resolution=None, accuracy=0.1, snapshots=False, parallel=True, check=False, tolerance=0.01) ...
+    applies the paths of ops, all active operations of job by default, to its stock and returns a Simulation.
+    The pixel size is resolution or, if not given, accuracy percent of the larger side of the stock - like
+    the simulator's task panel. The tool starts at the top of the stock above the origin, each operation
+    continues where the previous one ended.
+    If snapshots is set a copy of the heightmap is taken after each operation.
+    If parallel is set the stock is updated by a thread pool, the result is the same either way.
+    If check is set all moves are checked against the heightmap of the job's Base model, see modelHeightMap(),
+    moves cutting more than tolerance below the model or rapid moves removing more than tolerance of stock are
+    collected in the collisions of the result.'''
+    if ops is None:
+        ops = operations(job)
+    stock = job.Stock.Shape
+    bb = stock.BoundBox
+    if resolution is None:
+        resolution = 0.01 * accuracy * max(bb.XLength, bb.YLength)
+
+    sim = PathSimulator.PathSim()
+    sim.BeginSimulation(stock, resolution, parallel)
+    limit = None
+    if check:
+        (heights, x0, y0, resolution) = heightMap(sim)
+        (ny, nx) = heights.shape
+        limit = limitHeightMap(modelHeightMap(job, x0, y0, nx, ny, resolution), tolerance)
+        sim.SetLimit(limit, tolerance)
+    position = FreeCAD.Placement(FreeCAD.Vector(0, 0, bb.ZMax), FreeCAD.Rotation())
+    timing = []
+    shots = []
+    collisions = []
+    haveTool = False
+    for op in ops:
+        try:
+            tool = PathDressup.toolController(op).Tool
+        except Exception:
+            tool = None
+        if tool is not None:
+            sim.SetCurrentTool(tool)
+            haveTool = True
+        if not haveTool:
+            PathLog.warning("%s: no tool, skipped" % op.Label)
+            continue
+
+        begin = time.time()
+        position = sim.ApplyPath(position, op.Path)
+        timing.append((op.Label, time.time() - begin, op.Path.Size))
+        PathLog.debug("%s: %.3fs for %d commands" % timing[-1])
+        if check:
+            (rapids, gouges) = sim.GetCollisions()
+            if rapids or gouges:
+                collisions.append((op.Label, rapids, gouges))
+        if snapshots:
+            shots.append((op.Label, heightMap(sim)[0].copy()))
+    return Simulation(sim, timing, shots, limit, collisions)
@@ -25,13 +25,19 @@
 from __future__ import print_function
 
 import FreeCAD
-import MeshPart
 #import Part
 import Path
+import PathScripts.PathJobRegenerate as PathJobRegenerate
 import PathScripts.PathLog as PathLog
+import PathScripts.PathMesh as PathMesh
 #import PathScripts.PathPocketBase as PathPocketBase
+import PathScripts.PathSimplify as PathSimplify
 import PathScripts.PathUtils as PathUtils
 import PathScripts.PathOp as PathOp
+import math
+import multiprocessing
+import numpy
+import time
 
 from PySide import QtCore
 
@@ -52,6 +58,88 @@ else:
 def translate(context, text, disambig=None):
     return QtCore.QCoreApplication.translate(context, text, disambig)
 
+Algorithms = ['OCL Dropcutter', 'OCL Waterline', 'OCL Batch Dropcutter']
+
+# the STLSurf the batch dropcutter drops onto, in worker processes set up by _dropChunk
+_dropSurface = None
+
+def _dropChunk(args):
+    '''Runs dropLines() in a worker process, args are the mesh arrays followed by the arguments of dropLines().'''
+    global _dropSurface
+    (points, facets) = args[:2]
+    _dropSurface = PathMesh.stlSurf(points, facets)
+    return dropLines(args[2:])
+
+def dropLines(args):
+    '''dropLines((diameter, sampling, minimumZ, lines)) ... drops a cylindrical cutter along each of
+    the scan lines, given as ((x0, y0), (x1, y1)) tuples, onto the surface of the process.
+    Returns a (N, 3) array of CL points for every line.'''
+    import ocl
+    (diameter, sampling, minimumZ, lines) = args
+    pdc = ocl.PathDropCutter()
+    pdc.setSTL(_dropSurface)
+    pdc.setCutter(ocl.CylCutter(diameter, 5))
+    pdc.minimumZ = minimumZ
+    pdc.setSampling(sampling)
+    result = []
+    for ((x0, y0), (x1, y1)) in lines:
+        path = ocl.Path()
+        path.append(ocl.Line(ocl.Point(x0, y0, 0), ocl.Point(x1, y1, 0)))
+        pdc.setPath(path)
+        pdc.run()
+        result.append(numpy.array([(p.x, p.y, p.z) for p in pdc.getCLPoints()], dtype=numpy.float64).reshape(-1, 3))
+    return result
+
+def scanLines(bb, diameter, stepOver, angle):
+    '''scanLines(bb, diameter, stepOver, angle) ... returns the zigzag lines covering bb, extended by
+    diameter, which are stepOver apart and at angle degrees to the X axis.'''
+    a = math.radians(angle)
+    (ux, uy) = (math.cos(a), math.sin(a))
+    (vx, vy) = (-uy, ux)
+    (cx, cy) = (bb.Center.x, bb.Center.y)
+    corners = [(x - cx, y - cy) for x in (bb.XMin, bb.XMax) for y in (bb.YMin, bb.YMax)]
+    u = [x * ux + y * uy for (x, y) in corners]
+    v = [x * vx + y * vy for (x, y) in corners]
+    (umin, umax) = (min(u) - diameter, max(u) + diameter)
+    (vmin, vmax) = (min(v) - diameter, max(v) + diameter)
+    count = int(math.ceil((vmax - vmin) / stepOver)) + 1
+    step = (vmax - vmin) / (count - 1)
+    lines = []
+    for n in range(count):
+        w = vmin + n * step
+        p0 = (cx + umin * ux + w * vx, cy + umin * uy + w * vy)
+        p1 = (cx + umax * ux + w * vx, cy + umax * uy + w * vy)
+        lines.append((p0, p1) if n % 2 == 0 else (p1, p0))
+    return lines
+
+def dropAll(mesh, lines, diameter, sampling, minimumZ, processes=1):
+    '''dropAll(mesh, lines, diameter, sampling, minimumZ, processes=1) ... runs the dropcutter
+    along all lines over the PathMesh.MeshSurface mesh. If processes is not 1 the lines are split
+    into chunks which are processed by that many FreeCADCmd worker processes, one per CPU if 0, see
+    PathJobRegenerate.computeInWorkers(). Chunks of workers which failed, or all lines if FreeCADCmd
+    can't be found, are processed serially.
+    Returns the CL points of each line, in the order of lines.'''
+    global _dropSurface
+    if not processes:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(lines))
+    executable = PathJobRegenerate.workerExecutable() if processes > 1 else None
+    if executable is not None:
+        size = int(math.ceil(len(lines) / float(processes)))
+        chunks = [lines[i:i + size] for i in range(0, len(lines), size)]
+        work = [(mesh.points, mesh.facets, diameter, sampling, minimumZ, chunk) for chunk in chunks]
+        try:
+            results = PathJobRegenerate.computeInWorkers(work, processes, executable, function=_dropChunk)
+            _dropSurface = mesh.surface()
+            for (i, chunk) in enumerate(chunks):
+                if results[i] is None:
+                    results[i] = dropLines((diameter, sampling, minimumZ, chunk))
+            return [points for result in results for points in result]
+        except Exception as e:
+            PathLog.warning("parallel dropcutter failed (%s), computing serially" % e)
+    _dropSurface = mesh.surface()
+    return dropLines((diameter, sampling, minimumZ, lines))
+
 class ObjectSurface(PathOp.ObjectOp):
     '''Proxy object for Surfacing operation.'''
     def baseObject(self):
@@ -69,9 +157,28 @@ class ObjectSurface(PathOp.ObjectOp):
     def initOperation(self, obj):
         '''initPocketOp(obj) ... create facing specific properties'''
         obj.addProperty("App::PropertyEnumeration", "Algorithm", "Algorithm", QtCore.QT_TRANSLATE_NOOP("App::Property", "The library to use to generate the path"))
-        obj.Algorithm = ['OCL Dropcutter', 'OCL Waterline']
+        obj.Algorithm = Algorithms
         obj.addProperty("App::PropertyFloatConstraint", "SampleInterval", "Surface", QtCore.QT_TRANSLATE_NOOP("App::Property", "The Sample Interval.  Small values cause long wait"))
         obj.SampleInterval = (0.04, 0.01, 1.0, 0.01)
+        self.addBatchProperties(obj)
+
+    def addBatchProperties(self, obj):
+        obj.addProperty("App::PropertyPercent", "StepOver", "Surface", QtCore.QT_TRANSLATE_NOOP("App::Property", "Distance between scan lines in percent of the tool diameter (OCL Batch Dropcutter)"))
+        obj.StepOver = 100
+        obj.addProperty("App::PropertyAngle", "ScanAngle", "Surface", QtCore.QT_TRANSLATE_NOOP("App::Property", "Angle of the scan lines to the X axis (OCL Batch Dropcutter)"))
+        obj.addProperty("App::PropertyDistance", "FitTolerance", "Surface", QtCore.QT_TRANSLATE_NOOP("App::Property", "Maximum deviation when merging CL points into lines and arcs, 0 keeps all points (OCL Batch Dropcutter)"))
+        obj.FitTolerance = 0.01
+        obj.addProperty("App::PropertyInteger", "Processes", "Surface", QtCore.QT_TRANSLATE_NOOP("App::Property", "Number of FreeCADCmd processes used to compute the scan lines, 1 computes them in FreeCAD itself, 0 uses one per CPU (OCL Batch Dropcutter)"))
+        obj.Processes = 1
+
+    def onDocumentRestored(self, obj):
+        super(self.__class__, self).onDocumentRestored(obj)
+        if not hasattr(obj, 'StepOver'):
+            self.addBatchProperties(obj)
+        if obj.getEnumerationsOfProperty('Algorithm') != Algorithms:
+            algorithm = obj.Algorithm
+            obj.Algorithm = Algorithms
+            obj.Algorithm = algorithm
 
     def opExecute(self, obj):
         '''opExecute(obj) ... process engraving operation'''
@@ -92,7 +199,7 @@ class ObjectSurface(PathOp.ObjectOp):
 
         print("base object: " + self.baseobject.Name)
 
-        if obj.Algorithm in ['OCL Dropcutter', 'OCL Waterline']:
+        if obj.Algorithm in Algorithms:
             try:
                 import ocl
             except:
@@ -100,28 +207,20 @@ class ObjectSurface(PathOp.ObjectOp):
                         translate("Path_Surface", "This operation requires OpenCamLib to be installed.\n"))
                 return
 
-        if self.baseobject.TypeId.startswith('Mesh'):
-            mesh = self.baseobject.Mesh
-        else:
-            # try/except is for Path Jobs created before GeometryTolerance
-            try:
-                deflection = parentJob.GeometryTolerance
-            except AttributeError:
-                from PathScripts.PathPreferences import PathPreferences
-                deflection = PathPreferences.defaultGeometryTolerance()
-            self.baseobject.Shape.tessellate(0.5)
-            mesh = MeshPart.meshFromShape(self.baseobject.Shape, Deflection=deflection)
-
-        bb = mesh.BoundBox
-
-        s = ocl.STLSurf()
-        for f in mesh.Facets:
-            p = f.Points[0]
-            q = f.Points[1]
-            r = f.Points[2]
-            t = ocl.Triangle(ocl.Point(p[0], p[1], p[2]), ocl.Point(
-                q[0], q[1], q[2]), ocl.Point(r[0], r[1], r[2]))
-            s.addTriangle(t)
+        # try/except is for Path Jobs created before GeometryTolerance
+        try:
+            deflection = parentJob.GeometryTolerance
+        except AttributeError:
+            from PathScripts.PathPreferences import PathPreferences
+            deflection = PathPreferences.defaultGeometryTolerance()
+        mesh = PathMesh.meshSurface(self.baseobject, deflection, parentJob)
+        bb = mesh.boundBox
+
+        if obj.Algorithm == 'OCL Batch Dropcutter':
+            self.commandlist.extend(self._batchDropcutter(obj, mesh, bb))
+            return
+
+        s = mesh.surface()
 
         if obj.Algorithm == 'OCL Dropcutter':
             output = self._dropcutter(obj, s, bb)
@@ -250,6 +349,36 @@ class ObjectSurface(PathOp.ObjectOp):
 
         return output
 
+    def _batchDropcutter(self, obj, mesh, bb):
+        diameter = float(obj.ToolController.Tool.Diameter)
+        stepOver = diameter * max(obj.StepOver, 1) / 100.0
+        lines = scanLines(bb, diameter, stepOver, obj.ScanAngle.Value)
+
+        begin = time.time()
+        clp = dropAll(mesh, lines, diameter, obj.SampleInterval, 0.25, obj.Processes)
+        PathLog.info("dropcutter: %d lines, %d points in %.2fs" % (len(lines), sum(len(p) for p in clp), time.time() - begin))
+
+        tolerance = obj.FitTolerance.Value
+        output = []
+        output.append(Path.Command('G0', {'Z': obj.ClearanceHeight.Value, 'F': self.vertRapid}))
+        first = True
+        for points in clp:
+            if len(points) == 0:
+                continue
+            if first:
+                output.append(Path.Command('G0', {'X': points[0][0], 'Y': points[0][1], 'F': self.horizRapid}))
+                output.append(Path.Command('G1', {'Z': points[0][2], 'F': self.vertFeed}))
+                first = False
+            else:
+                output.append(Path.Command('G1', {'X': points[0][0], 'Y': points[0][1], 'Z': points[0][2], 'F': self.horizFeed}))
+            if tolerance > 0:
+                segments = PathSimplify.fit(points, tolerance)
+            else:
+                segments = [(i, i + 1, None) for i in range(len(points) - 1)]
+            output.extend(PathSimplify.commands(points, segments, self.horizFeed))
+        PathLog.info("dropcutter: %d commands" % len(output))
+        return output
+
     def pocketInvertExtraOffset(self):
         return True
 
@@ -33,6 +33,8 @@ other than PathLog, then it probably doesn't belong here.
 '''
 
 import PathScripts.PathLog as PathLog
+import collections
+import hashlib
 import sys
 
 PathLog.setLevel(PathLog.Level.INFO, PathLog.thisModule())
@@ -88,6 +90,12 @@ def getPublicObject(obj):
             return getPublicObject(body)
     return obj
 
+def shapeDigest(shape):
+    '''shapeDigest(shape) ... returns a hash of the BREP representation of shape.
+Unlike shape.hashCode() it only depends on the geometry and placement of the shape,
+so it can be used to detect changes of a shape, or to identify equal shapes.'''
+    return hashlib.md5(shape.exportBrepToString().encode('utf-8')).hexdigest()
+
 def clearExpressionEngine(obj):
     '''clearExpressionEngine(obj) ... removes all expressions from obj.
 
@@ -117,3 +125,39 @@ def keyValueIter(dictionary):
     if sys.version_info.major < 3:
         return dictionary.iteritems()
     return dictionary.items()
+
+class LRUCache(object):
+    '''Cache holding up to size entries, once it is full each new entry evicts the least
+    recently used one. Keeps track of the number of hits, misses and evictions.'''
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        '''get(key) ... returns the value stored for key, or None.'''
+        value = self.entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        '''clear() ... remove all entries, statistics are kept.'''
+        self.entries.clear()
+
+    def statistics(self):
+        '''statistics() ... returns a dictionary with the number of entries, hits, misses and evictions.'''
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
@@ -686,50 +686,29 @@ def rampPlunge(edge, rampangle, destZ, startZ):
 def sort_jobs(locations, keys, attractors=[]):
     """ sort holes by the nearest neighbor method
         keys: two-element list of keys for X and Y coordinates. for example ['x','y']
+        attractors: keys whose absolute values are added to the squared distance, [keys[0]] by default
         originally written by m0n5t3r for PathHelix
+        See PathOrder for a faster and better ordering without attractors.
     """
-    from Queue import PriorityQueue
-    from collections import defaultdict
-
     attractors = attractors or [keys[0]]
+    if not locations:
+        return []
 
-    def sqdist(a, b):
-        """ square Euclidean distance """
-        d = 0
-        for k in keys:
-            d += (a[k] - b[k]) ** 2
-
-        return d
-
-    def weight(location):
-        w = 0
-
-        for k in attractors:
-            w += abs(location[k])
-
-        return w
-
-    def find_closest(location_list, location, dist):
-        q = PriorityQueue()
-
-        for j in location_list:
-            q.put((dist(j, location) + weight(j), j))
-
-        prio, result = q.get()
-
-        return result
+    pos = numpy.array([[loc[k] for k in keys] for loc in locations], dtype=numpy.float64)
+    weight = numpy.zeros(len(locations))
+    for k in attractors:
+        weight += numpy.abs([loc[k] for loc in locations])
 
     out = []
-    zero = defaultdict(lambda: 0)
-
-    out.append(find_closest(locations, zero, sqdist))
-    locations.remove(out[-1])
-
-    while locations:
-        closest = find_closest(locations, out[-1], sqdist)
-        out.append(closest)
-        locations.remove(closest)
-
+    remaining = numpy.ones(len(locations), dtype=bool)
+    last = numpy.zeros(len(keys))
+    for _ in range(len(locations)):
+        d = ((pos - last) ** 2).sum(axis=1) + weight
+        d[~remaining] = numpy.inf
+        i = int(numpy.argmin(d))
+        remaining[i] = False
+        out.append(locations[i])
+        last = pos[i]
     return out
 
 def guessDepths(objshape, subs=None):
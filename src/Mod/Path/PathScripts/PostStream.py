@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+'''
+Streaming core for post processors.
+
+A post processor generates its output as a sequence of text chunks (usually
+one line each) which are handed to a GCodeWriter. The writer forwards them in
+batches to any file like object (file, pipe, socket.makefile(), ...) so the
+memory used is independent of the size of the program. Formatting of numbers,
+modal suppression of commands and line numbering are provided by GCodeFormatter
+so all posts produce them the same way.
+'''
+
+import FreeCAD
+import io
+
+class GCodeFormatter(object):
+    '''Formats words and lines of g-code.
+    The formatter keeps the state required for line numbers and modal command suppression,
+    a new instance should be used for every export.'''
+
+    def __init__(self, precision=3, lineNumbers=False, start=100, increment=10, modal=False, space=' '):
+        self.precision = precision
+        self.lineNumbers = lineNumbers
+        self.lineNr = start
+        self.increment = increment
+        self.modal = modal
+        self.space = space
+        self.lastCommand = None
+        self.setPrecision(precision)
+
+    def setPrecision(self, precision):
+        '''setPrecision(precision) ... set the default number of digits used by fmt().'''
+        self.precision = precision
+        self.precisionString = '.%df' % int(precision)
+
+    def linenumber(self):
+        '''linenumber() ... returns the next line number prefix, or an empty string if line numbers are disabled.'''
+        if self.lineNumbers:
+            self.lineNr += self.increment
+            return "N%d " % self.lineNr
+        return ''
+
+    def fmt(self, value, precision=None):
+        '''fmt(value, precision=None) ... format value with the given, or the default, precision.'''
+        if precision is None:
+            return format(float(value), self.precisionString)
+        return format(float(value), '.%df' % int(precision))
+
+    def command(self, command):
+        '''command(command) ... returns the command word, or None if it is suppressed by modal mode.'''
+        last = self.lastCommand
+        self.lastCommand = command
+        if self.modal and command == last:
+            return None
+        return command
+
+    def line(self, words):
+        '''line(words) ... returns the words as a single, line numbered, line including the newline.
+        Returns None if there are no words.'''
+        if not words:
+            return None
+        if self.lineNumbers:
+            words = [self.linenumber()] + list(words)
+        return ''.join([w + self.space for w in words]).rstrip() + "\n"
+
+    def lines(self, text, keepends=True):
+        '''lines(text, keepends=True) ... generator returning each line of text prefixed with a line number.'''
+        for line in text.splitlines(keepends):
+            yield self.linenumber() + line
+
+
+class GCodeWriter(object):
+    '''Collects the text chunks emitted by a post processor.
+    Chunks are forwarded in batches of bufferSize to stream, if one is given. If collect is set
+    all text is also kept and can be retrieved with getvalue().'''
+
+    def __init__(self, stream=None, collect=False, bufferSize=8192):
+        self.stream = stream
+        self.collect = collect
+        self.bufferSize = bufferSize
+        self.buffer = []
+        self.chunks = []
+        self.lineCount = 0
+        self.byteCount = 0
+        self.binary = _isBinary(stream)
+
+    def write(self, text):
+        if text:
+            self.buffer.append(text)
+            if len(self.buffer) >= self.bufferSize:
+                self.flush()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        if self.buffer:
+            chunk = ''.join(self.buffer)
+            self.buffer = []
+            self.lineCount += chunk.count("\n")
+            self.byteCount += len(chunk)
+            if self.collect:
+                self.chunks.append(chunk)
+            if self.stream is not None:
+                if self.binary:
+                    chunk = _encode(chunk)
+                self.stream.write(chunk)
+        if self.stream is not None and hasattr(self.stream, 'flush'):
+            self.stream.flush()
+
+    def getvalue(self):
+        '''getvalue() ... returns all collected text, only available if collect is set.'''
+        if self.buffer:
+            self.flush()
+        if len(self.chunks) > 1:
+            self.chunks = [''.join(self.chunks)]
+        return self.chunks[0] if self.chunks else ''
+
+
+def _isBinary(stream):
+    if stream is None or isinstance(stream, io.TextIOBase):
+        return False
+    return 'b' in getattr(stream, 'mode', 'b')
+
+def _encode(text):
+    if isinstance(text, bytes):
+        return text
+    return text.encode('utf-8')
+
+def _editGCode(gcode):
+    from PathScripts import PostUtils
+    dia = PostUtils.GCodeEditorDialog()
+    dia.editor.setText(gcode)
+    if dia.exec_():
+        return dia.editor.toPlainText()
+    return gcode
+
+def write(lines, stream, bufferSize=8192):
+    '''write(lines, stream, bufferSize=8192) ... stream lines into the file like object stream.
+    Returns the writer, which holds statistics about the written output.'''
+    writer = GCodeWriter(stream, False, bufferSize)
+    writer.writelines(lines)
+    writer.flush()
+    return writer
+
+def export(lines, filename, showEditor=False, collect=True):
+    '''export(lines, filename, showEditor=False, collect=True) ... write the generated lines to filename.
+    If the editor is shown the entire program has to be assembled first, otherwise the lines are
+    streamed into the file and only kept if collect is set - in which case the program is returned.
+    A filename of '-' suppresses writing to a file.'''
+    if showEditor and FreeCAD.GuiUp:
+        collector = GCodeWriter(None, True)
+        collector.writelines(lines)
+        final = _editGCode(collector.getvalue())
+        if filename != '-':
+            with open(filename, 'wb') as fp:
+                fp.write(_encode(final))
+        return final
+
+    if filename == '-':
+        collector = GCodeWriter(None, True)
+        collector.writelines(lines)
+        return collector.getvalue()
+
+    with open(filename, 'wb') as fp:
+        writer = GCodeWriter(fp, collect)
+        writer.writelines(lines)
+        writer.flush()
+    if collect:
+        return writer.getvalue()
+    return None
@@ -47,6 +47,7 @@ from FreeCAD import Units
 import datetime
 import PathScripts
 from PathScripts import PostUtils
+from PathScripts import PostStream
 #from PathScripts import PathUtils
 
 now = datetime.datetime.now()
@@ -112,9 +113,7 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
+formatter = PostStream.GCodeFormatter(AXIS_PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
 def processArguments(argstring):
     global OUTPUT_HEADER
@@ -146,12 +145,10 @@ def processArguments(argstring):
         elif arg.split('=')[0] == '--feed-precision':
             FEED_PRECISION = arg.split('=')[1]
 
-def export(objectslist, filename, argstring):
+def export(objectslist, filename, argstring, collect=True):
     processArguments(argstring)
     for i in objectslist:
         print (i.Name)
-    global UNITS
-    global UNIT_FORMAT
 
     # ISJOB = (len(objectslist) == 1) and isinstance(objectslist[0].Proxy, PathScripts.PathJob.ObjectJob)
     # print("isjob: {} {}".format(ISJOB, len(objectslist)))
@@ -163,24 +160,35 @@ def export(objectslist, filename, argstring):
     #             return
 
     print("postprocessing...")
-    gcode = ""
+    final = PostStream.export(gcodeLines(objectslist), filename, SHOW_EDITOR, collect)
+    print("done postprocessing.")
+
+    return final
+
+
+def gcodeLines(objectslist):
+    """gcodeLines(objectslist) ... generator returning the entire program, line by line."""
+    global formatter
+    global LINENR
+
+    formatter = PostStream.GCodeFormatter(AXIS_PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
     # write header
     if OUTPUT_HEADER:
-        gcode += HEADER
+        yield HEADER
 
-    gcode += SAFETYBLOCK
+    yield SAFETYBLOCK
 
     # Write the preamble
     if OUTPUT_COMMENTS:
         for item in objectslist:
             if isinstance (item.Proxy, PathScripts.PathToolController.ToolController):
-                gcode += ";T{}={}\n".format(item.ToolNumber, item.Name)
-        gcode += linenumber() + ";begin preamble\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
+                yield ";T{}={}\n".format(item.ToolNumber, item.Name)
+        yield linenumber() + ";begin preamble\n"
+    for line in formatter.lines(PREAMBLE):
+        yield line
 
-    gcode += linenumber() + UNITS + "\n"
+    yield linenumber() + UNITS + "\n"
 
     for obj in objectslist:
         #skip postprocessing tools
@@ -190,64 +198,39 @@ def export(objectslist, filename, argstring):
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + ";begin operation\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + ";begin operation\n"
+        for line in formatter.lines(PRE_OPERATION):
+            yield line
 
-        gcode += parse(obj)
+        for line in parse(obj):
+            yield line
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + ";end operation: %s\n" % obj.Label
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + ";end operation: %s\n" % obj.Label
+        for line in formatter.lines(POST_OPERATION):
+            yield line
 
     # do the post_amble
 
     if OUTPUT_COMMENTS:
-        gcode += ";begin postamble\n"
-    for line in TOOLRETURN.splitlines(True):
-        gcode += linenumber() + line
-    for line in SAFETYBLOCK.splitlines(True):
-        gcode += linenumber() + line
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
-
-    print("done postprocessing.")
-
-    if not filename == '-':
-        gfile = pythonopen(filename, "wb")
-        gfile.write(final)
-        gfile.close()
+        yield ";begin postamble\n"
+    for line in formatter.lines(TOOLRETURN):
+        yield line
+    for line in formatter.lines(SAFETYBLOCK):
+        yield line
+    for line in formatter.lines(POSTAMBLE):
+        yield line
 
-    return final
+    # line numbers continue in the next export
+    LINENR = formatter.lineNr
 
 
 def linenumber():
-    global LINENR
-    if OUTPUT_LINE_NUMBERS is True:
-        LINENR += 10
-        return "N" + str(LINENR) + " "
-    return ""
+    return formatter.linenumber()
 
 def parse(pathobj):
-    global AXIS_PRECISION
-    global FEED_PRECISION
-    out = ""
-    lastcommand = None
-    axis_precision_string = '.' + str(AXIS_PRECISION) +'f'
-    feed_precision_string = '.' + str(FEED_PRECISION) +'f'
+    """parse(pathobj) ... generator returning the g-code lines of pathobj."""
     # params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
     # the order of parameters
     # centroid doesn't want K properties on XY plane  Arcs need work.
@@ -255,84 +238,62 @@ def parse(pathobj):
 
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        #     yield linenumber() + "(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            out += parse(p)
-        return out
-    else:  # parsing simple path
+            for line in parse(p):
+                yield line
+        return
 
-        # groups might contain non-path things like stock.
-        if not hasattr(pathobj, "Path"):
-            return out
+    # parsing simple path
+    # groups might contain non-path things like stock.
+    if not hasattr(pathobj, "Path"):
+        return
 
-        # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(" + pathobj.Label + ")\n"
+    # if OUTPUT_COMMENTS:
+    #     yield linenumber() + "(" + pathobj.Label + ")\n"
 
-        for c in pathobj.Path.Commands:
-            commandlist = [] #list of elements in the command, code and params.
-            command = c.Name #command M or G code or comment string
+    formatter.lastCommand = None
+    for c in pathobj.Path.Commands:
+        commandlist = [] #list of elements in the command, code and params.
+        command = c.Name #command M or G code or comment string
 
-            if command[0]=='(':
-                command = PostUtils.fcoms(command, COMMENT)
+        if command[0]=='(':
+            command = PostUtils.fcoms(command, COMMENT)
 
+        # if modal: only print the command if it is not the same as the
+        # last one
+        if formatter.command(command) is not None:
             commandlist.append(command)
-            # if modal: only print the command if it is not the same as the
-            # last one
-            if MODAL is True:
-                if command == lastcommand:
-                    commandlist.pop(0)
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if c.Name not in ["G0", "G00"]: #centroid doesn't use rapid speeds
-                            speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
-                            commandlist.append(
-                                param + format(float(speed.getValueAs(UNIT_FORMAT)), feed_precision_string) )
-                    elif param == 'H':
-                        commandlist.append(param + str(int(c.Parameters['H'])))
-                    elif param == 'S':
-                        commandlist.append(param + PostUtils.fmt(c.Parameters['S'], SPINDLE_DECIMALS, "G21"))
-                    elif param == 'T':
-                        commandlist.append(param + str(int(c.Parameters['T'])))
-                    else:
+
+        # Now add the remaining parameters in order
+        parameters = c.Parameters
+        for param in params:
+            if param in parameters:
+                if param == 'F':
+                    if c.Name not in ["G0", "G00"]: #centroid doesn't use rapid speeds
+                        speed = Units.Quantity(parameters['F'], FreeCAD.Units.Velocity)
                         commandlist.append(
-                            param + format(c.Parameters[param], axis_precision_string))
-            outstr = str(commandlist)
-            outstr =outstr.replace('[','')
-            outstr =outstr.replace(']','')
-            outstr =outstr.replace("'",'')
-            outstr =outstr.replace(",",'')
-            #out += outstr + '\n'
-
-            # store the latest command
-            lastcommand = command
-
-            # Check for Tool Change:
-            if command == 'M6':
-                # if OUTPUT_COMMENTS:
-                #     out += linenumber() + "(begin toolchange)\n"
-                for line in TOOL_CHANGE.splitlines(True):
-                    out += linenumber() + line
-
-            # if command == "message":
-            #     if OUTPUT_COMMENTS is False:
-            #         out = []
-            #     else:
-            #         commandlist.pop(0)  # remove the command
-
-            # prepend a line number and append a newline
-            if len(commandlist) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    commandlist.insert(0, (linenumber()))
-
-                # append the line to the final output
-                for w in commandlist:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
-
-        return out
+                            param + formatter.fmt(speed.getValueAs(UNIT_FORMAT), FEED_PRECISION))
+                elif param == 'H':
+                    commandlist.append(param + str(int(parameters['H'])))
+                elif param == 'S':
+                    commandlist.append(param + PostUtils.fmt(parameters['S'], SPINDLE_DECIMALS, "G21"))
+                elif param == 'T':
+                    commandlist.append(param + str(int(parameters['T'])))
+                else:
+                    commandlist.append(param + formatter.fmt(parameters[param]))
+
+        # Check for Tool Change:
+        if command == 'M6':
+            # if OUTPUT_COMMENTS:
+            #     yield linenumber() + "(begin toolchange)\n"
+            for line in formatter.lines(TOOL_CHANGE):
+                yield line
+
+        # prepend a line number and append a newline
+        line = formatter.line(commandlist)
+        if line:
+            yield line
 
 
 print(__name__ + " gcode postprocessor loaded.")
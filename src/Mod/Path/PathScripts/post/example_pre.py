@@ -70,14 +70,11 @@ def insert(filename, docname):
 
 def parse(inputstring):
     "parse(inputstring): returns a parsed output string"
-    print("preprocessing...")
-    print(inputstring)
-    PathLog.track(inputstring)
+    PathLog.track(len(inputstring))
     # split the input by line
     lines = inputstring.split("\n")
-    output = ""
+    output = []
     lastcommand = None
-    print (lines)
 
     for l in lines:
         # remove any leftover trailing and preceding spaces
@@ -88,7 +85,7 @@ def parse(inputstring):
         if l[0].upper() in ["N"]:
             # remove line numbers
             l = l.split(" ",1)
-            if len(l)>=1:
+            if len(l)>1:
                 l = l[1]
             else:
                 continue
@@ -99,7 +96,7 @@ def parse(inputstring):
             continue
         if l[0].upper() in ["G","M"]:
             # found a G or M command: we store it
-            output += l + "\n"
+            output.append(l)
             last = l[0].upper()
             for c in l[1:]:
                 if not c.isdigit():
@@ -109,10 +106,10 @@ def parse(inputstring):
             lastcommand = last
         elif lastcommand:
             # no G or M command: we repeat the last one
-            output += lastcommand + " " + l + "\n"
+            output.append(lastcommand + " " + l)
 
-    print("done preprocessing.")
-    return output
+    output.append("")
+    return "\n".join(output)
 
 
 print(__name__ + " gcode preprocessor loaded.")
@@ -25,6 +25,8 @@
 #***************************************************************************/
 
 
+from __future__ import print_function
+
 '''
 Generate g-code compatible with fablin from a Path.
 
@@ -43,7 +45,7 @@ Arguments for fablin:
 
 import datetime
 now = datetime.datetime.now()
-from PathScripts import PostUtils
+from PathScripts import PostStream
 
 #These globals set common customization preferences
 OUTPUT_COMMENTS = False # Fablin does not support parenthesis, it will echo the command complaining. As a side effect the spinner may turn at a very reduced speed (do not ask me why).
@@ -90,9 +92,7 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
+formatter = PostStream.GCodeFormatter(4, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
 def processArguments(argstring):
     global OUTPUT_HEADER
@@ -116,23 +116,33 @@ def processArguments(argstring):
         elif arg == '--show-editor':
             SHOW_EDITOR = True
         elif arg == '--no-show-editor':
-	    SHOW_EDITOR = False
+            SHOW_EDITOR = False
 
-	params = arg.split('=')
+        params = arg.split('=')
 
         if params[0] == '--rapids-feedrate':
-	    RAPID_FEEDRATE = params[1]
+            RAPID_FEEDRATE = params[1]
 
-def export(objectslist,filename,argstring):
+def export(objectslist,filename,argstring,collect=True):
     processArguments(argstring)
-    global UNITS
     for obj in objectslist:
         if not hasattr(obj,"Path"):
-            print "the object " + obj.Name + " is not a path. Please select only path and Compounds."
+            print("the object " + obj.Name + " is not a path. Please select only path and Compounds.")
             return
 
-    print "postprocessing..."
-    gcode = ""
+    print("postprocessing...")
+    final = PostStream.export(gcodeLines(objectslist), filename, SHOW_EDITOR, collect)
+    print("done postprocessing.")
+
+    return final
+
+def gcodeLines(objectslist):
+    """gcodeLines(objectslist) ... generator returning the entire program, line by line."""
+    global UNITS
+    global formatter
+    global LINENR
+
+    formatter = PostStream.GCodeFormatter(4, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
     #Find the machine.
     #The user my have overridden post processor defaults in the GUI.
@@ -144,7 +154,7 @@ def export(objectslist,filename,argstring):
                 if p.Name == "Machine":
                     myMachine = p
     if myMachine is None:
-        print "No machine found in this project"
+        print("No machine found in this project")
     else:
         if myMachine.MachineUnits == "Metric":
            UNITS = "G21"
@@ -154,143 +164,113 @@ def export(objectslist,filename,argstring):
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ +")\n"
-        gcode += linenumber() + "(Output Time:"+str(now)+")\n"
+        yield linenumber() + "(Exported by FreeCAD)\n"
+        yield linenumber() + "(Post Processor: " + __name__ +")\n"
+        yield linenumber() + "(Output Time:"+str(now)+")\n"
 
     #Write the preamble
-    if OUTPUT_COMMENTS: gcode += linenumber() + "(begin preamble)\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
-    #gcode += linenumber() + UNITS + "\n"
+    if OUTPUT_COMMENTS: yield linenumber() + "(begin preamble)\n"
+    for line in formatter.lines(PREAMBLE):
+        yield line
+    #yield linenumber() + UNITS + "\n"
 
     for obj in objectslist:
 
         #do the pre_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(begin operation: " + obj.Label + ")\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+        if OUTPUT_COMMENTS: yield linenumber() + "(begin operation: " + obj.Label + ")\n"
+        for line in formatter.lines(PRE_OPERATION):
+            yield line
 
-        gcode += parse(obj)
+        for line in parse(obj):
+            yield line
 
         #do the post_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(finish operation: " + obj.Label + ")\n"
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+        if OUTPUT_COMMENTS: yield linenumber() + "(finish operation: " + obj.Label + ")\n"
+        for line in formatter.lines(POST_OPERATION):
+            yield line
 
     #do the post_amble
 
-    if OUTPUT_COMMENTS: gcode += "(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
-
-    print "done postprocessing."
+    if OUTPUT_COMMENTS: yield "(begin postamble)\n"
+    for line in formatter.lines(POSTAMBLE):
+        yield line
 
-    gfile = pythonopen(filename,"wb")
-    gfile.write(gcode)
-    gfile.close()
+    # line numbers continue in the next export
+    LINENR = formatter.lineNr
 
 
 def linenumber():
-    global LINENR
-    if OUTPUT_LINE_NUMBERS == True:
-        LINENR += 10
-        return "N" + str(LINENR) + " "
-    return ""
+    return formatter.linenumber()
 
 def parse(pathobj):
-    out = ""
+    """parse(pathobj) ... generator returning the g-code lines of pathobj."""
     lastcommand = None
 
     #params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control the order of parameters
     params = ['X','Y','Z','A','B','I','J','F','S','T','Q','R','L'] #linuxcnc doesn't want K properties on XY plane  Arcs need work.
 
     if hasattr(pathobj,"Group"): #We have a compound or project.
-        if OUTPUT_COMMENTS: out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        if OUTPUT_COMMENTS: yield linenumber() + "(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            out += parse(p)
-        return out
-    else: #parsing simple path
-
-        if not hasattr(pathobj,"Path"): #groups might contain non-path things like stock.
-            return out
-
-        if OUTPUT_COMMENTS: out += linenumber() + "(Path: " + pathobj.Label + ")\n"
-
-        for c in pathobj.Path.Commands:
-            outstring = []
-            command = c.Name
-
-	    # fablin does not support parenthesis syntax, so removing that (pocket) in the agnostic gcode
-	    if command[0] == '(':
-		if not OUTPUT_COMMENTS: pass
-	    else:
-	    	outstring.append(command)
-
-	    # if modal: only print the command if it is not the same as the last one
-            if MODAL == True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if command not in RAPID_MOVES:
-                            outstring.append(param + format(c.Parameters['F'], '.2f'))
-                    elif param == 'T':
-                        outstring.append(param + str(c.Parameters['T']))
-                    else:
-                        outstring.append(param + format(c.Parameters[param], '.4f'))
-
-	    if command in RAPID_MOVES and command != lastcommand:
-		outstring.append('F' + format(RAPID_FEEDRATE))
-
-            # store the latest command
-            lastcommand = command
-
-            # Check for Tool Change:
-            if command == 'M6':
-                if OUTPUT_COMMENTS: out += linenumber() + "(begin toolchange)\n"
-                if not OUTPUT_TOOL_CHANGE:
-                    outstring.insert(0, ";")
-                else:
-                    for line in TOOL_CHANGE.splitlines(True):
-                        out += linenumber() + line
-
-            if command == "message":
-                if OUTPUT_COMMENTS == False:
-                    out = []
+            for line in parse(p):
+                yield line
+        return
+
+    #parsing simple path
+    if not hasattr(pathobj,"Path"): #groups might contain non-path things like stock.
+        return
+
+    if OUTPUT_COMMENTS: yield linenumber() + "(Path: " + pathobj.Label + ")\n"
+
+    for c in pathobj.Path.Commands:
+        outstring = []
+        command = c.Name
+
+        # fablin does not support parenthesis syntax, so removing that (pocket) in the agnostic gcode
+        # if modal: only print the command if it is not the same as the last one
+        if command[0] != '(' and not (MODAL and command == lastcommand):
+            outstring.append(command)
+
+        # Now add the remaining parameters in order
+        parameters = c.Parameters
+        for param in params:
+            if param in parameters:
+                if param == 'F':
+                    if command not in RAPID_MOVES:
+                        outstring.append(param + formatter.fmt(parameters['F'], 2))
+                elif param == 'T':
+                    outstring.append(param + str(parameters['T']))
                 else:
-                    outstring.pop(0) #remove the command
-
-            if command in SUPPRESS_COMMANDS:
-                outstring = []
-
-            #prepend a line number and append a newline
-            if len(outstring) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    outstring.insert(0,(linenumber()))
-
-                #append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
-
-        return out
+                    outstring.append(param + formatter.fmt(parameters[param]))
+
+        if command in RAPID_MOVES and command != lastcommand:
+            outstring.append('F' + format(RAPID_FEEDRATE))
+
+        # store the latest command
+        lastcommand = command
+
+        # Check for Tool Change:
+        if command == 'M6':
+            if OUTPUT_COMMENTS: yield linenumber() + "(begin toolchange)\n"
+            if not OUTPUT_TOOL_CHANGE:
+                outstring.insert(0, ";")
+            else:
+                for line in formatter.lines(TOOL_CHANGE):
+                    yield line
+
+        if command == "message":
+            if OUTPUT_COMMENTS == False:
+                continue
+            if outstring and outstring[0] == command:
+                outstring.pop(0) #remove the command
+
+        if command in SUPPRESS_COMMANDS:
+            outstring = []
 
+        #prepend a line number and append a newline
+        line = formatter.line(outstring)
+        if line:
+            yield line
 
-print __name__ + " gcode postprocessor loaded."
 
+print(__name__ + " gcode postprocessor loaded.")
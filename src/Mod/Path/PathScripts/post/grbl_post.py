@@ -30,7 +30,7 @@ grbl_post.export(object,"/path/to/file.ncc")
 '''
 
 import FreeCAD
-import PathScripts.PostUtils as PostUtils
+import PathScripts.PostStream as PostStream
 import argparse
 import datetime
 import shlex
@@ -95,9 +95,7 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
+formatter = PostStream.GCodeFormatter(PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
 
 def processArguments(argstring):
@@ -138,19 +136,28 @@ def processArguments(argstring):
 
     return True
 
-def export(objectslist,filename,argstring):
+def export(objectslist,filename,argstring,collect=True):
     if not processArguments(argstring):
         return None
 
-    global UNITS
-
     for obj in objectslist:
         if not hasattr(obj,"Path"):
             print("the object " + obj.Name + " is not a path. Please select only path and Compounds.")
             return
 
     print("postprocessing...")
-    gcode = ""
+    final = PostStream.export(gcodeLines(objectslist), filename, SHOW_EDITOR, collect)
+    print("done postprocessing.")
+
+    return final
+
+def gcodeLines(objectslist):
+    """gcodeLines(objectslist) ... generator returning the entire program, line by line."""
+    global UNITS
+    global formatter
+    global LINENR
+
+    formatter = PostStream.GCodeFormatter(PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
     #Find the machine.
     #The user my have overridden post processor defaults in the GUI.  Make sure we're using the current values in the Machine Def.
@@ -171,135 +178,104 @@ def export(objectslist,filename,argstring):
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ +")\n"
-        gcode += linenumber() + "(Output Time:"+str(now)+")\n"
+        yield linenumber() + "(Exported by FreeCAD)\n"
+        yield linenumber() + "(Post Processor: " + __name__ +")\n"
+        yield linenumber() + "(Output Time:"+str(now)+")\n"
 
     #Write the preamble
-    if OUTPUT_COMMENTS: gcode += linenumber() + "(begin preamble)\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
-    gcode += linenumber() + UNITS + "\n"
+    if OUTPUT_COMMENTS: yield linenumber() + "(begin preamble)\n"
+    for line in formatter.lines(PREAMBLE):
+        yield line
+    yield linenumber() + UNITS + "\n"
 
     for obj in objectslist:
 
         #do the pre_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(begin operation: " + obj.Label + ")\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+        if OUTPUT_COMMENTS: yield linenumber() + "(begin operation: " + obj.Label + ")\n"
+        for line in formatter.lines(PRE_OPERATION):
+            yield line
 
-        gcode += parse(obj)
+        for line in parse(obj):
+            yield line
 
         #do the post_op
-        if OUTPUT_COMMENTS: gcode += linenumber() + "(finish operation: " + obj.Label + ")\n"
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+        if OUTPUT_COMMENTS: yield linenumber() + "(finish operation: " + obj.Label + ")\n"
+        for line in formatter.lines(POST_OPERATION):
+            yield line
 
     #do the post_amble
 
-    if OUTPUT_COMMENTS: gcode += "(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if FreeCAD.GuiUp and SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
-
-    print("done postprocessing.")
+    if OUTPUT_COMMENTS: yield "(begin postamble)\n"
+    for line in formatter.lines(POSTAMBLE):
+        yield line
 
-    gfile = pythonopen(filename,"wb")
-    gfile.write(gcode)
-    gfile.close()
+    # line numbers continue in the next export
+    LINENR = formatter.lineNr
 
 
 def linenumber():
-    global LINENR
-    if OUTPUT_LINE_NUMBERS == True:
-        LINENR += 10
-        return "N" + str(LINENR) + " "
-    return ""
+    return formatter.linenumber()
 
 def parse(pathobj):
-    out = ""
-    lastcommand = None
-    precision_string = '.' + str(PRECISION) +'f'
-
+    """parse(pathobj) ... generator returning the g-code lines of pathobj."""
     #params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control the order of parameters
     params = ['X','Y','Z','A','B','I','J','F','S','T','Q','R','L'] #linuxcnc doesn't want K properties on XY plane  Arcs need work.
 
     if hasattr(pathobj,"Group"): #We have a compound or project.
-        if OUTPUT_COMMENTS: out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        if OUTPUT_COMMENTS: yield linenumber() + "(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            out += parse(p)
-        return out
-    else: #parsing simple path
-
-        if not hasattr(pathobj,"Path"): #groups might contain non-path things like stock.
-            return out
-
-        if OUTPUT_COMMENTS: out += linenumber() + "(Path: " + pathobj.Label + ")\n"
-
-        for c in pathobj.Path.Commands:
-            outstring = []
-            command = c.Name
+            for line in parse(p):
+                yield line
+        return
+
+    #parsing simple path
+    if not hasattr(pathobj,"Path"): #groups might contain non-path things like stock.
+        return
+
+    if OUTPUT_COMMENTS: yield linenumber() + "(Path: " + pathobj.Label + ")\n"
+
+    formatter.lastCommand = None
+    for c in pathobj.Path.Commands:
+        outstring = []
+        command = c.Name
+        # if modal: only print the command if it is not the same as the last one
+        if formatter.command(command) is not None:
             outstring.append(command)
-            # if modal: only print the command if it is not the same as the last one
-            if MODAL == True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if command not in RAPID_MOVES:
-                            outstring.append(param + format(c.Parameters['F'] * 60, '.2f'))
-                    elif param == 'T':
-                        outstring.append(param + str(c.Parameters['T']))
-                    else:
-                        outstring.append(param + format(c.Parameters[param], precision_string))
-
-            # store the latest command
-            lastcommand = command
-
-            # Check for Tool Change:
-            if command == 'M6':
-                if OUTPUT_COMMENTS: out += linenumber() + "(begin toolchange)\n"
-                if not OUTPUT_TOOL_CHANGE:
-                    outstring.insert(0, ";")
-                else:
-                    for line in TOOL_CHANGE.splitlines(True):
-                        out += linenumber() + line
 
-            if command == "message":
-                if OUTPUT_COMMENTS == False:
-                    out = []
+        # Now add the remaining parameters in order
+        parameters = c.Parameters
+        for param in params:
+            if param in parameters:
+                if param == 'F':
+                    if command not in RAPID_MOVES:
+                        outstring.append(param + format(parameters['F'] * 60, '.2f'))
+                elif param == 'T':
+                    outstring.append(param + str(parameters['T']))
                 else:
-                    outstring.pop(0) #remove the command
+                    outstring.append(param + formatter.fmt(parameters[param]))
 
-            if command in SUPPRESS_COMMANDS:
+        # Check for Tool Change:
+        if command == 'M6':
+            if OUTPUT_COMMENTS: yield linenumber() + "(begin toolchange)\n"
+            if not OUTPUT_TOOL_CHANGE:
                 outstring.insert(0, ";")
+            else:
+                for line in formatter.lines(TOOL_CHANGE):
+                    yield line
 
-            #prepend a line number and append a newline
-            if len(outstring) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    outstring.insert(0,(linenumber()))
+        if command == "message":
+            if OUTPUT_COMMENTS == False:
+                continue
+            if outstring and outstring[0] == command:
+                outstring.pop(0) #remove the command
 
-                #append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
+        if command in SUPPRESS_COMMANDS:
+            outstring.insert(0, ";")
 
-        return out
+        #prepend a line number and append a newline
+        line = formatter.line(outstring)
+        if line:
+            yield line
 
 
 print(__name__ + " gcode postprocessor loaded.")
-
@@ -27,7 +27,8 @@ import Path
 import argparse
 import datetime
 import shlex
-from PathScripts import PostUtils
+from PathScripts import PathSimplify
+from PathScripts import PostStream
 from PathScripts import PathUtils
 
 TOOLTIP = '''
@@ -54,6 +55,7 @@ parser.add_argument('--postamble', help='set commands to be issued after the las
 parser.add_argument('--inches', action='store_true', help='Convert output for US imperial mode (G20)')
 parser.add_argument('--modal', action='store_true', help='Output the Same G-command Name USE NonModal Mode')
 parser.add_argument('--axis-modal', action='store_true', help='Output the Same Axis Value Mode')
+parser.add_argument('--compress', type=float, default=0, help='replace runs of straight moves by lines and arcs within the given tolerance, default=0 (off)')
 
 TOOLTIP_ARGS = parser.format_help()
 
@@ -64,6 +66,7 @@ OUTPUT_LINE_NUMBERS = False
 SHOW_EDITOR = True
 MODAL = False  # if true commands are suppressed if the same as previous line.
 OUTPUT_DOUBLES = True  # if false duplicate axis values are suppressed if the same as previous line.
+COMPRESS = 0  # if > 0 runs of straight moves are replaced by lines and arcs within this tolerance.
 COMMAND_SPACE = " "
 LINENR = 100  # line number starting value
 
@@ -96,9 +99,7 @@ POST_OPERATION = ''''''
 # Tool Change commands will be inserted before a tool change
 TOOL_CHANGE = ''''''
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
+formatter = PostStream.GCodeFormatter(PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
 
 def processArguments(argstring):
@@ -114,6 +115,7 @@ def processArguments(argstring):
     global UNIT_FORMAT
     global MODAL
     global OUTPUT_DOUBLES
+    global COMPRESS
 
     try:
         args = parser.parse_args(shlex.split(argstring))
@@ -141,6 +143,7 @@ def processArguments(argstring):
         if args.axis_modal:
             print ('here')
             OUTPUT_DOUBLES = False
+        COMPRESS = args.compress
 
     except:
         return False
@@ -148,12 +151,9 @@ def processArguments(argstring):
     return True
 
 
-def export(objectslist, filename, argstring):
+def export(objectslist, filename, argstring, collect=True):
     if not processArguments(argstring):
         return None
-    global UNITS
-    global UNIT_FORMAT
-    global UNIT_SPEED_FORMAT
 
     for obj in objectslist:
         if not hasattr(obj, "Path"):
@@ -161,20 +161,34 @@ def export(objectslist, filename, argstring):
             return None
 
     print("postprocessing...")
-    gcode = ""
+    final = PostStream.export(gcodeLines(objectslist), filename, SHOW_EDITOR, collect)
+    print("done postprocessing.")
+
+    return final
+
+
+def gcodeLines(objectslist):
+    """gcodeLines(objectslist) ... generator returning the entire program, line by line."""
+    global UNITS
+    global UNIT_FORMAT
+    global UNIT_SPEED_FORMAT
+    global formatter
+    global LINENR
+
+    formatter = PostStream.GCodeFormatter(PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ + ")\n"
-        gcode += linenumber() + "(Output Time:" + str(now) + ")\n"
+        yield linenumber() + "(Exported by FreeCAD)\n"
+        yield linenumber() + "(Post Processor: " + __name__ + ")\n"
+        yield linenumber() + "(Output Time:" + str(now) + ")\n"
 
     # Write the preamble
     if OUTPUT_COMMENTS:
-        gcode += linenumber() + "(begin preamble)\n"
+        yield linenumber() + "(begin preamble)\n"
     for line in PREAMBLE.splitlines(False):
-        gcode += linenumber() + line + "\n"
-    gcode += linenumber() + UNITS + "\n"
+        yield linenumber() + line + "\n"
+    yield linenumber() + UNITS + "\n"
 
     for obj in objectslist:
 
@@ -198,154 +212,129 @@ def export(objectslist, filename, argstring):
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(begin operation: %s)\n" % obj.Label
-            gcode += linenumber() + "(machine: %s, %s)\n" % (myMachine, UNIT_SPEED_FORMAT)
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + "(begin operation: %s)\n" % obj.Label
+            yield linenumber() + "(machine: %s, %s)\n" % (myMachine, UNIT_SPEED_FORMAT)
+        for line in formatter.lines(PRE_OPERATION):
+            yield line
 
-        gcode += parse(obj)
+        for line in parse(obj):
+            yield line
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(finish operation: %s)\n" % obj.Label
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + "(finish operation: %s)\n" % obj.Label
+        for line in formatter.lines(POST_OPERATION):
+            yield line
 
     # do the post_amble
     if OUTPUT_COMMENTS:
-        gcode += "(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if FreeCAD.GuiUp and SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
+        yield "(begin postamble)\n"
+    for line in formatter.lines(POSTAMBLE):
+        yield line
 
-    print("done postprocessing.")
-
-    if not filename == '-':
-        gfile = pythonopen(filename, "wb")
-        gfile.write(final)
-        gfile.close()
-
-    return final
+    # line numbers continue in the next export
+    LINENR = formatter.lineNr
 
 
 def linenumber():
-    global LINENR
-    if OUTPUT_LINE_NUMBERS is True:
-        LINENR += 10
-        return "N" + str(LINENR) + " "
-    return ""
+    return formatter.linenumber()
 
 
 def parse(pathobj):
-    global PRECISION
-    global MODAL
-    global OUTPUT_DOUBLES
-    global UNIT_FORMAT
-    global UNIT_SPEED_FORMAT
-
-    out = ""
-    lastcommand = None
-    precision_string = '.' + str(PRECISION) + 'f'
+    """parse(pathobj) ... generator returning the g-code lines of pathobj."""
     currLocation = {}  # keep track for no doubles
 
     # the order of parameters
-    # linuxcnc doesn't want K properties on XY plane  Arcs need work.
-    params = ['X', 'Y', 'Z', 'A', 'B', 'C', 'I', 'J', 'F', 'S', 'T', 'Q', 'R', 'L', 'H', 'D', 'P']
+    # linuxcnc doesn't want K properties on XY plane
+    params = ['X', 'Y', 'Z', 'A', 'B', 'C', 'I', 'J', 'K', 'F', 'S', 'T', 'Q', 'R', 'L', 'H', 'D', 'P']
+    plane = 'G17'
     firstmove = Path.Command("G0", {"X": -1, "Y": -1, "Z": -1, "F": 0.0})
     currLocation.update(firstmove.Parameters)  # set First location Parameters
 
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        #     yield linenumber() + "(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            out += parse(p)
-        return out
-    else:  # parsing simple path
-
-        # groups might contain non-path things like stock.
-        if not hasattr(pathobj, "Path"):
-            return out
-
-        # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(" + pathobj.Label + ")\n"
-
-        for c in pathobj.Path.Commands:
-
-            outstring = []
-            command = c.Name
+            for line in parse(p):
+                yield line
+        return
+
+    # parsing simple path
+    # groups might contain non-path things like stock.
+    if not hasattr(pathobj, "Path"):
+        return
+
+    # if OUTPUT_COMMENTS:
+    #     yield linenumber() + "(" + pathobj.Label + ")\n"
+
+    path = pathobj.Path
+    if COMPRESS > 0:
+        # LinuxCNC handles arcs in all planes
+        (path, ratio, deviation) = PathSimplify.compress(path, COMPRESS, planes=('XY', 'XZ', 'YZ'))
+        if OUTPUT_COMMENTS and ratio > 1:
+            yield formatter.line(["(compressed %d to %d commands, deviation %s)" % (pathobj.Path.Size, path.Size, formatter.fmt(deviation))])
+
+    formatter.lastCommand = None
+    for c in path.Commands:
+
+        command = c.Name
+        if command in ['G17', 'G18', 'G19']:
+            plane = command
+
+        if command[0] == '(' and not OUTPUT_COMMENTS: # command is a comment
+            continue
+
+        outstring = []
+        # if modal: suppress the command if it is the same as the last one
+        if formatter.command(command) is not None:
             outstring.append(command)
 
-            # if modal: suppress the command if it is the same as the last one
-            if MODAL is True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-            if c.Name[0] == '(' and not OUTPUT_COMMENTS: # command is a comment
-                continue
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F' and (currLocation[param] != c.Parameters[param] or OUTPUT_DOUBLES):
-                        if c.Name not in ["G0", "G00"]:  # linuxcnc doesn't use rapid speeds
-                            speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
-                            if speed.getValueAs(UNIT_SPEED_FORMAT) > 0.0:
-                                outstring.append(param + format(float(speed.getValueAs(UNIT_SPEED_FORMAT)), precision_string))
-                        else:
-                            continue
-                    elif param == 'T':
-                        outstring.append(param + str(int(c.Parameters['T'])))
-                    elif param == 'H':
-                        outstring.append(param + str(int(c.Parameters['H'])))
-                    elif param == 'D':
-                        outstring.append(param + str(int(c.Parameters['D'])))
-                    elif param == 'S':
-                        outstring.append(param + str(int(c.Parameters['S'])))
+        # Now add the remaining parameters in order
+        parameters = c.Parameters
+        for param in params:
+            if param in parameters:
+                if param == 'F' and (currLocation[param] != parameters[param] or OUTPUT_DOUBLES):
+                    if command not in ["G0", "G00"]:  # linuxcnc doesn't use rapid speeds
+                        speed = Units.Quantity(parameters['F'], FreeCAD.Units.Velocity)
+                        if speed.getValueAs(UNIT_SPEED_FORMAT) > 0.0:
+                            outstring.append(param + formatter.fmt(speed.getValueAs(UNIT_SPEED_FORMAT)))
                     else:
-                        if (not OUTPUT_DOUBLES) and (param in currLocation) and (currLocation[param] == c.Parameters[param]):
-                            continue
-                        else:
-                            pos = Units.Quantity(c.Parameters[param], FreeCAD.Units.Length)
-                            outstring.append(
-                                param + format(float(pos.getValueAs(UNIT_FORMAT)), precision_string))
-
-            # store the latest command
-            lastcommand = command
-            currLocation.update(c.Parameters)
-
-            # Check for Tool Change:
-            if command == 'M6':
-                # if OUTPUT_COMMENTS:
-                #     out += linenumber() + "(begin toolchange)\n"
-                for line in TOOL_CHANGE.splitlines(True):
-                    out += linenumber() + line
-
-            if command == "message":
-                if OUTPUT_COMMENTS is False:
-                    out = []
+                        continue
+                elif param == 'K' and plane == 'G17':
+                    continue
+                elif param == 'T':
+                    outstring.append(param + str(int(parameters['T'])))
+                elif param == 'H':
+                    outstring.append(param + str(int(parameters['H'])))
+                elif param == 'D':
+                    outstring.append(param + str(int(parameters['D'])))
+                elif param == 'S':
+                    outstring.append(param + str(int(parameters['S'])))
                 else:
-                    outstring.pop(0)  # remove the command
+                    if (not OUTPUT_DOUBLES) and (param in currLocation) and (currLocation[param] == parameters[param]):
+                        continue
+                    else:
+                        pos = Units.Quantity(parameters[param], FreeCAD.Units.Length)
+                        outstring.append(param + formatter.fmt(pos.getValueAs(UNIT_FORMAT)))
 
-            # prepend a line number and append a newline
-            if len(outstring) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    outstring.insert(0, (linenumber()))
+        currLocation.update(parameters)
 
-                # append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE
-                out = out.strip() + "\n"
+        # Check for Tool Change:
+        if command == 'M6':
+            # if OUTPUT_COMMENTS:
+            #     yield linenumber() + "(begin toolchange)\n"
+            for line in formatter.lines(TOOL_CHANGE):
+                yield line
+
+        if command == "message":
+            if OUTPUT_COMMENTS is False:
+                continue
+            if outstring and outstring[0] == command:
+                outstring.pop(0)  # remove the command
 
-        return out
+        # prepend a line number and append a newline
+        line = formatter.line(outstring)
+        if line:
+            yield line
 
 print(__name__ + " gcode postprocessor loaded.")
@@ -1,6 +1,6 @@
 from __future__ import print_function
 import datetime
-from PathScripts import PostUtils
+from PathScripts import PostStream
 
 # ***************************************************************************
 # *   (c) sliptonic (shopinthewoods@gmail.com) 2014                         *
@@ -79,10 +79,6 @@ POST_OPERATION = ''''''
 # Tool Change commands will be inserted before a tool change
 TOOL_CHANGE = ''''''
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
-
 CurrentState = {}
 
 def getMetricValue(val):
@@ -93,7 +89,7 @@ def getImperialValue(val):
 GetValue = getMetricValue
 
 
-def export(objectslist, filename, argstring):
+def export(objectslist, filename, argstring, collect=True):
     global OUTPUT_COMMENTS
     global OUTPUT_HEADER
     global SHOW_EDITOR
@@ -123,59 +119,48 @@ def export(objectslist, filename, argstring):
         'JSXY': 0, 'JSZ': 0, 'MSXY': 0, 'MSZ': 0
     }
     print("postprocessing...")
-    gcode = ""
+    final = PostStream.export(gcodeLines(objectslist), filename, SHOW_EDITOR, collect)
+    print("done postprocessing.")
+
+    return final
 
+
+def gcodeLines(objectslist):
+    """gcodeLines(objectslist) ... generator returning the entire program, line by line."""
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "'Exported by FreeCAD\n"
-        gcode += linenumber() + "'Post Processor: " + __name__ + "\n"
-        gcode += linenumber() + "'Output Time:" + str(now) + "\n"
+        yield linenumber() + "'Exported by FreeCAD\n"
+        yield linenumber() + "'Post Processor: " + __name__ + "\n"
+        yield linenumber() + "'Output Time:" + str(now) + "\n"
 
     # Write the preamble
     if OUTPUT_COMMENTS:
-        gcode += linenumber() + "'(begin preamble)\n"
+        yield linenumber() + "'(begin preamble)\n"
     for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
+        yield linenumber() + line
 
     for obj in objectslist:
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "'(begin operation: " + obj.Label + ")\n"
+            yield linenumber() + "'(begin operation: " + obj.Label + ")\n"
         for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + line
 
-        gcode += parse(obj)
+        for txt in parse(obj):
+            yield txt
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "'(finish operation: " + obj.Label + ")\n"
+            yield linenumber() + "'(finish operation: " + obj.Label + ")\n"
         for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + line
 
     # do the post_amble
     if OUTPUT_COMMENTS:
-        gcode += "'(begin postamble)\n"
+        yield "'(begin postamble)\n"
     for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
-
-    print("done postprocessing.")
-
-    # Write the output
-    gfile = pythonopen(filename, "wb")
-    gfile.write(final)
-    gfile.close()
+        yield linenumber() + line
 
 
 def move(command):
@@ -330,35 +315,35 @@ scommands = {
 
 
 def parse(pathobj):
+    """parse(pathobj) ... generator returning the output of pathobj, one command at a time."""
     global CurrentState
 
-    output = ""
     params = ['X', 'Y', 'Z', 'A', 'B', 'I', 'J', 'K', 'F', 'S', 'T']
     # Above list controls the order of parameters
 
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         if OUTPUT_COMMENTS:
-            output += linenumber() + "'(compound: " + pathobj.Label + ")\n"
+            yield linenumber() + "'(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            output += parse(p)
+            for txt in parse(p):
+                yield txt
     else:  # parsing simple path
         # groups might contain non-path things like stock.
         if not hasattr(pathobj, "Path"):
-            return output
+            return
         if OUTPUT_COMMENTS:
-            output += linenumber() + "'(Path: " + pathobj.Label + ")\n"
+            yield linenumber() + "'(Path: " + pathobj.Label + ")\n"
         for c in pathobj.Path.Commands:
             command = c.Name
             if command in scommands:
-                output += scommands[command](c)
+                yield scommands[command](c)
                 if c.Parameters:
                     CurrentState.update(c.Parameters)
             elif command[0] == '(':
-                output += "' " + command + "\n"
+                yield "' " + command + "\n"
             else:
                 print("I don't know what the hell the command: ",end='')
                 print(command + " means.  Maybe I should support it.")
-    return output
 
 
 def linenumber():
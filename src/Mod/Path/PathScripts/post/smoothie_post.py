@@ -35,7 +35,7 @@ smoothie_post.export(object,"/path/to/file.ncc","")
 
 import argparse
 import datetime
-from PathScripts import PostUtils
+from PathScripts import PostStream
 import FreeCAD
 from FreeCAD import Units
 import shlex
@@ -85,6 +85,7 @@ UNIT_FORMAT = 'mm'
 MACHINE_NAME = "SmoothieBoard"
 CORNER_MIN = {'x': 0, 'y': 0, 'z': 0}
 CORNER_MAX = {'x': 500, 'y': 300, 'z': 300}
+PRECISION = 4
 
 # Preamble text will appear at the beginning of the GCODE output file.
 PREAMBLE = '''G17 G90
@@ -107,9 +108,7 @@ POST_OPERATION = ''''''
 TOOL_CHANGE = ''''''
 
 
-# to distinguish python built-in open function from the one declared below
-if open.__module__ == '__builtin__':
-    pythonopen = open
+formatter = PostStream.GCodeFormatter(PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
 def processArguments(argstring):
     global OUTPUT_HEADER
@@ -164,17 +163,33 @@ def processArguments(argstring):
 
     return True
 
-def export(objectslist, filename, argstring):
+def export(objectslist, filename, argstring, collect=True):
     processArguments(argstring)
-    global UNITS
-    global IP_ADDR
     for obj in objectslist:
         if not hasattr(obj, "Path"):
             FreeCAD.Console.PrintError("the object " + obj.Name + " is not a path. Please select only path and Compounds.\n")
             return
 
     FreeCAD.Console.PrintMessage("postprocessing...\n")
-    gcode = ""
+
+    if IP_ADDR is not None:
+        # the upload requires the size of the program up front
+        final = PostStream.export(gcodeLines(objectslist), '-', SHOW_EDITOR)
+        sendToSmoothie(IP_ADDR, final, filename)
+    else:
+        final = PostStream.export(gcodeLines(objectslist), filename, SHOW_EDITOR, collect)
+
+    FreeCAD.Console.PrintMessage("done postprocessing.\n")
+    return final
+
+
+def gcodeLines(objectslist):
+    """gcodeLines(objectslist) ... generator returning the entire program, line by line."""
+    global UNITS
+    global formatter
+    global LINENR
+
+    formatter = PostStream.GCodeFormatter(PRECISION, OUTPUT_LINE_NUMBERS, LINENR, 10, MODAL, COMMAND_SPACE)
 
     # Find the machine.
     # The user my have overridden post processor defaults in the GUI.  Make
@@ -193,62 +208,43 @@ def export(objectslist, filename, argstring):
 
     # write header
     if OUTPUT_HEADER:
-        gcode += linenumber() + "(Exported by FreeCAD)\n"
-        gcode += linenumber() + "(Post Processor: " + __name__ + ")\n"
-        gcode += linenumber() + "(Output Time:" + str(now) + ")\n"
+        yield linenumber() + "(Exported by FreeCAD)\n"
+        yield linenumber() + "(Post Processor: " + __name__ + ")\n"
+        yield linenumber() + "(Output Time:" + str(now) + ")\n"
 
     # Write the preamble
     if OUTPUT_COMMENTS:
-        gcode += linenumber() + "(begin preamble)\n"
-    for line in PREAMBLE.splitlines(True):
-        gcode += linenumber() + line
-    gcode += linenumber() + UNITS + "\n"
+        yield linenumber() + "(begin preamble)\n"
+    for line in formatter.lines(PREAMBLE):
+        yield line
+    yield linenumber() + UNITS + "\n"
 
     for obj in objectslist:
 
         # do the pre_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(begin operation: " + obj.Label + ")\n"
-        for line in PRE_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + "(begin operation: " + obj.Label + ")\n"
+        for line in formatter.lines(PRE_OPERATION):
+            yield line
 
-        gcode += parse(obj)
+        for line in parse(obj):
+            yield line
 
         # do the post_op
         if OUTPUT_COMMENTS:
-            gcode += linenumber() + "(finish operation: " + obj.Label + ")\n"
-        for line in POST_OPERATION.splitlines(True):
-            gcode += linenumber() + line
+            yield linenumber() + "(finish operation: " + obj.Label + ")\n"
+        for line in formatter.lines(POST_OPERATION):
+            yield line
 
     # do the post_amble
 
     if OUTPUT_COMMENTS:
-        gcode += "(begin postamble)\n"
-    for line in POSTAMBLE.splitlines(True):
-        gcode += linenumber() + line
-
-    if SHOW_EDITOR:
-        dia = PostUtils.GCodeEditorDialog()
-        dia.editor.setText(gcode)
-        result = dia.exec_()
-        if result:
-            final = dia.editor.toPlainText()
-        else:
-            final = gcode
-    else:
-        final = gcode
-
-    if IP_ADDR is not None:
-        sendToSmoothie(IP_ADDR, final, filename)
-    else:
-
-        if not filename == '-':
-            gfile = pythonopen(filename, "wb")
-            gfile.write(final)
-            gfile.close()
+        yield "(begin postamble)\n"
+    for line in formatter.lines(POSTAMBLE):
+        yield line
 
-    FreeCAD.Console.PrintMessage("done postprocessing.\n")
-    return final
+    # line numbers continue in the next export
+    LINENR = formatter.lineNr
 
 
 def sendToSmoothie(IP_ADDR, GCODE, fname):
@@ -326,18 +322,11 @@ def sendToSmoothie(IP_ADDR, GCODE, fname):
 
 
 def linenumber():
-    global LINENR
-    if OUTPUT_LINE_NUMBERS is True:
-        LINENR += 10
-        return "N" + str(LINENR) + " "
-    return ""
+    return formatter.linenumber()
 
 def parse(pathobj):
-    global PRECISION
-    out = ""
-    lastcommand = None
+    """parse(pathobj) ... generator returning the g-code lines of pathobj."""
     global SPINDLE_SPEED
-    precision_string = '.' + str(PRECISION) +'f'
 
     # params = ['X','Y','Z','A','B','I','J','K','F','S'] #This list control
     # the order of parameters
@@ -346,77 +335,65 @@ def parse(pathobj):
 
     if hasattr(pathobj, "Group"):  # We have a compound or project.
         # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(compound: " + pathobj.Label + ")\n"
+        #     yield linenumber() + "(compound: " + pathobj.Label + ")\n"
         for p in pathobj.Group:
-            out += parse(p)
-        return out
-    else:  # parsing simple path
-
-        # groups might contain non-path things like stock.
-        if not hasattr(pathobj, "Path"):
-            return out
-
-        # if OUTPUT_COMMENTS:
-        #     out += linenumber() + "(" + pathobj.Label + ")\n"
-
-        for c in pathobj.Path.Commands:
-            outstring = []
-            command = c.Name
+            for line in parse(p):
+                yield line
+        return
+
+    # parsing simple path
+    # groups might contain non-path things like stock.
+    if not hasattr(pathobj, "Path"):
+        return
+
+    # if OUTPUT_COMMENTS:
+    #     yield linenumber() + "(" + pathobj.Label + ")\n"
+
+    formatter.lastCommand = None
+    for c in pathobj.Path.Commands:
+        outstring = []
+        command = c.Name
+        # if modal: only print the command if it is not the same as the
+        # last one
+        if formatter.command(command) is not None:
             outstring.append(command)
-            # if modal: only print the command if it is not the same as the
-            # last one
-            if MODAL is True:
-                if command == lastcommand:
-                    outstring.pop(0)
-
-            # Now add the remaining parameters in order
-            for param in params:
-                if param in c.Parameters:
-                    if param == 'F':
-                        if c.Name not in ["G0", "G00"]: #linuxcnc doesn't use rapid speeds
-                            speed = Units.Quantity(c.Parameters['F'], FreeCAD.Units.Velocity)
-                            outstring.append(
-                                param + format(float(speed.getValueAs(UNIT_SPEED_FORMAT)), precision_string ) )
-                    elif param == 'T':
-                        outstring.append(param + str(c.Parameters['T']))
-                    elif param == 'S':
-                        outstring.append(param + str(c.Parameters['S']))
-                        SPINDLE_SPEED = c.Parameters['S']
-                    else:
-                        pos = Units.Quantity(c.Parameters[param], FreeCAD.Units.Length)
-                        outstring.append(
-                            param + format(float(pos.getValueAs(UNIT_FORMAT)), precision_string) )
-                            #param + format(c.Parameters[param], precision_string))
-            if command in ['G1', 'G01', 'G2', 'G02', 'G3', 'G03']:
-                outstring.append('S' + str(SPINDLE_SPEED))
-
-            # store the latest command
-            lastcommand = command
-
-            # Check for Tool Change:
-            if command == 'M6':
-                # if OUTPUT_COMMENTS:
-                #     out += linenumber() + "(begin toolchange)\n"
-                for line in TOOL_CHANGE.splitlines(True):
-                    out += linenumber() + line
-
-            if command == "message":
-                if OUTPUT_COMMENTS is False:
-                    out = []
-                else:
-                    outstring.pop(0)  # remove the command
-
-            # prepend a line number and append a newline
-            if len(outstring) >= 1:
-                if OUTPUT_LINE_NUMBERS:
-                    outstring.insert(0, (linenumber()))
 
-                # append the line to the final output
-                for w in outstring:
-                    out += w + COMMAND_SPACE 
-                out = out.strip() + "\n"
-
-        return out
+        # Now add the remaining parameters in order
+        parameters = c.Parameters
+        for param in params:
+            if param in parameters:
+                if param == 'F':
+                    if command not in ["G0", "G00"]: #linuxcnc doesn't use rapid speeds
+                        speed = Units.Quantity(parameters['F'], FreeCAD.Units.Velocity)
+                        outstring.append(param + formatter.fmt(speed.getValueAs(UNIT_SPEED_FORMAT)))
+                elif param == 'T':
+                    outstring.append(param + str(parameters['T']))
+                elif param == 'S':
+                    outstring.append(param + str(parameters['S']))
+                    SPINDLE_SPEED = parameters['S']
+                else:
+                    pos = Units.Quantity(parameters[param], FreeCAD.Units.Length)
+                    outstring.append(param + formatter.fmt(pos.getValueAs(UNIT_FORMAT)))
+        if command in ['G1', 'G01', 'G2', 'G02', 'G3', 'G03']:
+            outstring.append('S' + str(SPINDLE_SPEED))
+
+        # Check for Tool Change:
+        if command == 'M6':
+            # if OUTPUT_COMMENTS:
+            #     yield linenumber() + "(begin toolchange)\n"
+            for line in formatter.lines(TOOL_CHANGE):
+                yield line
+
+        if command == "message":
+            if OUTPUT_COMMENTS is False:
+                continue
+            if outstring and outstring[0] == command:
+                outstring.pop(0)  # remove the command
+
+        # prepend a line number and append a newline
+        line = formatter.line(outstring)
+        if line:
+            yield line
 
 
 print(__name__ + " gcode postprocessor loaded.")
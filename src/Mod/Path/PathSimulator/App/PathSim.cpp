@@ -45,6 +45,7 @@ PathSim::PathSim()
 {
 	m_stock = nullptr;
 	m_tool = nullptr;
+	m_parallel = true;
 }
 
 PathSim::~PathSim()
@@ -56,10 +57,13 @@ PathSim::~PathSim()
 }
 
 
-void PathSim::BeginSimulation(Part::TopoShape * stock, float resolution)
+void PathSim::BeginSimulation(Part::TopoShape * stock, float resolution, bool parallel, int tileSize)
 {
 	Base::BoundBox3d bbox = stock->getBoundBox();
-	m_stock = new cStock(bbox.MinX, bbox.MinY, bbox.MinZ, bbox.LengthX(), bbox.LengthY(), bbox.LengthZ(), resolution);
+	if (m_stock != nullptr)
+		delete m_stock;
+	m_parallel = parallel;
+	m_stock = new cStock(bbox.MinX, bbox.MinY, bbox.MinZ, bbox.LengthX(), bbox.LengthY(), bbox.LengthZ(), resolution, tileSize);
 }
 
 void PathSim::SetCurrentTool(Tool * tool)
@@ -117,30 +121,41 @@ void PathSim::SetCurrentTool(Tool * tool)
 		angle = 180;
 		break;
 	}
+	if (m_tool != nullptr)
+		delete m_tool;
 	m_tool = new cSimTool(tp, tool->Diameter / 2.0, angle);
 }
 
-Base::Placement * PathSim::ApplyCommand(Base::Placement * pos, Command * cmd)
+// Applies a single move, or only queues it for cStock::ApplyQueuedTools, checked with id, if queue is set.
+void PathSim::ApplyMove(Point3D & pos, const Command & cmd, bool queue, int id)
 {
-	Point3D fromPos(*pos);
-	Point3D toPos(*pos);
-	toPos.UpdateCmd(*cmd);
-	if (cmd->Name == "G0" || cmd->Name == "G1")
-	{
-        m_stock->ApplyLinearTool(fromPos, toPos, *m_tool);
-	}
-	else if (cmd->Name == "G2")
+	Point3D fromPos(pos);
+	Point3D toPos(pos);
+	toPos.UpdateCmd(cmd);
+	if (cmd.Name == "G0" || cmd.Name == "G1")
 	{
-		Vector3d vcent = cmd->getCenter();
-		Point3D cent(vcent);
-		m_stock->ApplyCircularTool(fromPos, toPos, cent, *m_tool, false);
+		if (queue)
+			m_stock->QueueLinearTool(fromPos, toPos, *m_tool, id, cmd.Name == "G0");
+		else
+			m_stock->ApplyLinearTool(fromPos, toPos, *m_tool);
 	}
-	else if (cmd->Name == "G3")
+	else if (cmd.Name == "G2" || cmd.Name == "G3")
 	{
-		Vector3d vcent = cmd->getCenter();
+		Vector3d vcent = cmd.getCenter();
 		Point3D cent(vcent);
-		m_stock->ApplyCircularTool(fromPos, toPos, cent, *m_tool, true);
+		bool isCCW = cmd.Name == "G3";
+		if (queue)
+			m_stock->QueueCircularTool(fromPos, toPos, cent, *m_tool, isCCW, id);
+		else
+			m_stock->ApplyCircularTool(fromPos, toPos, cent, *m_tool, isCCW);
 	}
+	pos = toPos;
+}
+
+Base::Placement * PathSim::ApplyCommand(Base::Placement * pos, Command * cmd)
+{
+	Point3D toPos(*pos);
+	ApplyMove(toPos, *cmd);
 
 	Base::Placement *plc = new Base::Placement();
 	Vector3d vec(toPos.x, toPos.y, toPos.z);
@@ -148,8 +163,68 @@ Base::Placement * PathSim::ApplyCommand(Base::Placement * pos, Command * cmd)
 	return plc;
 }
 
+// Applies all moves of path starting at pos. Drill cycles are expanded into a retract to the R plane
+// if below it, a rapid to the hole, the plunge and a rapid back to the R plane.
+// The moves are queued and applied to the stock tile by tile, in parallel if enabled in BeginSimulation.
+// Collisions of the moves are reported with the index of their command in GetCollisions.
+Base::Placement * PathSim::ApplyPath(Base::Placement * pos, Toolpath * path)
+{
+	Point3D curPos(*pos);
+	const std::vector<Command*> &cmds = path->getCommands();
+	m_stock->ClearHits();
+	for (int i = 0; i < (int)cmds.size(); i++)
+	{
+		const Command &cmd = *cmds[i];
+		if (cmd.Name == "G0" || cmd.Name == "G1" || cmd.Name == "G2" || cmd.Name == "G3")
+		{
+			ApplyMove(curPos, cmd, true, i);
+		}
+		else if (cmd.Name == "G81" || cmd.Name == "G82" || cmd.Name == "G83")
+		{
+			float x = cmd.has("X") ? cmd.getParam("X") : curPos.x;
+			float y = cmd.has("Y") ? cmd.getParam("Y") : curPos.y;
+			float z = cmd.has("Z") ? cmd.getParam("Z") : curPos.z;
+			float r = cmd.has("R") ? cmd.getParam("R") : curPos.z;
+			float clear = std::max(curPos.z, r);
+			std::vector<Point3D> moves;
+			if (curPos.z < r)
+				moves.push_back(Point3D(curPos.x, curPos.y, r));
+			moves.push_back(Point3D(x, y, clear));
+			if (clear > r)
+				moves.push_back(Point3D(x, y, r));
+			moves.push_back(Point3D(x, y, z));
+			moves.push_back(Point3D(x, y, r));
+			// all but the plunge are rapid moves
+			for (std::vector<Point3D>::iterator move = moves.begin(); move != moves.end(); ++move)
+			{
+				m_stock->QueueLinearTool(curPos, *move, *m_tool, i, move != moves.end() - 2);
+				curPos = *move;
+			}
+		}
+	}
+	m_stock->ApplyQueuedTools(m_parallel);
 
+	Base::Placement *plc = new Base::Placement();
+	Vector3d vec(curPos.x, curPos.y, curPos.z);
+	plc->setPosition(vec);
+	return plc;
+}
 
+void PathSim::SetLimit(const std::vector<float> & heights, float cutTolerance)
+{
+	m_stock->SetLimit(heights, cutTolerance);
+}
 
-
- 
+// Returns the indices of the rapid moves of the last ApplyPath removing material, and of the moves
+// going below the limit set with SetLimit.
+void PathSim::GetCollisions(std::vector<int> & rapids, std::vector<int> & limits)
+{
+	const std::map<int, int> & hits = m_stock->GetHits();
+	for (std::map<int, int>::const_iterator it = hits.begin(); it != hits.end(); ++it)
+	{
+		if (it->second & SIM_HIT_CUT)
+			rapids.push_back(it->first);
+		if (it->second & SIM_HIT_LIMIT)
+			limits.push_back(it->first);
+	}
+}
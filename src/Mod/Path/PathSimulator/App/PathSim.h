@@ -31,6 +31,7 @@
 #include <TopoDS.hxx>
 #include <TopoDS_Shape.hxx>
 #include <Mod/Path/App/Command.h>
+#include <Mod/Path/App/Path.h>
 #include <Mod/Path/App/Tooltable.h>
 #include <Mod/Part/App/TopoShape.h>
 #include "VolSim.h"
@@ -50,13 +51,20 @@ namespace PathSimulator
 			PathSim();
 			~PathSim();
             
-			void BeginSimulation(Part::TopoShape * stock, float resolution);
+			void BeginSimulation(Part::TopoShape * stock, float resolution, bool parallel = true, int tileSize = SIM_TILE_SIZE);
 			void SetCurrentTool(Tool * tool);
 			Base::Placement * ApplyCommand(Base::Placement * pos, Command * cmd);
+			Base::Placement * ApplyPath(Base::Placement * pos, Toolpath * path);
+			void SetLimit(const std::vector<float> & heights, float cutTolerance);
+			void GetCollisions(std::vector<int> & rapids, std::vector<int> & limits);
+
+		private:
+			void ApplyMove(Point3D & pos, const Command & cmd, bool queue = false, int id = -1);
 
 		public:
 			cStock * m_stock;
 			cSimTool *m_tool;
+			bool m_parallel;
 	};
 
 } //namespace Path
@@ -27,6 +27,7 @@
 #include <Base/VectorPy.h>
 #include <Mod/Part/App/TopoShapePy.h>
 #include <Mod/Path/App/CommandPy.h>
+#include <Mod/Path/App/PathPy.h>
 #include <Mod/Mesh/App/MeshPy.h>
 #include "Mod/Path/PathSimulator/App/PathSim.h"
 
@@ -57,14 +58,20 @@ int PathSimPy::PyInit(PyObject* /*args*/, PyObject* /*kwd*/)
 
 PyObject* PathSimPy::BeginSimulation(PyObject * args, PyObject * kwds)
 {
-	static char *kwlist[] = { "stock", "resolution", NULL };
+	static char *kwlist[] = { "stock", "resolution", "parallel", "tile_size", NULL };
 	PyObject *pObjStock;
 	float resolution;
-	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!f", kwlist, &(Part::TopoShapePy::Type), &pObjStock, &resolution))
+	PyObject *parallel = Py_True;
+	int tileSize = SIM_TILE_SIZE;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!f|O!i", kwlist, &(Part::TopoShapePy::Type), &pObjStock, &resolution, &PyBool_Type, &parallel, &tileSize))
 		return 0;
+	if (tileSize < 1) {
+		PyErr_SetString(PyExc_ValueError, "tile_size must be at least 1");
+		return 0;
+	}
 	PathSim *sim = getPathSimPtr();
 	Part::TopoShape *stock = static_cast<Part::TopoShapePy*>(pObjStock)->getTopoShapePtr();
-	sim->BeginSimulation(stock, resolution);
+	sim->BeginSimulation(stock, resolution, PyObject_IsTrue(parallel) ? true : false, tileSize);
 	Py_IncRef(Py_None);
 	return Py_None;
 }
@@ -115,6 +122,103 @@ PyObject* PathSimPy::ApplyCommand(PyObject * args, PyObject * kwds)
 	return newposPy;
 }
 
+PyObject* PathSimPy::ApplyPath(PyObject * args, PyObject * kwds)
+{
+	static char *kwlist[] = { "position", "path", NULL };
+	PyObject *pObjPlace;
+	PyObject *pObjPath;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O!O!", kwlist, &(Base::PlacementPy::Type), &pObjPlace, &(Path::PathPy::Type), &pObjPath))
+		return 0;
+	PathSim *sim = getPathSimPtr();
+	if (sim->m_stock == nullptr || sim->m_tool == nullptr) {
+		PyErr_SetString(PyExc_RuntimeError, "BeginSimulation and SetCurrentTool must be called first");
+		return 0;
+	}
+	Base::Placement *pos = static_cast<Base::PlacementPy*>(pObjPlace)->getPlacementPtr();
+	Path::Toolpath *path = static_cast<Path::PathPy*>(pObjPath)->getToolpathPtr();
+	Base::Placement *newpos = sim->ApplyPath(pos, path);
+	return new Base::PlacementPy(newpos);
+}
+
+PyObject* PathSimPy::SetLimit(PyObject * args, PyObject * kwds)
+{
+	static char *kwlist[] = { "heights", "tolerance", NULL };
+	PyObject *pObjHeights = Py_None;
+	float tolerance = 0.01f;
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "|Of", kwlist, &pObjHeights, &tolerance))
+		return 0;
+	PathSim *sim = getPathSimPtr();
+	if (sim->m_stock == nullptr) {
+		PyErr_SetString(PyExc_RuntimeError, "BeginSimulation must be called first");
+		return 0;
+	}
+	std::vector<float> heights;
+	if (pObjHeights != Py_None) {
+		Py_buffer view;
+		if (PyObject_GetBuffer(pObjHeights, &view, PyBUF_C_CONTIGUOUS) != 0) {
+			PyErr_SetString(PyExc_TypeError, "heights must be a contiguous buffer");
+			return 0;
+		}
+		std::size_t count = sim->m_stock->GetSizeX() * sim->m_stock->GetSizeY();
+		if (static_cast<std::size_t>(view.len) != count * sizeof(float)) {
+			PyBuffer_Release(&view);
+			PyErr_SetString(PyExc_ValueError, "heights must be a buffer of float32 with one value per pixel of the stock");
+			return 0;
+		}
+		const float *data = static_cast<const float*>(view.buf);
+		heights.assign(data, data + count);
+		PyBuffer_Release(&view);
+	}
+	sim->SetLimit(heights, tolerance);
+	Py_IncRef(Py_None);
+	return Py_None;
+}
+
+PyObject* PathSimPy::GetCollisions(PyObject * args)
+{
+	if (!PyArg_ParseTuple(args, ""))
+		return 0;
+	PathSim *sim = getPathSimPtr();
+	if (sim->m_stock == nullptr) {
+		PyErr_SetString(PyExc_RuntimeError, "BeginSimulation must be called first");
+		return 0;
+	}
+	std::vector<int> rapids, limits;
+	sim->GetCollisions(rapids, limits);
+	Py::List pyRapids, pyLimits;
+	for (std::vector<int>::iterator it = rapids.begin(); it != rapids.end(); ++it)
+		pyRapids.append(Py::Long(*it));
+	for (std::vector<int>::iterator it = limits.begin(); it != limits.end(); ++it)
+		pyLimits.append(Py::Long(*it));
+	Py::Tuple tuple(2);
+	tuple.setItem(0, pyRapids);
+	tuple.setItem(1, pyLimits);
+	return Py::new_reference_to(tuple);
+}
+
+PyObject* PathSimPy::GetHeightMap(PyObject * args)
+{
+	if (!PyArg_ParseTuple(args, ""))
+		return 0;
+	cStock *stock = getPathSimPtr()->m_stock;
+	if (stock == nullptr) {
+		PyErr_SetString(PyExc_RuntimeError, "BeginSimulation must be called first");
+		return 0;
+	}
+	std::vector<float> heights;
+	stock->GetHeightMap(heights);
+	Point3D pos = stock->GetPosition();
+
+	Py::Tuple tuple(6);
+	tuple.setItem(0, Py::asObject(PyBytes_FromStringAndSize(reinterpret_cast<const char*>(&heights[0]), heights.size() * sizeof(float))));
+	tuple.setItem(1, Py::Long(stock->GetSizeX()));
+	tuple.setItem(2, Py::Long(stock->GetSizeY()));
+	tuple.setItem(3, Py::Float(pos.x));
+	tuple.setItem(4, Py::Float(pos.y));
+	tuple.setItem(5, Py::Float(stock->GetResolution()));
+	return Py::new_reference_to(tuple);
+}
+
 Py::Object PathSimPy::getTool(void) const
 {
     //return Py::Object();
@@ -22,19 +22,29 @@
 
 #include "PreCompiled.h"
 #include <algorithm>
+#include <QtConcurrentMap>
+#include <boost/bind.hpp>
 #include "VolSim.h"
 
 //************************************************************************************************************
 // stock
 //************************************************************************************************************
-cStock::cStock(float px, float py, float pz, float lx, float ly, float lz, float res)
-	: m_px(px), m_py(py), m_pz(pz), m_lx(lx), m_ly(ly), m_lz(lz), m_res(res)
+cStock::cStock(float px, float py, float pz, float lx, float ly, float lz, float res, int tileSize)
+	: m_px(px), m_py(py), m_pz(pz), m_lx(lx), m_ly(ly), m_lz(lz), m_res(res), m_tileSize(std::max(1, tileSize))
 {
 	m_x = (int)(m_lx / res) + 1;
 	m_y = (int)(m_ly / res) + 1;
 	m_stock.Init(m_x, m_y);
 	m_attr.Init(m_x, m_y);
 	m_plane = pz + lz;
+	m_tx = (m_x + m_tileSize - 1) / m_tileSize;
+	m_ty = (m_y + m_tileSize - 1) / m_tileSize;
+	m_tiles.resize(m_tx * m_ty);
+	m_bx0 = m_by0 = 0;
+	m_bx1 = m_x;
+	m_by1 = m_y;
+	m_hasLimit = false;
+	m_cutTolerance = 0;
 	for (int y = 0; y < m_y; y++)
 		for (int x = 0; x < m_x; x++)
 		{
@@ -62,7 +72,7 @@ float cStock::FindRectTop(int & xp, int & yp, int & x_size, int & y_size, bool s
 		if (xr_ok)
 		{
 			int tx = xp + x_size;
-			if (tx >= m_x)
+			if (tx >= m_bx1)
 				xr_ok = false;
 			else
 			{
@@ -83,7 +93,7 @@ float cStock::FindRectTop(int & xp, int & yp, int & x_size, int & y_size, bool s
 		if (xl_ok)
 		{
 			int tx = xp - 1;
-			if (tx < 0)
+			if (tx < m_bx0)
 				xl_ok = false;
 			else
 			{
@@ -107,7 +117,7 @@ float cStock::FindRectTop(int & xp, int & yp, int & x_size, int & y_size, bool s
 		if (yu_ok)
 		{
 			int ty = yp + y_size;
-			if (ty >= m_y)
+			if (ty >= m_by1)
 				yu_ok = false;
 			else
 			{
@@ -128,7 +138,7 @@ float cStock::FindRectTop(int & xp, int & yp, int & x_size, int & y_size, bool s
 		if (yd_ok)
 		{
 			int ty = yp - 1;
-			if (ty < 0)
+			if (ty < m_by0)
 				yd_ok = false;
 			else
 			{
@@ -208,7 +218,7 @@ void cStock::FindRectBot(int & xp, int & yp, int & x_size, int & y_size, bool sc
 		if (xr_ok)
 		{
 			int tx = xp + x_size;
-			if (tx >= m_x)
+			if (tx >= m_bx1)
 				xr_ok = false;
 			else
 			{
@@ -229,7 +239,7 @@ void cStock::FindRectBot(int & xp, int & yp, int & x_size, int & y_size, bool sc
 		if (xl_ok)
 		{
 			int tx = xp - 1;
-			if (tx < 0)
+			if (tx < m_bx0)
 				xl_ok = false;
 			else
 			{
@@ -253,7 +263,7 @@ void cStock::FindRectBot(int & xp, int & yp, int & x_size, int & y_size, bool sc
 		if (yu_ok)
 		{
 			int ty = yp + y_size;
-			if (ty >= m_y)
+			if (ty >= m_by1)
 				yu_ok = false;
 			else
 			{
@@ -274,7 +284,7 @@ void cStock::FindRectBot(int & xp, int & yp, int & x_size, int & y_size, bool sc
 		if (yd_ok)
 		{
 			int ty = yp - 1;
-			if (ty < 0)
+			if (ty < m_by0)
 				yd_ok = false;
 			else
 			{
@@ -335,22 +345,23 @@ int cStock::TesselBot(int xp, int yp)
 }
 
 
-int cStock::TesselSidesX(int yp)
+// sides between the rows yp - 1 and yp from column x0 up to x1
+int cStock::TesselSidesX(int yp, int x0, int x1)
 {
 	float lastz1 = m_pz;
 	if (yp < m_y)
-		lastz1 = std::max(m_stock[0][yp], m_pz);
+		lastz1 = std::max(m_stock[x0][yp], m_pz);
 	float lastz2 = m_pz;
 	if (yp > 0)
-		lastz2 = std::max(m_stock[0][yp - 1], m_pz);
+		lastz2 = std::max(m_stock[x0][yp - 1], m_pz);
 
 	std::vector<MeshCore::MeshGeomFacet> *facets = &facetsInner;
 	if (yp == 0 || yp == m_y)
 		facets = &facetsOuter;
 
 	//bool lastzclip = (lastz - m_pz) < m_res;
-	int lastpoint = 0;
-	for (int x = 1; x <= m_x; x++)
+	int lastpoint = x0;
+	for (int x = x0 + 1; x <= x1; x++)
 	{
 		float newz1 = m_pz;
 		if (yp < m_y && x < m_x)
@@ -361,7 +372,7 @@ int cStock::TesselSidesX(int yp)
 
 		if (fabs(lastz1 - lastz2) > m_res)
 		{
-			if (fabs(newz1 - lastz1) < m_res && fabs(newz2 - lastz2) < m_res)
+			if (x < x1 && fabs(newz1 - lastz1) < m_res && fabs(newz2 - lastz2) < m_res)
 				continue;
 			Point3D pbl(lastpoint, yp, lastz1);
 			Point3D pbr(x, yp, lastz1);
@@ -376,22 +387,23 @@ int cStock::TesselSidesX(int yp)
 	return 0;
 }
 
-int cStock::TesselSidesY(int xp)
+// sides between the columns xp - 1 and xp from row y0 up to y1
+int cStock::TesselSidesY(int xp, int y0, int y1)
 {
 	float lastz1 = m_pz;
 	if (xp < m_x)
-		lastz1 = std::max(m_stock[xp][0], m_pz);
+		lastz1 = std::max(m_stock[xp][y0], m_pz);
 	float lastz2 = m_pz;
 	if (xp > 0)
-		lastz2 = std::max(m_stock[xp - 1][0], m_pz);
+		lastz2 = std::max(m_stock[xp - 1][y0], m_pz);
 
 	std::vector<MeshCore::MeshGeomFacet> *facets = &facetsInner;
 	if (xp == 0 || xp == m_x)
 		facets = &facetsOuter;
 
 	//bool lastzclip = (lastz - m_pz) < m_res;
-	int lastpoint = 0;
-	for (int y = 1; y <= m_y; y++)
+	int lastpoint = y0;
+	for (int y = y0 + 1; y <= y1; y++)
 	{
 		float newz1 = m_pz;
 		if (xp < m_x && y < m_y)
@@ -402,7 +414,7 @@ int cStock::TesselSidesY(int xp)
 
 		if (fabs(lastz1 - lastz2) > m_res)
 		{
-			if (fabs(newz1 - lastz1) < m_res && fabs(newz2 - lastz2) < m_res)
+			if (y < y1 && fabs(newz1 - lastz1) < m_res && fabs(newz2 - lastz2) < m_res)
 				continue;
 			Point3D pbr(xp, lastpoint, lastz1);
 			Point3D pbl(xp, y, lastz1);
@@ -440,28 +452,43 @@ void cStock::AddQuad(Point3D & p1, Point3D & p2, Point3D & p3, Point3D & p4, std
 	facets.push_back(facet);
 }
 
-void cStock::Tessellate(Mesh::MeshObject & meshOuter, Mesh::MeshObject & meshInner)
+// heights of the stock surface, m_y rows of m_x values each, cut through pixels are at the stock bottom
+void cStock::GetHeightMap(std::vector<float> & heights)
 {
-	// reset attribs
+	heights.resize(m_x * m_y);
 	for (int y = 0; y < m_y; y++)
-	for (int x = 0; x < m_x; x++)
+		for (int x = 0; x < m_x; x++)
+			heights[y * m_x + x] = std::max(m_stock[x][y], m_pz);
+}
+
+void cStock::TessellateTile(int tx, int ty)
+{
+	cStockTile & tile = m_tiles[ty * m_tx + tx];
+	m_bx0 = tx * m_tileSize;
+	m_by0 = ty * m_tileSize;
+	m_bx1 = std::min(m_x, m_bx0 + m_tileSize);
+	m_by1 = std::min(m_y, m_by0 + m_tileSize);
+
+	// reset attribs
+	for (int y = m_by0; y < m_by1; y++)
+	for (int x = m_bx0; x < m_bx1; x++)
 		m_attr[x][y] = 0;
 
 	facetsOuter.clear();
 	facetsInner.clear();
 
-	for (int y = 0; y < m_y; y++)
+	for (int y = m_by0; y < m_by1; y++)
 	{
-		for (int x = 0; x < m_x; x++)
+		for (int x = m_bx0; x < m_bx1; x++)
 		{
 			int attr = m_attr[x][y];
 			if ((attr & SIM_TESSEL_TOP) == 0)
 				x += TesselTop(x, y);
 		}
 	}
-	for (int y = 0; y < m_y; y++)
+	for (int y = m_by0; y < m_by1; y++)
 	{
-		for (int x = 0; x < m_x; x++)
+		for (int x = m_bx0; x < m_bx1; x++)
 		{
 			if ((m_stock[x][y] - m_pz) < m_res)
 				m_attr[x][y] |= SIM_TESSEL_BOT;
@@ -469,14 +496,56 @@ void cStock::Tessellate(Mesh::MeshObject & meshOuter, Mesh::MeshObject & meshInn
 				x += TesselBot(x, y);
 		}
 	}
-	for (int y = 0; y <= m_y; y++)
-		TesselSidesX(y);
-	for (int x = 0; x <= m_x; x++)
-		TesselSidesY(x);
-	meshOuter.addFacets(facetsOuter);
-	meshInner.addFacets(facetsInner);
+	// each tile does the sides at its lower edges, the last ones also those at the stock's upper edges
+	int ye = m_by1 == m_y ? m_y : m_by1 - 1;
+	for (int y = m_by0; y <= ye; y++)
+		TesselSidesX(y, m_bx0, m_bx1);
+	int xe = m_bx1 == m_x ? m_x : m_bx1 - 1;
+	for (int x = m_bx0; x <= xe; x++)
+		TesselSidesY(x, m_by0, m_by1);
+
+	tile.facetsOuter.swap(facetsOuter);
+	tile.facetsInner.swap(facetsInner);
 	facetsOuter.clear();
 	facetsInner.clear();
+	tile.dirty = false;
+}
+
+// Only tiles which changed since the last call are tessellated again, together with their neighbours
+// in +x and +y direction because the sides at their lower edges depend on the changed pixels.
+void cStock::Tessellate(Mesh::MeshObject & meshOuter, Mesh::MeshObject & meshInner)
+{
+	std::vector<bool> redo(m_tiles.size(), false);
+	for (int ty = 0; ty < m_ty; ty++)
+	{
+		for (int tx = 0; tx < m_tx; tx++)
+		{
+			if (!m_tiles[ty * m_tx + tx].dirty)
+				continue;
+			redo[ty * m_tx + tx] = true;
+			if (tx + 1 < m_tx)
+				redo[ty * m_tx + tx + 1] = true;
+			if (ty + 1 < m_ty)
+				redo[(ty + 1) * m_tx + tx] = true;
+		}
+	}
+	for (int ty = 0; ty < m_ty; ty++)
+		for (int tx = 0; tx < m_tx; tx++)
+			if (redo[ty * m_tx + tx])
+				TessellateTile(tx, ty);
+	m_bx0 = m_by0 = 0;
+	m_bx1 = m_x;
+	m_by1 = m_y;
+
+	std::vector<MeshCore::MeshGeomFacet> outer;
+	std::vector<MeshCore::MeshGeomFacet> inner;
+	for (std::vector<cStockTile>::iterator it = m_tiles.begin(); it != m_tiles.end(); ++it)
+	{
+		outer.insert(outer.end(), it->facetsOuter.begin(), it->facetsOuter.end());
+		inner.insert(inner.end(), it->facetsInner.begin(), it->facetsInner.end());
+	}
+	meshOuter.addFacets(outer);
+	meshInner.addFacets(inner);
 }
 
 
@@ -498,10 +567,183 @@ void cStock::CreatePocket(float cxf, float cyf, float radf, float height)
 				if (m_stock[x][y] > height) m_stock[x][y] = height;
 		}
 	}
+	SetDirty(xs, ys, xe, ye);
 }
 
 void cStock::ApplyLinearTool(Point3D & p1, Point3D & p2, cSimTool & tool)
 {
+	cSimMove move(p1, p2, tool, -1, false);
+	MoveBounds(move);
+	SetDirty(move.x0, move.y0, move.x1, move.y1);
+	LinearTool(p1, p2, tool, 0, 0, m_x, m_y);
+}
+
+void cStock::ApplyCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool & tool, bool isCCW)
+{
+	cSimMove move(p1, p2, cent, tool, isCCW, -1);
+	MoveBounds(move);
+	SetDirty(move.x0, move.y0, move.x1, move.y1);
+	CircularTool(p1, p2, cent, tool, isCCW, 0, 0, m_x, m_y);
+}
+
+// Queues a move for ApplyQueuedTools. If id is not negative, a rapid move removing material or any move
+// going below the limit set with SetLimit is reported with it in GetHits.
+void cStock::QueueLinearTool(Point3D & p1, Point3D & p2, cSimTool & tool, int id, bool rapid)
+{
+	m_moves.push_back(cSimMove(p1, p2, tool, id, rapid));
+}
+
+void cStock::QueueCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool & tool, bool isCCW, int id)
+{
+	m_moves.push_back(cSimMove(p1, p2, cent, tool, isCCW, id));
+}
+
+// Sets the lowest height moves may reach, heights are in the order of GetHeightMap. An empty vector
+// removes the limit. Rapid moves removing less than cutTolerance of material are not reported.
+void cStock::SetLimit(const std::vector<float> & heights, float cutTolerance)
+{
+	m_hasLimit = (int)heights.size() == m_x * m_y;
+	if (m_hasLimit)
+		m_limit = heights;
+	else
+		m_limit.clear();
+	m_cutTolerance = cutTolerance;
+}
+
+// Applies all queued moves. Each tile applies the moves touching it, clipped to the tile, so the tiles
+// can be processed concurrently. Since moves only ever lower the stock the order doesn't matter and
+// the result is the same as applying the moves one after the other.
+void cStock::ApplyQueuedTools(bool parallel)
+{
+	std::vector<int> tiles;
+	for (int i = 0; i < (int)m_moves.size(); i++)
+	{
+		cSimMove & move = m_moves[i];
+		MoveBounds(move);
+		if (move.x0 >= move.x1 || move.y0 >= move.y1)
+			continue;
+		for (int ty = move.y0 / m_tileSize; ty <= (move.y1 - 1) / m_tileSize; ty++)
+		{
+			for (int tx = move.x0 / m_tileSize; tx <= (move.x1 - 1) / m_tileSize; tx++)
+			{
+				cStockTile & tile = m_tiles[ty * m_tx + tx];
+				if (tile.moves.empty())
+					tiles.push_back(ty * m_tx + tx);
+				tile.moves.push_back(i);
+				tile.dirty = true;
+			}
+		}
+	}
+
+	if (parallel && tiles.size() > 1)
+		QtConcurrent::blockingMap(tiles, boost::bind(&cStock::ApplyTile, this, _1));
+	else
+		for (std::vector<int>::iterator it = tiles.begin(); it != tiles.end(); ++it)
+			ApplyTile(*it);
+	for (std::vector<int>::iterator it = tiles.begin(); it != tiles.end(); ++it)
+	{
+		std::vector<std::pair<int, int> > & hits = m_tiles[*it].hits;
+		for (std::vector<std::pair<int, int> >::iterator hit = hits.begin(); hit != hits.end(); ++hit)
+			m_hits[hit->first] |= hit->second;
+		hits.clear();
+	}
+	m_moves.clear();
+}
+
+void cStock::ApplyTile(int tile)
+{
+	cStockTile & t = m_tiles[tile];
+	int x0 = (tile % m_tx) * m_tileSize;
+	int y0 = (tile / m_tx) * m_tileSize;
+	int x1 = std::min(m_x, x0 + m_tileSize);
+	int y1 = std::min(m_y, y0 + m_tileSize);
+	for (std::vector<int>::iterator it = t.moves.begin(); it != t.moves.end(); ++it)
+	{
+		cSimMove & move = m_moves[*it];
+		int hits;
+		if (move.isArc)
+			hits = CircularTool(move.p1, move.p2, move.cent, move.tool, move.isCCW, x0, y0, x1, y1);
+		else
+			hits = LinearTool(move.p1, move.p2, move.tool, x0, y0, x1, y1);
+		if (!move.rapid)
+			hits &= ~SIM_HIT_CUT;
+		if (hits != 0 && move.id >= 0)
+			t.hits.push_back(std::make_pair(move.id, hits));
+	}
+	t.moves.clear();
+}
+
+// pixels touched by a move, with a margin of one pixel for the walk steps
+void cStock::MoveBounds(cSimMove & move)
+{
+	Point3D pi1 = ToInner(move.p1);
+	Point3D pi2 = ToInner(move.p2);
+	float rad = move.tool.radius / m_res + 1;
+	float xmin = std::min(pi1.x, pi2.x) - rad;
+	float xmax = std::max(pi1.x, pi2.x) + rad;
+	float ymin = std::min(pi1.y, pi2.y) - rad;
+	float ymax = std::max(pi1.y, pi2.y) + rad;
+	if (move.isArc)
+	{
+		float cpx = move.cent.x / m_res + pi1.x;
+		float cpy = move.cent.y / m_res + pi1.y;
+		float crad = sqrt(move.cent.x * move.cent.x + move.cent.y * move.cent.y) / m_res + rad;
+		xmin = std::min(xmin, cpx - crad);
+		xmax = std::max(xmax, cpx + crad);
+		ymin = std::min(ymin, cpy - crad);
+		ymax = std::max(ymax, cpy + crad);
+	}
+	move.x0 = std::max(0, (int)floor(xmin));
+	move.y0 = std::max(0, (int)floor(ymin));
+	move.x1 = std::min(m_x, (int)ceil(xmax) + 1);
+	move.y1 = std::min(m_y, (int)ceil(ymax) + 1);
+}
+
+void cStock::SetDirty(int x0, int y0, int x1, int y1)
+{
+	x0 = std::max(0, x0);
+	y0 = std::max(0, y0);
+	x1 = std::min(m_x, x1);
+	y1 = std::min(m_y, y1);
+	if (x0 >= x1 || y0 >= y1)
+		return;
+	for (int ty = y0 / m_tileSize; ty <= (y1 - 1) / m_tileSize; ty++)
+		for (int tx = x0 / m_tileSize; tx <= (x1 - 1) / m_tileSize; tx++)
+			m_tiles[ty * m_tx + tx].dirty = true;
+}
+
+// narrows [i0, i1) to the steps for which s + i * d is within [lo, hi), with a margin of a pixel
+static void ClipSteps(float s, float d, int lo, int hi, int & i0, int & i1)
+{
+	if (fabs(d) < SIM_EPSILON)
+	{
+		if (s < lo - 1 || s > hi + 1)
+			i1 = i0;
+		return;
+	}
+	float a = (lo - 1 - s) / d;
+	float b = (hi + 1 - s) / d;
+	if (a > b)
+		std::swap(a, b);
+	i0 = std::max(i0, (int)floor(a));
+	i1 = std::min(i1, (int)ceil(b) + 1);
+}
+
+// closest and farthest distance of the clip area, with a margin of a pixel, from the centre cx, cy
+static void ClipRadius(float cx, float cy, int cx0, int cy0, int cx1, int cy1, float & rmin, float & rmax)
+{
+	float dx = std::max(std::max(cx0 - 1 - cx, cx - cx1 - 1), 0.0f);
+	float dy = std::max(std::max(cy0 - 1 - cy, cy - cy1 - 1), 0.0f);
+	rmin = sqrt(dx * dx + dy * dy);
+	dx = std::max(fabs(cx0 - 1 - cx), fabs(cx1 + 1 - cx));
+	dy = std::max(fabs(cy0 - 1 - cy), fabs(cy1 + 1 - cy));
+	rmax = sqrt(dx * dx + dy * dy);
+}
+
+// applies the move to the pixels cx0 <= x < cx1 and cy0 <= y < cy1
+int cStock::LinearTool(Point3D & p1, Point3D & p2, cSimTool & tool, int cx0, int cy0, int cx1, int cy1)
+{
+	int hits = 0;
 	// tanslate coordinates
 	Point3D pi1 = ToInner(p1);
 	Point3D pi2 = ToInner(p2);
@@ -527,19 +769,21 @@ void cStock::ApplyLinearTool(Point3D & p1, Point3D & p2, cSimTool & tool)
 		float t = -1;
 		for (int j = 0; j < radSteps; j++)
 		{
+			// positions are computed from the step number so only the steps inside the clip area are walked
 			float z = pi1.z + tool.GetToolProfileAt(t);
-			Point3D p = start;
-			for (int i = 0; i < lenSteps; i++)
+			int i0 = 0;
+			int i1 = lenSteps;
+			ClipSteps(start.x, mainWay.x, cx0, cx1, i0, i1);
+			ClipSteps(start.y, mainWay.y, cy0, cy1, i0, i1);
+			for (int i = i0; i < i1; i++)
 			{
-				int x = (int)p.x;
-				int y = (int)p.y;
-				if (x >= 0 && y >= 0 && x < m_x && y < m_y)
+				int x = (int)(start.x + i * mainWay.x);
+				int y = (int)(start.y + i * mainWay.y);
+				if (x >= cx0 && y >= cy0 && x < cx1 && y < cy1)
 				{
-					if (m_stock[x][y] > z)
-						m_stock[x][y] = z;
+					float zi = z + i * zstep;
+					hits |= Cut(x, y, zi);
 				}
-				p.Add(mainWay);
-				z += zstep;
 			}
 			t += tstep;
 			start.Add(sideWay);
@@ -549,8 +793,12 @@ void cStock::ApplyLinearTool(Point3D & p1, Point3D & p2, cSimTool & tool)
 		cupAngle = 360;
 
 	// end cup
+	float rmin, rmax;
+	ClipRadius(pi2.x, pi2.y, cx0, cy0, cx1, cy1, rmin, rmax);
 	for (float r = 0.5f; r <= rad; r += (float)SIM_WALK_RES)
 	{
+		if (r < rmin || r > rmax)
+			continue;
 		Point3D cupCirc(perpDirX * r, perpDirY * r, pi2.z);
 		float rotang = 180 * SIM_WALK_RES / (3.1415926535 * r); 
 		cupCirc.SetRotationAngle(-rotang);
@@ -559,18 +807,17 @@ void cStock::ApplyLinearTool(Point3D & p1, Point3D & p2, cSimTool & tool)
 		{
 			int x = (int)(pi2.x + cupCirc.x);
 			int y = (int)(pi2.y + cupCirc.y);
-			if (x >= 0 && y >= 0 && x < m_x && y < m_y)
-			{
-				if (m_stock[x][y] > z)
-					m_stock[x][y] = z;
-			}
+			if (x >= cx0 && y >= cy0 && x < cx1 && y < cy1)
+				hits |= Cut(x, y, z);
 			cupCirc.Rotate();
 		}
 	}
+	return hits;
 }
 
-void cStock::ApplyCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool & tool, bool isCCW)
+int cStock::CircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool & tool, bool isCCW, int cx0, int cy0, int cx1, int cy1)
 {
+	int hits = 0;
 	// tanslate coordinates
 	Point3D pi1 = ToInner(p1);
 	Point3D pi2 = ToInner(p2);
@@ -605,8 +852,15 @@ void cStock::ApplyCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimT
 	Point3D cupCirc;
 	float tstep = (float)SIM_WALK_RES / rad;
 	float t = -1;
+	float rmin, rmax;
+	ClipRadius(cpx, cpy, cx0, cy0, cx1, cy1, rmin, rmax);
 	for (float r = crad1; r <= crad2; r += (float)SIM_WALK_RES)
 	{
+		if (r < rmin || r > rmax)
+		{
+			t += tstep;
+			continue;
+		}
 		cupCirc.x = xynorm.x * r;
 		cupCirc.y = xynorm.y * r;
 		float rotang = (float)SIM_WALK_RES / r; 
@@ -620,11 +874,8 @@ void cStock::ApplyCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimT
 		{
 			int x = (int)(cpx + cupCirc.x);
 			int y = (int)(cpy + cupCirc.y);
-			if (x >= 0 && y >= 0 && x < m_x && y < m_y)
-			{
-				if (m_stock[x][y] > z)
-					m_stock[x][y] = z;
-			}
+			if (x >= cx0 && y >= cy0 && x < cx1 && y < cy1)
+				hits |= Cut(x, y, z);
 			z += zstep;
 			cupCirc.Rotate();
 		}
@@ -634,8 +885,11 @@ void cStock::ApplyCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimT
 	// apply end cup
 	xynorm.SetRotationAngleRad(ang);
 	xynorm.Rotate();
+	ClipRadius(pi2.x, pi2.y, cx0, cy0, cx1, cy1, rmin, rmax);
 	for (float r = 0.5f; r <= rad; r += (float)SIM_WALK_RES)
 	{
+		if (r < rmin || r > rmax)
+			continue;
 		Point3D cupCirc(xynorm.x * r, xynorm.y * r, 0);
 		float rotang = (float)SIM_WALK_RES / r;
 		int ndivs = (int)(3.1415926535 / rotang) + 1;
@@ -647,14 +901,12 @@ void cStock::ApplyCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimT
 		{
 			int x = (int)(pi2.x + cupCirc.x);
 			int y = (int)(pi2.y + cupCirc.y);
-			if (x >= 0 && y >= 0 && x < m_x && y < m_y)
-			{
-				if (m_stock[x][y] > z)
-					m_stock[x][y] = z;
-			}
+			if (x >= cx0 && y >= cy0 && x < cx1 && y < cy1)
+				hits |= Cut(x, y, z);
 			cupCirc.Rotate();
 		}
 	}
+	return hits;
 }
 
 
@@ -695,7 +947,7 @@ void Point3D::SetRotationAngle(float angle)
 	SetRotationAngleRad(angle * 2 * 3.1415926535 / 360);
 }
 
-void Point3D::UpdateCmd(Path::Command & cmd)
+void Point3D::UpdateCmd(const Path::Command & cmd)
 {
 	if (cmd.has("X"))
 		x = cmd.getPlacement().getPosition()[0];
@@ -26,6 +26,8 @@
 #ifndef PATHSIMULATOR_VolSim_H
 #define PATHSIMULATOR_VolSim_H
 
+#include <algorithm>
+#include <map>
 #include <vector>
 #include <Mod/Mesh/App/Mesh.h>
 #include <Mod/Path/App/Command.h>
@@ -34,6 +36,9 @@
 #define SIM_TESSEL_TOP		1
 #define SIM_TESSEL_BOT		2
 #define SIM_WALK_RES		0.6   // step size in pixel units (to make sure all pixels in the path are visited)
+#define SIM_TILE_SIZE		128 // default edge length of the tiles in pixels, tiles are updated and tessellated independently
+#define SIM_HIT_CUT			1	// a rapid move removed material
+#define SIM_HIT_LIMIT		2	// a move went below the limit heightmap
 struct Point3D
 {
 	Point3D() : x(0), y(0), z(0), sina(0), cosa(0) {}
@@ -43,7 +48,7 @@ struct Point3D
 	inline void set(float px, float py, float pz) { x = px; y = py; z = pz; }
 	inline void Add(Point3D & p) { x += p.x; y += p.y; z += p.z; }
 	inline void Rotate() { float tx = x;  x = x * cosa - y * sina; y = tx * sina + y * cosa; }
-	void UpdateCmd(Path::Command & cmd);
+	void UpdateCmd(const Path::Command & cmd);
 	void SetRotationAngle(float angle);
 	void SetRotationAngleRad(float angle);
 	float x, y, z;
@@ -106,6 +111,31 @@ public:
 	float GetToolProfileAt(float pos);
 };
 
+// a tool move queued for cStock::ApplyQueuedTools
+struct cSimMove
+{
+	cSimMove(Point3D & p1, Point3D & p2, cSimTool & tool, int id, bool rapid)
+		: p1(p1), p2(p2), tool(tool), isArc(false), isCCW(false), id(id), rapid(rapid), x0(0), y0(0), x1(0), y1(0) {}
+	cSimMove(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool & tool, bool isCCW, int id)
+		: p1(p1), p2(p2), cent(cent), tool(tool), isArc(true), isCCW(isCCW), id(id), rapid(false), x0(0), y0(0), x1(0), y1(0) {}
+	Point3D p1, p2, cent;
+	cSimTool tool;
+	bool isArc, isCCW;
+	int id;		// reported in cStock::GetHits, -1 if not checked
+	bool rapid;	// removing material is reported as SIM_HIT_CUT
+	int x0, y0, x1, y1;	// pixels which might be changed by the move
+};
+
+struct cStockTile
+{
+	cStockTile() : dirty(true) {}
+	bool dirty;	// changed since last tessellation
+	std::vector<int> moves;	// queued moves touching the tile
+	std::vector<std::pair<int, int> > hits;	// id and SIM_HIT_* flags of the checked moves
+	std::vector<MeshCore::MeshGeomFacet> facetsOuter;
+	std::vector<MeshCore::MeshGeomFacet> facetsInner;
+};
+
 template <class T>
 class Array2D
 {
@@ -135,25 +165,56 @@ private:
 class cStock
 {
 public:
-	cStock(float px, float py, float pz, float lx, float ly, float lz, float res);
+	cStock(float px, float py, float pz, float lx, float ly, float lz, float res, int tileSize = SIM_TILE_SIZE);
 	~cStock();
 	void Tessellate(Mesh::MeshObject & meshOuter, Mesh::MeshObject & meshInner);
     void CreatePocket(float x, float y, float rad, float height);
     void ApplyLinearTool(Point3D & p1, Point3D & p2, cSimTool &tool);
     void ApplyCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool &tool, bool isCCW);
+    void QueueLinearTool(Point3D & p1, Point3D & p2, cSimTool &tool, int id = -1, bool rapid = false);
+    void QueueCircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool &tool, bool isCCW, int id = -1);
+    void ApplyQueuedTools(bool parallel = true);
+    void ApplyTile(int tile);
+    void SetLimit(const std::vector<float> & heights, float cutTolerance);
+    inline const std::map<int, int> & GetHits() { return m_hits; }
+    inline void ClearHits() { m_hits.clear(); }
     inline Point3D ToInner(Point3D & p) {
 		return Point3D((p.x - m_px) / m_res, (p.y - m_py) / m_res, p.z);
 	}
+	void GetHeightMap(std::vector<float> & heights);
+	inline int GetSizeX() { return m_x; }
+	inline int GetSizeY() { return m_y; }
+	inline float GetResolution() { return m_res; }
+	inline Point3D GetPosition() { return Point3D(m_px, m_py, m_pz); }
 
 private:
+	// lowers pixel x, y to z and returns the SIM_HIT_* flags
+	inline int Cut(int x, int y, float z) {
+		int hits = 0;
+		float & h = m_stock[x][y];
+		if (h > z)
+		{
+			if (h - std::max(z, m_pz) > m_cutTolerance)
+				hits = SIM_HIT_CUT;
+			h = z;
+		}
+		if (m_hasLimit && z < m_limit[y * m_x + x])
+			hits |= SIM_HIT_LIMIT;
+		return hits;
+	}
+	int LinearTool(Point3D & p1, Point3D & p2, cSimTool &tool, int cx0, int cy0, int cx1, int cy1);
+	int CircularTool(Point3D & p1, Point3D & p2, Point3D & cent, cSimTool &tool, bool isCCW, int cx0, int cy0, int cx1, int cy1);
+	void MoveBounds(cSimMove & move);
+	void SetDirty(int x0, int y0, int x1, int y1);
+	void TessellateTile(int tx, int ty);
 	float FindRectTop(int & xp, int & yp, int & x_size, int & y_size, bool scanHoriz);
 	void FindRectBot(int & xp, int & yp, int & x_size, int & y_size, bool scanHoriz);
 	void SetFacetPoints(MeshCore::MeshGeomFacet & facet, Point3D & p1, Point3D & p2, Point3D & p3);
 	void AddQuad(Point3D & p1, Point3D & p2, Point3D & p3, Point3D & p4, std::vector<MeshCore::MeshGeomFacet> & facets);
 	int TesselTop(int x, int y);
 	int TesselBot(int x, int y);
-	int TesselSidesX(int yp);
-	int TesselSidesY(int xp);
+	int TesselSidesX(int yp, int x0, int x1);
+	int TesselSidesY(int xp, int y0, int y1);
 	Array2D<float>  m_stock;
 	Array2D<char> m_attr;
 	float m_px, m_py, m_pz;  // stock zero position
@@ -161,6 +222,15 @@ private:
 	float m_res;        // resoulution
 	float m_plane;		// stock plane height
 	int m_x, m_y;            // stock array size
+	int m_tileSize;          // edge length of the tiles in pixels
+	int m_tx, m_ty;          // number of tiles
+	int m_bx0, m_by0, m_bx1, m_by1;  // bounds of the tile being tessellated
+	std::vector<cStockTile> m_tiles;
+	std::vector<cSimMove> m_moves;
+	std::vector<float> m_limit;	// lowest height a move may reach, row by row like GetHeightMap
+	bool m_hasLimit;
+	float m_cutTolerance;	// material removed by rapid moves which is ignored
+	std::map<int, int> m_hits;	// SIM_HIT_* flags of the checked moves since ClearHits
 	std::vector<MeshCore::MeshGeomFacet> facetsOuter;
 	std::vector<MeshCore::MeshGeomFacet> facetsInner;
 };
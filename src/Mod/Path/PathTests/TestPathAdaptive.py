@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Part
+import Path
+import PathScripts.PathAdaptive as PathAdaptive
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathAdaptive(PathTestBase):
+
+    def area(self):
+        # 60x40 pocket with a round island of radius 5 in the middle
+        face = Part.makePlane(60, 40)
+        island = Part.Face(Part.Wire(Part.makeCircle(5, FreeCAD.Vector(30, 20, 0))))
+        area = Path.Area()
+        area.add(face.cut(island))
+        return area
+
+    def test00(self):
+        """Verify the adaptive tool path starts with a helix and stays clear of the walls."""
+        passes = self.area().makeAdaptive(tool_radius=3, engagement=60, tolerance=0.1)
+        self.assertTrue(len(passes) > 1)
+        self.assertEqual(passes[0][0], PathAdaptive.PassHelix)
+        self.assertTrue(any(kind == PathAdaptive.PassCutting for (kind, points) in passes))
+
+        for (kind, points) in passes:
+            self.assertTrue(kind in [PathAdaptive.PassCutting, PathAdaptive.PassHelix, PathAdaptive.PassLinkClear, PathAdaptive.PassLinkNotClear])
+            if kind == PathAdaptive.PassLinkNotClear:
+                continue
+            for p in points:
+                self.assertTrue(3 - 0.2 <= p.x <= 57 + 0.2)
+                self.assertTrue(3 - 0.2 <= p.y <= 37 + 0.2)
+                self.assertTrue((p - FreeCAD.Vector(30, 20, 0)).Length >= 8 - 0.2)
+                self.assertRoughly(p.z, 0)
+
+    def test01(self):
+        """Verify progress is reported and the computation can be aborted."""
+        done = []
+        def progress(value):
+            done.append(value)
+            return True
+        self.area().makeAdaptive(tool_radius=3, progress=progress)
+        self.assertTrue(len(done) > 0)
+        self.assertTrue(all(0 <= value <= 1 for value in done))
+
+        self.assertRaises(Exception, self.area().makeAdaptive, tool_radius=3, progress=lambda value: False)
+
+    def test02(self):
+        """Verify nothing is cut if the tool doesn't fit."""
+        self.assertEqual(self.area().makeAdaptive(tool_radius=25), [])
+        self.assertRaises(Exception, self.area().makeAdaptive, tool_radius=3, engagement=0)
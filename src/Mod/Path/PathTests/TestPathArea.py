@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Part
+import Path
+import numpy
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathArea(PathTestBase):
+
+    def points(self, count):
+        return numpy.random.RandomState(7).uniform(0, 100, (count, 2))
+
+    def edges(self, heights=[0]):
+        return [Part.makeLine(FreeCAD.Vector(x, y, z), FreeCAD.Vector(x + 1, y, z)) for z in heights for (x, y) in self.points(200)]
+
+    def circles(self, heights):
+        return [Part.Wire(Part.makeCircle(0.5, FreeCAD.Vector(x, y, z))) for z in heights for (x, y) in self.points(50)]
+
+    def rapid(self, wires, start):
+        p = start
+        d = 0
+        for w in wires:
+            d += (w.Vertexes[0].Point - p).Length
+            p = w.Vertexes[-1].Point
+        return d
+
+    def ends(self, wires):
+        return [(w.Vertexes[0].Point, w.Vertexes[-1].Point) for w in wires]
+
+    def solid(self):
+        # a step on top of a block with a hole through both
+        block = Part.makeBox(20, 20, 10).fuse(Part.makeBox(10, 10, 10, FreeCAD.Vector(5, 5, 10)))
+        return block.cut(Part.makeCylinder(2, 20, FreeCAD.Vector(10, 10, 0)))
+
+    def sections(self, threads):
+        area = Path.Area()
+        area.add(self.solid())
+        area.setParams(SectionCount=-1, Stepdown=2, SectionMode='BoundBox', SectionThreads=threads, Offset=-1)
+        return area.makeSections()
+
+    def test00(self):
+        """Verify sections sliced in parallel are the same as sliced one after the other."""
+        serial = self.sections(1)
+        parallel = self.sections(4)
+        self.assertEqual(len(serial), 11)
+        self.assertEqual(len(parallel), len(serial))
+        for (s, p) in zip(serial, parallel):
+            (s, p) = (s.getShape(), p.getShape())
+            self.assertEqual(len(p.Wires), len(s.Wires))
+            self.assertRoughly(p.Length, s.Length)
+            self.assertRoughly(p.BoundBox.ZMin, s.BoundBox.ZMin)
+            self.assertRoughly(p.BoundBox.XLength, s.BoundBox.XLength)
+
+        # the sections go from the top of the step down to the bottom of the block
+        self.assertRoughly(serial[0].getShape().BoundBox.XLength, 8)
+        self.assertRoughly(serial[-1].getShape().BoundBox.XLength, 18)
+
+    def test01(self):
+        """Verify the rapid move statistics of Path.sortWires."""
+        edges = self.edges()
+        start = FreeCAD.Vector(0, 0, 0)
+
+        (wires, end, stats) = Path.sortWires(edges, start=start, arc_plane=0, statistics=True)
+        self.assertEqual(len(wires), len(edges))
+        self.assertEqual(stats['moves'], 0)
+        self.assertTrue(stats['rapid_after'] < stats['rapid_before'])
+        self.assertRoughly(stats['rapid_after'], self.rapid(wires, start))
+
+        (wires, end, improved) = Path.sortWires(edges, start=start, arc_plane=0, statistics=True, sort_improve=10)
+        self.assertEqual(len(wires), len(edges))
+        self.assertTrue(improved['moves'] > 0)
+        self.assertTrue(improved['rapid_after'] < stats['rapid_after'])
+        self.assertRoughly(improved['rapid_after'], self.rapid(wires, start))
+        self.assertRoughly(improved['rapid_before'], stats['rapid_before'])
+
+    def test02(self):
+        """Verify shapes without a plane are sorted the same with and without their R-tree."""
+        edges = self.edges()
+        start = FreeCAD.Vector(0, 0, 0)
+        # the R-tree is only used with more shapes than nearest_k
+        (indexed, end) = Path.sortWires(edges, start=start, arc_plane=0)
+        (searched, end2) = Path.sortWires(edges, start=start, arc_plane=0, nearest_k=len(edges))
+        self.assertEqual(len(indexed), len(searched))
+        for ((a1, a2), (b1, b2)) in zip(self.ends(indexed), self.ends(searched)):
+            self.assertCoincide(a1, b1)
+            self.assertCoincide(a2, b2)
+        self.assertCoincide(end, end2)
+
+    def test03(self):
+        """Verify the improvement pass on wires of a single plane."""
+        circles = self.circles([0])
+        start = FreeCAD.Vector(0, 0, 0)
+        (wires, end, stats) = Path.sortWires(circles, start=start, arc_plane=0, statistics=True)
+        (improved, end, istats) = Path.sortWires(circles, start=start, arc_plane=0, statistics=True, sort_improve=10)
+        self.assertEqual(len(improved), len(circles))
+        self.assertTrue(istats['moves'] > 0)
+        self.assertTrue(istats['rapid_after'] < stats['rapid_after'])
+        self.assertRoughly(istats['rapid_after'], self.rapid(improved, start))
+        self.assertTrue(all(v.Point.z == 0 for w in improved for v in w.Vertexes))
+
+    def test04(self):
+        """Verify the improvement pass keeps the order of the planes."""
+        circles = self.circles([10, 5, 0])
+        start = FreeCAD.Vector(0, 0, 20)
+        (wires, end) = Path.sortWires(circles, start=start, arc_plane=0)
+        (improved, end, stats) = Path.sortWires(circles, start=start, arc_plane=0, statistics=True, sort_improve=10)
+        self.assertTrue(stats['moves'] > 0)
+        heights = [w.Vertexes[0].Point.z for w in improved]
+        self.assertEqual(heights, [w.Vertexes[0].Point.z for w in wires])
+        self.assertEqual(heights, [10.0] * 50 + [5.0] * 50 + [0.0] * 50)
+
+    def test05(self):
+        """Verify the improvement pass keeps the depth order of loose edges."""
+        edges = self.edges([10, 0])
+        start = FreeCAD.Vector(0, 0, 20)
+        (wires, end) = Path.sortWires(edges, start=start, arc_plane=0)
+        (improved, end, stats) = Path.sortWires(edges, start=start, arc_plane=0, statistics=True, sort_improve=10)
+        self.assertEqual(len(improved), len(edges))
+        self.assertTrue(stats['moves'] > 0)
+        self.assertEqual([w.Vertexes[0].Point.z for w in improved], [w.Vertexes[0].Point.z for w in wires])
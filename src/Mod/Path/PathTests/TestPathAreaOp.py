@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Part
+import PathScripts.PathAreaOp as PathAreaOp
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathAreaOp(PathTestBase):
+
+    def plane(self):
+        return Part.makePlane(10, 10, FreeCAD.Vector(-5, -5, 0))
+
+    def key(self, cache, shape, plane, heights=[5, 0]):
+        return cache.key(shape, plane, "{'Offset': 1}", heights, False)
+
+    def test00(self):
+        """Verify the section cache keys identify shape, workplane and parameters."""
+        cache = PathAreaOp.SectionCache()
+        box = Part.makeBox(10, 10, 10)
+        key = self.key(cache, box, self.plane())
+        self.assertEqual(self.key(cache, Part.makeBox(10, 10, 10), self.plane()), key)
+        self.assertNotEqual(self.key(cache, Part.makeBox(10, 10, 11), self.plane()), key)
+        self.assertNotEqual(self.key(cache, box, self.plane(), [5, 1]), key)
+        self.assertNotEqual(cache.key(box, self.plane(), "{'Offset': 2}", [5, 0], False), key)
+
+        # same centre, different normal
+        plane = self.plane()
+        plane.rotate(FreeCAD.Vector(), FreeCAD.Vector(1, 0, 0), 90)
+        self.assertRoughly((plane.BoundBox.Center - self.plane().BoundBox.Center).Length, 0)
+        self.assertNotEqual(self.key(cache, box, plane), key)
+
+    def test01(self):
+        """Verify the section cache counts hits, misses and evicts the least recently used entry."""
+        cache = PathAreaOp.SectionCache(2)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', [1])
+        cache.put('b', [2])
+        self.assertEqual(cache.get('a'), [1])
+        cache.put('c', [3])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), [3])
+        self.assertEqual(cache.statistics(), {'entries': 2, 'hits': 2, 'misses': 2, 'evictions': 1})
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.statistics(), {'entries': 0, 'hits': 2, 'misses': 3, 'evictions': 1})
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import FreeCAD
+import Path
+
+from PathScripts import PathArray
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathArray(PathTestBase):
+
+    def path(self):
+        return Path.Path([
+            Path.Command('(array test)'),
+            Path.Command('G0', {'Z': 5}),
+            Path.Command('G0', {'X': 1.1234567, 'Y': 2}),
+            Path.Command('G1', {'Z': -1, 'F': 100}),
+            Path.Command('G2', {'X': 3, 'Y': 2, 'I': 1, 'J': 0}),
+            Path.Command('M3', {'S': 1000}),
+            Path.Command('G81', {'X': -0.0000004, 'Z': -2, 'R': 1}),
+            Path.Command('G1', {'Y': 0})])
+
+    def legacy(self, paths):
+        return Path.Path(''.join([p.toGCode() for p in paths]))
+
+    def test00(self):
+        """Verify linear copies are identical to transformed commands read back from G-code."""
+        path = self.path()
+        offsets = [(10.0000004, 0), (0, -7.5), (3.3333333, 1.1111111)]
+        expected = []
+        for x, y in offsets:
+            pl = FreeCAD.Placement()
+            pl.move(FreeCAD.Vector(x, y, 0))
+            expected.append(Path.Path([cm.transform(pl) for cm in path.Commands]))
+        self.assertEqual(PathArray.linearCopies(path, offsets).toGCode(), self.legacy(expected).toGCode())
+        self.assertEqual(PathArray.linearCopies(path, []).Size, 0)
+
+    def test01(self):
+        """Verify polar copies rotate moves, drill positions and arc centres."""
+        path = Path.Path([
+            Path.Command('(array test)'),
+            Path.Command('G0', {'Z': 5}),
+            Path.Command('G0', {'X': 3, 'Y': -2}),
+            Path.Command('G1', {'Z': -1, 'F': 100}),
+            Path.Command('G2', {'X': 1, 'Y': 0, 'I': -2, 'J': 0}),
+            Path.Command('M3', {'S': 1000}),
+            Path.Command('G81', {'Z': -2, 'R': 1}),
+            Path.Command('G1', {'Y': 1})])
+        centre = FreeCAD.Vector(1, -2, 0)
+        rotated90 = '''(array test)
+G0 X-1 Y-3 Z5
+G0 X1 Y0
+G1 F100 X1 Y0 Z-1
+G2 I0 J-2 X-1 Y-2
+M3 S1000
+G81 R1 X-1 Y-2 Z-2
+G1 X-2 Y-2
+'''
+        rotated180 = '''(array test)
+G0 X2 Y-4 Z5
+G0 X-1 Y-2
+G1 F100 X-1 Y-2 Z-1
+G2 I2 J0 X1 Y-4
+M3 S1000
+G81 R1 X1 Y-4 Z-2
+G1 X1 Y-5
+'''
+        self.assertEqual(PathArray.polarCopies(path, [90, 180], centre).toGCode(), Path.Path(rotated90 + rotated180).toGCode())
+        self.assertEqual(PathArray.ObjectArray.rotatePath(None, path, 90, centre).toGCode(), Path.Path(rotated90).toGCode())
+        self.assertEqual(PathArray.polarCopies(path, [], centre).Size, 0)
+
+    def test02(self):
+        """Verify rotation fills in the current position and rotates arc centres."""
+        path = Path.Path([
+            Path.Command('G0', {'X': 1}),
+            Path.Command('G1', {'Y': 1}),
+            Path.Command('G2', {'X': 0, 'Y': 2, 'J': 1})])
+        commands = PathArray.polarCopies(path, [90], FreeCAD.Vector()).Commands
+        self.assertEqual(commands[0].Parameters, {'X': 0, 'Y': 1})
+        self.assertEqual(commands[1].Parameters, {'X': -1, 'Y': 1})
+        self.assertEqual(commands[2].Parameters, {'X': -2, 'Y': 0, 'I': -1, 'J': 0})
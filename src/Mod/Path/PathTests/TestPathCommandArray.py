@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Path
+import math
+
+from PathScripts.PathCommandArray import CommandArray
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathCommandArray(PathTestBase):
+
+    def path(self):
+        return Path.Path([
+            Path.Command('G0', {'X': 1, 'Y': 2, 'Z': 5}),
+            Path.Command('G1', {'Z': -1, 'F': 100}),
+            Path.Command('G2', {'X': 3, 'Y': 2, 'I': 1, 'J': 0}),
+            Path.Command('M6', {'T': 2}),
+            Path.Command('G1', {'X': 0})])
+
+    def test00(self):
+        """Verify toArrays returns modal filled values."""
+        arr = CommandArray.fromPath(self.path())
+        self.assertEqual(len(arr), 5)
+        self.assertEqual([arr.names[op] for op in arr.opcodes], ['G0', 'G1', 'G2', 'M6', 'G1'])
+        self.assertEqual(list(arr.column('X')), [1, 1, 3, 3, 0])
+        self.assertEqual(list(arr.column('Z')), [5, -1, -1, -1, -1])
+        self.assertTrue(math.isnan(arr.column('F')[0]))
+        self.assertEqual(list(arr.column('F')[1:]), [100, 100, 100, 100])
+        self.assertTrue(math.isnan(arr.column('I')[0]))
+        self.assertRoughly(arr.column('I')[2], 1)
+        self.assertTrue(math.isnan(arr.column('I')[3]))
+        self.assertEqual(list(arr.mask[1]), [False, False, True, False, False, False, True])
+
+    def test01(self):
+        """Verify a path survives a round trip through arrays."""
+        path = self.path()
+        arr = CommandArray.fromPath(path)
+        self.assertEqual(arr.toPath(path).toGCode(), path.toGCode())
+        # without template non axis parameters are lost, the tool change has no T
+        commands = arr.toPath().Commands
+        self.assertEqual(commands[3].Name, 'M6')
+        self.assertEqual(commands[3].Parameters, {})
+        self.assertEqual(commands[2].Parameters, {'X': 3, 'Y': 2, 'I': 1, 'J': 0})
+
+    def test02(self):
+        """Verify vectorized queries and modifications."""
+        arr = CommandArray.fromPath(self.path())
+        bb = arr.boundBox()
+        self.assertCoincide(FreeCAD.Vector(bb.XMin, bb.YMin, bb.ZMin), FreeCAD.Vector(0, 2, -1))
+        self.assertCoincide(FreeCAD.Vector(bb.XMax, bb.YMax, bb.ZMax), FreeCAD.Vector(3, 2, 5))
+
+        path = arr.setFeed(50).toPath(self.path())
+        self.assertEqual([c.Parameters.get('F') for c in path.Commands], [None, 50, 50, None, 50])
+        self.assertEqual(path.Commands[3].Parameters, {'T': 2})
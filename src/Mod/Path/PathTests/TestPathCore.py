@@ -24,6 +24,12 @@
 
 import FreeCAD
 import Path
+import numpy
+import os
+import re
+import struct
+import tempfile
+import zipfile
 from PathTests.PathTestUtils import PathTestBase
 
 class TestPathCore(PathTestBase):
@@ -126,6 +132,173 @@ G0 Z0.500000
         p.setFromGCode(lines)
         self.assertEqual (p.toGCode(), output)
 
+    def test11(self):
+        """Test reading a GCode file"""
+
+        lines = '''%
+N10 G90 G21 (setup)
+N20 g0 x1 y2 z5 ; rapid
+T1 M6
+G01 Z-1 F100
+X10
+Y 10
+G2 X0 Y0 I-5 J-5
+#1=3
+G0 Z5
+'''
+        (fd, filename) = tempfile.mkstemp(suffix='.ngc')
+        os.write(fd, lines.encode())
+        os.close(fd)
+        try:
+            (p, numbers) = Path.readGCode(filename, return_lines=True)
+            self.assertEqual([c.Name for c in p.Commands], ['G90', 'G21', '(setup)', 'G0', '(rapid)', 'M6', 'G01', 'G01', 'G01', 'G2', 'G0'])
+            self.assertEqual(str(p.Commands[3]), 'Command G0 [ X:1 Y:2 Z:5 ]')
+            self.assertEqual(str(p.Commands[5]), 'Command M6 [ T:1 ]')
+            self.assertEqual(str(p.Commands[8]), 'Command G01 [ Y:10 ]')
+            self.assertEqual(numpy.frombuffer(numbers, dtype=numpy.int32).tolist(), [2, 2, 2, 3, 3, 4, 5, 6, 7, 8, 10])
+
+            p = Path.readGCode(filename, comments=False)
+            self.assertEqual(p.Size, 8)
+
+            # the preview only keeps the last of the moves within 20mm, with their full position
+            p = Path.readGCode(filename, comments=False, preview=20)
+            self.assertEqual([c.Name for c in p.Commands], ['G90', 'G21', 'G0', 'M6', 'G01', 'G2', 'G0'])
+            self.assertEqual(str(p.Commands[4]), 'Command G01 [ X:10 Y:10 Z:-1 ]')
+        finally:
+            os.remove(filename)
+
+    def test12(self):
+        """Test the modal positions of a Path"""
+
+        p = Path.Path([Path.Command('G0', {'Z': 5}), Path.Command('G0', {'X': 1, 'Y': 2}),
+            Path.Command('M3', {'S': 1000}), Path.Command('G1', {'Z': -1, 'F': 10})])
+        self.assertEqual(p.getPosition(0), FreeCAD.Vector(0, 0, 0))
+        self.assertEqual(p.getPosition(1), FreeCAD.Vector(0, 0, 5))
+        self.assertEqual(p.getPosition(3), FreeCAD.Vector(1, 2, 5))
+        self.assertEqual(p.getPosition(4), FreeCAD.Vector(1, 2, -1))
+        self.assertRaises(IndexError, p.getPosition, 5)
+
+        # the positions follow changes of the path
+        p.insertCommand(Path.Command('G0', {'X': 7}), 2)
+        self.assertEqual(p.getPosition(3), FreeCAD.Vector(7, 2, 5))
+        p.deleteCommand(0)
+        self.assertEqual(p.getPosition(1), FreeCAD.Vector(1, 2, 0))
+
+    def test13(self):
+        """Test the binary format of a Path"""
+
+        p = Path.Path([Path.Command('G0', {'Z': 5}), Path.Command('G1', {'X': 0.1, 'Y': -2.25, 'F': 100}),
+            Path.Command('M3', {'S': 1000}), Path.Command('G2', {'X': 1.3, 'Y': 2, 'I': 0.6, 'J': 1e-7})])
+        for compress in [False, True]:
+            q = Path.Path()
+            q.setFromBinary(p.toBinary(compress=compress))
+            self.assertEqual(q.toGCode(), p.toGCode())
+
+        # single precision keeps about 7 significant digits
+        q = Path.Path()
+        q.setFromBinary(p.toBinary(float32=True))
+        self.assertEqual([c.Name for c in q.Commands], [c.Name for c in p.Commands])
+        for c, d in zip(q.Commands, p.Commands):
+            self.assertEqual(sorted(c.Parameters), sorted(d.Parameters))
+            for k in c.Parameters:
+                self.assertRoughly(c.Parameters[k], d.Parameters[k])
+
+        self.assertRaises(Exception, q.setFromBinary, p.toBinary()[:-3])
+
+        # counts in the header which don't fit the data are rejected before they are used
+        data = p.toBinary(compress=False)
+        q = Path.Path()
+        self.assertRaises(Exception, q.setFromBinary, data[:12] + struct.pack('<I', 0xffffffff) + data[16:])
+        data = p.toBinary(compress=True)
+        self.assertRaises(Exception, q.setFromBinary, data[:16] + struct.pack('<I', 0xffffffff) + data[20:])
+        self.assertEqual(q.Size, 0)
+
+    def test14(self):
+        """Test the summary of a Path restored with a document"""
+
+        p = Path.Path([Path.Command('G0', {'Z': 5}), Path.Command('G1', {'X': 10}), Path.Command('G1', {'Y': 5, 'Z': -1})])
+        doc = FreeCAD.newDocument("TestPathCoreSummary")
+        doc.addObject('Path::Feature', 'Path').Path = p
+        (fd, filename) = tempfile.mkstemp(suffix='.FCStd')
+        os.close(fd)
+        try:
+            doc.saveAs(filename)
+            FreeCAD.closeDocument(doc.Name)
+            doc = FreeCAD.openDocument(filename)
+
+            # the summary is available before the path is parsed
+            self.assertFalse(Path.isLoaded(doc.Path))
+            (count, length, bb) = Path.getSummary(doc.Path)
+            self.assertEqual(count, 3)
+            self.assertRoughly(length, p.Length)
+            self.assertEqual((bb.XMin, bb.YMin, bb.ZMin, bb.XMax, bb.YMax, bb.ZMax), (0, 0, -1, 10, 5, 5))
+            self.assertFalse(Path.isLoaded(doc.Path))
+            self.assertEqual(doc.Path.Path.toGCode(), p.toGCode())
+            self.assertTrue(Path.isLoaded(doc.Path))
+        finally:
+            FreeCAD.closeDocument(doc.Name)
+            os.remove(filename)
+
+    def test15(self):
+        """Test the modal positions after drill cycles"""
+
+        drill = [Path.Command('G0', {'Z': 10}), Path.Command('G0', {'X': 1, 'Y': 1}),
+            Path.Command('G81', {'X': 1, 'Y': 1, 'Z': -5, 'R': 2, 'F': 10}),
+            Path.Command('G83', {'X': 4, 'Y': 1, 'Z': -5, 'Q': 1, 'F': 10}), Path.Command('G80')]
+
+        # G98, the default, returns to the Z before the cycle
+        p = Path.Path(drill)
+        self.assertEqual(p.getPosition(3), FreeCAD.Vector(1, 1, 10))
+        self.assertEqual(p.getPosition(4), FreeCAD.Vector(4, 1, 10))
+        self.assertEqual(p.getPosition(5), FreeCAD.Vector(4, 1, 10))
+        p = Path.Path([Path.Command('G98')] + drill)
+        self.assertEqual(p.getPosition(5), FreeCAD.Vector(4, 1, 10))
+
+        # G99 returns to R, which stays for the following cycles
+        p = Path.Path([Path.Command('G99')] + drill)
+        self.assertEqual(p.getPosition(4), FreeCAD.Vector(1, 1, 2))
+        self.assertEqual(p.getPosition(5), FreeCAD.Vector(4, 1, 2))
+
+        # G98 doesn't stay below R
+        p = Path.Path([Path.Command('G0', {'Z': 1}), Path.Command('G81', {'X': 1, 'Z': -5, 'R': 2})])
+        self.assertEqual(p.getPosition(2), FreeCAD.Vector(1, 0, 2))
+
+    def test16(self):
+        """Test saving a Path restored from a document without summary"""
+
+        p = Path.Path([Path.Command('G0', {'Z': 5}), Path.Command('G1', {'X': 10})])
+        doc = FreeCAD.newDocument("TestPathCoreNoSummary")
+        doc.addObject('Path::Feature', 'Path').Path = p
+        (fd, filename) = tempfile.mkstemp(suffix='.FCStd')
+        os.close(fd)
+        (fd, resaved) = tempfile.mkstemp(suffix='.FCStd')
+        os.close(fd)
+        try:
+            doc.saveAs(filename)
+            FreeCAD.closeDocument(doc.Name)
+
+            # documents saved before the summary was added only have the file
+            with zipfile.ZipFile(filename) as archive:
+                entries = [(info, archive.read(info)) for info in archive.infolist()]
+            with zipfile.ZipFile(filename, 'w') as archive:
+                for (info, data) in entries:
+                    if info.filename == 'Document.xml':
+                        data = re.sub(b'(<Path file="[^"]*")[^/]*/>', b'\\1/>', data)
+                    archive.writestr(info, data)
+
+            doc = FreeCAD.openDocument(filename)
+            self.assertFalse(Path.isLoaded(doc.Path))
+            doc.saveAs(resaved)
+            self.assertFalse(Path.isLoaded(doc.Path))
+            FreeCAD.closeDocument(doc.Name)
+
+            doc = FreeCAD.openDocument(resaved)
+            self.assertEqual(doc.Path.Path.toGCode(), p.toGCode())
+        finally:
+            FreeCAD.closeDocument(doc.Name)
+            os.remove(filename)
+            os.remove(resaved)
+
     def test20(self):
         """Test Path Tool and ToolTable object core functionality"""
 
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import Path
+import PathScripts.PathCycleTime as PathCycleTime
+import numpy
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathCycleTime(PathTestBase):
+
+    def machine(self):
+        return PathCycleTime.Machine((500, 500, 200), 0.01, (100, 50), 0)
+
+    def test00(self):
+        """Verify planning of single moves with and without reaching their speed."""
+        # 100mm at 10mm/s: 0.02s to accelerate, 0.02s to decelerate, each over 0.1mm, and 99.8mm of cruising
+        t = PathCycleTime.plan(numpy.array([100.0]), numpy.array([10.0]), numpy.array([500.0]), numpy.array([0.0, 0.0]))
+        self.assertRoughly(t[0], 0.04 + 99.8 / 10)
+        # 1mm at 100mm/s never gets there, the peak speed is sqrt(500)
+        t = PathCycleTime.plan(numpy.array([1.0]), numpy.array([100.0]), numpy.array([500.0]), numpy.array([0.0, 0.0]))
+        self.assertRoughly(t[0], 2 * numpy.sqrt(500) / 500)
+
+    def test01(self):
+        """Verify collinear moves don't slow down and corners do."""
+        straight = Path.Path([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 0}),
+            Path.Command('G1', {'X': 50, 'F': 10}), Path.Command('G1', {'X': 100, 'F': 10})])
+        t = PathCycleTime.pathTime(straight, machine=self.machine())
+        self.assertRoughly(t.total, 0.04 + 99.8 / 10)
+        self.assertRoughly(t.rapid, 0)
+        self.assertEqual(t.end[0], 100)
+
+        corner = Path.Path([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 0}),
+            Path.Command('G1', {'X': 50, 'F': 10}), Path.Command('G1', {'Y': 50, 'F': 10})])
+        t = PathCycleTime.pathTime(corner, machine=self.machine())
+        self.assertTrue(t.total > 0.04 + 99.8 / 10)
+        self.assertTrue(t.total < 0.08 + 99.6 / 10 + 1e-9)
+
+    def test02(self):
+        """Verify the feed rate defaults to the tool controller's."""
+        path = Path.Path([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 0}), Path.Command('G1', {'X': 100})])
+        t = PathCycleTime.pathTime(path, (10, 5), machine=self.machine())
+        self.assertRoughly(t.times[1], 0.04 + 99.8 / 10)
+        path = Path.Path([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 0}), Path.Command('G1', {'Z': -10})])
+        t = PathCycleTime.pathTime(path, (10, 5), machine=self.machine())
+        self.assertRoughly(t.times[1], 0.05 + 9.875 / 5)
+
+    def test03(self):
+        """Verify drill cycles and dwells."""
+        path = Path.Path([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 5}),
+            Path.Command('G81', {'X': 10, 'Y': 0, 'Z': -5, 'R': 2, 'F': 2}),
+            Path.Command('G4', {'P': 1.5}),
+            Path.Command('G83', {'X': 20, 'Y': 0, 'Z': -6, 'R': 2, 'Q': 2, 'F': 2}),
+            Path.Command('G80')])
+        t = PathCycleTime.pathTime(path, machine=self.machine())
+        # rapid to the hole and down from Z5 to R2 before feeding to Z-5 and retracting
+        self.assertRoughly(t.times[1], 10 / 100.0 + (3 + 7) / 50.0 + 7 / 2.0)
+        self.assertRoughly(t.times[2], 1.5)
+        self.assertRoughly(t.times[3], 10 / 100.0 + (8 + 3 * 8) / 50.0 + 8 / 2.0)
+        self.assertEqual(t.end[2], 2)
+
+        # a cycle starting below R has no approach
+        path = Path.Path([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 10}),
+            Path.Command('G81', {'X': 0, 'Y': 0, 'Z': -5, 'R': 2, 'F': 2}),
+            Path.Command('G0', {'Z': 0}),
+            Path.Command('G81', {'X': 0, 'Y': 0, 'Z': -5, 'R': 2, 'F': 2})])
+        t = PathCycleTime.pathTime(path, machine=self.machine())
+        self.assertRoughly(t.times[1], (8 + 7) / 50.0 + 7 / 2.0)
+        self.assertRoughly(t.times[3], 7 / 50.0 + 7 / 2.0)
+
+    def test04(self):
+        """Verify formatting of times."""
+        self.assertEqual(PathCycleTime.formatTime(0), '0:00:00')
+        self.assertEqual(PathCycleTime.formatTime(3725.4), '1:02:05')
+
+    def test05(self):
+        """Verify arcs are measured in the plane selected by G17, G18 and G19."""
+        # accelerations this high leave just the length of each arc over its feed rate
+        machine = PathCycleTime.Machine((1e9, 1e9, 1e9), 0.01, (100, 50), 0)
+        def arcTime(*commands):
+            path = Path.Path([Path.Command('G0', {'X': 0, 'Y': 0, 'Z': 0})] + list(commands))
+            return PathCycleTime.pathTime(path, machine=machine).times[-1]
+
+        quarter = 5 * numpy.pi / 10
+        self.assertRoughly(arcTime(Path.Command('G2', {'X': 10, 'Y': 10, 'I': 0, 'J': 10, 'F': 10})), 3 * quarter)
+        self.assertRoughly(arcTime(Path.Command('G3', {'X': 10, 'Y': 10, 'I': 0, 'J': 10, 'F': 10})), quarter)
+        # G18 looks at the plane from +Y, with Z to the right and X up
+        self.assertRoughly(arcTime(Path.Command('G18'), Path.Command('G2', {'X': 10, 'Z': 10, 'I': 0, 'K': 10, 'F': 10})), quarter)
+        self.assertRoughly(arcTime(Path.Command('G18'), Path.Command('G3', {'X': 10, 'Z': 10, 'I': 0, 'K': 10, 'F': 10})), 3 * quarter)
+        # G19 looks at the plane from +X, with Y to the right and Z up
+        self.assertRoughly(arcTime(Path.Command('G19'), Path.Command('G2', {'Y': 10, 'Z': 10, 'J': 0, 'K': 10, 'F': 10})), 3 * quarter)
+        self.assertRoughly(arcTime(Path.Command('G19'), Path.Command('G3', {'Y': 10, 'Z': 10, 'J': 0, 'K': 10, 'F': 10})), quarter)
+        # a helix along Y and the return to G17
+        self.assertRoughly(arcTime(Path.Command('G18'), Path.Command('G3', {'X': 10, 'Y': 5, 'Z': 10, 'I': 0, 'K': 10, 'F': 10})),
+                numpy.hypot(15 * numpy.pi, 5) / 10)
+        self.assertRoughly(arcTime(Path.Command('G19'), Path.Command('G17'), Path.Command('G3', {'X': 10, 'Y': 10, 'I': 0, 'J': 10, 'F': 10})), quarter)
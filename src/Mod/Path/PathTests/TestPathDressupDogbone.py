@@ -149,3 +149,26 @@ class TestDressupDogbone(PathTestBase):
         self.assertEquals("(72.50, 72.50)", formatBoneLoc(locs[7]))
 
         FreeCAD.closeDocument("TestDressupDogbone")
+
+    def test03(self):
+        '''Verify the corners are found in between other commands.'''
+        path = Path.Path('G0 X10 Y10 Z10\nG1 Z0\nG1 Y100\nM3 S1000\nG1 X12\nG1 Y10\nG1 X10\nG1 Z10')
+        moves = PathDressupDogbone.Moves(path)
+        self.assertEqual(list(moves.isMove), [True, True, True, False, True, True, True, True])
+        self.assertEqual(list(moves.isPlunge), [True, True, False, False, False, False, False, True])
+        self.assertEqual(list(moves.turns(PathDressupDogbone.Side.Right)[4:7]), [True, True, True])
+        self.assertEqual(list(moves.turns(PathDressupDogbone.Side.Left)[4:7]), [False, False, False])
+        chord = moves.chord(4)
+        self.assertCoincide(chord.Start, Vector(10, 100, 0))
+        self.assertCoincide(chord.End, Vector(12, 100, 0))
+
+        base = TestProfile('Inside', 'CW', path.toGCode())
+        obj = TestFeature()
+        db = PathDressupDogbone.ObjectDressup(obj, base)
+        db.setup(obj, True)
+        db.execute(obj, False)
+        # no bone across the M3 command
+        self.assertEquals(len(db.bones), 3)
+        self.assertEquals("1: (12.00, 100.00)", self.formatBone(db.bones[0]))
+        self.assertEquals("2: (12.00, 10.00)", self.formatBone(db.bones[1]))
+        self.assertEquals("3: (10.00, 10.00)", self.formatBone(db.bones[2]))
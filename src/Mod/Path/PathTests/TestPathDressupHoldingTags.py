@@ -25,6 +25,7 @@
 import FreeCAD
 import Path
 import PathScripts
+import PathScripts.PathDressupHoldingTags as PathDressupHoldingTags
 import math
 import unittest
 
@@ -32,6 +33,32 @@ from FreeCAD import Vector
 from PathScripts.PathDressupHoldingTags import *
 from PathTests.PathTestUtils import PathTestBase
 
+class TestSpeed:
+    def __init__(self, value):
+        self.Value = value
+
+class TestToolController:
+    def __init__(self):
+        self.HorizFeed = TestSpeed(100)
+        self.VertFeed = TestSpeed(50)
+        self.HorizRapid = TestSpeed(1000)
+        self.VertRapid = TestSpeed(500)
+
+class TestProfile:
+    def __init__(self, path):
+        self.Name = 'Profile'
+        self.Path = Path.Path(path)
+        self.ToolController = TestToolController()
+
+class TestFeature:
+    def __init__(self, base):
+        self.Base = base
+        self.SegmentationFactor = 50
+
+class AllTags(TagIndex):
+    def candidates(self, edge):
+        return set(self.boxes.keys())
+
 class TestHoldingTags(PathTestBase):
     """Unit tests for the HoldingTags dressup."""
 
@@ -74,3 +101,34 @@ class TestHoldingTags(PathTestBase):
         print(h)
         self.assertConeAt(tag.solid, Vector(0,0,-h * 0.01), 2.5, 0, h)
 
+    def test10(self):
+        """Verify the tag index does not change the generated path."""
+        gcode = ['G0 X0 Y0 Z10', 'G1 Z0']
+        for (x, y) in [(i, 0) for i in range(1, 101)] + [(100, i) for i in range(1, 101)] + [(100 - i, 100) for i in range(1, 101)] + [(0, 100 - i) for i in range(1, 101)]:
+            gcode.append('G1 X%d Y%d' % (x, y))
+        gcode.append('G0 Z10')
+        obj = TestFeature(TestProfile('\n'.join(gcode)))
+        pathData = PathData(obj)
+
+        tags = []
+        for (i, (x, y, enabled)) in enumerate([(50.5, 0, True), (100, 50, True), (0, 50, False), (50, 100, True)]):
+            tag = Tag(i, x, y, 4, 5, 90, 0, enabled)
+            tag.createSolidsAt(pathData.minZ, 0)
+            tags.append(tag)
+
+        index = TagIndex(tags)
+        self.assertEqual(index.candidates(pathData.edges[52]), set([0]))
+        self.assertEqual(index.candidates(pathData.edges[10]), set())
+
+        dressup = ObjectTagDressup.__new__(ObjectTagDressup)
+        path = dressup.createPath(obj, pathData, tags)
+        self.assertEqual(len(dressup.mappers), 3)
+
+        orig = PathDressupHoldingTags.TagIndex
+        try:
+            PathDressupHoldingTags.TagIndex = AllTags
+            expected = dressup.createPath(obj, pathData, tags)
+        finally:
+            PathDressupHoldingTags.TagIndex = orig
+
+        self.assertEqual(path.toGCode(), expected.toGCode())
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import PathScripts.PathJob as PathJob
+import PathScripts.PathJobRegenerate as PathJobRegenerate
+import PathScripts.PathProfileContour as PathProfileContour
+import os
+import pickle
+import shutil
+import tempfile
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathJobRegenerate(PathTestBase):
+
+    def setUp(self):
+        self.doc = FreeCAD.newDocument("TestPathJobRegenerate")
+        self.box = self.doc.addObject('Part::Box', 'Box')
+        self.doc.recompute()
+        self.job = PathJob.Create('Job', self.box, None)
+        self.ops = [PathProfileContour.Create('Contour'), PathProfileContour.Create('Contour')]
+        self.ops[1].OffsetExtra = 2
+        self.doc.recompute()
+
+    def tearDown(self):
+        FreeCAD.closeDocument("TestPathJobRegenerate")
+
+    def state(self, op):
+        return (op.Path.toGCode(), op.Proxy.cacheHits, op.Proxy.cacheMisses)
+
+    def work(self):
+        for op in self.ops:
+            op.UseCache = False
+        return [op.Proxy.collectAreaTasks(op) for op in self.ops]
+
+    def commands(self, results):
+        return [[(key, commands) for (key, commands, end) in tasks] for (tasks, duration) in results]
+
+    def test00(self):
+        """Verify collecting the area tasks doesn't execute the operation."""
+        op = self.ops[0]
+        state = self.state(op)
+        op.touch()
+        self.assertEqual(op.Proxy.collectAreaTasks(op), [])
+        self.assertEqual(self.state(op), state)
+        self.assertTrue('Touched' in op.State)
+
+        op.UseCache = False
+        op.touch()
+        tasks = op.Proxy.collectAreaTasks(op)
+        self.assertTrue(len(tasks) > 0)
+        self.assertTrue(all(isinstance(task['shape'], str) for task in tasks))
+        self.assertEqual(self.state(op), state)
+        self.assertTrue('Touched' in op.State)
+
+    def test01(self):
+        """Verify the work computed serially, in a worker and in worker processes is the same."""
+        work = self.work()
+        expected = self.commands([PathJobRegenerate.computeAreaTasks(tasks) for tasks in work])
+        self.assertEqual(self.commands(PathJobRegenerate.computeAll(work, 1)), expected)
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            inputFile = os.path.join(tmpdir, 'work')
+            outputFile = os.path.join(tmpdir, 'result')
+            with open(inputFile, 'wb') as fp:
+                pickle.dump((PathJobRegenerate.computeAreaTasks, work), fp, 2)
+            PathJobRegenerate.runWorker(inputFile, outputFile)
+            with open(outputFile, 'rb') as fp:
+                self.assertEqual(self.commands(pickle.load(fp)), expected)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        executable = PathJobRegenerate.workerExecutable()
+        if executable is not None:
+            results = PathJobRegenerate.computeInWorkers(work, 2, executable)
+            self.assertEqual(self.commands(results), expected)
+
+    def test02(self):
+        """Verify regenerate assigns the same paths as recomputing the operations."""
+        for op in self.ops:
+            op.UseCache = False
+        self.doc.recompute()
+        states = [self.state(op) for op in self.ops]
+
+        report = PathJobRegenerate.regenerate(self.job, 1)
+        self.assertEqual([(label, mode) for (label, mode, collect, compute, assign) in report], [(op.Label, 'serial') for op in self.ops])
+        for (op, (gcode, hits, misses)) in zip(self.ops, states):
+            # every operation is computed exactly once
+            self.assertEqual(self.state(op), (gcode, hits, misses + 1))
+
+        if PathJobRegenerate.workerExecutable() is not None:
+            report = PathJobRegenerate.regenerate(self.job, 2)
+            self.assertEqual([mode for (label, mode, collect, compute, assign) in report], ['parallel', 'parallel'])
+            for (op, (gcode, hits, misses)) in zip(self.ops, states):
+                self.assertEqual(self.state(op), (gcode, hits, misses + 2))
+
+        for op in self.ops:
+            op.UseCache = True
+        self.doc.recompute()
+        report = PathJobRegenerate.regenerate(self.job, 1)
+        self.assertEqual([mode for (label, mode, collect, compute, assign) in report], ['cached', 'cached'])
+        self.assertEqual([op.Path.toGCode() for op in self.ops], [gcode for (gcode, hits, misses) in states])
@@ -190,6 +190,56 @@ class TestPathLog(unittest.TestCase):
         self.assertTrue(msg.startswith(self.MODULE))
         self.assertTrue(msg.endswith('test61(this, None, 1, 18.25)'))
 
+    def test70(self):
+        """Verify messages are only formatted if they are logged."""
+        called = []
+        def message():
+            called.append(True)
+            return 'that'
+        self.assertIsNone(PathLog.debug(message))
+        self.assertIsNone(PathLog.debug("%d: %s", 1, 'this'))
+        self.assertEqual(called, [])
+
+        PathLog.setLevel(PathLog.Level.DEBUG, self.MODULE)
+        self.assertTrue(PathLog.debug(message).strip().endswith(': that'))
+        self.assertTrue(PathLog.debug("%d: %s", 1, 'this').strip().endswith(': 1: this'))
+        self.assertTrue(PathLog.debug("100%").strip().endswith(': 100%'))
+        self.assertEqual(called, [True])
+
+    def test71(self):
+        """Verify isEnabledFor honours the module's log level."""
+        self.assertTrue(PathLog.isEnabledFor(PathLog.Level.NOTICE))
+        self.assertFalse(PathLog.isEnabledFor(PathLog.Level.DEBUG))
+        PathLog.setLevel(PathLog.Level.DEBUG, self.MODULE)
+        self.assertTrue(PathLog.isEnabledFor(PathLog.Level.DEBUG))
+        self.assertTrue(PathLog.isEnabledFor(PathLog.Level.DEBUG, self.MODULE))
+        self.assertFalse(PathLog.isEnabledFor(PathLog.Level.DEBUG, 'SomeOtherModule'))
+
+    def test72(self):
+        """Verify profiling counts the log calls per call site."""
+        PathLog.startProfiling()
+        for i in range(3):
+            PathLog.debug("%d", i)
+        PathLog.track()
+        result = PathLog.stopProfiling()
+        self.assertEqual(len(result), 2)
+        (count, module, line, func, level) = result[0]
+        self.assertEqual((count, module, func, level), (3, self.MODULE, 'test72', 'DEBUG'))
+        self.assertEqual(result[1][0], 1)
+        self.assertEqual(result[1][4], 'TRACK')
+        self.assertEqual(PathLog.profile(), [])
+
+    def test73(self):
+        """Verify moduleLevel resolves the module once and follows its log level."""
+        level = PathLog.moduleLevel()
+        self.assertEqual(level.module, self.MODULE)
+        self.assertFalse(level.isEnabledFor(PathLog.Level.DEBUG))
+        PathLog.setLevel(PathLog.Level.DEBUG, self.MODULE)
+        self.assertTrue(level.isEnabledFor(PathLog.Level.DEBUG))
+        PathLog.setLevel(PathLog.Level.RESET)
+        self.assertFalse(level.isEnabledFor(PathLog.Level.DEBUG))
+        self.assertEqual(PathLog.moduleLevel('SomeOtherModule').module, 'SomeOtherModule')
+
     def testzz(self):
         """Restoring environment after tests."""
         PathLog.setLevel(PathLog.Level.RESET)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Mesh
+import Part
+import PathScripts.PathMesh as PathMesh
+import numpy
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathMesh(PathTestBase):
+
+    def test00(self):
+        """Verify the mesh topology is converted into arrays."""
+        mesh = Mesh.createBox(10, 20, 30)
+        (points, facets) = PathMesh.meshArrays(mesh)
+        self.assertEqual(points.shape, (mesh.CountPoints, 3))
+        self.assertEqual(facets.shape, (mesh.CountFacets, 3))
+        for (f, facet) in zip(facets, mesh.Facets):
+            for (i, pt) in zip(f, facet.Points):
+                self.assertEqual(tuple(points[i]), tuple(pt))
+
+        surface = PathMesh.MeshSurface(points, facets)
+        self.assertRoughly(surface.boundBox.XLength, 10)
+        self.assertRoughly(surface.boundBox.YLength, 20)
+        self.assertRoughly(surface.boundBox.ZLength, 30)
+
+    def test01(self):
+        """Verify degenerated facets are dropped."""
+        points = numpy.array([(0, 0, 0), (1, 0, 0), (0, 1, 0), (2, 0, 0)], dtype=numpy.float64)
+        facets = numpy.array([(0, 1, 2), (0, 1, 3), (1, 1, 2)], dtype=numpy.int32)
+        tri = PathMesh.triangles(points, facets)
+        self.assertEqual(tri.shape, (1, 3, 3))
+        self.assertEqual(tri[0].tolist(), [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+
+    def test02(self):
+        """Verify surfaces are cached by their mesh."""
+        cache = PathMesh.SurfaceCache(1)
+        (points, facets) = PathMesh.meshArrays(Mesh.createBox(1, 1, 1))
+        key = PathMesh._meshKey(points, facets)
+        self.assertEqual(key, PathMesh._meshKey(points.copy(), facets.copy()))
+        self.assertTrue(cache.get(key) is None)
+        surface = PathMesh.MeshSurface(points, facets)
+        cache.put(key, surface)
+        self.assertTrue(cache.get(key) is surface)
+        cache.put(PathMesh._meshKey(points * 2, facets), PathMesh.MeshSurface(points * 2, facets))
+        self.assertTrue(cache.get(key) is None)
+        self.assertEqual(cache.statistics(), {'entries': 1, 'hits': 1, 'misses': 2, 'evictions': 1})
+
+    def test03(self):
+        """Verify the heightmap holds the highest facet above each pixel centre."""
+        points = numpy.array([(0, 0, 1), (10, 0, 1), (0, 10, 1), (0, 0, 2), (4, 0, 6), (0, 4, 2)], dtype=numpy.float64)
+        facets = numpy.array([(0, 1, 2), (3, 4, 5)], dtype=numpy.int32)
+        heights = PathMesh.heightMap(points, facets, 0, 0, 12, 11, 1.0)
+        self.assertEqual(heights.shape, (11, 12))
+        self.assertRoughly(heights[0, 0], 2.5)
+        self.assertRoughly(heights[0, 2], 4.5)
+        self.assertRoughly(heights[0, 4], 1)
+        self.assertRoughly(heights[4, 4], 1)
+        self.assertEqual(heights[5, 5], -numpy.inf)
+        self.assertEqual(heights[10, 11], -numpy.inf)
+
+        # large facets are split and give the same result
+        self.assertTrue((heights == PathMesh.heightMap(points, facets, 0, 0, 12, 11, 1.0, span=1)).all())
+
+    def test04(self):
+        """Verify shapes are cached by their geometry and the deflection."""
+        box = Part.makeBox(10, 10, 10)
+        key = PathMesh._shapeKey(box, 0.1)
+        self.assertEqual(PathMesh._shapeKey(Part.makeBox(10, 10, 10), 0.1), key)
+        self.assertNotEqual(PathMesh._shapeKey(box, 0.2), key)
+        # same bounding box, different shape
+        hole = box.cut(Part.makeCylinder(2, 10, FreeCAD.Vector(5, 5, 0)))
+        self.assertNotEqual(PathMesh._shapeKey(hole, 0.1), key)
+
+    def test05(self):
+        """Verify the STL of the facets holds all triangles exactly."""
+        (points, facets) = PathMesh.meshArrays(Mesh.createSphere(3.7, 12))
+        tri = PathMesh.triangles(points, facets)
+        lines = PathMesh.stlText(points, facets).splitlines()
+        vertices = [[float(v) for v in line.split()[1:]] for line in lines if line.startswith('vertex')]
+        self.assertEqual(lines.count('endfacet'), len(tri))
+        self.assertTrue((numpy.array(vertices).reshape(-1, 3, 3) == tri).all())
+        self.assertEqual(PathMesh.stlText(points, facets[:0]).splitlines(), ['solid', 'endsolid'])
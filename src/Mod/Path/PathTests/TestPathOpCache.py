@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Part
+import PathScripts.PathJob as PathJob
+import PathScripts.PathOp as PathOp
+import PathScripts.PathProfileContour as PathProfileContour
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathOpCache(PathTestBase):
+
+    def setUp(self):
+        self.doc = FreeCAD.newDocument("TestPathOpCache")
+        self.box = self.doc.addObject('Part::Box', 'Box')
+        self.doc.recompute()
+        self.job = PathJob.Create('Job', self.box, None)
+        self.op = PathProfileContour.Create('Contour')
+        self.doc.recompute()
+
+    def tearDown(self):
+        FreeCAD.closeDocument("TestPathOpCache")
+
+    def regenerate(self):
+        self.op.touch()
+        self.doc.recompute()
+        return (self.op.Proxy.cacheHits, self.op.Proxy.cacheMisses)
+
+    def test00(self):
+        """Verify the fingerprint of a shape depends on its geometry only."""
+        box = Part.makeBox(10, 10, 10)
+        hole = box.cut(Part.makeCylinder(2, 10, FreeCAD.Vector(5, 5, 0)))
+        self.assertEqual(PathOp._fingerprintShape(box), PathOp._fingerprintShape(Part.makeBox(10, 10, 10)))
+        # same bounding box, different shape
+        self.assertNotEqual(PathOp._fingerprintShape(box), PathOp._fingerprintShape(hole))
+        moved = box.copy()
+        moved.translate(FreeCAD.Vector(1, 0, 0))
+        self.assertNotEqual(PathOp._fingerprintShape(box), PathOp._fingerprintShape(moved))
+
+    def test01(self):
+        """Verify the path is reused as long as the inputs don't change."""
+        (hits, misses) = (self.op.Proxy.cacheHits, self.op.Proxy.cacheMisses)
+        gcode = self.op.Path.toGCode()
+        self.assertEqual(self.regenerate(), (hits + 1, misses))
+        self.assertEqual(self.op.Path.toGCode(), gcode)
+
+        self.op.UseCache = False
+        self.assertEqual(self.regenerate(), (hits + 1, misses + 1))
+        self.assertEqual(self.op.Path.toGCode(), gcode)
+
+    def test02(self):
+        """Verify changes of the model, the operation and the job invalidate the path."""
+        gcode = self.op.Path.toGCode()
+        (hits, misses) = self.regenerate()
+
+        self.box.Length = 20
+        self.doc.recompute()
+        self.regenerate()
+        self.assertTrue(self.op.Proxy.cacheMisses > misses)
+        self.assertNotEqual(self.op.Path.toGCode(), gcode)
+
+        # the original geometry gives the original path again
+        self.box.Length = 10
+        self.doc.recompute()
+        self.regenerate()
+        self.assertEqual(self.op.Path.toGCode(), gcode)
+
+        fingerprint = self.op.Proxy.fingerprint(self.op)
+        self.op.Side = 'Inside' if self.op.Side == 'Outside' else 'Outside'
+        self.assertNotEqual(self.op.Proxy.fingerprint(self.op), fingerprint)
+        self.op.Side = 'Inside' if self.op.Side == 'Outside' else 'Outside'
+        self.assertEqual(self.op.Proxy.fingerprint(self.op), fingerprint)
+
+        self.job.GeometryTolerance = self.job.GeometryTolerance.Value * 2
+        self.assertNotEqual(self.op.Proxy.fingerprint(self.op), fingerprint)
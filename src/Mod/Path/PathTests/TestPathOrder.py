@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import PathScripts.PathOrder as PathOrder
+import numpy
+
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathOrder(PathTestBase):
+
+    def points(self, count=500):
+        return numpy.random.RandomState(7).uniform(0, 100, (count, 2))
+
+    def test00(self):
+        """Verify the KD-tree finds the nearest remaining points."""
+        points = self.points()
+        tree = PathOrder.KDTree(points)
+        for i in range(0, len(points), 2):
+            tree.remove(i)
+        self.assertEqual(len(tree), len(points) // 2)
+        for (x, y) in numpy.random.RandomState(3).uniform(-10, 110, (50, 2)):
+            d = ((points - (x, y)) ** 2).sum(axis=1)
+            d[::2] = numpy.inf
+            self.assertEqual(tree.nearest(x, y, 3), list(numpy.argsort(d)[:3]))
+
+    def test01(self):
+        """Verify the nearest neighbour tour."""
+        points = numpy.array([(5, 0), (1, 0), (10, 0), (2, 0)])
+        self.assertEqual(PathOrder.nearestNeighbour(points), [1, 3, 0, 2])
+        self.assertEqual(PathOrder.nearestNeighbour(points, (11, 0)), [2, 0, 3, 1])
+        self.assertRoughly(PathOrder.tourLength(points, [1, 3, 0, 2]), 10)
+
+    def test02(self):
+        """Verify the improved tour visits all points and is not longer."""
+        points = self.points()
+        nn = PathOrder.nearestNeighbour(points)
+        order = PathOrder.improve(points, nn, timeLimit=10)
+        self.assertEqual(sorted(order), list(range(len(points))))
+        self.assertTrue(PathOrder.tourLength(points, order) < PathOrder.tourLength(points, nn))
+        self.assertEqual(PathOrder.orderPoints(points, timeLimit=0), nn)
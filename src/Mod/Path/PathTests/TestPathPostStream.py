@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import Path
+import PathScripts.PostStream as PostStream
+import io
+import os
+import tempfile
+
+from PathTests.PathTestUtils import PathTestBase
+
+class PathObject(object):
+    '''Stand in for an operation, all the posts need is a Label and a Path.'''
+
+    def __init__(self, label, commands):
+        self.Name = label
+        self.Label = label
+        self.Path = Path.Path(commands)
+
+def C(name, params={}):
+    return Path.Command(name, params)
+
+# output of the posts before they were converted to PostStream
+GRBL = '''N110 (begin preamble)
+N120 G17 G90
+N130 G21
+N140 (begin operation: Profile)
+N150 (Path: Profile)
+N160  (profile)
+N170  G0 Z5.000
+N180  G0 X1.000 Y2.000
+N190  G1 Z-1.500 F150.00
+N200  G1 X10.123 Y2.000 F300.00
+N210  G2 X12.000 Y4.000 I0.000 J2.000 F300.00
+N220  G1 Y8.000
+N230  G0 Z5.000
+N240 (finish operation: Profile)
+N250 (begin operation: Drilling)
+N260 (Path: Drilling)
+N270 (begin toolchange)
+N280  ; M6 T2
+N290  M3 S1000.000
+N300  G0 X3.000 Y3.000
+N310  G81 X3.000 Y3.000 Z-4.000 F60.00 R2.000
+N320  ; G80
+N330  G0 Z5.000
+N340 (finish operation: Drilling)
+(begin postamble)
+N350 M5
+N360 G17 G90
+N370 ; M2
+'''
+
+DYNAPATH = '''(begin preamble)
+G17
+G90
+;G90.1 ;needed for simulation only
+G80
+G40
+G21
+(begin operation: Profile)
+(Path: Profile)
+(profile)
+G0 Z5.000
+G0 X1.000 Y2.000
+G1 Z-1.500 F2
+G1 X10.123 Y2.000 F5
+G2 X12.000 Y4.000 I0.000 J2.000 F5
+G1 Y8.000
+G0 Z5.000
+(finish operation: Profile)
+(begin operation: Drilling)
+(Path: Drilling)
+(begin toolchange)
+M6 T2
+M3 S1000
+G0 X3.000 Y3.000
+G81 X3.000 Y3.000 Z-4.000 F1 R2.000
+G80
+G0 Z5.000
+(finish operation: Drilling)
+(begin postamble)
+M09
+M05
+G80
+G40
+G17
+G90
+M30
+'''
+
+class TestPathPostStream(PathTestBase):
+
+    def setUp(self):
+        self.ops = [
+                PathObject('Profile', [C('(profile)'), C('G0', {'Z': 5}), C('G0', {'X': 1, 'Y': 2}),
+                    C('G1', {'Z': -1.5, 'F': 2.5}), C('G1', {'X': 10.123456, 'Y': 2, 'F': 5}),
+                    C('G2', {'X': 12, 'Y': 4, 'I': 0, 'J': 2, 'F': 5}), C('G1', {'Y': 8}), C('G0', {'Z': 5})]),
+                PathObject('Drilling', [C('M6', {'T': 2}), C('M3', {'S': 1000}), C('G0', {'X': 3, 'Y': 3}),
+                    C('G81', {'X': 3, 'Y': 3, 'Z': -4, 'R': 2, 'F': 1}), C('G80'), C('G0', {'Z': 5})])]
+        (fd, self.filename) = tempfile.mkstemp(suffix='.ngc')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def readFile(self):
+        with open(self.filename, 'r') as fp:
+            return fp.read()
+
+    def assertPost(self, postprocessor, args, expected):
+        start = postprocessor.LINENR
+        gcode = postprocessor.export(self.ops, self.filename, args)
+        self.assertEqual(gcode, expected)
+        self.assertEqual(self.readFile(), expected)
+
+        # streaming into the file without keeping a copy gives the same file
+        os.remove(self.filename)
+        postprocessor.LINENR = start
+        self.assertIsNone(postprocessor.export(self.ops, self.filename, args, collect=False))
+        self.assertEqual(self.readFile(), expected)
+
+    def test00(self):
+        """Verify the grbl post output didn't change with PostStream."""
+        from PathScripts.post import grbl_post as postprocessor
+        postprocessor.LINENR = 100
+        self.assertPost(postprocessor, '--no-header --comments --line-numbers --precision=3 --no-show-editor', GRBL)
+
+    def test01(self):
+        """Verify the dynapath post output didn't change with PostStream."""
+        from PathScripts.post import dynapath_post as postprocessor
+        # dynapath has no arguments to suppress the editor
+        postprocessor.SHOW_EDITOR = False
+        self.assertPost(postprocessor, '', DYNAPATH)
+
+    def test02(self):
+        """Verify GCodeWriter forwards all lines in batches."""
+        lines = ["G1 X%d\n" % i for i in range(25)]
+        stream = io.BytesIO()
+        writer = PostStream.write(iter(lines), stream, bufferSize=4)
+        self.assertEqual(stream.getvalue().decode(), ''.join(lines))
+        self.assertEqual(writer.lineCount, 25)
+
+        collector = PostStream.GCodeWriter(None, True, 4)
+        collector.writelines(lines)
+        self.assertEqual(collector.getvalue(), ''.join(lines))
+
+    def test03(self):
+        """Verify line numbers continue from one export to the next, as they did before PostStream."""
+        from PathScripts.post import grbl_post as postprocessor
+        args = '--no-header --comments --line-numbers --precision=3 --no-show-editor'
+        postprocessor.LINENR = 100
+        first = postprocessor.export(self.ops, self.filename, args)
+        self.assertEqual(first, GRBL)
+        self.assertEqual(postprocessor.LINENR, 370)
+
+        second = postprocessor.export(self.ops, self.filename, args)
+        self.assertEqual(second.splitlines()[0], 'N380 (begin preamble)')
+        self.assertEqual(second.splitlines()[-1], 'N640 ; M2')
+        self.assertEqual(postprocessor.LINENR, 640)
+
+    def test04(self):
+        """Verify PostProcessor only returns the program of a streaming post if asked to."""
+        from PathScripts.PathPostProcessor import PostProcessor
+        from PathScripts.post import grbl_post
+        args = '--no-header --comments --line-numbers --precision=3 --no-show-editor'
+        processor = PostProcessor(grbl_post)
+        self.assertTrue(processor.streaming)
+
+        grbl_post.LINENR = 100
+        self.assertIsNone(processor.export(self.ops, self.filename, args, False))
+        self.assertEqual(self.readFile(), GRBL)
+
+        grbl_post.LINENR = 100
+        self.assertEqual(processor.export(self.ops, self.filename, args), GRBL)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Part
+import Path
+import PathScripts.PathDressupCompress as PathDressupCompress
+import PathScripts.PathSimplify as PathSimplify
+import math
+import numpy
+
+from PathScripts.PathGeom import PathGeom
+from PathTests.PathTestUtils import PathTestBase
+
+class TestPathSimplify(PathTestBase):
+
+    def points(self):
+        # half circle, counter clockwise from (10, 0) to (-10, 0), followed by a descending line
+        t = numpy.linspace(0, math.pi, 100)
+        arc = numpy.column_stack((10 * numpy.cos(t), 10 * numpy.sin(t), numpy.zeros(100)))
+        line = numpy.column_stack((numpy.linspace(-10.5, -30, 40), numpy.zeros(40), numpy.linspace(0, -5, 40)))
+        return numpy.vstack((arc, line))
+
+    def test00(self):
+        """Verify an arc and a line are fitted as such."""
+        points = self.points()
+        segments = PathSimplify.fit(points, 0.01)
+        self.assertEqual(len(segments), 3)
+        self.assertEqual(segments[0][:2], (0, 99))
+        self.assertRoughly(segments[0][2][0], 0)
+        self.assertRoughly(segments[0][2][1], 0)
+        self.assertFalse(segments[0][2][2])
+        self.assertEqual(segments[1], (99, 100, None))
+        self.assertEqual(segments[2], (100, 139, None))
+        self.assertTrue(PathSimplify.deviation(points, segments) <= 0.01)
+
+    def test01(self):
+        """Verify fitting without arcs and the generated commands."""
+        points = self.points()
+        segments = PathSimplify.fit(points, 0.01, False)
+        self.assertTrue(len(segments) > 3)
+        self.assertTrue(all(arc is None for (i, j, arc) in segments))
+        self.assertTrue(PathSimplify.deviation(points, segments) <= 0.01)
+
+        commands = PathSimplify.commands(points, PathSimplify.fit(points, 0.01), 100)
+        self.assertEqual([cmd.Name for cmd in commands], ['G3', 'G1', 'G1'])
+        self.assertRoughly(commands[0].Parameters['X'], -10)
+        self.assertRoughly(commands[0].Parameters['Y'], 0)
+        self.assertRoughly(commands[0].Parameters['I'], -10)
+        self.assertRoughly(commands[0].Parameters['J'], 0)
+        self.assertRoughly(commands[2].Parameters['Z'], -5)
+        self.assertEqual(commands[2].Parameters['F'], 100)
+
+    def test02(self):
+        """Verify arcs are fitted in the XZ plane."""
+        # quarter circle around the Y axis, clockwise in G18 from (10, 5, 0) to (0, 5, 10)
+        t = numpy.linspace(0, math.pi / 2, 50)
+        points = numpy.column_stack((10 * numpy.cos(t), numpy.full(50, 5.0), 10 * numpy.sin(t)))
+        self.assertTrue(all(arc is None for (i, j, arc) in PathSimplify.fit(points, 0.01)))
+
+        segments = PathSimplify.fit(points, 0.01, planes=('XY', 'XZ', 'YZ'))
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(segments[0][2][3], 'XZ')
+        self.assertTrue(PathSimplify.deviation(points, segments) <= 0.01)
+
+        commands = PathSimplify.commands(points, segments)
+        self.assertEqual([cmd.Name for cmd in commands], ['G18', 'G2', 'G17'])
+        self.assertRoughly(commands[1].Parameters['I'], -10)
+        self.assertRoughly(commands[1].Parameters['K'], 0)
+        self.assertFalse('J' in commands[1].Parameters)
+
+    def test03(self):
+        """Verify runs of straight moves of a Path are compressed and other commands kept."""
+        points = self.points()
+        cmds = [Path.Command('G0', {'X': 10, 'Y': 0, 'Z': 5}), Path.Command('G1', {'Z': 0, 'F': 50})]
+        cmds.extend(Path.Command('G1', {'X': p[0], 'Y': p[1], 'Z': p[2], 'F': 100}) for p in points[1:])
+        cmds.append(Path.Command('G0', {'Z': 5}))
+        (path, ratio, deviation) = PathSimplify.compress(Path.Path(cmds), 0.01)
+
+        self.assertEqual([cmd.Name for cmd in path.Commands], ['G0', 'G1', 'G3', 'G1', 'G1', 'G0'])
+        self.assertRoughly(ratio, len(cmds) / 6.0)
+        self.assertTrue(deviation <= 0.01)
+        self.assertEqual(path.Commands[2].Parameters['F'], 100)
+        self.assertRoughly(path.Commands[4].Parameters['X'], -30)
+        self.assertRoughly(path.Commands[4].Parameters['Z'], -5)
+
+    def test04(self):
+        """Verify the compress dressup only fits XY arcs by default, which PathGeom understands."""
+        # the half circle in XY is followed by a quarter circle in XZ
+        t = numpy.linspace(0, math.pi / 2, 50)[1:]
+        points = numpy.vstack((self.points()[:100], numpy.column_stack((-20 + 10 * numpy.cos(t), numpy.zeros(49), 10 * numpy.sin(t)))))
+        cmds = [Path.Command('G0', {'X': 10, 'Y': 0, 'Z': 5}), Path.Command('G1', {'Z': 0, 'F': 50})]
+        cmds.extend(Path.Command('G1', {'X': p[0], 'Y': p[1], 'Z': p[2], 'F': 100}) for p in points[1:])
+
+        doc = FreeCAD.newDocument("TestPathSimplify")
+        try:
+            base = doc.addObject("Path::Feature", "Base")
+            base.Path = Path.Path(cmds)
+            obj = doc.addObject("Path::FeaturePython", "DressupCompress")
+            PathDressupCompress.ObjectDressup(obj)
+            obj.Proxy.setup(obj)
+            obj.Base = base
+            doc.recompute()
+            self.assertEqual(obj.ArcPlanes, 'XY')
+            self.assertTrue(obj.CompressionRatio > 1)
+            names = [cmd.Name for cmd in obj.Path.Commands]
+            self.assertTrue('G3' in names)
+            self.assertFalse('G18' in names or 'G19' in names)
+
+            # the edges of the compressed path are within the tolerance of all original points
+            edges = []
+            pos = FreeCAD.Vector()
+            for cmd in obj.Path.Commands:
+                edge = PathGeom.edgeForCmd(cmd, pos)
+                if edge is not None:
+                    edges.append(edge)
+                pos = PathGeom.commandEndPoint(cmd, pos)
+            self.assertCoincide(pos, FreeCAD.Vector(*points[-1]))
+            compound = Part.Compound(edges)
+            for p in points:
+                self.assertTrue(compound.distToShape(Part.Vertex(FreeCAD.Vector(*p)))[0] <= 0.01 + 1e-6)
+
+            # arcs in the other planes have to be asked for
+            obj.ArcPlanes = 'XY XZ YZ'
+            doc.recompute()
+            self.assertTrue('G18' in [cmd.Name for cmd in obj.Path.Commands])
+        finally:
+            FreeCAD.closeDocument("TestPathSimplify")
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD
+import Part
+import Path
+import PathScripts.PathCustom as PathCustom
+import PathScripts.PathJob as PathJob
+import PathScripts.PathMesh as PathMesh
+import PathScripts.PathSanity as PathSanity
+import PathScripts.PathSimulation as PathSimulation
+import PathSimulator
+import numpy
+
+from PathTests.PathTestUtils import PathTestBase
+
+class HeightMapSim(object):
+    '''Stands in for a PathSimulator.PathSim with a flat stock.'''
+
+    def __init__(self, heights, x0, y0, resolution):
+        self.heights = numpy.asarray(heights, dtype=numpy.float32)
+        self.x0 = x0
+        self.y0 = y0
+        self.resolution = resolution
+
+    def GetHeightMap(self):
+        (ny, nx) = self.heights.shape
+        return (self.heights.tobytes(), nx, ny, self.x0, self.y0, self.resolution)
+
+
+class TestPathSimulation(PathTestBase):
+
+    def setUp(self):
+        self.doc = FreeCAD.newDocument("TestPathSimulation")
+        self.box = self.doc.addObject('Part::Box', 'Box')
+        self.doc.recompute()
+        self.job = PathJob.Create('Job', self.box, None)
+        # the stock is 5 larger than the 10x10x10 box on each side and 2 above it
+        for ext in ['ExtXneg', 'ExtXpos', 'ExtYneg', 'ExtYpos']:
+            setattr(self.job.Stock, ext, 5)
+        self.job.Stock.ExtZneg = 0
+        self.job.Stock.ExtZpos = 2
+        self.doc.recompute()
+
+    def tearDown(self):
+        FreeCAD.closeDocument("TestPathSimulation")
+
+    def addOp(self, label, gcode):
+        op = self.doc.addObject("Path::FeaturePython", "Custom")
+        PathCustom.ObjectCustom(op)
+        op.addProperty("App::PropertyBool", "Active", "Path")
+        op.addProperty("App::PropertyLink", "ToolController", "Path")
+        op.Label = label
+        op.Active = True
+        op.ToolController = self.job.ToolControllers.Group[0]
+        op.Gcode = gcode
+        self.job.Proxy.addOperation(op)
+        self.doc.recompute()
+        return op
+
+    def addOps(self):
+        # a 5mm end mill faces the stock in front of the box down to 11
+        self.addOp('Face', ['G0 X-10 Y-6 Z15\n', 'G1 Z11\n', 'G1 X20\n', 'G1 Y-2\n', 'G1 X-10\n'])
+        # the R plane is below the top of the stock but the cycle starts over the faced part
+        self.addOp('Drill', ['G81 X10 Y-5 Z10.5 R11.5\n'])
+        self.addOp('Rapid', ['G0 Z15\n', 'G0 X-10 Y5\n', 'G0 Z11.5\n', 'G0 X20\n'])
+        self.addOp('Gouge', ['G0 Z15\n', 'G0 X5 Y5\n', 'G1 Z9\n'])
+
+    def test00(self):
+        """Verify the stock and the model heightmap use the pixel centres."""
+        sim = PathSimulation.Simulation(HeightMapSim(numpy.full((3, 6), 5), 1, 2, 0.5), [], [])
+        self.assertEqual(sim.heights.shape, (3, 6))
+        (xs, ys) = sim.coordinates()
+        self.assertEqual(xs.tolist(), [1.25, 1.75, 2.25, 2.75, 3.25, 3.75])
+        self.assertEqual(ys.tolist(), [2.25, 2.75, 3.25])
+
+        # a square at z=1 from (2, 2) to (3, 4) covers the centres of columns 2 and 3 of all rows
+        points = numpy.array([(2, 2, 1), (3, 2, 1), (3, 4, 1), (2, 4, 1)], dtype=numpy.float64)
+        facets = numpy.array([(0, 1, 2), (0, 2, 3)], dtype=numpy.int32)
+        model = PathMesh.MeshSurface(points, facets).heightMap(sim.x0, sim.y0, 6, 3, sim.resolution)
+        inside = (xs > 2) & (xs < 3)
+        for row in model:
+            self.assertEqual((row == 1).tolist(), inside.tolist())
+            self.assertTrue(numpy.isneginf(row[~inside]).all())
+
+    def test01(self):
+        """Verify the limit is the lowest height of each pixel and its neighbours."""
+        model = numpy.arange(1, 10, dtype=numpy.float32).reshape(3, 3)
+        limit = PathSimulation.limitHeightMap(model, 0.5)
+        self.assertEqual(limit.tolist(), [[0.5, 0.5, 1.5], [0.5, 0.5, 1.5], [3.5, 3.5, 4.5]])
+
+        # pixels next to the outline of the model are not limited
+        model[0, 0] = -numpy.inf
+        limit = PathSimulation.limitHeightMap(model, 0.5)
+        self.assertEqual(numpy.isneginf(limit).tolist(), [[True, True, False], [True, True, False], [False, False, False]])
+
+    def test02(self):
+        """Verify simulate reports gouges and rapid moves into the stock."""
+        self.addOps()
+        result = PathSimulation.simulate(self.job, resolution=0.25, check=True)
+        self.assertEqual([t[0] for t in result.timing], ['Face', 'Drill', 'Rapid', 'Gouge'])
+        self.assertEqual(result.collisions, [('Rapid', [3], []), ('Gouge', [], [2])])
+        self.assertAlmostEqual(result.gouges().max(), 0.99, places=3)
+
+        # without the offending operations nothing is reported and the model isn't touched
+        self.job.Operations.Group[2].Active = False
+        self.job.Operations.Group[3].Active = False
+        result = PathSimulation.simulate(self.job, resolution=0.25, check=True)
+        self.assertEqual(result.collisions, [])
+        self.assertEqual(result.gouges().max(), 0)
+
+    def test03(self):
+        """Verify Path Sanity fails jobs with collisions."""
+        self.addOps()
+        sanity = PathSanity.CommandPathSanity()
+        self.assertFalse(sanity._CommandPathSanity__checkCollisions(self.job))
+        self.job.Operations.Group[2].Active = False
+        self.job.Operations.Group[3].Active = False
+        self.assertTrue(sanity._CommandPathSanity__checkCollisions(self.job))
+
+    def simulator(self, tileSize):
+        # 301 x 201 pixels
+        sim = PathSimulator.PathSim()
+        sim.BeginSimulation(Part.makeBox(30, 20, 10), 0.1, True, tileSize)
+        sim.SetCurrentTool(Path.Tool('3mm ball', tooltype='BallEndMill', diameter=3))
+        return sim
+
+    def paths(self):
+        C = Path.Command
+        return [Path.Path([C('G0', {'Z': 12}), C('G0', {'X': 2, 'Y': 2}), C('G1', {'Z': 8}), C('G1', {'X': 28, 'Y': 3}),
+                    C('G2', {'X': 28, 'Y': 15, 'I': 0, 'J': 6}), C('G1', {'X': 5, 'Y': 15, 'Z': 7}),
+                    C('G81', {'X': 15, 'Y': 10, 'Z': 5, 'R': 9}), C('G1', {'X': 3, 'Y': 18, 'Z': 9})]),
+                Path.Path([C('G1', {'X': 20, 'Y': 5, 'Z': 6}), C('G1', {'X': 10, 'Y': 12})])]
+
+    def simulate(self, sim, paths, tessellate=False):
+        position = FreeCAD.Placement(FreeCAD.Vector(0, 0, 12), FreeCAD.Rotation())
+        for path in paths:
+            position = sim.ApplyPath(position, path)
+            if tessellate:
+                sim.GetResultMesh()
+        return sim
+
+    def facets(self, mesh):
+        return sorted(tuple(numpy.round(numpy.array(f.Points).flatten(), 4)) for f in mesh.Facets)
+
+    def test04(self):
+        """Verify the stock is cut the same with one tile and many tiles."""
+        single = self.simulate(self.simulator(1000), self.paths()).GetHeightMap()
+        self.assertEqual(single[1:3], (301, 201))
+        heights = numpy.frombuffer(single[0], dtype=numpy.float32)
+        self.assertTrue(heights.min() < 6.5)
+        for tileSize in [128, 16, 7]:
+            tiled = self.simulate(self.simulator(tileSize), self.paths()).GetHeightMap()
+            self.assertEqual(tiled[1:], single[1:])
+            self.assertEqual(tiled[0], single[0])
+
+    def test05(self):
+        """Verify tessellating only the changed tiles gives the mesh of a full tessellation."""
+        for tileSize in [1000, 16]:
+            incremental = self.simulate(self.simulator(tileSize), self.paths(), True).GetResultMesh()
+            full = self.simulate(self.simulator(tileSize), self.paths()).GetResultMesh()
+            for (i, f) in zip(incremental, full):
+                self.assertEqual(i.CountFacets, f.CountFacets)
+                self.assertEqual(self.facets(i), self.facets(f))
@@ -26,8 +26,18 @@ import TestApp
 
 from PathTests.TestPathLog   import TestPathLog
 from PathTests.TestPathCore  import TestPathCore
+from PathTests.TestPathCommandArray import TestPathCommandArray
+from PathTests.TestPathCycleTime import TestPathCycleTime
+from PathTests.TestPathArray import TestPathArray
+from PathTests.TestPathArea import TestPathArea
+from PathTests.TestPathAreaOp import TestPathAreaOp
 #from PathTests.TestPathPost  import PathPostTestCases
+from PathTests.TestPathPostStream import TestPathPostStream
 from PathTests.TestPathGeom  import TestPathGeom
+from PathTests.TestPathJobRegenerate import TestPathJobRegenerate
+from PathTests.TestPathMesh  import TestPathMesh
+from PathTests.TestPathOpCache import TestPathOpCache
+from PathTests.TestPathOrder import TestPathOrder
 from PathTests.TestPathUtil  import TestPathUtil
 from PathTests.TestPathDepthParams        import depthTestCases
 from PathTests.TestPathDressupHoldingTags import TestHoldingTags
@@ -37,4 +47,7 @@ from PathTests.TestPathTool import TestPathTool
 from PathTests.TestPathTooltable import TestPathTooltable
 from PathTests.TestPathToolController import TestPathToolController
 from PathTests.TestPathSetupSheet import TestPathSetupSheet
+from PathTests.TestPathSimplify import TestPathSimplify
+from PathTests.TestPathSimulation import TestPathSimulation
+from PathTests.TestPathAdaptive import TestPathAdaptive
 
@@ -38,6 +38,9 @@ struct CAreaPocketParams
 	}
 };
 
+struct CAreaAdaptiveParams;
+struct CAdaptivePass;
+
 class CArea
 {
 public:
@@ -78,6 +81,7 @@ public:
 	void Reorder();
 	void MakePocketToolpath(std::list<CCurve> &toolpath, const CAreaPocketParams &params)const;
 	void SplitAndMakePocketToolpath(std::list<CCurve> &toolpath, const CAreaPocketParams &params)const;
+	void MakeAdaptiveToolpath(std::list<CAdaptivePass> &toolpath, const CAreaAdaptiveParams &params)const;
 	void MakeOnePocketCurve(std::list<CCurve> &curve_list, const CAreaPocketParams &params)const;
 	static bool HolesLinked();
 	void Split(std::list<CArea> &m_areas)const;
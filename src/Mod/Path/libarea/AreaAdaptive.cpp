@@ -0,0 +1,639 @@
+// AreaAdaptive.cpp
+// This program is released under the BSD license. See the file COPYING for details.
+
+// implements CAdaptiveRegion and CArea::MakeAdaptiveToolpath
+
+// The material is tracked in a grid of cells of the size of the tolerance. The
+// tool moves in small steps, and before each step the direction is chosen
+// which cuts as much as possible without exceeding the engagement angle. The
+// engagement is measured by sampling the front half of the tool's circle. A
+// pass ends when there is no material left to cut in front of the tool, the
+// next one starts from the nearest position visited before from where there
+// is material in reach.
+
+#include "AreaAdaptive.h"
+
+#include <algorithm>
+#include <vector>
+
+// keeps the memory of the grids within bounds for big areas with small tolerance
+const double CAdaptiveRegion::max_cells = 1.0e7;
+const double CAdaptiveRegion::max_total_cells = 4.0e7;
+
+// number of directions tried on each side of the current direction
+static const int steer_count = 18;
+
+static void UnFitArcs(CArea &area)
+{
+	for(std::list<CCurve>::iterator It = area.m_curves.begin(); It != area.m_curves.end(); It++)
+		It->UnFitArcs();
+}
+
+void CAdaptiveRegion::MakeRegions(const CArea &area, const CAreaAdaptiveParams &params, std::list<CAdaptiveRegion> &regions)
+{
+	CArea bound(area);
+	bound.OffsetWithClipper(-params.tool_radius - params.extra_offset, ClipperLib::jtRound, ClipperLib::etClosedPolygon);
+	if(CArea::m_please_abort)return;
+
+	std::list<CArea> areas;
+	bound.Split(areas);
+
+	for(std::list<CArea>::iterator It = areas.begin(); It != areas.end(); It++)
+	{
+		if(CArea::m_please_abort)return;
+
+		regions.push_back(CAdaptiveRegion(params));
+		CAdaptiveRegion &region = regions.back();
+		region.m_bound = *It;
+		UnFitArcs(region.m_bound);
+
+		region.m_material = *It;
+		region.m_material.OffsetWithClipper(params.tool_radius, ClipperLib::jtRound, ClipperLib::etClosedPolygon);
+		UnFitArcs(region.m_material);
+
+		CBox2D box;
+		region.m_material.GetBox(box);
+		region.m_cell = std::min(params.tolerance, params.tool_radius / 4);
+		if(box.m_valid)
+		{
+			double size = (box.Width() + 4 * region.m_cell) * (box.Height() + 4 * region.m_cell);
+			if(size > max_cells * region.m_cell * region.m_cell)
+				region.m_cell = sqrt(size / max_cells);
+			region.m_cells = (ceil(box.Width() / region.m_cell) + 4) * (ceil(box.Height() / region.m_cell) + 4);
+		}
+
+		region.m_inner = *It;
+		region.m_inner.OffsetWithClipper(-region.m_cell, ClipperLib::jtRound, ClipperLib::etClosedPolygon);
+		UnFitArcs(region.m_inner);
+	}
+}
+
+namespace {
+
+// a cell is set if its centre is inside
+class CellGrid
+{
+public:
+	double m_x0, m_y0, m_cell;
+	int m_nx, m_ny;
+	std::vector<unsigned char> m_cells;
+
+	CellGrid(const CBox2D &box, double cell)
+	{
+		m_cell = cell;
+		m_x0 = box.m_minxy.x - 2 * cell;
+		m_y0 = box.m_minxy.y - 2 * cell;
+		m_nx = (int)ceil(box.Width() / cell) + 4;
+		m_ny = (int)ceil(box.Height() / cell) + 4;
+		m_cells.resize((size_t)m_nx * m_ny, 0);
+	}
+
+	bool Get(int i, int j)const
+	{
+		if(i < 0 || j < 0 || i >= m_nx || j >= m_ny)return false;
+		return m_cells[(size_t)j * m_nx + i] != 0;
+	}
+
+	bool Get(const Point &p)const
+	{
+		return Get((int)floor((p.x - m_x0) / m_cell), (int)floor((p.y - m_y0) / m_cell));
+	}
+
+	Point Centre(int i, int j)const
+	{
+		return Point(m_x0 + (i + 0.5) * m_cell, m_y0 + (j + 0.5) * m_cell);
+	}
+
+	// sets the cells inside the area with even-odd rule, returns the number of cells set
+	int Fill(const CArea &area)
+	{
+		int count = 0;
+		std::vector<double> xs;
+		for(int j = 0; j < m_ny; j++)
+		{
+			double y = m_y0 + (j + 0.5) * m_cell;
+			xs.clear();
+			for(std::list<CCurve>::const_iterator It = area.m_curves.begin(); It != area.m_curves.end(); It++)
+			{
+				const CVertex *prev = NULL;
+				for(std::list<CVertex>::const_iterator VIt = It->m_vertices.begin(); VIt != It->m_vertices.end(); VIt++)
+				{
+					const Point &p1 = VIt->m_p;
+					if(prev)
+					{
+						const Point &p0 = prev->m_p;
+						if((p0.y <= y) != (p1.y <= y))
+							xs.push_back(p0.x + (y - p0.y) * (p1.x - p0.x) / (p1.y - p0.y));
+					}
+					prev = &(*VIt);
+				}
+			}
+			std::sort(xs.begin(), xs.end());
+			for(size_t k = 0; k + 1 < xs.size(); k += 2)
+			{
+				int i0 = std::max(0, (int)ceil((xs[k] - m_x0) / m_cell - 0.5));
+				int i1 = std::min(m_nx, (int)ceil((xs[k + 1] - m_x0) / m_cell - 0.5));
+				for(int i = i0; i < i1; i++)
+				{
+					unsigned char &c = m_cells[(size_t)j * m_nx + i];
+					if(!c)count++;
+					c = 1;
+				}
+			}
+		}
+		return count;
+	}
+
+	// clears the cells within radius of c, returns the number of cells cleared
+	int Clear(const Point &c, double radius)
+	{
+		int count = 0;
+		int j0 = std::max(0, (int)ceil((c.y - radius - m_y0) / m_cell - 0.5));
+		int j1 = std::min(m_ny - 1, (int)floor((c.y + radius - m_y0) / m_cell - 0.5));
+		for(int j = j0; j <= j1; j++)
+		{
+			double dy = m_y0 + (j + 0.5) * m_cell - c.y;
+			double dx = radius * radius - dy * dy;
+			if(dx < 0)continue;
+			dx = sqrt(dx);
+			int i0 = std::max(0, (int)ceil((c.x - dx - m_x0) / m_cell - 0.5));
+			int i1 = std::min(m_nx - 1, (int)floor((c.x + dx - m_x0) / m_cell - 0.5));
+			for(int i = i0; i <= i1; i++)
+			{
+				unsigned char &cell = m_cells[(size_t)j * m_nx + i];
+				if(cell)count++;
+				cell = 0;
+			}
+		}
+		return count;
+	}
+};
+
+class AdaptiveSolver
+{
+	const CAdaptiveRegion &m_region;
+	const CAdaptiveProgress &m_progress;
+	std::list<CAdaptivePass> &m_toolpath;
+
+	double m_radius;
+	double m_cell;
+	double m_step;
+	double m_target;
+	double m_min_engagement;
+	double m_side; // sign of the rotation turning towards the material
+
+	CellGrid m_material;
+	CellGrid m_allowed;
+	std::vector<float> m_distance; // of the allowed cells to the bound
+	int m_total;
+	int m_remaining;
+	int m_steps;
+
+	std::vector<Point> m_front; // directions sampling the front half of the tool, relative to (1,0)
+	std::vector<Point> m_circle;
+	std::vector<Point> m_candidates; // visited positions to start new passes from
+
+	Point m_pos;
+	bool m_started;
+	bool m_aborted;
+
+public:
+	AdaptiveSolver(const CAdaptiveRegion &region, const CBox2D &box, const CAdaptiveProgress &progress, std::list<CAdaptivePass> &toolpath)
+		:m_region(region), m_progress(progress), m_toolpath(toolpath),
+		m_material(box, region.m_cell), m_allowed(box, region.m_cell),
+		m_steps(0), m_started(false), m_aborted(false)
+	{
+		const CAreaAdaptiveParams &params = region.m_params;
+		m_radius = params.tool_radius;
+		m_cell = region.m_cell;
+		m_step = std::max(2 * m_cell, m_radius / 8);
+		m_target = params.engagement;
+		m_min_engagement = std::min(m_target, PI) * 0.1;
+		m_side = params.climb ? -1.0 : 1.0;
+
+		int count = std::max(16, std::min(128, (int)ceil(PI * m_radius / m_cell)));
+		for(int k = 0; k < count; k++)
+		{
+			double a = -PI / 2 + (k + 0.5) * PI / count;
+			m_front.push_back(Point(cos(a), sin(a)));
+		}
+		for(int k = 0; k < 2 * count; k++)
+		{
+			double a = k * PI / count;
+			m_circle.push_back(Point(cos(a), sin(a)));
+		}
+
+		m_total = m_remaining = m_material.Fill(region.m_material);
+		m_allowed.Fill(region.m_inner);
+		MakeDistance();
+	}
+
+	bool Run()
+	{
+		if(m_total == 0)return true;
+
+		// In a region narrower than the stepover of a straight cut at the
+		// target engagement the tool can only slot, which the pass along the
+		// bound does in one go.
+		double stepover = m_radius * (1 - cos(std::min(m_target, PI / 2)));
+		double width = 0;
+		for(size_t k = 0; k < m_distance.size(); k++)
+			width = std::max(width, (double)m_distance[k]);
+
+		bool entered = false;
+		while(!m_aborted && width >= stepover)
+		{
+			if(StartPass())continue;
+			if(!Entry())break;
+			entered = true;
+		}
+		if(m_aborted)return false;
+
+		if(m_region.m_params.finish || !entered)
+			Finish();
+		return !m_aborted && Report(1.0);
+	}
+
+private:
+	static Point Rotate(const Point &v, const Point &dir)
+	{
+		return Point(v.x * dir.x - v.y * dir.y, v.x * dir.y + v.y * dir.x);
+	}
+
+	bool Report(double done)
+	{
+		if(CArea::m_please_abort || (m_progress && !m_progress(done)))
+			m_aborted = true;
+		return !m_aborted;
+	}
+
+	// chamfer distance of the allowed cells to the nearest cell outside
+	void MakeDistance()
+	{
+		const float big = 1e30f, diag = sqrt(2.0f);
+		int nx = m_allowed.m_nx, ny = m_allowed.m_ny;
+		m_distance.assign(m_allowed.m_cells.size(), 0.0f);
+		for(size_t k = 0; k < m_distance.size(); k++)
+			if(m_allowed.m_cells[k])m_distance[k] = big;
+
+		for(int j = 1; j < ny; j++)
+		{
+			for(int i = 1; i < nx - 1; i++)
+			{
+				float &d = m_distance[(size_t)j * nx + i];
+				if(d == 0.0)continue;
+				d = std::min(d, m_distance[(size_t)j * nx + i - 1] + 1.0f);
+				d = std::min(d, m_distance[(size_t)(j - 1) * nx + i] + 1.0f);
+				d = std::min(d, m_distance[(size_t)(j - 1) * nx + i - 1] + diag);
+				d = std::min(d, m_distance[(size_t)(j - 1) * nx + i + 1] + diag);
+			}
+		}
+		for(int j = ny - 2; j >= 0; j--)
+		{
+			for(int i = nx - 2; i > 0; i--)
+			{
+				float &d = m_distance[(size_t)j * nx + i];
+				if(d == 0.0)continue;
+				d = std::min(d, m_distance[(size_t)j * nx + i + 1] + 1.0f);
+				d = std::min(d, m_distance[(size_t)(j + 1) * nx + i] + 1.0f);
+				d = std::min(d, m_distance[(size_t)(j + 1) * nx + i + 1] + diag);
+				d = std::min(d, m_distance[(size_t)(j + 1) * nx + i - 1] + diag);
+			}
+		}
+		for(size_t k = 0; k < m_distance.size(); k++)
+			m_distance[k] = std::max(0.0f, (m_distance[k] - 0.5f) * (float)m_cell);
+	}
+
+	// angle of the front half of the tool at p moving in dir that is in material
+	double Engagement(const Point &p, const Point &dir)const
+	{
+		int count = 0;
+		for(size_t k = 0; k < m_front.size(); k++)
+		{
+			if(m_material.Get(p + Rotate(m_front[k], dir) * m_radius))
+				count++;
+		}
+		return PI * count / m_front.size();
+	}
+
+	bool NearMaterial(const Point &p)const
+	{
+		double r = m_radius + m_step;
+		for(size_t k = 0; k < m_circle.size(); k++)
+		{
+			if(m_material.Get(p + m_circle[k] * r))
+				return true;
+		}
+		return false;
+	}
+
+	// engagement after a step from p in direction dir rotated by angle, -1 if the tool may not go there
+	double Try(const Point &p, const Point &dir, double angle, Point &q, Point &d)const
+	{
+		d = dir;
+		d.Rotate(angle);
+		q = p + d * m_step;
+		if(!m_allowed.Get(q))return -1;
+		return Engagement(q, d);
+	}
+
+	// Tries the directions within span of dir from the material side on and
+	// picks the one with the highest engagement not above the target.
+	bool Steer(const Point &p, const Point &dir, double span, Point &q, Point &d)const
+	{
+		int count = (int)ceil(steer_count * span / (PI / 2));
+		double delta = 2 * span / count;
+		double engagement[4 * steer_count + 1];
+		double best_engagement = -1;
+		int best = -1;
+		Point tq, td;
+		for(int k = 0; k <= count; k++)
+		{
+			double e = Try(p, dir, m_side * (span - k * delta), tq, td);
+			engagement[k] = e;
+			if(e > best_engagement && e <= m_target)
+			{
+				best_engagement = e;
+				best = k;
+			}
+		}
+		if(best < 0 || best_engagement < m_min_engagement)return false;
+
+		double angle = m_side * (span - best * delta);
+		Try(p, dir, angle, q, d);
+		if(best > 0 && engagement[best - 1] > m_target)
+		{
+			// bisect towards the material side
+			double over = m_side * (span - (best - 1) * delta);
+			for(int i = 0; i < 5; i++)
+			{
+				double mid = (angle + over) / 2;
+				double e = Try(p, dir, mid, tq, td);
+				if(e >= best_engagement && e <= m_target)
+				{
+					angle = mid;
+					q = tq;
+					d = td;
+				}
+				else
+					over = mid;
+			}
+		}
+		return true;
+	}
+
+	// returns the number of cells cleared
+	int Cut(const Point &q)
+	{
+		int count = m_material.Clear(q, m_radius);
+		if(count == 0)return 0;
+		m_remaining -= count;
+		if(++m_steps % 4 == 0)m_candidates.push_back(q);
+		if(m_steps % 256 == 0)Report(1.0 - (double)m_remaining / m_total);
+		return count;
+	}
+
+	bool IsClear(const Point &p0, const Point &p1)const
+	{
+		// the tool may touch the material
+		double r = m_radius - m_cell;
+		double length = p0.dist(p1);
+		int count = (int)ceil(length / m_cell);
+		for(int i = 0; i <= count; i++)
+		{
+			Point p = count ? p0 + (p1 - p0) * ((double)i / count) : p0;
+			if(!m_allowed.Get(p) || m_material.Get(p))return false;
+			for(size_t k = 0; k < m_circle.size(); k++)
+			{
+				if(m_material.Get(p + m_circle[k] * r) || m_material.Get(p + m_circle[k] * (r / 2)))
+					return false;
+			}
+		}
+		return true;
+	}
+
+	void Link(const Point &p)
+	{
+		if(!m_started || m_pos.dist(p) < Point::tolerance)return;
+		m_toolpath.push_back(CAdaptivePass(IsClear(m_pos, p) ? AdaptiveMotionLinkClear : AdaptiveMotionLinkNotClear));
+		m_toolpath.back().m_points.push_back(m_pos);
+		m_toolpath.back().m_points.push_back(p);
+	}
+
+	void AddPass(AdaptiveMotionType type, const std::vector<Point> &points)
+	{
+		Link(points.front());
+		m_toolpath.push_back(CAdaptivePass(type));
+		if(type == AdaptiveMotionCutting)
+			Simplify(points, m_toolpath.back().m_points);
+		else
+			m_toolpath.back().m_points.assign(points.begin(), points.end());
+		m_pos = points.back();
+		m_started = true;
+	}
+
+	// Douglas-Peucker, keeping the points within a quarter cell
+	void Simplify(const std::vector<Point> &points, std::list<Point> &result)const
+	{
+		std::vector<bool> keep(points.size(), false);
+		keep.front() = keep.back() = true;
+		std::vector<std::pair<size_t, size_t> > stack;
+		stack.push_back(std::make_pair((size_t)0, points.size() - 1));
+		double tolerance = m_cell / 4;
+		while(!stack.empty())
+		{
+			size_t i0 = stack.back().first, i1 = stack.back().second;
+			stack.pop_back();
+			if(i1 <= i0 + 1)continue;
+			Point v(points[i0], points[i1]);
+			double length = v.length();
+			double max_dist = -1;
+			size_t index = i0;
+			for(size_t i = i0 + 1; i < i1; i++)
+			{
+				Point w(points[i0], points[i]);
+				double dist = length > Point::tolerance ? fabs(v ^ w) / length : w.length();
+				if(dist > max_dist)
+				{
+					max_dist = dist;
+					index = i;
+				}
+			}
+			if(max_dist > tolerance)
+			{
+				keep[index] = true;
+				stack.push_back(std::make_pair(i0, index));
+				stack.push_back(std::make_pair(index, i1));
+			}
+		}
+		for(size_t i = 0; i < points.size(); i++)
+			if(keep[i])result.push_back(points[i]);
+	}
+
+	// Starts a pass from the nearest candidate with material in reach, returns false if there is none
+	bool StartPass()
+	{
+		std::vector<std::pair<double, size_t> > order;
+		order.reserve(m_candidates.size());
+		for(size_t i = 0; i < m_candidates.size(); i++)
+			order.push_back(std::make_pair(m_candidates[i].dist(m_pos), i));
+		std::sort(order.begin(), order.end());
+
+		std::vector<bool> exhausted(m_candidates.size(), false);
+		size_t start = m_candidates.size();
+		Point p, q, d;
+		for(size_t i = 0; i < order.size(); i++)
+		{
+			p = m_candidates[order[i].second];
+			if(!NearMaterial(p))
+				exhausted[order[i].second] = true;
+			else if(Steer(p, Point(1, 0), PI, q, d))
+			{
+				start = order[i].second;
+				break;
+			}
+		}
+		bool found = start < m_candidates.size();
+
+		// The samples on the tool's circle may fall into cells just outside of
+		// it, which aren't cleared. Passes which only see those end after half a
+		// turn, and the candidate they started from is dropped.
+		int idle = 0, max_idle = (int)ceil(PI * m_radius / m_step);
+		int cleared = 0;
+		std::vector<Point> points;
+		if(found)
+		{
+			points.push_back(p);
+			for(;;)
+			{
+				points.push_back(q);
+				int count = Cut(q);
+				cleared += count;
+				idle = count ? 0 : idle + 1;
+				if(m_aborted || idle > max_idle)break;
+				p = q;
+				if(!Steer(p, Point(d), PI / 2, q, d))break;
+			}
+			if(!cleared)exhausted[start] = true;
+		}
+
+		// material is only ever removed, so those never become useful again
+		size_t j = 0;
+		for(size_t i = 0; i < exhausted.size(); i++)
+			if(!exhausted[i])m_candidates[j++] = m_candidates[i];
+		m_candidates.erase(m_candidates.begin() + j, m_candidates.begin() + exhausted.size());
+
+		if(!found)return false;
+		if(cleared)AddPass(AdaptiveMotionCutting, points);
+		return true;
+	}
+
+	// Enters the material with a helix where the tool has the most room, returns false if no material is left
+	bool Entry()
+	{
+		int best = -1;
+		for(size_t k = 0; k < m_distance.size(); k++)
+		{
+			if(m_allowed.m_cells[k] && m_material.m_cells[k] && (best < 0 || m_distance[k] > m_distance[best]))
+				best = (int)k;
+		}
+		if(best < 0)return false;
+
+		Point c = m_allowed.Centre(best % m_allowed.m_nx, best / m_allowed.m_nx);
+		double r = std::min(m_region.m_params.helix_radius, (double)m_distance[best]);
+		std::vector<Point> points;
+		if(r < m_cell)
+		{
+			r = 0;
+			points.push_back(c);
+		}
+		else
+		{
+			int count = std::max(8, (int)ceil(2 * PI * r / m_step));
+			for(int k = 0; k <= count; k++)
+			{
+				// climb milling turns counter-clockwise with the material outside
+				double a = -m_side * 2 * PI * k / count;
+				points.push_back(c + Point(cos(a), sin(a)) * r);
+			}
+			m_candidates.insert(m_candidates.end(), points.begin(), points.end() - 1);
+		}
+		m_remaining -= m_material.Clear(c, r + m_radius);
+		m_candidates.push_back(c);
+		AddPass(AdaptiveMotionHelix, points);
+		return Report(1.0 - (double)m_remaining / m_total);
+	}
+
+	// goes along the bound, starting with the nearest curve
+	void Finish()
+	{
+		std::list<const CCurve*> curves;
+		for(std::list<CCurve>::const_iterator It = m_region.m_bound.m_curves.begin(); It != m_region.m_bound.m_curves.end(); It++)
+		{
+			if(It->m_vertices.size() > 1)curves.push_back(&(*It));
+		}
+		while(!curves.empty())
+		{
+			std::list<const CCurve*>::iterator best_curve = curves.end();
+			std::list<CVertex>::const_iterator best_vertex;
+			double best_dist = 0;
+			for(std::list<const CCurve*>::iterator It = curves.begin(); It != curves.end(); It++)
+			{
+				for(std::list<CVertex>::const_iterator VIt = (*It)->m_vertices.begin(); VIt != (*It)->m_vertices.end(); VIt++)
+				{
+					double dist = m_started ? VIt->m_p.dist(m_pos) : 0;
+					if(best_curve == curves.end() || dist < best_dist)
+					{
+						best_curve = It;
+						best_vertex = VIt;
+						best_dist = dist;
+					}
+				}
+			}
+
+			// the curves are closed, so the last vertex repeats the first one
+			const std::list<CVertex> &vertices = (*best_curve)->m_vertices;
+			std::vector<Point> points;
+			for(std::list<CVertex>::const_iterator VIt = best_vertex; VIt != vertices.end(); VIt++)
+				points.push_back(VIt->m_p);
+			if(best_vertex != vertices.begin())
+			{
+				std::list<CVertex>::const_iterator VIt = vertices.begin();
+				for(VIt++; VIt != best_vertex; VIt++)
+					points.push_back(VIt->m_p);
+				points.push_back(best_vertex->m_p);
+			}
+			// outer curves are counter-clockwise and holes clockwise, which is climb milling
+			if(!m_region.m_params.climb)
+				std::reverse(points.begin(), points.end());
+			AddPass(AdaptiveMotionCutting, points);
+			curves.erase(best_curve);
+		}
+	}
+};
+
+}
+
+bool CAdaptiveRegion::MakeToolpath(std::list<CAdaptivePass> &toolpath, const CAdaptiveProgress &progress)const
+{
+	CBox2D box;
+	for(std::list<CCurve>::const_iterator It = m_material.m_curves.begin(); It != m_material.m_curves.end(); It++)
+	{
+		for(std::list<CVertex>::const_iterator VIt = It->m_vertices.begin(); VIt != It->m_vertices.end(); VIt++)
+			box.Insert(VIt->m_p);
+	}
+	if(!box.m_valid)return true;
+
+	AdaptiveSolver solver(*this, box, progress, toolpath);
+	return solver.Run();
+}
+
+void CArea::MakeAdaptiveToolpath(std::list<CAdaptivePass> &toolpath, const CAreaAdaptiveParams &params)const
+{
+	std::list<CAdaptiveRegion> regions;
+	CAdaptiveRegion::MakeRegions(*this, params, regions);
+	for(std::list<CAdaptiveRegion>::iterator It = regions.begin(); It != regions.end(); It++)
+	{
+		if(!It->MakeToolpath(toolpath))return;
+	}
+}
@@ -0,0 +1,77 @@
+// AreaAdaptive.h
+// This program is released under the BSD license. See the file COPYING for details.
+
+// adaptive clearing, the tool is steered through the material so that the
+// angle of its cutting edge in contact with the material stays below a limit
+
+#pragma once
+
+#include <functional>
+#include <list>
+#include "Area.h"
+
+struct CAreaAdaptiveParams
+{
+	double tool_radius;
+	double engagement; // maximum engagement angle in radians
+	double tolerance; // size of the cells tracking the material
+	double helix_radius; // radius of the entry helix, 0 to plunge
+	double extra_offset; // material left on the walls
+	bool climb; // keep the material on the right of the cutting direction
+	bool finish; // add a pass along the walls after clearing
+	CAreaAdaptiveParams(double Tool_radius, double Engagement, double Tolerance, double Helix_radius,
+		double Extra_offset, bool Climb, bool Finish)
+	{
+		tool_radius = Tool_radius;
+		engagement = Engagement;
+		tolerance = Tolerance;
+		helix_radius = Helix_radius;
+		extra_offset = Extra_offset;
+		climb = Climb;
+		finish = Finish;
+	}
+};
+
+enum AdaptiveMotionType
+{
+	AdaptiveMotionCutting,
+	AdaptiveMotionHelix, // one turn of the entry helix, repeated down to the cutting depth
+	AdaptiveMotionLinkClear, // the tool can stay down, there's no material left in the way
+	AdaptiveMotionLinkNotClear, // the tool has to be retracted
+};
+
+struct CAdaptivePass
+{
+	AdaptiveMotionType m_type;
+	std::list<Point> m_points;
+	CAdaptivePass(AdaptiveMotionType type):m_type(type){}
+};
+
+// called with the done fraction of a region, returns false to abort
+typedef std::function<bool(double)> CAdaptiveProgress;
+
+class CAdaptiveRegion
+{
+public:
+	CAreaAdaptiveParams m_params;
+	CArea m_bound; // positions the tool centre may take
+	CArea m_inner; // m_bound shrunk by the tolerance, so positions rounded to the cells stay within m_bound
+	CArea m_material; // material the tool can reach
+	double m_cell; // size of the cells tracking the material
+	double m_cells; // number of cells of each grid, a cell takes 6 bytes
+
+	// most cells of one region, the cells are made bigger to stay below
+	static const double max_cells;
+	// most cells of the regions made at the same time
+	static const double max_total_cells;
+
+	CAdaptiveRegion(const CAreaAdaptiveParams &params):m_params(params), m_cell(params.tolerance), m_cells(0){}
+
+	// Splits the area into the regions the tool can move within. Uses Clipper,
+	// so it must not run at the same time as any other libarea function.
+	static void MakeRegions(const CArea &area, const CAreaAdaptiveParams &params, std::list<CAdaptiveRegion> &regions);
+
+	// Only works on the curves of this region, so different regions can be
+	// processed in parallel. Returns false if aborted.
+	bool MakeToolpath(std::list<CAdaptivePass> &toolpath, const CAdaptiveProgress &progress = CAdaptiveProgress())const;
+};
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Benchmark comparing the legacy G-code round trip of the Path Array feature
+# with building the copies from command arrays.
+#
+# Run with:
+#   FreeCADCmd utils/benchmark-array.py [commands] [copies]
+# defaults are a 50000 command path and a 20x20 grid of copies.
+
+import math
+import sys
+import time
+
+import FreeCAD
+import Path
+
+from PathScripts import PathArray
+from PathScripts.PathGeom import PathGeom
+
+count = 50000
+grid = 20
+numbers = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+if numbers:
+    count = numbers[0]
+if len(numbers) > 1:
+    grid = numbers[1]
+
+def createPath(count):
+    commands = [Path.Command('G0', {'Z': 5}), Path.Command('G0', {'X': 0, 'Y': 0})]
+    for i in range(count):
+        a = i * 0.01
+        if i % 3:
+            commands.append(Path.Command('G1', {'X': 10 * math.cos(a), 'Y': 10 * math.sin(a), 'Z': -(i % 100) * 0.01, 'F': 100}))
+        else:
+            commands.append(Path.Command('G2', {'X': 10 * math.cos(a), 'Y': 10 * math.sin(a), 'I': 0.5, 'J': 0.25}))
+    return Path.Path(commands)
+
+def legacyLinear(path, offsets):
+    output = ""
+    for x, y in offsets:
+        pl = FreeCAD.Placement()
+        pl.move(FreeCAD.Vector(x, y, 0))
+        output += Path.Path([cm.transform(pl) for cm in path.Commands]).toGCode()
+    return Path.Path(output)
+
+def legacyPolar(path, angles, centre):
+    output = ""
+    for angle in angles:
+        ang = angle / 180 * math.pi
+        commands = []
+        currX = 0
+        currY = 0
+        for cmd in path.Commands:
+            if cmd.Name in PathArray.CmdRotate:
+                params = cmd.Parameters
+                currX = params.get('X', currX)
+                currY = params.get('Y', currY)
+                x = currX - centre.x
+                y = currY - centre.y
+                params.update({'X': x * math.cos(ang) - y * math.sin(ang) + centre.x,
+                               'Y': y * math.cos(ang) + x * math.sin(ang) + centre.y})
+                if cmd.Name in PathGeom.CmdMoveArc:
+                    i = params.get('I', 0)
+                    j = params.get('J', 0)
+                    params.update({'I': i * math.cos(ang) - j * math.sin(ang), 'J': j * math.cos(ang) + i * math.sin(ang)})
+                cmd.Parameters = params
+            commands.append(cmd)
+        output += Path.Path(commands).toGCode()
+    return Path.Path(output)
+
+def bench(label, fn):
+    start = time.time()
+    result = fn()
+    duration = time.time() - start
+    print("%-30s %8.2fs  %10.0f commands/s" % (label, duration, result.Size / duration))
+    return result
+
+print("creating path with %d commands ..." % count)
+path = createPath(count)
+offsets = [(25.0 * i, 25.0 * j) for i in range(grid) for j in range(grid) if i or j]
+angles = [360.0 / grid * (i + 1) for i in range(grid)]
+centre = FreeCAD.Vector(50, 50, 0)
+
+print("%dx%d grid" % (grid, grid))
+old = bench('legacy', lambda: legacyLinear(path, offsets))
+new = bench('command arrays', lambda: PathArray.linearCopies(path, offsets))
+print("identical: %s" % (old.toGCode() == new.toGCode()))
+
+print("%d polar copies" % grid)
+old = bench('legacy', lambda: legacyPolar(path, angles, centre))
+new = bench('command arrays', lambda: PathArray.polarCopies(path, angles, centre))
+print("identical: %s" % (old.toGCode() == new.toGCode()))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Benchmark comparing saving and loading a document with large paths in the G-code text
+# and the binary format, see the BinaryPathFormat preference. Paths are only parsed when they
+# are accessed the first time, which is measured separately from loading the document.
+#
+# Run with:
+#   FreeCADCmd utils/benchmark-document.py [commands] [objects]
+# default are 10 objects with 200000 commands each.
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+import FreeCAD
+import Path
+
+args = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+count = args[0] if len(args) > 0 else 200000
+objects = args[1] if len(args) > 1 else 10
+
+def createPath(count, offset):
+    cmds = [Path.Command('G0', {'X': 50, 'Y': 0, 'Z': 5})]
+    for i in range(count):
+        a = i * 0.001 + offset
+        cmds.append(Path.Command('G1', {'X': 50 * math.cos(a), 'Y': 50 * math.sin(a), 'Z': -(i % 100) * 0.01, 'F': 100}))
+    return Path.Path(cmds)
+
+def bench(label, filename, binary, float32=False, compress=True):
+    pref = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Path")
+    pref.SetBool('BinaryPathFormat', binary)
+    pref.SetBool('BinaryPathFloat32', float32)
+    pref.SetBool('BinaryPathCompression', compress)
+
+    start = time.time()
+    doc.saveCopy(filename)
+    saved = time.time() - start
+
+    start = time.time()
+    copy = FreeCAD.openDocument(filename)
+    loaded = time.time() - start
+    summary = sum(Path.getSummary(obj)[0] for obj in copy.Objects)
+
+    start = time.time()
+    commands = sum(obj.Path.Size for obj in copy.Objects)
+    accessed = time.time() - start
+    FreeCAD.closeDocument(copy.Name)
+
+    if summary != commands:
+        print("summary of %d commands doesn't match %d commands" % (summary, commands))
+    print("%-30s save %6.2fs  load %6.2fs  access %6.2fs  %8.1f MB  %9d commands" % (label, saved, loaded, accessed, os.path.getsize(filename) / 1e6, commands))
+    os.remove(filename)
+
+print("creating %d objects with %d commands ..." % (objects, count))
+doc = FreeCAD.newDocument('BenchmarkDocument')
+for i in range(objects):
+    obj = doc.addObject('Path::Feature', 'Path%d' % i)
+    obj.Path = createPath(count, i)
+
+pref = FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/Path")
+restore = (pref.GetBool('BinaryPathFormat', False), pref.GetBool('BinaryPathFloat32', False), pref.GetBool('BinaryPathCompression', True))
+filename = os.path.join(tempfile.gettempdir(), 'benchmark-document.FCStd')
+try:
+    bench('text', filename, False)
+    bench('binary', filename, True, False, False)
+    bench('binary, zlib', filename, True)
+    bench('binary, float32, zlib', filename, True, True)
+finally:
+    pref.SetBool('BinaryPathFormat', restore[0])
+    pref.SetBool('BinaryPathFloat32', restore[1])
+    pref.SetBool('BinaryPathCompression', restore[2])
+    FreeCAD.closeDocument(doc.Name)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Benchmark comparing the import of a G-code file through a Python pre processor
+# and Path.setFromGCode with the streaming Path.readGCode.
+#
+# Run with:
+#   FreeCADCmd utils/benchmark-import.py [lines]
+# default are 2000000 lines.
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+import Path
+
+from PathScripts.post import example_pre
+
+count = 2000000
+for arg in sys.argv[1:]:
+    if arg.isdigit():
+        count = int(arg)
+
+def createFile(filename, count):
+    with open(filename, 'w') as f:
+        f.write('%\n(benchmark)\nG90 G21\nG0 X50 Y0 Z5\n')
+        lines = []
+        for i in range(count):
+            a = i * 0.001
+            lines.append('N%d G1 X%.4f Y%.4f Z%.4f F100\n' % (i, 50 * math.cos(a), 50 * math.sin(a), -(i % 100) * 0.01))
+            if len(lines) == 10000:
+                f.write(''.join(lines))
+                lines = []
+        f.write(''.join(lines))
+        f.write('%\n')
+
+def legacy(filename):
+    with open(filename) as f:
+        gcode = f.read()
+    return Path.Path(gcode)
+
+def preprocessed(filename):
+    with open(filename) as f:
+        gcode = f.read()
+    return Path.Path(example_pre.parse(gcode))
+
+def bench(label, fn):
+    start = time.time()
+    path = fn()
+    duration = time.time() - start
+    print("%-30s %8.2fs  %10.0f lines/s  %9d commands" % (label, duration, count / duration, path.Size))
+    return path
+
+filename = os.path.join(tempfile.gettempdir(), 'benchmark-import.ngc')
+print("creating file with %d lines ..." % count)
+createFile(filename, count)
+
+bench('setFromGCode', lambda: legacy(filename))
+bench('example_pre', lambda: preprocessed(filename))
+bench('readGCode', lambda: Path.readGCode(filename))
+bench('readGCode, preview 0.1mm', lambda: Path.readGCode(filename, comments=False, preview=0.1))
+os.remove(filename)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Benchmark of post processor output collected in memory and streamed into
+# the file through PostStream.
+#
+# Run with:
+#   FreeCADCmd utils/benchmark-post.py [commands] [post] [legacy_post.py]
+# defaults are 5000000 commands and the linuxcnc post processor.
+#
+# To compare against a post from before PostStream pass its file, e.g.
+#   git show e130b2f:src/Mod/Path/PathScripts/post/linuxcnc_post.py > /tmp/legacy_post.py
+
+import imp
+import math
+import os
+import sys
+import tempfile
+import time
+
+import Path
+
+from PathScripts.PathPostProcessor import PostProcessor
+
+count = 5000000
+postname = 'linuxcnc'
+legacyFile = None
+for arg in sys.argv[1:]:
+    if arg.isdigit():
+        count = int(arg)
+    elif arg.endswith('_post.py'):
+        legacyFile = arg
+    elif not arg.endswith('.py'):
+        postname = arg
+
+class PathObject:
+    '''Minimal stand-in for a Path feature.'''
+    def __init__(self, path):
+        self.Name = 'Benchmark'
+        self.Label = 'Benchmark'
+        self.Path = path
+        self.InList = []
+
+def createPath(count):
+    commands = []
+    for i in range(count):
+        a = i * 0.001
+        commands.append(Path.Command('G1', {'X': 50 * math.cos(a), 'Y': 50 * math.sin(a), 'Z': -(i % 100) * 0.01, 'F': 10}))
+    return Path.Path(commands)
+
+def bench(label, fn):
+    start = time.time()
+    result = fn()
+    duration = time.time() - start
+    print("%-30s %8.2fs  %10.0f commands/s" % (label, duration, count / duration))
+    return result
+
+print("creating path with %d commands ..." % count)
+objects = [PathObject(createPath(count))]
+module = PostProcessor.load(postname).script
+args = '--no-header --no-comments --no-show-editor'
+module.processArguments(args)
+
+filename = os.path.join(tempfile.gettempdir(), 'benchmark-post.nc')
+if legacyFile:
+    legacy = imp.load_source('legacy_post', legacyFile)
+    bench('legacy post', lambda: legacy.export(objects, filename, args))
+bench('PostStream, collected', lambda: module.export(objects, filename, args))
+bench('PostStream, streamed', lambda: module.export(objects, filename, args, False))
+os.remove(filename)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Benchmark of slicing the solids of the Path demo parts with Path.Area.makeSections,
+# one section after the other and in parallel with the SectionThreads parameter.
+#
+# Run with:
+#   FreeCADCmd utils/benchmark-sections.py [stepdown] [threads]
+# defaults are a step down of 0.1mm and one thread per processor.
+
+import glob
+import os
+import sys
+import time
+
+import FreeCAD
+import Path
+
+numbers = [float(arg) for arg in sys.argv[1:] if arg.replace('.', '', 1).isdigit()]
+stepdown = numbers[0] if len(numbers) > 0 else 0.1
+threads = int(numbers[1]) if len(numbers) > 1 else 0
+
+def solids(filename):
+    doc = FreeCAD.openDocument(filename)
+    shapes = [(obj.Label, obj.Shape.copy()) for obj in doc.Objects if hasattr(obj, 'Shape') and obj.Shape.Solids]
+    FreeCAD.closeDocument(doc.Name)
+    # only the final parts, not the features they are made of
+    shapes.sort(key=lambda s: -s[1].Volume)
+    return shapes[:1]
+
+def sections(shape, threads):
+    area = Path.Area()
+    area.add(shape)
+    area.setParams(SectionCount=-1, Stepdown=stepdown, SectionMode='BoundBox', SectionThreads=threads)
+    start = time.time()
+    result = area.makeSections()
+    return (result, time.time() - start)
+
+demos = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DemoParts')
+for filename in sorted(glob.glob(os.path.join(demos, '*.fcstd'))):
+    for (label, shape) in solids(filename):
+        (serial, t1) = sections(shape, 1)
+        (parallel, tn) = sections(shape, threads)
+        same = len(serial) == len(parallel) and all(abs(s.getShape().Length - p.getShape().Length) < 1e-6
+                for (s, p) in zip(serial, parallel))
+        print("%-30s %-20s %4d sections  serial %6.2fs  parallel %6.2fs  %4.1fx  %s" % (os.path.basename(filename),
+            label, len(serial), t1, tn, t1 / max(tn, 1e-9), 'same' if same else 'DIFFERENT'))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Benchmark of the volumetric simulator, applying a path serially and with the
+# thread pool at several resolutions and timing the full and incremental tessellation.
+#
+# Run with:
+#   FreeCADCmd utils/benchmark-simulator.py [moves]
+# defaults to 20000 moves.
+
+import random
+import sys
+import time
+
+import FreeCAD
+import Part
+import Path
+import PathSimulator
+
+count = ([int(arg) for arg in sys.argv[1:] if arg.isdigit()] + [20000])[0]
+
+def createPath(count):
+    random.seed(5)
+    commands = []
+    x, y = 50, 40
+    for i in range(count):
+        x = min(95, max(5, x + random.uniform(-3, 3)))
+        y = min(75, max(5, y + random.uniform(-3, 3)))
+        commands.append(Path.Command('G1', {'X': x, 'Y': y, 'Z': random.uniform(5, 20), 'F': 100}))
+    return Path.Path(commands)
+
+def bench(stock, tool, path, resolution, parallel):
+    sim = PathSimulator.PathSim()
+    sim.BeginSimulation(stock, resolution, parallel)
+    sim.SetCurrentTool(tool)
+    start = FreeCAD.Placement(FreeCAD.Vector(0, 0, 20), FreeCAD.Rotation())
+    begin = time.time()
+    pos = sim.ApplyPath(start, path)
+    applied = time.time() - begin
+    begin = time.time()
+    sim.GetResultMesh()
+    tessellate = time.time() - begin
+    sim.ApplyPath(pos, Path.Path([Path.Command('G1', {'X': 50, 'Y': 40, 'Z': 2})]))
+    begin = time.time()
+    sim.GetResultMesh()
+    incremental = time.time() - begin
+    print("%6.2fmm %-8s %8.3fs %10.0f moves/s   tessellate %.3fs, after one move %.3fs" % (resolution,
+        'parallel' if parallel else 'serial', applied, count / applied, tessellate, incremental))
+
+stock = Part.makeBox(100, 80, 20)
+tool = Path.Tool('6mm ball', tooltype='BallEndMill', diameter=6)
+path = createPath(count)
+print("%d moves of a 6mm ball end mill on a 100 x 80 mm stock" % count)
+for resolution in [0.5, 0.2, 0.1]:
+    for parallel in [False, True]:
+        bench(stock, tool, path, resolution, parallel)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Benchmark comparing the single process OCL dropcutter of the 3D Surface operation
+# with the batch dropcutter, serially and with a process pool, and the effect of
+# fitting lines and arcs to the CL points.
+#
+# Run with:
+#   FreeCADCmd utils/benchmark-surface.py [file.FCStd object] [diameter] [sampling]
+# defaults are a set of demo parts, a 5mm cutter and a sampling interval of 0.1mm.
+
+import sys
+import time
+
+import FreeCAD
+import MeshPart
+import Part
+
+from PathScripts import PathMesh
+from PathScripts import PathSimplify
+from PathScripts import PathSurface
+
+diameter = 5.0
+sampling = 0.1
+numbers = [float(arg) for arg in sys.argv[1:] if arg.replace('.', '', 1).isdigit()]
+if numbers:
+    diameter = numbers[0]
+if len(numbers) > 1:
+    sampling = numbers[1]
+
+def demoParts():
+    box = Part.makeBox(100, 80, 10)
+    dome = box.fuse(Part.makeSphere(30, FreeCAD.Vector(50, 40, -10)))
+    torus = box.fuse(Part.makeTorus(25, 8, FreeCAD.Vector(50, 40, 10)))
+    cone = box.fuse(Part.makeCone(30, 5, 20, FreeCAD.Vector(50, 40, 10)))
+    return [('dome', dome), ('torus', torus), ('cone', cone)]
+
+def parts():
+    files = [arg for arg in sys.argv[1:] if arg.lower().endswith('.fcstd')]
+    if files:
+        doc = FreeCAD.openDocument(files[0])
+        names = [arg for arg in sys.argv[1:] if doc.getObject(arg)]
+        return [(name, doc.getObject(name).Shape) for name in names]
+    return demoParts()
+
+def legacy(surface, lines):
+    import ocl
+    pdc = ocl.PathDropCutter()
+    pdc.setSTL(surface)
+    pdc.setCutter(ocl.CylCutter(diameter, 5))
+    pdc.minimumZ = 0.25
+    pdc.setSampling(sampling)
+    path = ocl.Path()
+    for ((x0, y0), (x1, y1)) in lines:
+        path.append(ocl.Line(ocl.Point(x0, y0, 0), ocl.Point(x1, y1, 0)))
+    pdc.setPath(path)
+    pdc.run()
+    return pdc.getCLPoints()
+
+def bench(label, fn):
+    start = time.time()
+    result = fn()
+    print("  %-28s %8.2fs" % (label, time.time() - start))
+    return result
+
+for (name, shape) in parts():
+    mesh = PathMesh.MeshSurface(*PathMesh.meshArrays(MeshPart.meshFromShape(shape, Deflection=0.01)))
+    lines = PathSurface.scanLines(mesh.boundBox, diameter, diameter / 2, 0)
+    print("%s: %d triangles, %d scan lines" % (name, len(mesh.facets), len(lines)))
+
+    surface = bench('STLSurf', mesh.surface)
+    clp = bench('legacy', lambda: legacy(surface, lines))
+    bench('batch, serial', lambda: PathSurface.dropAll(mesh, lines, diameter, sampling, 0.25, 1))
+    clp = bench('batch, parallel', lambda: PathSurface.dropAll(mesh, lines, diameter, sampling, 0.25, 0))
+
+    points = sum(len(p) for p in clp)
+    for tolerance in [0.001, 0.01, 0.05]:
+        segments = [PathSimplify.fit(p, tolerance) for p in clp if len(p)]
+        count = sum(len(s) for s in segments)
+        arcs = sum(1 for s in segments for (i, j, arc) in s if arc is not None)
+        print("  tolerance %.3f: %d points -> %d commands (%d arcs), %.1fx" % (tolerance, points, count, arcs, points / float(max(count, 1))))
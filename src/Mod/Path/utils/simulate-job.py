@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+# ***************************************************************************
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Simulates all operations of a job without GUI and saves the resulting stock heightmap,
+# which allows comparing toolpaths of different versions.
+#
+# Run with:
+#   FreeCADCmd utils/simulate-job.py file.FCStd [job] [heightmap.npy] [resolution]
+# defaults are the first job in the document, <file>.npy and the task panel's accuracy.
+# If the .npy file already exists the new heightmap is compared against it instead.
+
+import os
+import sys
+import time
+
+import FreeCAD
+import numpy
+
+from PathScripts import PathSimulation
+
+args = [arg for arg in sys.argv[1:] if not arg.endswith('.py')]
+filename = [arg for arg in args if arg.lower().endswith('.fcstd')][0]
+output = ([arg for arg in args if arg.endswith('.npy')] + [os.path.splitext(filename)[0] + '.npy'])[0]
+resolution = ([float(arg) for arg in args if arg.replace('.', '', 1).isdigit()] + [None])[0]
+
+doc = FreeCAD.openDocument(filename)
+jobs = [obj for obj in doc.Objects if hasattr(obj, 'Operations') and hasattr(obj, 'Stock')]
+names = [arg for arg in args if doc.getObject(arg)]
+job = doc.getObject(names[0]) if names else jobs[0]
+
+start = time.time()
+result = PathSimulation.simulate(job, resolution=resolution)
+for (label, seconds, commands) in result.timing:
+    print("%-30s %8d commands %8.3fs" % (label, commands, seconds))
+print("%-30s %8.3fs, %dx%d pixels of %.3fmm" % ('total', time.time() - start, result.heights.shape[1], result.heights.shape[0], result.resolution))
+
+if os.path.exists(output):
+    expected = numpy.load(output)
+    if expected.shape != result.heights.shape:
+        print("heightmap size changed: %s -> %s" % (expected.shape, result.heights.shape))
+        sys.exit(1)
+    diff = numpy.abs(expected - result.heights)
+    print("max difference %.4f, %d pixels differ by more than %.4f" % (diff.max(), (diff > result.resolution).sum(), result.resolution))
+    sys.exit(1 if (diff > result.resolution).any() else 0)
+numpy.save(output, result.heights)
+print("heightmap saved to %s" % output)